@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Archive cataloger for downloaded ZIP/7z/RAR files.
+
+Reads only each archive's directory (the ZIP central directory, the 7z
+header, the RAR file headers) to list members with their sizes and CRCs,
+stores the listings in the catalog, and extracts single members on demand.
+
+ZIP support is built in. 7z and RAR listings need the optional `py7zr` and
+`rarfile` packages; archives of those types are skipped when they are missing.
+"""
+
+import logging
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+try:
+    import rarfile
+except ImportError:
+    rarfile = None
+
+import config
+from catalog import Catalog, path_key
+
+
+def data_set_from_path(path: Path) -> Optional[int]:
+    """Find the data set number from a data_set_N component of a path."""
+    for part in reversed(path.parts):
+        match = re.fullmatch(r"data_set_(\d+)", part)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def list_members(archive_path: Path) -> List[Dict]:
+    """
+    List the members of an archive without extracting anything.
+
+    Args:
+        archive_path: Path to a .zip, .7z or .rar file
+
+    Returns:
+        List of dicts with 'name', 'size', 'compressed_size', 'crc' and 'is_dir'
+
+    Raises:
+        ValueError: If the archive type is unsupported or its library is missing
+    """
+    suffix = archive_path.suffix.lower()
+
+    if suffix == '.zip':
+        with zipfile.ZipFile(archive_path) as zf:
+            return [
+                {
+                    'name': info.filename,
+                    'size': info.file_size,
+                    'compressed_size': info.compress_size,
+                    'crc': info.CRC,
+                    'is_dir': info.is_dir(),
+                }
+                for info in zf.infolist()
+            ]
+
+    if suffix == '.7z':
+        if py7zr is None:
+            raise ValueError("py7zr is not installed (pip install py7zr)")
+        with py7zr.SevenZipFile(archive_path, mode='r') as zf:
+            return [
+                {
+                    'name': info.filename,
+                    'size': info.uncompressed,
+                    'compressed_size': info.compressed,
+                    'crc': info.crc32,
+                    'is_dir': info.is_directory,
+                }
+                for info in zf.list()
+            ]
+
+    if suffix == '.rar':
+        if rarfile is None:
+            raise ValueError("rarfile is not installed (pip install rarfile)")
+        with rarfile.RarFile(archive_path) as rf:
+            return [
+                {
+                    'name': info.filename,
+                    'size': info.file_size,
+                    'compressed_size': info.compress_size,
+                    'crc': info.CRC,
+                    'is_dir': info.is_dir(),
+                }
+                for info in rf.infolist()
+            ]
+
+    raise ValueError(f"Unsupported archive type: {suffix}")
+
+
+def _safe_member_path(member: str) -> PurePosixPath:
+    """Normalize a member name and reject absolute or parent-relative paths."""
+    member_path = PurePosixPath(member.replace('\\', '/'))
+    if member_path.is_absolute() or '..' in member_path.parts or not member_path.parts:
+        raise ValueError(f"Refusing to extract unsafe member path: {member}")
+    return member_path
+
+
+def member_destination(data_set_dir: Path, archive_name: str, member: str) -> Path:
+    """
+    Where an extracted member lives in the category layout.
+
+    Args:
+        data_set_dir: data_set_N directory the archive belongs to
+        archive_name: File name of the archive the member comes from
+        member: Member name inside the archive
+
+    Returns:
+        data_set_dir/<member category>/<archive stem>/<member path>
+    """
+    member_path = _safe_member_path(member)
+    category = config.categorize(member_path.name)
+    return Path(data_set_dir) / category / Path(archive_name).stem / Path(*member_path.parts)
+
+
+class ArchiveCataloger:
+    """Catalog and extract members of archives in the download tree."""
+
+    def __init__(self, output_dir: Optional[Path] = None, workers: int = config.ARCHIVE_WORKERS):
+        """
+        Initialize the cataloger.
+
+        Args:
+            output_dir: Download tree root (default: config.OUTPUT_DIR)
+            workers: Number of archives listed in parallel
+        """
+        self.output_dir = Path(output_dir or config.OUTPUT_DIR)
+        self.workers = max(1, workers)
+        self.catalog = Catalog(self.output_dir)
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def find_archives(self) -> List[Path]:
+        """Find all archives under data_set_*/archives/."""
+        archives = []
+        for data_set_dir in sorted(self.output_dir.glob("data_set_*")):
+            archives_dir = data_set_dir / 'archives'
+            if not archives_dir.is_dir():
+                continue
+            for path in sorted(archives_dir.rglob("*")):
+                if path.is_file() and path.suffix.lower() in config.FILE_CATEGORIES['archives']:
+                    archives.append(path)
+        return archives
+
+    def catalog_archives(self, archives: Optional[List[Path]] = None) -> Dict[str, int]:
+        """
+        List archives in parallel and store their members in the catalog.
+
+        Listing runs on worker threads; catalog writes happen on the calling
+        thread as results arrive.
+
+        Args:
+            archives: Archives to process (default: every archive in the tree)
+
+        Returns:
+            Dict mapping archive key to member count for archives that succeeded
+        """
+        if archives is None:
+            archives = self.find_archives()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(list_members, path): path for path in archives}
+            for future in as_completed(futures):
+                path = futures[future]
+                key = path_key(self.output_dir, path)
+                try:
+                    members = future.result()
+                except (ValueError, OSError, zipfile.BadZipFile) as e:
+                    self.logger.warning(f"Skipping {key}: {e}")
+                    continue
+                except Exception as e:
+                    self.logger.error(f"Failed to list {key}: {e}")
+                    continue
+
+                self.catalog.replace_archive_members(key, data_set_from_path(path), members)
+                results[key] = len(members)
+                self.logger.info(f"Cataloged {key}: {len(members)} members")
+
+        return results
+
+    def extract_member(self, archive_path: Path, member: str) -> Path:
+        """
+        Stream a single member out of an archive into the category layout.
+
+        The member lands in data_set_N/<category>/<archive name>/<member path>,
+        where the category comes from the member's own extension.
+
+        Args:
+            archive_path: Archive to read from
+            member: Member name as listed in the catalog
+
+        Returns:
+            Path of the extracted file
+        """
+        archive_path = Path(archive_path)
+        member_path = _safe_member_path(member)
+
+        data_set = data_set_from_path(archive_path)
+        if data_set is not None:
+            base_dir = self.output_dir / f"data_set_{data_set}"
+        else:
+            base_dir = self.output_dir
+        dest = member_destination(base_dir, archive_path.name, member)
+        dest.parent.mkdir(exist_ok=True, parents=True)
+
+        suffix = archive_path.suffix.lower()
+        try:
+            if suffix == '.zip':
+                with zipfile.ZipFile(archive_path) as zf, zf.open(member) as src, open(dest, 'wb') as out:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+            elif suffix == '.rar':
+                if rarfile is None:
+                    raise ValueError("rarfile is not installed (pip install rarfile)")
+                with rarfile.RarFile(archive_path) as rf, rf.open(member) as src, open(dest, 'wb') as out:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+            elif suffix == '.7z':
+                if py7zr is None:
+                    raise ValueError("py7zr is not installed (pip install py7zr)")
+                # py7zr cannot stream a member; extract it alone into a scratch dir
+                with tempfile.TemporaryDirectory(dir=dest.parent) as tmpdir:
+                    with py7zr.SevenZipFile(archive_path, mode='r') as zf:
+                        zf.extract(path=tmpdir, targets=[member])
+                    shutil.move(str(Path(tmpdir, *member_path.parts)), str(dest))
+            else:
+                raise ValueError(f"Unsupported archive type: {suffix}")
+        except Exception:
+            # Best-effort cleanup - wrap unlink to avoid masking the original error
+            try:
+                if dest.exists():
+                    dest.unlink()
+            except Exception:
+                pass
+            raise
+
+        self.logger.info(f"Extracted {member} -> {dest}")
+        return dest
+
+    def close(self) -> None:
+        """Close the catalog."""
+        self.catalog.close()
+
+
+def main():
+    """Command-line entry point for cataloging, searching and extracting archives."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Catalog the contents of downloaded archives"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="List every archive and store members in the catalog")
+    scan_parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.ARCHIVE_WORKERS,
+        help=f"Archives processed in parallel (default: {config.ARCHIVE_WORKERS})"
+    )
+
+    search_parser = subparsers.add_parser("search", help="Search cataloged members by name")
+    search_parser.add_argument("pattern", help="Substring or SQL LIKE pattern")
+    search_parser.add_argument("--limit", type=int, default=100, help="Maximum results")
+
+    extract_parser = subparsers.add_parser("extract", help="Extract a single member")
+    extract_parser.add_argument("archive", help="Path to the archive")
+    extract_parser.add_argument("member", help="Member name inside the archive")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+
+    cataloger = ArchiveCataloger(output_dir, workers=getattr(args, 'workers', config.ARCHIVE_WORKERS))
+    try:
+        if args.command == "scan":
+            results = cataloger.catalog_archives()
+            print(f"\n✓ Cataloged {len(results)} archives ({sum(results.values())} members)")
+        elif args.command == "search":
+            for row in cataloger.catalog.search_archive_members(args.pattern, limit=args.limit):
+                print(f"{row['archive']}: {row['member']} ({row['size']} bytes)")
+        elif args.command == "extract":
+            dest = cataloger.extract_member(Path(args.archive), args.member)
+            print(f"✓ Extracted to {dest}")
+    except (ValueError, KeyError, OSError, zipfile.BadZipFile) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        cataloger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,520 @@
+"""
+SQLite catalog of everything File Fisher knows about the downloaded tree.
+
+The catalog lives next to metadata.json in the output directory and holds
+information that is expensive to recompute (archive member listings, etc.)
+so it can be searched without touching the files again.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_members (
+    archive TEXT NOT NULL,
+    data_set INTEGER,
+    member TEXT NOT NULL,
+    size INTEGER,
+    compressed_size INTEGER,
+    crc INTEGER,
+    is_dir INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (archive, member)
+);
+CREATE INDEX IF NOT EXISTS idx_archive_members_member ON archive_members (member);
+
+CREATE TABLE IF NOT EXISTS files (
+    data_set INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    category TEXT,
+    file_type TEXT,
+    url TEXT,
+    size_bytes INTEGER,
+    PRIMARY KEY (data_set, filename)
+);
+
+CREATE TABLE IF NOT EXISTS media_info (
+    path TEXT PRIMARY KEY,
+    data_set INTEGER,
+    detected_type TEXT,
+    extension_mismatch INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    codec TEXT,
+    width INTEGER,
+    height INTEGER,
+    bitrate INTEGER,
+    sample_rate INTEGER,
+    channels INTEGER,
+    error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pdf_info (
+    path TEXT PRIMARY KEY,
+    data_set INTEGER,
+    version TEXT,
+    pages INTEGER,
+    encrypted INTEGER,
+    has_text INTEGER,
+    producer TEXT,
+    creator TEXT,
+    repaired INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pdf_info_has_text ON pdf_info (has_text);
+
+CREATE TABLE IF NOT EXISTS watchlist_terms (
+    term TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS watchlist_scans (
+    path TEXT PRIMARY KEY,
+    data_set INTEGER,
+    size INTEGER,
+    mtime_ns INTEGER,
+    pages INTEGER,
+    error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS watchlist_hits (
+    term TEXT NOT NULL,
+    path TEXT NOT NULL,
+    data_set INTEGER,
+    page INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    PRIMARY KEY (term, path, page, offset)
+);
+CREATE INDEX IF NOT EXISTS idx_watchlist_hits_path ON watchlist_hits (path);
+
+CREATE TABLE IF NOT EXISTS processor_results (
+    processor TEXT NOT NULL,
+    path TEXT NOT NULL,
+    data_set INTEGER,
+    output TEXT,
+    error TEXT,
+    seconds REAL,
+    PRIMARY KEY (processor, path)
+);
+CREATE INDEX IF NOT EXISTS idx_processor_results_path ON processor_results (path);
+"""
+
+
+def path_key(output_dir: Path, path: Path) -> str:
+    """Catalog key for a file: its path relative to the output dir (absolute if outside it)."""
+    try:
+        return path.resolve().relative_to(Path(output_dir).resolve()).as_posix()
+    except ValueError:
+        return path.resolve().as_posix()
+
+
+class Catalog:
+    """Thin wrapper around the SQLite catalog database."""
+
+    def __init__(self, output_dir: Optional[Path] = None, path: Optional[Path] = None):
+        """
+        Open (and create if needed) the catalog.
+
+        Args:
+            output_dir: Download tree root; the catalog is stored inside it
+            path: Explicit database path (overrides output_dir)
+        """
+        if path is None:
+            path = Path(output_dir or config.OUTPUT_DIR) / config.CATALOG_FILE
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+
+        # Writers may live on worker threads; serialize access ourselves
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Files
+
+    def upsert_files(self, files: Iterable[Dict]) -> int:
+        """
+        Insert or update file records (metadata.json entries).
+
+        Returns:
+            Number of records written
+        """
+        rows = [
+            (f['data_set'], f['filename'], f.get('category'), f.get('file_type'),
+             f.get('url'), f.get('file_size_bytes'))
+            for f in files
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO files (data_set, filename, category, file_type, url, size_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (data_set, filename) DO UPDATE SET "
+                "category = excluded.category, file_type = excluded.file_type, url = excluded.url, "
+                "size_bytes = COALESCE(excluded.size_bytes, files.size_bytes)",
+                rows,
+            )
+        return len(rows)
+
+    def files(self, data_set: Optional[int] = None) -> List[Dict]:
+        """Return file records, optionally for a single data set."""
+        with self._lock:
+            if data_set is None:
+                rows = self._conn.execute(
+                    "SELECT * FROM files ORDER BY data_set, filename"
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM files WHERE data_set = ? ORDER BY filename", (data_set,)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def file_summary(self) -> List[Dict]:
+        """Number of files and their total size per data set and category."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data_set, category, COUNT(*) AS files, SUM(size_bytes) AS size_bytes "
+                "FROM files GROUP BY data_set, category ORDER BY data_set, category"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def files_page(self, data_set: Optional[int] = None, category: Optional[str] = None,
+                   name: Optional[str] = None, offset: int = 0, limit: int = 100) -> Tuple[List[Dict], int]:
+        """
+        Return one page of file records and the number of matching records.
+
+        Args:
+            data_set: Only this data set
+            category: Only this category
+            name: Substring of the filename, or a SQL LIKE pattern if it contains % or _
+            offset: Records to skip
+            limit: Maximum number of records
+        """
+        clauses, params = [], []
+        if data_set is not None:
+            clauses.append("data_set = ?")
+            params.append(data_set)
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if name:
+            if '%' not in name and '_' not in name:
+                name = f"%{name}%"
+            clauses.append("filename LIKE ?")
+            params.append(name)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM files{where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM files{where} ORDER BY data_set, filename LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def delete_files(self, keys: Iterable[Tuple[int, str]]) -> int:
+        """
+        Remove file records by (data_set, filename).
+
+        Returns:
+            Number of records deleted
+        """
+        rows = list(keys)
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "DELETE FROM files WHERE data_set = ? AND filename = ?", rows
+            )
+        return cursor.rowcount
+
+    # Archive members
+
+    def replace_archive_members(self, archive: str, data_set: Optional[int],
+                                members: Iterable[Dict]) -> None:
+        """Store the member listing of one archive, replacing any previous one."""
+        rows = [
+            (archive, data_set, m['name'], m.get('size'), m.get('compressed_size'),
+             m.get('crc'), int(bool(m.get('is_dir'))))
+            for m in members
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM archive_members WHERE archive = ?", (archive,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO archive_members "
+                "(archive, data_set, member, size, compressed_size, crc, is_dir) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def archive_members(self, archive: str) -> List[Dict]:
+        """Return the stored member listing of one archive."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM archive_members WHERE archive = ? ORDER BY member",
+                (archive,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search_archive_members(self, pattern: str, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """
+        Search archive members by name.
+
+        Args:
+            pattern: Substring to look for, or a SQL LIKE pattern if it contains % or _
+            limit: Maximum number of results
+            offset: Results to skip
+        """
+        if '%' not in pattern and '_' not in pattern:
+            pattern = f"%{pattern}%"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM archive_members WHERE member LIKE ? "
+                "ORDER BY archive, member LIMIT ? OFFSET ?",
+                (pattern, limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # Media headers
+
+    def upsert_media_info(self, records: Iterable[Dict]) -> int:
+        """
+        Insert or replace media probe results (see media_probe.probe_file).
+
+        Returns:
+            Number of records written
+        """
+        rows = [
+            (r['path'], r.get('data_set'), r.get('detected_type'), int(bool(r.get('extension_mismatch'))),
+             r.get('duration'), r.get('codec'), r.get('width'), r.get('height'), r.get('bitrate'),
+             r.get('sample_rate'), r.get('channels'), r.get('error'))
+            for r in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO media_info "
+                "(path, data_set, detected_type, extension_mismatch, duration, codec, width, height, "
+                "bitrate, sample_rate, channels, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def media_info(self, mismatched_only: bool = False) -> List[Dict]:
+        """Return media probe results, optionally only files whose content doesn't match their extension."""
+        query = "SELECT * FROM media_info"
+        if mismatched_only:
+            query += " WHERE extension_mismatch = 1"
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY path").fetchall()
+        return [dict(row) for row in rows]
+
+    # PDF structure
+
+    def upsert_pdf_info(self, records: Iterable[Dict]) -> int:
+        """
+        Insert or replace PDF probe results (see pdf_probe.probe_pdf).
+
+        Returns:
+            Number of records written
+        """
+        def flag(value):
+            return None if value is None else int(bool(value))
+
+        rows = [
+            (r['path'], r.get('data_set'), r.get('version'), r.get('pages'), flag(r.get('encrypted')),
+             flag(r.get('has_text')), r.get('producer'), r.get('creator'), int(bool(r.get('repaired'))),
+             r.get('error'))
+            for r in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pdf_info "
+                "(path, data_set, version, pages, encrypted, has_text, producer, creator, repaired, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def pdf_info(self, image_only: bool = False) -> List[Dict]:
+        """
+        Return PDF probe results.
+
+        Args:
+            image_only: Only PDFs without a text layer (scans), most pages first
+        """
+        with self._lock:
+            if image_only:
+                rows = self._conn.execute(
+                    "SELECT * FROM pdf_info WHERE has_text = 0 ORDER BY pages DESC, path"
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM pdf_info ORDER BY path").fetchall()
+        return [dict(row) for row in rows]
+
+    def probe_info(self, path: str) -> Dict:
+        """
+        Media and PDF probe results of one file.
+
+        Args:
+            path: File path relative to the output dir
+
+        Returns:
+            {'media': record or None, 'pdf': record or None}
+        """
+        with self._lock:
+            media = self._conn.execute("SELECT * FROM media_info WHERE path = ?", (path,)).fetchone()
+            pdf = self._conn.execute("SELECT * FROM pdf_info WHERE path = ?", (path,)).fetchone()
+        return {'media': dict(media) if media else None, 'pdf': dict(pdf) if pdf else None}
+
+    # Watchlist
+
+    def watchlist_terms(self) -> Set[str]:
+        """Terms every scanned file has been searched for."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT term FROM watchlist_terms")}
+
+    def update_watchlist_terms(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        """Record terms as indexed, and drop removed terms together with their hits."""
+        removed = [(term,) for term in removed]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM watchlist_hits WHERE term = ?", removed)
+            self._conn.executemany("DELETE FROM watchlist_terms WHERE term = ?", removed)
+            self._conn.executemany("INSERT OR IGNORE INTO watchlist_terms (term) VALUES (?)",
+                                   [(term,) for term in added])
+
+    def watchlist_scans(self) -> Dict[str, Tuple[int, int]]:
+        """(size, mtime_ns) of every scanned file, by path."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, mtime_ns FROM watchlist_scans").fetchall()
+        return {row['path']: (row['size'], row['mtime_ns']) for row in rows}
+
+    def store_watchlist_scan(self, scan: Dict, hits: Iterable[Tuple[str, int, int]], replace: bool) -> int:
+        """
+        Store the result of scanning one file.
+
+        Args:
+            scan: path, data_set, size, mtime_ns, pages and error of the scan
+            hits: (term, page, offset) matches
+            replace: The file was scanned for every term, so its earlier hits are dropped
+
+        Returns:
+            Number of hits written
+        """
+        rows = [(term, scan['path'], scan.get('data_set'), page, offset) for term, page, offset in hits]
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM watchlist_hits WHERE path = ?", (scan['path'],))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO watchlist_hits (term, path, data_set, page, offset) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watchlist_scans (path, data_set, size, mtime_ns, pages, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (scan['path'], scan.get('data_set'), scan.get('size'), scan.get('mtime_ns'),
+                 scan.get('pages'), scan.get('error')),
+            )
+        return len(rows)
+
+    def watchlist_hits(self, term: Optional[str] = None) -> List[Dict]:
+        """Return watchlist matches, optionally for a single term."""
+        query = "SELECT * FROM watchlist_hits"
+        params: Tuple = ()
+        if term is not None:
+            query += " WHERE term = ?"
+            params = (term,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY term, path, page, offset", params).fetchall()
+        return [dict(row) for row in rows]
+
+    # Post-download processors
+
+    def upsert_processor_results(self, records: Iterable[Dict]) -> int:
+        """
+        Insert or replace processor outputs (see processors.ProcessingPipeline).
+
+        Args:
+            records: processor, path, data_set, output (a dict, stored as JSON), error and seconds
+
+        Returns:
+            Number of records written
+        """
+        rows = [
+            (r['processor'], r['path'], r.get('data_set'),
+             None if r.get('output') is None else json.dumps(r['output'], sort_keys=True),
+             r.get('error'), r.get('seconds'))
+            for r in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO processor_results (processor, path, data_set, output, error, seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def processor_results(self, processor: Optional[str] = None, path: Optional[str] = None,
+                          errors_only: bool = False) -> List[Dict]:
+        """
+        Return processor outputs, with `output` decoded.
+
+        Args:
+            processor: Only this processor
+            path: Only this file (relative to the output dir)
+            errors_only: Only records of failed runs
+        """
+        clauses, params = [], []
+        if processor is not None:
+            clauses.append("processor = ?")
+            params.append(processor)
+        if path is not None:
+            clauses.append("path = ?")
+            params.append(path)
+        if errors_only:
+            clauses.append("error IS NOT NULL")
+        query = "SELECT * FROM processor_results"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY processor, path", params).fetchall()
+        results = []
+        for row in rows:
+            record = dict(row)
+            record['output'] = None if record['output'] is None else json.loads(record['output'])
+            results.append(record)
+        return results
+
+    # Paths
+
+    def rename_paths(self, renames: Iterable[Tuple[str, str]]) -> int:
+        """
+        Re-key path-keyed records (archive listings, probes, watchlist scans, processor results) after files moved.
+
+        Args:
+            renames: (old key, new key) pairs, paths relative to the output dir
+
+        Returns:
+            Number of records updated
+        """
+        rows = [(new, old) for old, new in renames]
+        updated = 0
+        with self._lock, self._conn:
+            for query in ("UPDATE archive_members SET archive = ? WHERE archive = ?",
+                          "UPDATE media_info SET path = ? WHERE path = ?",
+                          "UPDATE pdf_info SET path = ? WHERE path = ?",
+                          "UPDATE watchlist_scans SET path = ? WHERE path = ?",
+                          "UPDATE watchlist_hits SET path = ? WHERE path = ?",
+                          "UPDATE processor_results SET path = ? WHERE path = ?"):
+                updated += self._conn.executemany(query, rows).rowcount
+        return updated
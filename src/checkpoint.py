@@ -0,0 +1,137 @@
+"""
+Crawl checkpoints for the scraper.
+
+The scraper records what it has learned so far (data set URLs, page counts,
+the last page parsed and the documents found) in a JSON file in the output
+directory. The file is rewritten atomically every CHECKPOINT_INTERVAL
+seconds, when a data set finishes, and when the run is interrupted, so
+`--resume` can pick up at the first page that was not parsed yet.
+"""
+
+import json
+import os
+import signal
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import config
+
+
+def data_set_state(url: Optional[str]) -> Dict:
+    """
+    Empty crawl state of one data set.
+
+    last_page is the index of the last page parsed (pages are parsed in
+    order), -1 before the first; documents holds everything found up to it
+    except on failed_pages, the pages whose fetch failed. document_pages
+    gives the page of each document, so documents of a failed page fetched
+    later are slotted in where an uninterrupted crawl would have put them.
+    A data set is only complete once every page was parsed.
+    """
+    return {
+        'url': url, 'total_pages': None, 'last_page': -1, 'failed_pages': [],
+        'documents': [], 'document_pages': [], 'complete': False, 'downloaded': False,
+    }
+
+
+class CrawlCheckpoint:
+    """Crawl state of one scraper run, persisted as JSON."""
+
+    VERSION = 1
+
+    def __init__(self, path: Path, interval: float = config.CHECKPOINT_INTERVAL):
+        """
+        Args:
+            path: Checkpoint file
+            interval: Minimum seconds between periodic saves
+        """
+        self.path = Path(path)
+        self.interval = interval
+        self.data_set_urls: Dict[int, str] = {}
+        self.data_sets: Dict[int, Dict] = {}
+        self._last_save = time.monotonic()
+
+    @classmethod
+    def load(cls, path: Path, interval: float = config.CHECKPOINT_INTERVAL) -> 'CrawlCheckpoint':
+        """
+        Read a checkpoint; a missing file gives an empty one.
+
+        Raises:
+            ValueError: If the file is not a checkpoint of this version
+        """
+        checkpoint = cls(path, interval)
+        if not checkpoint.path.exists():
+            return checkpoint
+        try:
+            with open(checkpoint.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{checkpoint.path} is not a valid checkpoint: {e}")
+        if not isinstance(state, dict) or state.get('version') != cls.VERSION:
+            raise ValueError(f"{checkpoint.path} is not a version {cls.VERSION} checkpoint")
+        # JSON object keys are strings
+        checkpoint.data_set_urls = {int(k): v for k, v in state.get('data_set_urls', {}).items()}
+        checkpoint.data_sets = {int(k): v for k, v in state.get('data_sets', {}).items()}
+        return checkpoint
+
+    def data_set(self, data_set_num: int, url: Optional[str] = None) -> Dict:
+        """State of one data set (created empty on first use, or when its URL changed)."""
+        state = self.data_sets.get(data_set_num)
+        if state is None or (url is not None and state.get('url') != url):
+            state = self.data_sets[data_set_num] = data_set_state(url)
+        return state
+
+    def maybe_save(self) -> bool:
+        """Save if at least `interval` seconds passed since the last save."""
+        if time.monotonic() - self._last_save < self.interval:
+            return False
+        self.save()
+        return True
+
+    def save(self) -> None:
+        """Write the checkpoint atomically (temp file + rename)."""
+        state = {
+            'version': self.VERSION,
+            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'data_set_urls': self.data_set_urls,
+            'data_sets': self.data_sets,
+        }
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def remove(self) -> None:
+        """Delete the checkpoint file (the crawl finished)."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _terminate(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+@contextmanager
+def exit_on_sigterm() -> Iterator[None]:
+    """
+    Turn SIGTERM into SystemExit for the duration of the block.
+
+    SIGINT already raises KeyboardInterrupt; with both as exceptions, the
+    caller's cleanup (saving the checkpoint) runs on either signal. Only the
+    main thread can install handlers; elsewhere this does nothing.
+    """
+    try:
+        previous = signal.signal(signal.SIGTERM, _terminate)
+    except ValueError:  # not in the main thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous)
@@ -1,23 +1,30 @@
 """Configuration for DOJ Epstein Disclosures scraper."""
 
-from pathlib import Path as _Path
+import os as _os
+from pathlib import Path as _Path, PurePosixPath as _PurePosixPath
 
 # Base URLs
 BASE_URL = "https://www.justice.gov"
 MAIN_PAGE_URL = f"{BASE_URL}/epstein/doj-disclosures"
 
 # Scraping settings
-REQUEST_TIMEOUT = 30  # seconds
+REQUEST_TIMEOUT = 30  # seconds to wait for data (read timeout)
+CONNECT_TIMEOUT = 10  # seconds to establish a connection
 RATE_LIMIT_DELAY = 2.0  # seconds between requests (slower to avoid detection)
 MAX_RETRIES = 3
-RETRY_DELAY = 10  # seconds
+RETRY_DELAY = 10  # seconds (retry backoff starts at half this and doubles)
+PAGE_WORKERS = 4  # listing pages fetched concurrently (still paced by RATE_LIMIT_DELAY)
+
+# HTTP transport (src/transport.py)
+HTTP_BACKEND = "requests"  # or "urllib3"
+HTTP_POOL_SIZE = 16  # keep-alive connections per host; at least the number of concurrent workers
 
 # User agent (appear as regular browser to avoid bot detection)
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 
 # Output settings (cross-platform defaults)
 OUTPUT_DIR = _Path.home() / "Documents" / "Epstein"  # ~/Documents/Epstein on all platforms
-LOGS_DIR = _Path.cwd() / "logs"  # logs directory in current working directory
+LOGS_DIR = _Path(_os.environ.get("FILE_FISHER_LOGS_DIR") or _Path.cwd() / "logs")  # logs/ in the working directory, or $FILE_FISHER_LOGS_DIR
 METADATA_FILE = "metadata.json"
 DOWNLOAD_FILES = True  # Set to False to only collect metadata
 
@@ -36,3 +43,99 @@ SUPPORTED_EXTENSIONS = [
 
 # File naming patterns
 FILENAME_PATTERN = r"EFTA\d+"  # Base pattern without extension
+
+# Category folders and the extensions that land in them
+FILE_CATEGORIES = {
+    'documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf'],
+    'videos': ['.mp4', '.mov', '.avi', '.wmv', '.flv'],
+    'audio': ['.mp3', '.wav', '.m4a', '.aac', '.ogg'],
+    'images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'],
+    'archives': ['.zip', '.rar', '.7z'],
+}
+
+
+def categorize(filename: str) -> str:
+    """Return the category folder for a filename based on its extension ('other' if unlisted)."""
+    file_ext = _PurePosixPath(filename).suffix.lower()
+    for category, extensions in FILE_CATEGORIES.items():
+        if file_ext in extensions:
+            return category
+    return 'other'
+
+# Catalog settings
+CATALOG_FILE = "catalog.db"  # SQLite catalog stored next to metadata.json
+ARCHIVE_WORKERS = 4  # parallel archive listing workers
+MEDIA_WORKERS = 8  # parallel media header probes (src/media_probe.py)
+PDF_WORKERS = 4  # worker processes for PDF structure probes (src/pdf_probe.py)
+PDF_TEXT_PAGES = 3  # leading pages checked for fonts when deciding if a PDF has a text layer
+
+# Shared work queue (multiple downloader processes on one output dir)
+QUEUE_FILE = "queue.db"  # SQLite job queue stored in the output directory
+LEASE_SECONDS = 300  # a claimed file is reclaimable after this long without renewal
+
+# Plan mode (--plan) HEAD probing
+PROBE_WORKERS = 8  # concurrent HEAD requests
+PROBE_RATE = 4.0  # HEAD requests per second across all workers
+PROBE_CACHE_FILE = "probe_cache.json"  # cached sizes reused by later runs
+SCHEDULE_UNSIZED_MIN_BYTES = 100 * 1024 * 1024  # byte budget that must be left to start a file of unknown size
+
+# WARC record/replay (scraper --record / --replay)
+WARC_DIR = "warc"  # subdirectory of the output directory for recorded crawls
+WARC_MAX_SIZE = 1024 * 1024 * 1024  # start a new .warc.gz after this many bytes
+
+# Logging (src/log_pipeline.py)
+LOG_JSON = False  # write log files as JSON lines (--log-json)
+CONSOLE_LOG_RATE = 20  # INFO lines per second shown on the console; the log file keeps all
+
+# Progress display
+PROGRESS_INTERVAL = 0.5  # seconds between progress bar redraws
+
+# Compiled link manifest (src/manifest.py)
+MANIFEST_FILE = "links.efm"  # default output of `manifest.py compile`
+
+# Delta sync (--sync)
+QUARANTINE_DIR = "quarantine"  # files no longer listed are moved here (under a dated folder) with --quarantine
+
+# Scraper crawl checkpoints (--resume)
+CHECKPOINT_FILE = "crawl_checkpoint.json"  # crawl state stored in the output directory
+CHECKPOINT_INTERVAL = 30  # seconds between periodic checkpoint saves
+
+# Scraper watch mode (--watch)
+WATCH_INTERVAL = 3600  # seconds between portal checks
+WATCH_STATE_FILE = "watch_state.json"  # link-set fingerprints from the last check, in the output directory
+
+# Storage layout (src/layout.py)
+STORAGE_LAYOUT = "flat"  # flat, efta (subfolders by EFTA number range) or hash (subfolders by name hash)
+LAYOUT_FILE = "layout.json"  # layout of the tree, stored in the output directory
+FANOUT_EFTA_BUCKET = 1000  # EFTA numbers per subfolder in the efta layout
+
+# Storage sinks (--sink, src/sinks.py)
+TAR_SHARD_DIR = "shards"  # default directory for tar shards, inside the output directory
+TAR_SHARD_SIZE = 1024 * 1024 * 1024  # start a new shard once one reaches this size
+S3_ENDPOINT = "https://s3.amazonaws.com"  # overridden by $S3_ENDPOINT_URL
+S3_REGION = "us-east-1"
+S3_SPOOL_SIZE = 64 * 1024 * 1024  # objects larger than this are spooled to a temp file before upload
+
+# Mirrors (--mirrors, src/mirrors.py)
+MIRROR_HOST_CONCURRENCY = 4  # transfers at once per host
+MIRROR_EWMA_ALPHA = 0.3  # weight of the newest latency/throughput sample
+MIRROR_FAILURE_COOLDOWN = 60  # seconds a failed host is tried last, times its consecutive failures (max 10x)
+MIRROR_MIN_SAMPLE_BYTES = 256 * 1024  # smaller transfers only update latency, not throughput
+
+# Catalog API server (src/serve.py)
+SERVE_HOST = "127.0.0.1"  # use 0.0.0.0 to serve the whole network
+SERVE_PORT = 8080
+SERVE_PAGE_SIZE = 100  # records per page unless ?limit= asks for another size
+SERVE_MAX_PAGE_SIZE = 1000
+SERVE_CACHE_ENTRIES = 2048  # JSON responses kept in the LRU; cleared whenever the catalog changes
+SERVE_DB_WORKERS = 4  # threads running catalog queries
+SERVE_IDLE_TIMEOUT = 60  # seconds a keep-alive connection may sit idle
+SERVE_MAX_HEADER_SIZE = 16 * 1024  # larger request heads are rejected with 431
+
+# Watchlist scanning (--watchlist, src/watchlist.py)
+WATCHLIST_WORKERS = 4  # worker processes extracting and scanning document text
+WATCHLIST_SUFFIXES = ['.pdf', '.txt', '.docx']  # documents/ files whose text is scanned
+
+# Post-download processors (--process, src/processors.py)
+PROCESSOR_WORKERS = 4  # worker processes shared by all processors; each also has its own concurrency limit
+PROCESSOR_READ_SIZE = 1024 * 1024  # bytes per read when hashing
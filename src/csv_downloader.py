@@ -12,15 +12,15 @@ Much more reliable than web scraping!
 
 import csv
 import json
-import logging
+import os
 import sys
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 try:
     import requests
-    from tqdm import tqdm
+    import tqdm  # noqa: F401  (checked here; the bars live in progress.TransferProgress)
 except ImportError as e:
     print("\n" + "="*70)
     print("❌ ERROR: Missing required dependencies!")
@@ -32,18 +32,37 @@ except ImportError as e:
     sys.exit(1)
 
 import config
+from catalog import Catalog
+from filters import FileFilter, apply_size_terms, filter_arg
+from layout import LAYOUTS, LayoutError, StorageLayout
+from planner import DownloadPlan, ProbeCache, build_plan, format_bytes
+from processors import PROCESSORS, ProcessingPipeline, parse_processors
+from progress import TransferProgress, known_total
+from remote_zip import inspect_remote_archive
+from sharding import filter_shard, shard_arg, shard_metadata_name
+from sync import SyncPlan, plan_sync, quarantine, scan_local
+from sinks import LocalSink, StorageSink, sink_from_spec
+from scheduler import DownloadScheduler, add_scheduler_arguments, scheduler_from_args
+from throttle import BandwidthLimiter, bandwidth_limiter_from_args
+from log_pipeline import setup_logger
+from manifest import Manifest, ManifestError, is_manifest
+from mirrors import MirrorMap, SourceSelector, candidate_urls, host_of, parse_mirror_column
+from transport import BACKENDS, create_transport
+from watchlist import WatchlistScanner, load_terms
+from work_queue import LeaseLost, WorkQueue, job_key
 
 
 class CSVDownloader:
     """Download files from CSV link list."""
 
-    def __init__(self, csv_path: str, download_files: bool = True):
+    def __init__(self, csv_path: str, download_files: bool = True, http_backend: Optional[str] = None):
         """
         Initialize downloader.
 
         Args:
             csv_path: Path to CSV file with download links
             download_files: Whether to download files
+            http_backend: Transport backend name (default config.HTTP_BACKEND)
         """
         self.csv_path = Path(csv_path)
         if not self.csv_path.exists():
@@ -61,50 +80,79 @@ class CSVDownloader:
         # Setup logging
         self._setup_logging()
 
-        # Setup session
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": config.USER_AGENT,
-        })
+        # Setup HTTP transport (pooled keep-alive connections, retries, split timeouts)
+        self.session = create_transport(
+            headers={"User-Agent": config.USER_AGENT},
+            backend=http_backend,
+            on_retry=self._log_retry,
+        )
 
         # Storage
         self.files_by_dataset: Dict[int, List[Dict]] = {}
         self.metadata: Dict[str, List[Dict]] = {}
 
+        # Remote archive inspection (list .zip members via Range instead of downloading)
+        self.inspect_archives = False
+        self.archive_member_pattern: Optional[str] = None
+        self.catalog: Optional[Catalog] = None
+
+        # (index, count) when this node only handles one shard of the run
+        self.shard: Optional[Tuple[int, int]] = None
+
+        # --filter: files it rejects are dropped while the link list is read
+        self.file_filter: Optional[FileFilter] = None
+
+        # Process-wide byte-rate cap shared by every transfer (None = unlimited)
+        self.bandwidth: Optional[BandwidthLimiter] = None
+
+        # Priority/budget scheduling across the selected data sets (None = CSV order)
+        self.scheduler: Optional[DownloadScheduler] = None
+
+        # HEAD probe results from a previous --plan run (loaded lazily)
+        self.probe_cache: Optional[ProbeCache] = None
+
+        # Where files go under the output directory (resolved from LAYOUT_FILE on first use)
+        self.layout: Optional[StorageLayout] = None
+
+        # Where downloads are written (default: a LocalSink over the layout)
+        self.sink: Optional[StorageSink] = None
+
+        # Alternative sources: per-row `mirrors` URLs and an optional prefix map.
+        # Every source but the last is tried without retries so failover is immediate.
+        self.mirror_map: Optional[MirrorMap] = None
+        self.sources = SourceSelector()
+        self.failover_session = create_transport(
+            headers={"User-Agent": config.USER_AGENT}, backend=http_backend, retries=0,
+        )
+
+        # Documents are scanned for watchlist terms as they finish (--watchlist)
+        self.watchlist: Optional[WatchlistScanner] = None
+
+        # Completed files are handed to post-download processors (--process)
+        self.processing: Optional[ProcessingPipeline] = None
+
+        # Aggregated byte-level progress of the loop currently downloading
+        self.progress: Optional[TransferProgress] = None
+
+        # Shared on-disk job queue when several processes drain the same CSV
+        self.use_queue = False
+        self.queue: Optional[WorkQueue] = None
+
     def _setup_logging(self) -> None:
         """Configure logging."""
-        log_file = self.logs_dir / f"csv_downloader_{time.strftime('%Y%m%d_%H%M%S')}.log"
-        
-        # Use a per-instance logger to avoid handler reuse between instances
-        logger_name = f"{__name__}.CSVDownloader.{id(self)}"
+        suffix = "jsonl" if config.LOG_JSON else "log"
+        log_file = self.logs_dir / f"csv_downloader_{time.strftime('%Y%m%d_%H%M%S')}.{suffix}"
 
         # Use a per-instance logger to avoid handler reuse between instances
         logger_name = f"{__name__}.CSVDownloader.{id(self)}"
-        self.logger = logging.getLogger(logger_name)
-
-       # Ensure deterministic logger behavior
-        self.logger.setLevel(logging.INFO)
-        self.logger.propagate = False
-
-        # Only configure handlers if not already configured for this instance logger
-        if not self.logger.handlers:
-            # File handler
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.INFO)
-
-            # Console handler
-            console_handler = logging.StreamHandler(sys.stdout)
-            console_handler.setLevel(logging.INFO)
 
-            # Formatter
-            formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-            file_handler.setFormatter(formatter)
-            console_handler.setFormatter(formatter)
+        # Records go through a queue; a listener thread does the formatting and I/O
+        self.logger = setup_logger(logger_name, log_file, json_lines=config.LOG_JSON)
+        self.logger.info("Logging to %s", log_file)
 
-            # Add handlers
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
-        self.logger.info(f"Logging to {log_file}")
+    def _log_retry(self, method: str, url: str, reason, attempt: int) -> None:
+        """Transport retry hook: note each retry in the log."""
+        self.logger.warning(f"{method} {url} failed ({reason}); retry {attempt}/{config.MAX_RETRIES}")
 
     def load_csv(self) -> bool:
         """Load a CSV file and organize files by data set.
@@ -113,7 +161,9 @@ class CSVDownloader:
         to extract file information, and categorizes files based on their extensions.
         It handles potential errors in row data and logs the number of files loaded
         across different data sets. If the CSV file does not exist or an error occurs
-        during processing, appropriate error messages are logged.
+        during processing, appropriate error messages are logged. If the path is a
+        manifest compiled by manifest.py, it is memory-mapped instead. Rows
+        rejected by `self.file_filter` are dropped here, before anything is queued.
         
         Returns:
             bool: True if the CSV was loaded successfully, False otherwise.
@@ -124,6 +174,9 @@ class CSVDownloader:
             self.logger.error(f"CSV file not found: {self.csv_path}")
             return False
 
+        if is_manifest(self.csv_path):
+            return self._load_manifest()
+
         try:
             with open(self.csv_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
@@ -134,26 +187,18 @@ class CSVDownloader:
                     self.logger.error(f"CSV missing required columns. Expected: {required_columns}, Found: {reader.fieldnames}")
                     return False
 
+                # Sizes from an earlier --plan let size terms apply right away
+                probe_cache = self._get_probe_cache() if self.file_filter and self.file_filter.uses_size else None
+                filtered_count = 0
+
                 for row in reader:
                     try:
                         data_set = int(row['data_set'])
                         url = row['url']
                         filename = row['link_text']
 
-                        # Determine file category
                         file_ext = Path(filename).suffix.lower()
-                        if file_ext in ['.pdf', '.doc', '.docx', '.txt']:
-                            category = 'documents'
-                        elif file_ext in ['.mp4', '.mov', '.avi']:
-                            category = 'videos'
-                        elif file_ext in ['.mp3', '.wav', '.m4a']:
-                            category = 'audio'
-                        elif file_ext in ['.jpg', '.jpeg', '.png', '.gif']:
-                            category = 'images'
-                        elif file_ext in ['.zip', '.rar', '.7z']:
-                            category = 'archives'
-                        else:
-                            category = 'other'
+                        category = config.categorize(filename)
 
                         file_info = {
                             'filename': filename,
@@ -162,6 +207,14 @@ class CSVDownloader:
                             'file_type': file_ext,
                             'category': category
                         }
+                        mirrors = parse_mirror_column(row.get('mirrors'))
+                        if mirrors:
+                            file_info['mirrors'] = mirrors
+
+                        if self.file_filter is not None and not self.file_filter.matches(
+                                file_info, probe_cache.size(url) if probe_cache else None):
+                            filtered_count += 1
+                            continue
 
                         if data_set not in self.files_by_dataset:
                             self.files_by_dataset[data_set] = []
@@ -175,6 +228,8 @@ class CSVDownloader:
             # Log statistics
             total_files = sum(len(files) for files in self.files_by_dataset.values())
             self.logger.info(f"Loaded {total_files} files across {len(self.files_by_dataset)} data sets")
+            if self.file_filter is not None:
+                self.logger.info(f"Filter '{self.file_filter}' excluded {filtered_count} files")
 
             for ds_num in sorted(self.files_by_dataset.keys()):
                 count = len(self.files_by_dataset[ds_num])
@@ -186,76 +241,131 @@ class CSVDownloader:
             self.logger.error(f"Failed to load CSV: {e}")
             return False
 
+    def _load_manifest(self) -> bool:
+        """Open a compiled manifest (see manifest.py) in place of a CSV.
+
+        Only the header and index are read here; each data set's files are
+        decoded from the memory map the first time they are used.
+        """
+        try:
+            manifest = Manifest(self.csv_path)
+        except ManifestError as e:
+            self.logger.error(f"Failed to load manifest: {e}")
+            return False
+        self.files_by_dataset = manifest
+
+        self.logger.info(f"Loaded {manifest.total_files} files across {len(manifest)} data sets (compiled manifest)")
+        for ds_num in manifest:
+            self.logger.info(f"  Data Set {ds_num}: {manifest.count(ds_num)} files")
+        return True
+
     def download_file(self, file_info: Dict, data_set_dir: Path) -> bool:
         """Download a single file from a given URL.
         
-        This function creates a directory for the file based on its category,  checks
-        if the file already exists, and if not, downloads it while  respecting rate
-        limits. It logs the download progress and updates  the file_info dictionary
-        with the file size in both bytes and megabytes.  In case of a failure during
-        the download, it cleans up by removing  any partially downloaded file.
+        This function checks if the file is already stored, and if not, downloads
+        it while  respecting rate limits, streaming it into the storage sink
+        (individual files under the output directory by default). It logs the
+        download progress and updates  the file_info dictionary with the file
+        size in both bytes and megabytes.  In case of a failure during the
+        download, the sink discards whatever was written.
         """
-        category_dir = data_set_dir / file_info['category']
-        file_path = category_dir / file_info['filename']
+        sink = self._get_sink()
 
         # Skip if exists
-        if file_path.exists():
-            self.logger.debug(f"Already exists: {file_info['filename']}")
+        if sink.exists(file_info):
+            self.logger.debug("Already exists: %s", file_info['filename'])
             return True
 
+        if self.inspect_archives and file_info['file_type'] == '.zip':
+            return self._inspect_archive(file_info, data_set_dir)
+
         # Download
         try:
-            # Create directory with error handling
-            try:
-                category_dir.mkdir(exist_ok=True, parents=True)
-            except OSError as e:
-                self.logger.error(f"Failed to create directory {category_dir}: {e}")
-                return False
-            
-            time.sleep(config.RATE_LIMIT_DELAY)
-            response = self.session.get(file_info['url'], timeout=config.REQUEST_TIMEOUT, stream=True)
-            response.raise_for_status()
-
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            out = self._fetch(file_info, sink)
 
             # Get file size
-            file_size = file_path.stat().st_size
+            file_size = out.size
             file_info['file_size_bytes'] = file_size
             file_info['file_size_mb'] = round(file_size / (1024 * 1024), 2)
 
-            self.logger.debug(f"Downloaded: {file_info['filename']} ({file_info['file_size_mb']} MB)")
+            self.logger.debug("Downloaded: %s (%s MB)", file_info['filename'], file_info['file_size_mb'])
+            if self.watchlist is not None:
+                self.watchlist.submit(self._local_path(file_info))
+            if self.processing is not None:
+                self.processing.submit(self._local_path(file_info), file_info.get('category'))
             return True
 
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Network error downloading {file_info['filename']}: {e}")
-            # Best-effort cleanup - wrap unlink to avoid masking the original error
-            try:
-                if file_path.exists():
-                    file_path.unlink()
-            except Exception:
-                pass
+            return False
+        except LeaseLost as e:
+            self.logger.warning(f"Abandoned {file_info['filename']}: {e}")
             return False
         except (IOError, OSError, PermissionError) as e:
             self.logger.error(f"File I/O error for {file_info['filename']}: {e}")
-            # Best-effort cleanup - wrap unlink to avoid masking the original error
-            try:
-                if file_path.exists():
-                    file_path.unlink()
-            except Exception:
-                pass
             return False
         except Exception as e:
             self.logger.error(f"Unexpected error downloading {file_info['filename']}: {e}")
-            # Best-effort cleanup - wrap unlink to avoid masking the original error
-            try:
-                if file_path.exists():
-                    file_path.unlink()
-            except Exception:
-                pass
             return False
 
+    def _fetch(self, file_info: Dict, sink: StorageSink):
+        """Stream a file into the sink from its best source, failing over to the others.
+
+        Sources are ranked by self.sources; each attempt gets a fresh sink
+        writer, so a transfer that breaks off leaves nothing behind. Only the
+        last source uses the retrying session.
+
+        Returns:
+            The committed sink writer.
+
+        Raises:
+            requests.exceptions.RequestException: If every source failed.
+            LeaseLost: If another queue worker took the file over mid-transfer.
+        """
+        lease_key = job_key(file_info) if self.queue is not None else None
+        size_hint = self._get_probe_cache().size(file_info['url'])
+        urls = self.sources.rank(candidate_urls(file_info, self.mirror_map), size_hint)
+        primary_host = host_of(file_info['url'])
+        for i, url in enumerate(urls):
+            last = i == len(urls) - 1
+            try:
+                # Pause outside attempt() so the rate limit is not timed as the host's latency
+                if host_of(url) == primary_host:
+                    time.sleep(config.RATE_LIMIT_DELAY)
+                # The writer (and its directory) exists before the request is made
+                with sink.open(file_info, size_hint) as out, self.sources.attempt(url) as attempt:
+                    session = self.session if last else self.failover_session
+                    response = session.get(url, stream=True)
+                    response.raise_for_status()
+                    attempt.first_byte()
+
+                    for chunk in response.iter_content(chunk_size=8192):
+                        if lease_key is not None and self.queue.lost(lease_key):
+                            raise LeaseLost("lease taken over by another worker")
+                        if self.bandwidth is not None:
+                            self.bandwidth.consume(len(chunk))
+                        if self.progress is not None:
+                            self.progress.add_bytes(len(chunk))
+                        attempt.add(len(chunk))
+                        out.write(chunk)
+            except requests.exceptions.RequestException as e:
+                if last:
+                    raise
+                self.logger.warning(f"{file_info['filename']}: {host_of(url)} failed ({e}), trying the next source")
+                continue
+            if url != file_info['url']:
+                file_info['source_url'] = url
+            return out
+
+    def _inspect_archive(self, file_info: Dict, data_set_dir: Path) -> bool:
+        """List a remote ZIP's members (and fetch matching ones) instead of downloading it."""
+        if self.catalog is None:
+            self.catalog = Catalog(self.output_dir)
+        return inspect_remote_archive(
+            self.session, file_info, data_set_dir, self.logger,
+            catalog=self.catalog, member_pattern=self.archive_member_pattern,
+        )
+
     def download_data_sets(self, data_set_numbers: List[int]) -> None:
         """Download selected data sets.
         
@@ -268,12 +378,16 @@ class CSVDownloader:
         Args:
             data_set_numbers: A list of integers representing the data set numbers to download.
         """
+        if self.scheduler is not None and self.download_files:
+            self._download_scheduled(data_set_numbers)
+            return
+
         for ds_num in sorted(data_set_numbers):
             if ds_num not in self.files_by_dataset:
                 self.logger.warning(f"Data Set {ds_num} not found in CSV")
                 continue
 
-            files = self.files_by_dataset[ds_num]
+            files = self._data_set_files(ds_num)
             self.logger.info(f"Downloading Data Set {ds_num} ({len(files)} files)")
 
             if not self.download_files:
@@ -289,17 +403,344 @@ class CSVDownloader:
                 self.logger.error(f"Failed to create directory for Data Set {ds_num}: {e}")
                 continue
 
-            success_count = 0
-            for file_info in tqdm(files, desc=f"Data Set {ds_num}"):
-                if self.download_file(file_info, data_set_dir):
-                    success_count += 1
+            if self.use_queue:
+                success_count = self._drain_queue(ds_num, files, data_set_dir)
+                # Report every worker's results, not just this process's share
+                files = self.queue.files(ds_num)
+            else:
+                success_count = 0
+                with self._start_progress(files, f"Data Set {ds_num}") as progress:
+                    for file_info in files:
+                        progress.start_file()
+                        ok = self.download_file(file_info, data_set_dir)
+                        progress.finish_file(ok)
+                        if ok:
+                            success_count += 1
 
             self.logger.info(f"Data Set {ds_num}: Downloaded {success_count}/{len(files)} files")
+            if self.bandwidth is not None:
+                self.logger.info(self.bandwidth.report())
+            if len(self.sources.hosts) > 1:
+                self.logger.info("Sources:\n" + self.sources.report())
+            self.metadata[f"data_set_{ds_num}"] = files
+
+    def _data_set_files(self, ds_num: int) -> List[Dict]:
+        """Files of a data set this process is responsible for (its shard, if any)."""
+        files = self.files_by_dataset[ds_num]
+        if self.file_filter is not None:
+            if isinstance(self.files_by_dataset, Manifest):
+                # Compiled manifests are decoded lazily, so filter on first use
+                files = [f for f in files if self.file_filter.matches(f)]
+            files = apply_size_terms(files, self.file_filter, self.session, self._get_probe_cache(), self.logger)
+            self.logger.info(f"Data Set {ds_num}: {len(files)} files match '{self.file_filter}'")
+        if self.shard:
+            files = filter_shard(files, self.shard)
+            self.logger.info(
+                f"Data Set {ds_num}: {len(files)}/{len(self.files_by_dataset[ds_num])} files "
+                f"in shard {self.shard[0]}/{self.shard[1]}"
+            )
+        return files
+
+    def _local_path(self, file_info: Dict) -> Path:
+        """Where a file lives in the download tree."""
+        return self._get_layout().locate(file_info['data_set'], file_info['category'], file_info['filename'])
+
+    def _get_layout(self) -> StorageLayout:
+        """Storage layout of the current output directory."""
+        if self.layout is None:
+            self.layout = StorageLayout.load(self.output_dir)
+        return self.layout
+
+    def _get_sink(self) -> StorageSink:
+        """Storage sink downloads are written to."""
+        if self.sink is None:
+            self.sink = LocalSink(self._get_layout())
+        return self.sink
+
+    def close_sink(self) -> None:
+        """Finish the storage sink (e.g. close the open tar shard)."""
+        if self.sink is not None:
+            self.sink.close()
+
+    def close_watchlist(self) -> None:
+        """Wait for pending watchlist scans and store their results."""
+        if self.watchlist is not None:
+            self.watchlist.close()
+            self.logger.info(self.watchlist.report())
+
+    def close_processing(self) -> None:
+        """Wait for queued post-download processors and store their results."""
+        if self.processing is not None:
+            self.processing.close()
+            self.logger.info(self.processing.report())
+
+    def _get_probe_cache(self) -> ProbeCache:
+        """Probe cache for the current output directory."""
+        if self.probe_cache is None:
+            self.probe_cache = ProbeCache(self.output_dir)
+        return self.probe_cache
+
+    def _known_transfer_size(self, file_info: Dict) -> Optional[int]:
+        """Bytes a file would transfer without asking the server: 0 if on disk, else its known or cached size."""
+        if self._get_sink().exists(file_info):
+            return 0
+        if 'file_size_bytes' in file_info:
+            return file_info['file_size_bytes']
+        return self._get_probe_cache().size(file_info['url'])
+
+    def _start_progress(self, files: List[Dict], desc: str, queue_depth=None) -> TransferProgress:
+        """Open the progress display for a download loop (byte ETA when every size is known)."""
+        self.progress = TransferProgress(
+            len(files), total_bytes=known_total(files, self._known_transfer_size),
+            desc=desc, queue_depth=queue_depth,
+        )
+        return self.progress
+
+    def plan(self, data_set_numbers: List[int]) -> DownloadPlan:
+        """Estimate the download of the selected data sets without downloading.
+
+        Sends concurrent, rate-limited HEAD requests for every file not yet on
+        disk, caches the sizes for later runs and projects the total size,
+        free space and ETA.
+
+        Args:
+            data_set_numbers: Data sets to estimate.
+
+        Returns:
+            DownloadPlan: Totals and projections; see DownloadPlan.report().
+        """
+        files = []
+        for ds_num in sorted(data_set_numbers):
+            if ds_num not in self.files_by_dataset:
+                self.logger.warning(f"Data Set {ds_num} not found in CSV")
+                continue
+            files.extend(self._data_set_files(ds_num))
+
+        self.logger.info(f"Probing {len(files)} files...")
+        download_plan = build_plan(
+            self.session, files, self.output_dir, logger=self.logger,
+            bandwidth_cap=self.bandwidth.current_rate if self.bandwidth is not None else None,
+            is_local=self._get_sink().exists,
+        )
+        self.probe_cache = None  # reload with the fresh results
+        return download_plan
+
+    def cached_size(self, data_set_numbers: List[int]) -> Optional[int]:
+        """Total size of the selected data sets according to the probe cache, if fully probed."""
+        cache = self._get_probe_cache()
+        total = 0
+        for ds_num in data_set_numbers:
+            for file_info in self.files_by_dataset.get(ds_num, []):
+                size = cache.size(file_info['url'])
+                if size is None:
+                    return None
+                total += size
+        return total
+
+    def _download_scheduled(self, data_set_numbers: List[int]) -> None:
+        """Download the highest-priority files of the selected data sets within the budgets.
+
+        Candidates from all selected data sets are planned together by the
+        scheduler, then downloaded in plan order. Files that would overrun the
+        byte or time budget are not started, and the run stops once a budget
+        is used up.
+        """
+        candidates = []
+        for ds_num in sorted(data_set_numbers):
+            if ds_num not in self.files_by_dataset:
+                self.logger.warning(f"Data Set {ds_num} not found in CSV")
+                continue
+            files = self._data_set_files(ds_num)
             self.metadata[f"data_set_{ds_num}"] = files
+            candidates.extend(files)
+
+        # The clock starts before planning: probing unknown sizes uses up the time budget too
+        self.scheduler.start()
+        self.scheduler.probe_sizes(candidates, self._known_transfer_size, self.session,
+                                   self._get_probe_cache(), logger=self.logger)
+        selected = self.scheduler.plan(candidates, self._known_transfer_size)
+        self.logger.info(f"Scheduled {len(selected)}/{len(candidates)} files by priority")
+
+        success_count = 0
+        skipped_count = 0
+        with self._start_progress(selected, "Scheduled") as progress:
+            for file_info in selected:
+                if self.scheduler.exhausted():
+                    self.logger.info("Budget used up, stopping")
+                    break
+                if not self.scheduler.can_start(file_info):
+                    skipped_count += 1
+                    continue
+
+                data_set_dir = self.output_dir / f"data_set_{file_info['data_set']}"
+                transferred = file_info.get('planned_size_bytes') != 0
+                progress.start_file()
+                ok = self.download_file(file_info, data_set_dir)
+                progress.finish_file(ok)
+                if ok:
+                    success_count += 1
+                    self.scheduler.record(file_info, file_info.get('file_size_bytes', 0) if transferred else 0)
+                else:
+                    self.scheduler.record(file_info, 0)
+
+        self.logger.info(
+            f"Downloaded {success_count}/{len(selected)} scheduled files "
+            f"({skipped_count} skipped to stay within budget)"
+        )
+        self.logger.info(self.scheduler.summary())
+        if self.bandwidth is not None:
+            self.logger.info(self.bandwidth.report())
+
+    def _drain_queue(self, ds_num: int, files: List[Dict], data_set_dir: Path) -> int:
+        """Download a data set cooperatively through the shared work queue.
+
+        Queues the data set's files (files already queued by another worker
+        are left alone), then claims and downloads one file at a time until no
+        unclaimed files remain. Leases are renewed by the queue's heartbeat
+        thread while a transfer runs; a transfer whose lease was taken over
+        by another worker is aborted.
+
+        Returns:
+            int: Number of files this process downloaded successfully.
+        """
+        if self.queue is None:
+            self.queue = WorkQueue(self.output_dir / config.QUEUE_FILE)
+            self.queue.start_heartbeat()
+            self.logger.info(f"Joined work queue {self.queue.path} as {self.queue.worker_id}")
+        sink = self._get_sink()
+        if isinstance(sink, LocalSink):
+            # Two workers on one file (after a lost lease) must not share a .part file
+            sink.part_tag = self.queue.worker_id
+
+        added = self.queue.enqueue(files)
+        self.logger.info(f"Data Set {ds_num}: queued {added} new files ({self.queue.counts(ds_num)})")
+
+        success_count = 0
+        queue_depth = lambda: self.queue.counts(ds_num).get('pending', 0)  # noqa: E731
+        with self._start_progress(files, f"Data Set {ds_num}", queue_depth=queue_depth) as progress:
+            while True:
+                file_info = self.queue.claim(ds_num)
+                if file_info is None:
+                    break
+                progress.start_file()
+                if self.download_file(file_info, data_set_dir):
+                    if self.queue.complete(file_info):
+                        success_count += 1
+                        progress.finish_file(True)
+                    else:
+                        self.logger.warning(f"{file_info['filename']}: lease lost before completion; "
+                                            f"left to the worker that took it over")
+                        progress.finish_file(False)
+                else:
+                    self.queue.release(file_info)
+                    progress.finish_file(False)
+
+        return success_count
+
+    def sync(self, data_set_numbers: List[int], quarantine_removed: bool = False) -> SyncPlan:
+        """Bring the download tree in line with the loaded link list.
+
+        The list, the files on disk and the catalog are merged in one sorted
+        pass (see sync.plan_sync). Files filed under another category are
+        renamed into place, new files are downloaded, and files whose URL
+        changed are downloaded again (the old copy is kept until the new one
+        arrives). Files no longer listed are reported, or moved to the
+        quarantine folder. With download_files off nothing is changed.
+
+        Args:
+            data_set_numbers: Data sets to reconcile.
+            quarantine_removed: Move files that are no longer listed out of the tree.
+
+        Returns:
+            SyncPlan: What was found; see SyncPlan.report().
+        """
+        data_set_numbers = sorted(data_set_numbers)
+        listed = []
+        for ds_num in data_set_numbers:
+            if ds_num not in self.files_by_dataset:
+                self.logger.warning(f"Data Set {ds_num} not in the link list; all its local files count as removed")
+                continue
+            listed.extend(self.files_by_dataset[ds_num])
+
+        if self.catalog is None:
+            self.catalog = Catalog(self.output_dir)
+        catalog_rows = [row for ds_num in data_set_numbers for row in self.catalog.files(ds_num)]
+        sync_plan = plan_sync(listed, scan_local(self.output_dir, data_set_numbers), catalog_rows)
+        self.logger.info("Sync plan:\n%s", sync_plan.report())
+
+        if not self.download_files:
+            return sync_plan
+
+        for listed_entry, local_entry in sync_plan.moved:
+            target = self._local_path(listed_entry)
+            try:
+                target.parent.mkdir(exist_ok=True, parents=True)
+                os.replace(local_entry['path'], target)
+                self.logger.info(f"Moved {local_entry['path']} -> {target}")
+            except OSError as e:
+                self.logger.error(f"Failed to move {local_entry['path']}: {e}")
+
+        # Changed files: keep the old copy aside until the new one is in place
+        stale = {}
+        for listed_entry, local_entry in sync_plan.changed:
+            old_path = local_entry['path'].with_name(local_entry['path'].name + '.old')
+            try:
+                os.replace(local_entry['path'], old_path)
+            except OSError as e:
+                self.logger.error(f"Failed to set aside {local_entry['path']}: {e}")
+                continue
+            stale[id(listed_entry)] = (old_path, local_entry['path'])
+
+        files = sync_plan.to_download
+        success_count = 0
+        with self._start_progress(files, "Sync") as progress:
+            for file_info in files:
+                progress.start_file()
+                ok = self.download_file(file_info, self.output_dir / f"data_set_{file_info['data_set']}")
+                progress.finish_file(ok)
+                if ok:
+                    success_count += 1
+                if id(file_info) not in stale:
+                    continue
+                old_path, original_path = stale[id(file_info)]
+                try:
+                    if not ok:
+                        os.replace(old_path, original_path)
+                    elif quarantine_removed:
+                        quarantine(self.output_dir, old_path, original=original_path)
+                    else:
+                        old_path.unlink()
+                except OSError as e:
+                    self.logger.error(f"Failed to clean up {old_path}: {e}")
+        self.logger.info(f"Sync: downloaded {success_count}/{len(files)} new or changed files")
+
+        if quarantine_removed:
+            for record in sync_plan.removed:
+                if record.get('path') is None:
+                    continue
+                try:
+                    dest = quarantine(self.output_dir, record['path'])
+                    self.logger.info(f"Quarantined {record['path']} -> {dest}")
+                except OSError as e:
+                    self.logger.error(f"Failed to quarantine {record['path']}: {e}")
+
+        self.catalog.upsert_files(listed)
+        self.catalog.delete_files((r['data_set'], r['filename']) for r in sync_plan.removed)
+        for ds_num in data_set_numbers:
+            if ds_num in self.files_by_dataset:
+                self.metadata[f"data_set_{ds_num}"] = self.files_by_dataset[ds_num]
+        return sync_plan
+
+    def close_queue(self) -> None:
+        """Release any leases still held and close the work queue."""
+        if self.queue is not None:
+            self.queue.close()
+            self.queue = None
 
     def save_metadata(self) -> None:
         """Save metadata to a JSON file and log the total files processed."""
-        metadata_path = self.output_dir / config.METADATA_FILE
+        metadata_name = shard_metadata_name(self.shard) if self.shard else config.METADATA_FILE
+        metadata_path = self.output_dir / metadata_name
 
         try:
             with open(metadata_path, 'w', encoding='utf-8') as f:
@@ -404,7 +845,7 @@ def main():
         "csv_file",
         nargs="?",
         default=str(Path.home() / "Downloads" / "master_file_links.csv"),
-        help="Path to CSV file with download links"
+        help="Path to CSV file with download links, or a manifest compiled by manifest.py"
     )
     parser.add_argument(
         "--no-download",
@@ -422,17 +863,173 @@ def main():
         nargs="+",
         help="Specific data sets to download"
     )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        help=f"Storage layout for a new output directory (default: {config.STORAGE_LAYOUT}; "
+             "existing trees keep theirs, convert with layout.py migrate)"
+    )
+    parser.add_argument(
+        "--mirrors",
+        type=str,
+        metavar="FILE",
+        help="Mirror prefix map (lines of 'PRIMARY_PREFIX MIRROR_PREFIX...'); files are fetched from "
+             "the fastest measured source and fail over to the others"
+    )
+    parser.add_argument(
+        "--sink",
+        default="local",
+        metavar="SINK",
+        help="Where downloads are written: local (default), tar[:DIR] for rotating .tar shards with an "
+             f"offset index (default DIR: <output-dir>/{config.TAR_SHARD_DIR}), or s3://BUCKET[/PREFIX]"
+    )
+    parser.add_argument(
+        "--watchlist",
+        type=str,
+        metavar="FILE",
+        help="Scan downloaded documents for these terms (one per line) as they finish; "
+             "the index is kept in the catalog (see watchlist.py hits)"
+    )
+    parser.add_argument(
+        "--process",
+        type=str,
+        metavar="NAME[,NAME]",
+        help=f"Run post-download processors on each file as it lands ({', '.join(sorted(PROCESSORS))}); "
+             "results are kept in the catalog (see processors.py results)"
+    )
+    parser.add_argument(
+        "--inspect-archives",
+        action="store_true",
+        help="List remote .zip members via HTTP Range instead of downloading whole archives"
+    )
+    parser.add_argument(
+        "--archive-members",
+        type=str,
+        metavar="GLOB",
+        help="With --inspect-archives, fetch only members matching this glob"
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="i/N",
+        help="Only handle shard i of N (files assigned by a stable hash of their EFTA ID)"
+    )
+    parser.add_argument(
+        "--filter",
+        type=filter_arg,
+        metavar="EXPR",
+        help="Only handle matching files, e.g. 'category=videos size<500M', 'ext=pdf efta=1-5000', "
+             "'!name~_redacted' (terms: category, ext, efta, name=glob, name~regex, size)"
+    )
+    parser.add_argument(
+        "--max-bandwidth",
+        type=str,
+        metavar="RATE",
+        help="Cap total download speed, e.g. 500K, 20M, 1G (bytes per second)"
+    )
+    parser.add_argument(
+        "--bandwidth-schedule",
+        type=str,
+        metavar="WINDOWS",
+        help="Time-of-day caps overriding --max-bandwidth, e.g. '22:00-06:00=100M,09:00-17:00=5M'"
+    )
+    add_scheduler_arguments(parser)
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Dry run: HEAD-probe the selected files and report size, free space and ETA"
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help=f"Share work with other processes via {config.QUEUE_FILE} in the output directory"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Reconcile the output directory with this link list: fetch only new or changed files, "
+             "report files no longer listed (with --no-download: report only)"
+    )
+    parser.add_argument(
+        "--quarantine",
+        action="store_true",
+        help=f"With --sync, move files no longer listed to {config.QUARANTINE_DIR}/<date>/ in the output directory"
+    )
+    parser.add_argument(
+        "--http-backend",
+        choices=sorted(BACKENDS),
+        default=config.HTTP_BACKEND,
+        help=f"HTTP client used for all requests (default: {config.HTTP_BACKEND})"
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="Write the log file as JSON lines for machine parsing"
+    )
 
     args = parser.parse_args()
+    try:
+        bandwidth = bandwidth_limiter_from_args(args.max_bandwidth, args.bandwidth_schedule)
+        scheduler = scheduler_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if scheduler is not None and args.queue:
+        parser.error("--queue cannot be combined with priority/budget scheduling")
+    if args.sync and (args.queue or args.plan or args.shard or scheduler is not None):
+        parser.error("--sync cannot be combined with --queue, --plan, --shard or scheduling")
+    if args.quarantine and not args.sync:
+        parser.error("--quarantine requires --sync")
+    if args.sync and args.filter:
+        parser.error("--sync reconciles the whole link list and cannot be combined with --filter")
+    if args.sink != "local" and (args.sync or args.inspect_archives or args.watchlist or args.process):
+        parser.error("--sync, --inspect-archives, --watchlist and --process work on the local tree "
+                     "and need --sink local")
+    processors = None
+    if args.process:
+        try:
+            processors = parse_processors(args.process)
+        except ValueError as e:
+            parser.error(str(e))
 
     # Override output dir if specified (use local variable to avoid mutating config)
     output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
 
+    # Log format is read when the logger is set up in __init__
+    if args.log_json:
+        config.LOG_JSON = True
+
     # Create downloader
-    downloader = CSVDownloader(args.csv_file, download_files=not args.no_download)
+    downloader = CSVDownloader(args.csv_file, download_files=not args.no_download, http_backend=args.http_backend)
     
     # Set output directory
     downloader.output_dir = output_dir
+    try:
+        downloader.layout = StorageLayout.open(output_dir, args.layout)
+        downloader.sink = sink_from_spec(args.sink, output_dir, downloader.layout)
+    except (LayoutError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return
+    downloader.inspect_archives = args.inspect_archives
+    downloader.archive_member_pattern = args.archive_members
+    downloader.shard = args.shard
+    downloader.file_filter = args.filter
+    if args.mirrors:
+        try:
+            downloader.mirror_map = MirrorMap.load(Path(args.mirrors))
+        except (OSError, ValueError) as e:
+            print(f"❌ Failed to load mirror map: {e}")
+            return
+    if args.watchlist and not args.no_download:
+        try:
+            downloader.watchlist = WatchlistScanner(load_terms(Path(args.watchlist)), output_dir)
+        except OSError as e:
+            print(f"❌ Failed to load watchlist: {e}")
+            return
+    if processors and not args.no_download:
+        downloader.processing = ProcessingPipeline(processors, output_dir)
+    downloader.use_queue = args.queue
+    downloader.bandwidth = bandwidth
+    downloader.scheduler = scheduler
 
     # Load CSV
     if not downloader.load_csv():
@@ -456,11 +1053,63 @@ def main():
     print(f"Download Configuration:")
     print(f"  Data Sets: {selected}")
     print(f"  Output Directory: {downloader.output_dir}")
+    if args.sink != "local":
+        print(f"  Sink: {downloader.sink.describe()}")
     print(f"  Download Files: {not args.no_download}")
+    cached_size = downloader.cached_size(selected)
+    if cached_size is not None:
+        print(f"  Estimated Size: {format_bytes(cached_size)} (from last --plan)")
+    if args.inspect_archives:
+        print(f"  Inspect Archives: yes (members: {args.archive_members or 'list only'})")
+    if args.shard:
+        print(f"  Shard: {args.shard[0]}/{args.shard[1]}")
+    if args.filter:
+        print(f"  Filter: {args.filter}")
+    if downloader.watchlist is not None:
+        print(f"  Watchlist: {args.watchlist} ({len(downloader.watchlist.terms)} terms)")
+    if downloader.processing is not None:
+        print(f"  Processors: {', '.join(p.name for p in processors)}")
+    if args.mirrors:
+        print(f"  Mirrors: {args.mirrors} ({len(downloader.mirror_map.prefixes)} prefixes)")
+    if bandwidth is not None:
+        print(f"  Max Bandwidth: {args.max_bandwidth or 'unlimited'}"
+              + (f" (schedule: {args.bandwidth_schedule})" if args.bandwidth_schedule else ""))
+    if scheduler is not None:
+        print(f"  Budget: {args.max_bytes or 'no byte limit'}, {args.max_duration or 'no time limit'}")
+    if args.queue:
+        print(f"  Work Queue: {downloader.output_dir / config.QUEUE_FILE}")
     print(f"{'='*70}\n")
 
+    if args.plan:
+        download_plan = downloader.plan(selected)
+        print(f"\n{'='*70}")
+        print("Download Plan:")
+        print(download_plan.report())
+        print(f"{'='*70}\n")
+        return
+
+    if args.sync:
+        try:
+            sync_plan = downloader.sync(selected, quarantine_removed=args.quarantine)
+        finally:
+            downloader.close_watchlist()
+            downloader.close_processing()
+        print(f"\n{'='*70}")
+        print("Sync:")
+        print(sync_plan.report())
+        print(f"{'='*70}\n")
+        if not args.no_download:
+            downloader.save_metadata()
+        return
+
     # Download
-    downloader.download_data_sets(selected)
+    try:
+        downloader.download_data_sets(selected)
+    finally:
+        downloader.close_queue()
+        downloader.close_sink()
+        downloader.close_watchlist()
+        downloader.close_processing()
     downloader.save_metadata()
 
     print(f"\n{'='*70}")
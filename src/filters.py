@@ -0,0 +1,194 @@
+"""
+Selection filters: decide which listed files a run touches before any network I/O.
+
+A filter expression is a list of whitespace-separated terms that must all
+match. Values within a term are comma-separated alternatives, and a leading
+'!' negates a term:
+
+    category=documents,videos   file category
+    ext=pdf,mp4                 extension (leading dot optional)
+    efta=1000-1999,2500         EFTA number, inclusive ranges or single numbers
+    name=EFTA0001*              filename glob (case-insensitive)
+    name~^EFTA000[0-4]          filename regex (searched, case-insensitive)
+    size<20M  size>=1K          known size (<, <=, >, >=, =; binary units)
+
+The expression is compiled once and applied while the link list is read or
+a listing page is parsed, so excluded files never reach the download queue.
+Size terms are evaluated with sizes already known (metadata or the plan
+probe cache); files whose size is unknown pass until apply_size_terms()
+HEAD-probes them, which only happens for files the other terms kept.
+"""
+
+import argparse
+import fnmatch
+import operator
+import re
+import shlex
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from planner import ProbeCache, probe_sizes
+from throttle import parse_size
+
+_EFTA_NUMBER = re.compile(r"EFTA(\d+)", re.IGNORECASE)
+_TERM = re.compile(r"(?P<field>[a-z]+)\s*(?P<op><=|>=|!=|=|<|>|~)\s*(?P<value>.+)", re.IGNORECASE)
+_SIZE_OPS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '!=': operator.ne,
+}
+
+
+def efta_number(file_info: Dict) -> Optional[int]:
+    """EFTA number in a file's name, if it has one."""
+    match = _EFTA_NUMBER.search(file_info.get('filename', ''))
+    return int(match.group(1)) if match else None
+
+
+def _parse_ranges(value: str) -> List[tuple]:
+    ranges = []
+    for part in value.split(','):
+        low, sep, high = part.strip().partition('-')
+        try:
+            low = int(low)
+            high = int(high) if sep else low
+        except ValueError:
+            raise ValueError(f"Invalid EFTA range '{part}' (expected e.g. 1000-1999 or 2500)")
+        if high < low:
+            raise ValueError(f"Invalid EFTA range '{part}' (end before start)")
+        ranges.append((low, high))
+    return ranges
+
+
+class _Term:
+    """One compiled term: a predicate over (file_info, size)."""
+
+    def __init__(self, text: str, predicate: Callable[[Dict, Optional[int]], bool],
+                 negate: bool = False, is_size: bool = False):
+        self.text = text
+        self.predicate = predicate
+        self.negate = negate
+        self.is_size = is_size
+
+    def __call__(self, file_info: Dict, size: Optional[int]) -> bool:
+        if self.is_size and size is None:
+            return True  # decided later, once the size is known
+        return self.predicate(file_info, size) != self.negate
+
+
+def _compile_term(text: str) -> _Term:
+    negate = text.startswith('!')
+    match = _TERM.fullmatch(text[1:] if negate else text)
+    if not match:
+        raise ValueError(f"Invalid filter term '{text}' (expected e.g. ext=pdf, size<20M)")
+    field, op, value = match.group('field').lower(), match.group('op'), match.group('value')
+
+    if field == 'size':
+        if op == '~':
+            raise ValueError(f"Invalid filter term '{text}' (size takes <, <=, >, >=, = or !=)")
+        limit = parse_size(value)
+        compare = _SIZE_OPS[op]
+        return _Term(text, lambda f, size: compare(size, limit), negate, is_size=True)
+
+    if op == '!=':
+        op, negate = '=', not negate
+    if field == 'name' and op == '~':
+        try:
+            pattern = re.compile(value, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regex in '{text}': {e}")
+        return _Term(text, lambda f, size: pattern.search(f['filename']) is not None, negate)
+    if op != '=':
+        raise ValueError(f"Invalid filter term '{text}' ({field} takes = or !=)")
+
+    values = [v.strip() for v in value.split(',') if v.strip()]
+    if field == 'category':
+        wanted = {v.lower() for v in values}
+        return _Term(text, lambda f, size: f['category'] in wanted, negate)
+    if field == 'ext':
+        wanted = {v.lower() if v.startswith('.') else '.' + v.lower() for v in values}
+        return _Term(text, lambda f, size: Path(f['filename']).suffix.lower() in wanted, negate)
+    if field == 'efta':
+        ranges = _parse_ranges(value)
+
+        def in_ranges(f, size):
+            number = efta_number(f)
+            return number is not None and any(low <= number <= high for low, high in ranges)
+        return _Term(text, in_ranges, negate)
+    if field == 'name':
+        patterns = [v.lower() for v in values]
+        return _Term(text, lambda f, size: any(fnmatch.fnmatchcase(f['filename'].lower(), p) for p in patterns),
+                     negate)
+    raise ValueError(f"Unknown filter field '{field}' (use category, ext, efta, name or size)")
+
+
+class FileFilter:
+    """A compiled filter expression."""
+
+    def __init__(self, expression: str):
+        """
+        Args:
+            expression: Filter expression (see the module docstring)
+
+        Raises:
+            ValueError: If the expression does not parse
+        """
+        self.expression = expression
+        try:
+            words = shlex.split(expression)
+        except ValueError as e:
+            raise ValueError(f"Invalid filter '{expression}': {e}")
+        if not words:
+            raise ValueError("Empty filter expression")
+        self.terms = [_compile_term(word) for word in words]
+        self.uses_size = any(term.is_size for term in self.terms)
+
+    def matches(self, file_info: Dict, size: Optional[int] = None) -> bool:
+        """
+        Whether a file passes every term.
+
+        Args:
+            file_info: File entry (filename, category, ...)
+            size: Size in bytes if known; falls back to file_info['file_size_bytes']
+
+        Returns:
+            False if any term rejects the file; size terms pass while the size is unknown
+        """
+        if size is None:
+            size = file_info.get('file_size_bytes')
+        return all(term(file_info, size) for term in self.terms)
+
+    def __str__(self) -> str:
+        return self.expression
+
+
+def filter_arg(expression: str) -> FileFilter:
+    """argparse type for --filter."""
+    try:
+        return FileFilter(expression)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def apply_size_terms(files: List[Dict], file_filter: FileFilter, session: requests.Session,
+                     cache: ProbeCache, logger=None) -> List[Dict]:
+    """
+    Drop files rejected by the filter's size terms, HEAD-probing unknown sizes.
+
+    Sizes come from the file entry, then the probe cache; only the rest is
+    probed (and cached for --plan and preallocation). Files the server gives
+    no size for are kept.
+
+    Returns:
+        Files that pass the filter
+    """
+    if not file_filter.uses_size:
+        return files
+    unknown = [f for f in files if 'file_size_bytes' not in f and cache.size(f['url']) is None]
+    if unknown:
+        if logger is not None:
+            logger.info(f"Probing {len(unknown)} files for the size filter...")
+        probe_sizes(session, unknown, cache, logger=logger)
+        cache.save()
+    return [f for f in files if file_filter.matches(f, cache.size(f['url']))]
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Storage layout of the download tree.
+
+Files live under data_set_N/<category>/. In the default flat layout that
+is where they are stored directly; with hundreds of thousands of files per
+category, listing, stat-heavy tools and backups of such a directory get
+slow. The fan-out layouts add one level of subfolders:
+
+    flat   data_set_N/<category>/<filename>
+    efta   data_set_N/<category>/<EFTA number // FANOUT_EFTA_BUCKET, 5 digits>/<filename>
+           (names without an EFTA number go to _misc/)
+    hash   data_set_N/<category>/<first 2 hex digits of sha256(filename)>/<filename>
+
+The layout of a tree is recorded in LAYOUT_FILE in the output directory and
+StorageLayout resolves paths for the downloaders and every tool that reads
+the tree. `layout.py migrate` converts a tree in place with renames only;
+an interrupted migration is finished by running it again, and files are
+found in either layout until then.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import config
+from catalog import Catalog
+
+LAYOUTS = ('flat', 'efta', 'hash')
+
+_EFTA_NUMBER = re.compile(r"EFTA(\d+)", re.IGNORECASE)
+_MISC_BUCKET = '_misc'
+# Subfolder names of each fan-out layout (anything else under a category, e.g.
+# extracted archive members, is not part of the layout)
+_BUCKET_NAMES = {
+    'efta': re.compile(r"\d{5,}|" + _MISC_BUCKET),
+    'hash': re.compile(r"[0-9a-f]{2}"),
+}
+
+
+class LayoutError(Exception):
+    """Raised when a tree's layout is unknown or conflicts with the one requested."""
+
+
+def bucket_of(filename: str, layout: str) -> Optional[str]:
+    """Subfolder a file goes to in a layout (None for flat)."""
+    if layout == 'efta':
+        match = _EFTA_NUMBER.search(filename)
+        if not match:
+            return _MISC_BUCKET
+        return f"{int(match.group(1)) // config.FANOUT_EFTA_BUCKET:05d}"
+    if layout == 'hash':
+        return hashlib.sha256(filename.encode('utf-8')).hexdigest()[:2]
+    return None
+
+
+class StorageLayout:
+    """Path resolver for one download tree."""
+
+    def __init__(self, output_dir: Path, name: str = 'flat', previous: Optional[str] = None):
+        """
+        Args:
+            output_dir: Download tree root
+            name: Layout new files are stored in
+            previous: Layout a migration is moving away from (files may still be there)
+        """
+        if name not in LAYOUTS or (previous is not None and previous not in LAYOUTS):
+            raise LayoutError(f"Unknown layout '{name if name not in LAYOUTS else previous}' "
+                              f"(choose from {', '.join(LAYOUTS)})")
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.previous = previous
+
+    @property
+    def marker_path(self) -> Path:
+        return self.output_dir / config.LAYOUT_FILE
+
+    @classmethod
+    def load(cls, output_dir: Path) -> 'StorageLayout':
+        """
+        Layout recorded for a tree (flat when nothing is recorded).
+
+        Raises:
+            LayoutError: If the layout file is unreadable or names an unknown layout
+        """
+        marker_path = Path(output_dir) / config.LAYOUT_FILE
+        try:
+            with open(marker_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return cls(output_dir)
+        except (OSError, ValueError) as e:
+            raise LayoutError(f"Cannot read {marker_path}: {e}")
+        if not isinstance(state, dict):
+            raise LayoutError(f"{marker_path} is not a layout file")
+        return cls(output_dir, state.get('layout', 'flat'), state.get('previous'))
+
+    @classmethod
+    def open(cls, output_dir: Path, requested: Optional[str] = None) -> 'StorageLayout':
+        """
+        Layout for a run writing to `output_dir`.
+
+        An empty tree takes the requested layout (default config.STORAGE_LAYOUT)
+        and records it; an existing tree keeps its own.
+
+        Raises:
+            LayoutError: If an existing tree uses a different layout than requested
+        """
+        layout = cls.load(output_dir)
+        if layout.marker_path.exists() or next(layout.files(), None) is not None:
+            if requested is not None and requested != layout.name:
+                raise LayoutError(
+                    f"{output_dir} uses the {layout.name} layout; convert it first with "
+                    f"`python src/layout.py --output-dir {output_dir} migrate --to {requested}`"
+                )
+            return layout
+        layout = cls(output_dir, requested or config.STORAGE_LAYOUT)
+        if layout.name != 'flat':
+            layout.save()
+        return layout
+
+    def save(self) -> None:
+        """Record the layout in the output directory (atomically)."""
+        state = {'layout': self.name}
+        if self.previous is not None:
+            state['previous'] = self.previous
+        self.output_dir.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.marker_path.with_name(self.marker_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.marker_path)
+
+    def path(self, data_set: int, category: str, filename: str, layout: Optional[str] = None) -> Path:
+        """Where a file belongs (in this layout, or the one given)."""
+        category_dir = self.output_dir / f"data_set_{data_set}" / category
+        bucket = bucket_of(filename, layout or self.name)
+        return category_dir / bucket / filename if bucket else category_dir / filename
+
+    def locate(self, data_set: int, category: str, filename: str) -> Path:
+        """Where a file is: its place in this layout, or in the previous one while a migration is unfinished."""
+        path = self.path(data_set, category, filename)
+        if self.previous is not None and not path.exists():
+            old_path = self.path(data_set, category, filename, self.previous)
+            if old_path.exists():
+                return old_path
+        return path
+
+    def files(self, data_sets: Optional[Iterable[int]] = None,
+              categories: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """
+        Downloaded files in the tree (.part leftovers and extracted archive members excluded).
+
+        Args:
+            data_sets: Only these data sets (default: every data_set_N folder)
+            categories: Only these categories (default: all)
+
+        Yields:
+            Dicts with data_set, category, filename and path
+        """
+        if data_sets is None:
+            data_set_dirs = []
+            for path in self.output_dir.glob("data_set_*"):
+                match = re.fullmatch(r"data_set_(\d+)", path.name)
+                if match and path.is_dir():
+                    data_set_dirs.append((int(match.group(1)), path))
+            data_set_dirs.sort()
+        else:
+            data_set_dirs = [(n, self.output_dir / f"data_set_{n}") for n in data_sets]
+        wanted = set(categories) if categories is not None else None
+        buckets = [_BUCKET_NAMES[name] for name in (self.name, self.previous) if name in _BUCKET_NAMES]
+
+        for data_set, data_set_dir in data_set_dirs:
+            if not data_set_dir.is_dir():
+                continue
+            with os.scandir(data_set_dir) as category_entries:
+                category_dirs = sorted((e.name, e.path) for e in category_entries if e.is_dir())
+            for category, category_dir in category_dirs:
+                if wanted is not None and category not in wanted:
+                    continue
+                for entry in self._scan(category_dir, buckets):
+                    yield {'data_set': data_set, 'category': category, 'filename': entry.name,
+                           'path': Path(entry.path)}
+
+    @staticmethod
+    def _scan(directory: str, buckets: List) -> Iterator[os.DirEntry]:
+        with os.scandir(directory) as entries:
+            entries = sorted(entries, key=lambda e: e.name)
+        for entry in entries:
+            if entry.is_file():
+                if not entry.name.endswith('.part'):
+                    yield entry
+            elif entry.is_dir() and any(b.fullmatch(entry.name) for b in buckets):
+                with os.scandir(entry.path) as inner:
+                    inner = sorted(inner, key=lambda e: e.name)
+                yield from (e for e in inner if e.is_file() and not e.name.endswith('.part'))
+
+
+def migrate(output_dir: Path, target: str, logger: Optional[logging.Logger] = None) -> int:
+    """
+    Convert a tree to another layout in place, with renames only.
+
+    The layout file names the target (and the layout being left) before the
+    first rename, so readers find every file while the migration runs and a
+    second call finishes an interrupted one. Catalog records keyed by path
+    are re-keyed as files move.
+
+    Args:
+        output_dir: Download tree root
+        target: Layout to convert to
+
+    Returns:
+        Number of files moved
+
+    Raises:
+        LayoutError: If the target is unknown or another migration is unfinished
+        OSError: If a rename fails (e.g. a category folder on another filesystem)
+    """
+    logger = logger or logging.getLogger(__name__)
+    current = StorageLayout.load(output_dir)
+    if current.previous is not None and current.name != target:
+        raise LayoutError(f"A migration to {current.name} is unfinished; run it again with --to {current.name}")
+    layout = StorageLayout(output_dir, target, current.previous or current.name)
+    if layout.previous == target:
+        layout.previous = None
+        layout.save()
+        return 0
+    layout.save()
+
+    output_dir = layout.output_dir
+    moved = 0
+    with Catalog(output_dir) as catalog:
+        renames = []
+        for record in list(layout.files()):
+            dest = layout.path(record['data_set'], record['category'], record['filename'])
+            if record['path'] == dest:
+                continue
+            if dest.exists():
+                logger.warning(f"Not moving {record['path']}: {dest} already exists")
+                continue
+            dest.parent.mkdir(exist_ok=True)
+            os.rename(record['path'], dest)
+            renames.append((record['path'].relative_to(output_dir).as_posix(),
+                            dest.relative_to(output_dir).as_posix()))
+            moved += 1
+            if len(renames) >= 1000:
+                catalog.rename_paths(renames)
+                renames = []
+        catalog.rename_paths(renames)
+
+    # Drop the previous layout's subfolders once they are empty
+    if layout.previous in _BUCKET_NAMES:
+        for data_set_dir in output_dir.glob("data_set_*"):
+            for bucket_dir in data_set_dir.glob("*/*"):
+                if bucket_dir.is_dir() and _BUCKET_NAMES[layout.previous].fullmatch(bucket_dir.name):
+                    try:
+                        bucket_dir.rmdir()
+                    except OSError:
+                        pass  # not empty (e.g. a name shared with the new layout)
+
+    logger.info(f"Moved {moved} files from the {layout.previous} to the {target} layout")
+    layout.previous = None
+    layout.save()
+    return moved
+
+
+def main():
+    """Command-line entry point for inspecting and converting the storage layout."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Show or convert the storage layout of the download tree"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("show", help="Print the tree's layout and file count")
+    migrate_parser = subparsers.add_parser("migrate", help="Convert the tree in place (renames only, no copying)")
+    migrate_parser.add_argument(
+        "--to",
+        choices=LAYOUTS,
+        required=True,
+        help="Layout to convert to"
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+
+    try:
+        if args.command == "show":
+            layout = StorageLayout.load(output_dir)
+            count = sum(1 for _ in layout.files())
+            state = f" (migration from {layout.previous} unfinished)" if layout.previous else ""
+            print(f"{output_dir}: {layout.name} layout{state}, {count} files")
+        elif args.command == "migrate":
+            moved = migrate(output_dir, args.to)
+            print(f"\n✓ {output_dir} now uses the {args.to} layout ({moved} files moved)")
+    except (LayoutError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
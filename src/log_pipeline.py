@@ -0,0 +1,157 @@
+"""
+Non-blocking logging shared by the scraper and the CSV downloader.
+
+Loggers get a single QueueHandler; a QueueListener thread owns the file and
+console handlers and does all formatting and I/O, so a log call from a
+download thread only appends to an in-memory queue. Records are queued
+unformatted: pass arguments %-style (logger.debug("Got %s", name)) and the
+message is built on the listener thread, and not at all when the level is
+filtered out. Console output is capped at CONSOLE_LOG_RATE lines per second
+(warnings and errors always get through); the log file keeps everything,
+optionally as JSON lines.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+import config
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+_listeners: Dict[str, logging.handlers.QueueListener] = {}
+_listeners_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                    + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() merges msg and args on the calling thread; here the
+    record is queued as is. Arguments must therefore not be mutated after
+    the log call (strings and numbers, as used throughout this package).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RateLimitedStreamHandler(logging.StreamHandler):
+    """Console handler printing at most `per_second` INFO/DEBUG lines per second."""
+
+    def __init__(self, stream=None, per_second: float = config.CONSOLE_LOG_RATE):
+        super().__init__(stream)
+        self.per_second = per_second
+        self._window_start = 0.0
+        self._in_window = 0
+        self.suppressed = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno < logging.WARNING and self.per_second:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                if self.suppressed:
+                    self.stream.write(f"... {self.suppressed} log lines not shown on console (see log file)\n")
+                    self.suppressed = 0
+                self._window_start = now
+                self._in_window = 0
+            if self._in_window >= self.per_second:
+                self.suppressed += 1
+                return
+            self._in_window += 1
+        super().emit(record)
+
+
+def setup_logger(name: str, log_file: Path, json_lines: bool = config.LOG_JSON,
+                 level: int = logging.INFO) -> logging.Logger:
+    """
+    Configure a logger that hands records to a background listener thread.
+
+    Calling it again for the same name replaces the previous handlers (the
+    old listener is flushed and stopped first).
+
+    Args:
+        name: Logger name
+        log_file: File receiving every record
+        json_lines: Write the file as JSON lines instead of text
+        level: Minimum level
+
+    Returns:
+        The configured logger
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    stop_logger(logger)
+
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setLevel(level)
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+
+    console_handler = RateLimitedStreamHandler(sys.stdout)
+    console_handler.setLevel(level)
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()  # unbounded: a log call never waits
+    listener = logging.handlers.QueueListener(records, file_handler, console_handler,
+                                              respect_handler_level=True)
+    listener.start()
+    with _listeners_lock:
+        _listeners[name] = listener
+    logger.addHandler(LazyQueueHandler(records))
+    return logger
+
+
+def stop_logger(logger: logging.Logger) -> None:
+    """Flush and stop a logger's listener, closing its file."""
+    with _listeners_lock:
+        listener = _listeners.pop(logger.name, None)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            try:
+                handler.close()
+            except Exception:
+                # Best-effort close; ignore errors during cleanup
+                pass
+
+
+@atexit.register
+def _stop_all() -> None:
+    """Drain every queue at interpreter exit so no record is lost."""
+    with _listeners_lock:
+        names = list(_listeners)
+    for name in names:
+        stop_logger(logging.getLogger(name))
@@ -0,0 +1,322 @@
+"""
+Compiled link manifests.
+
+`compile` merges one or more link CSVs (data_set, url, link_text columns),
+normalizes and deduplicates URLs, drops filenames that don't match
+FILENAME_PATTERN, and writes a compact binary manifest sorted by data set
+and EFTA number. CSVDownloader accepts the manifest in place of a CSV: it is
+memory-mapped, data set counts come straight from the index, and a data
+set's records are only decoded when that data set is used.
+
+Layout (little endian):
+    header      magic "EFMF", version u16, reserved u16, records u32, data sets u32
+    index       per data set: number u32, first record u32, record count u32
+    records     per file: EFTA number u64, url offset u32, url length u16,
+                filename offset u32, filename length u16, category u8
+    strings     UTF-8 URLs and filenames referenced by the records
+"""
+
+import bisect
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import config
+
+MAGIC = b"EFMF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+INDEX_ENTRY = struct.Struct("<III")
+RECORD = struct.Struct("<QIHIHB")
+
+CATEGORIES = list(config.FILE_CATEGORIES) + ['other']
+_EFTA_NUMBER = re.compile(r"EFTA(\d+)", re.IGNORECASE)
+
+
+class ManifestError(Exception):
+    """Raised when a manifest file is missing, truncated or of another format."""
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a link for deduplication.
+
+    Relative links are resolved against BASE_URL; scheme and host are
+    lower-cased, default ports and fragments dropped. Path and query are
+    kept as they are (the server treats them case-sensitively).
+    """
+    parts = urlsplit(urljoin(config.BASE_URL + "/", url.strip()))
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in {("http", 80), ("https", 443)}:
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+def read_link_csvs(csv_paths: List[Path]) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Merge link CSVs into validated, deduplicated file entries.
+
+    The first occurrence of a URL wins, as does the first occurrence of a
+    filename within a data set.
+
+    Returns:
+        (entries with data_set/efta/url/filename/category, counts of
+         'rows', 'duplicates' and 'invalid')
+    """
+    entries = []
+    seen_urls = set()
+    seen_names = set()
+    stats = {'rows': 0, 'duplicates': 0, 'invalid': 0}
+
+    for csv_path in csv_paths:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            required_columns = {'data_set', 'url', 'link_text'}
+            if not reader.fieldnames or not required_columns.issubset(reader.fieldnames):
+                raise ValueError(f"{csv_path}: missing required columns {sorted(required_columns)}")
+            for row in reader:
+                stats['rows'] += 1
+                try:
+                    data_set = int(row['data_set'])
+                    url = normalize_url(row['url'])
+                    filename = Path(row['link_text'].strip()).name
+                except (KeyError, ValueError, TypeError, AttributeError):
+                    stats['invalid'] += 1
+                    continue
+                match = _EFTA_NUMBER.search(filename)
+                if (not re.search(config.FILENAME_PATTERN, filename, re.IGNORECASE) or match is None
+                        or len(url.encode('utf-8')) > 0xFFFF or len(filename.encode('utf-8')) > 0xFFFF):
+                    stats['invalid'] += 1
+                    continue
+                name_key = (data_set, filename.lower())
+                if url in seen_urls or name_key in seen_names:
+                    stats['duplicates'] += 1
+                    continue
+                seen_urls.add(url)
+                seen_names.add(name_key)
+                entries.append({
+                    'data_set': data_set,
+                    'efta': int(match.group(1)),
+                    'url': url,
+                    'filename': filename,
+                    'category': config.categorize(filename),
+                })
+
+    entries.sort(key=lambda e: (e['data_set'], e['efta'], e['filename']))
+    return entries, stats
+
+
+def write_manifest(entries: List[Dict], out_path: Path) -> None:
+    """Write sorted entries as a binary manifest (atomically)."""
+    index: Dict[int, List[int]] = {}
+    for position, entry in enumerate(entries):
+        first_and_count = index.setdefault(entry['data_set'], [position, 0])
+        first_and_count[1] += 1
+
+    strings = bytearray()
+    records = bytearray()
+    for entry in entries:
+        url = entry['url'].encode('utf-8')
+        name = entry['filename'].encode('utf-8')
+        url_offset = len(strings)
+        strings += url
+        name_offset = len(strings)
+        strings += name
+        records += RECORD.pack(entry['efta'], url_offset, len(url), name_offset, len(name),
+                               CATEGORIES.index(entry['category']))
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_name(out_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), len(index)))
+        for data_set in sorted(index):
+            f.write(INDEX_ENTRY.pack(data_set, *index[data_set]))
+        f.write(records)
+        f.write(strings)
+    os.replace(tmp_path, out_path)
+
+
+def compile_manifest(csv_paths: List[Path], out_path: Path) -> Dict[str, int]:
+    """
+    Compile link CSVs into a manifest.
+
+    Returns:
+        Counts: 'rows' read, 'files' written, 'duplicates' and 'invalid' dropped
+    """
+    entries, stats = read_link_csvs(csv_paths)
+    write_manifest(entries, out_path)
+    stats['files'] = len(entries)
+    return stats
+
+
+class _EftaColumn:
+    """Sequence view of the EFTA numbers of a record range, for bisect."""
+
+    def __init__(self, manifest: 'Manifest', first: int, count: int):
+        self.manifest = manifest
+        self.first = first
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> int:
+        return self.manifest._record(self.first + i)[0]
+
+
+class Manifest(Mapping):
+    """
+    Memory-mapped manifest, usable as {data_set: [file_info, ...]}.
+
+    Opening reads only the header and index; a data set's file_info dicts
+    are decoded on first access and cached.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            self._file = open(self.path, 'rb')
+        except OSError as e:
+            raise ManifestError(f"Cannot open manifest {self.path}: {e}")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ManifestError(f"{self.path} is empty")
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ManifestError(f"{self.path} is not a manifest")
+        magic, version, _, self.total_files, set_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ManifestError(f"{self.path} is not a version {VERSION} manifest")
+
+        self._index: Dict[int, Tuple[int, int]] = {}
+        for i in range(set_count):
+            data_set, first, count = INDEX_ENTRY.unpack_from(self._map, HEADER.size + i * INDEX_ENTRY.size)
+            self._index[data_set] = (first, count)
+        self._records_start = HEADER.size + set_count * INDEX_ENTRY.size
+        self._strings_start = self._records_start + self.total_files * RECORD.size
+        if self._strings_start > len(self._map):
+            self.close()
+            raise ManifestError(f"{self.path} is truncated")
+        self._decoded: Dict[int, List[Dict]] = {}
+
+    def _record(self, position: int) -> Tuple:
+        return RECORD.unpack_from(self._map, self._records_start + position * RECORD.size)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_start + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _file_info(self, data_set: int, position: int) -> Dict:
+        _, url_offset, url_length, name_offset, name_length, category = self._record(position)
+        filename = self._string(name_offset, name_length)
+        return {
+            'filename': filename,
+            'url': self._string(url_offset, url_length),
+            'data_set': data_set,
+            'file_type': Path(filename).suffix.lower(),
+            'category': CATEGORIES[category],
+        }
+
+    def count(self, data_set: int) -> int:
+        """Number of files in a data set, from the index alone."""
+        return self._index.get(data_set, (0, 0))[1]
+
+    def find(self, efta: int) -> List[Dict]:
+        """All files with a given EFTA number (binary search per data set)."""
+        found = []
+        for data_set, (first, count) in sorted(self._index.items()):
+            column = _EftaColumn(self, first, count)
+            i = bisect.bisect_left(column, efta)
+            while i < count and column[i] == efta:
+                found.append(self._file_info(data_set, first + i))
+                i += 1
+        return found
+
+    def __getitem__(self, data_set: int) -> List[Dict]:
+        if data_set not in self._index:
+            raise KeyError(data_set)
+        if data_set not in self._decoded:
+            first, count = self._index[data_set]
+            self._decoded[data_set] = [self._file_info(data_set, first + i) for i in range(count)]
+        return self._decoded[data_set]
+
+    def __contains__(self, data_set) -> bool:
+        return data_set in self._index
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self._index))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        """Unmap and close the file (decoded data sets stay usable)."""
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def is_manifest(path: Path) -> bool:
+    """True if a file starts with the manifest magic."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def main():
+    """Command line entry point: compile link CSVs or describe a manifest."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile link CSVs into a binary manifest")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser("compile", help="Merge, deduplicate and compile link CSVs")
+    compile_parser.add_argument("csv_files", nargs="+", help="Link CSVs (data_set, url, link_text)")
+    compile_parser.add_argument(
+        "-o", "--output",
+        default=config.MANIFEST_FILE,
+        help=f"Manifest to write (default: {config.MANIFEST_FILE})"
+    )
+
+    info_parser = subparsers.add_parser("info", help="Show the data sets in a manifest")
+    info_parser.add_argument("manifest", help="Manifest file")
+
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        try:
+            stats = compile_manifest([Path(p) for p in args.csv_files], Path(args.output))
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✓ Wrote {stats['files']} files to {args.output} "
+              f"({stats['rows']} rows read, {stats['duplicates']} duplicates, {stats['invalid']} invalid)")
+    else:
+        try:
+            manifest = Manifest(Path(args.manifest))
+        except ManifestError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"{manifest.total_files} files in {len(manifest)} data sets")
+        for data_set in manifest:
+            print(f"  Data Set {data_set}: {manifest.count(data_set)} files")
+        manifest.close()
+
+
+if __name__ == "__main__":
+    main()
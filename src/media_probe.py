@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Header-only media prober for downloaded videos and audio.
+
+Reads just the container headers (MP4/MOV boxes, seeking past `mdat` to a
+trailing `moov`; RIFF chunks of WAV and AVI; the first MP3 frame and its
+Xing/VBRI header; the first and last OGG pages; ADTS headers) to get
+duration, codec, resolution, sample rate and bitrate, typically touching a
+few KB per file. Every file's first bytes are also matched against known
+magic numbers so files whose extension doesn't match their content are
+flagged. Results are stored in the catalog's media_info table.
+"""
+
+import logging
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import config
+from archives import data_set_from_path
+from catalog import Catalog, path_key
+from layout import StorageLayout
+
+SNIFF_BYTES = 64
+
+# Content types each extension may legitimately hold
+EXTENSION_TYPES = {
+    '.mp4': {'mp4', 'mov'},
+    '.mov': {'mov', 'mp4'},
+    '.m4a': {'mp4'},
+    '.avi': {'avi'},
+    '.wmv': {'asf'},
+    '.flv': {'flv'},
+    '.mp3': {'mp3'},
+    '.wav': {'wav'},
+    '.aac': {'aac', 'mp4'},
+    '.ogg': {'ogg'},
+    '.pdf': {'pdf'},
+    '.docx': {'zip'},
+    '.doc': {'ole'},
+    '.rtf': {'rtf'},
+    '.jpg': {'jpeg'},
+    '.jpeg': {'jpeg'},
+    '.png': {'png'},
+    '.gif': {'gif'},
+    '.bmp': {'bmp'},
+    '.tiff': {'tiff'},
+    '.zip': {'zip'},
+    '.rar': {'rar'},
+    '.7z': {'7z'},
+}
+
+_MAGIC = [
+    (0, b'%PDF', 'pdf'),
+    (0, b'PK\x03\x04', 'zip'),
+    (0, b'PK\x05\x06', 'zip'),
+    (0, b'Rar!\x1a\x07', 'rar'),
+    (0, b"7z\xbc\xaf'\x1c", '7z'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole'),
+    (0, b'{\\rtf', 'rtf'),
+    (0, b'\xff\xd8\xff', 'jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'png'),
+    (0, b'GIF8', 'gif'),
+    (0, b'BM', 'bmp'),
+    (0, b'II*\x00', 'tiff'),
+    (0, b'MM\x00*', 'tiff'),
+    (0, b'OggS', 'ogg'),
+    (0, b'fLaC', 'flac'),
+    (0, b'FLV\x01', 'flv'),
+    (0, b'0&\xb2u\x8ef\xcf\x11', 'asf'),
+    (0, b'ID3', 'mp3'),
+    (0, b'\x1aE\xdf\xa3', 'mkv'),
+    (4, b'ftyp', 'mp4'),
+    (4, b'moov', 'mov'),
+    (4, b'mdat', 'mov'),
+    (4, b'wide', 'mov'),
+    (4, b'free', 'mov'),
+]
+
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+_ADTS_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350]
+_WAV_CODECS = {1: 'pcm', 3: 'pcm_float', 6: 'alaw', 7: 'mulaw', 0x55: 'mp3', 0xFFFE: 'extensible'}
+
+# A moov box larger than this is not read (a few MB even for hours of video)
+_MAX_MOOV = 64 * 1024 * 1024
+_OGG_TAIL = 64 * 1024
+
+
+def sniff_type(head: bytes) -> Optional[str]:
+    """Content type from a file's first bytes, or None if unrecognized."""
+    for offset, magic, kind in _MAGIC:
+        if head[offset:offset + len(magic)] == magic:
+            if kind == 'mp4' and head[8:12] == b'qt  ':
+                return 'mov'
+            return kind
+    if head[:4] == b'RIFF':
+        return {b'WAVE': 'wav', b'AVI ': 'avi'}.get(head[8:12])
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        # MPEG audio frame sync: layer bits 00 are ADTS (AAC), anything else MP1/2/3
+        return 'aac' if head[1] & 0x06 == 0 else 'mp3'
+    return None
+
+
+class _Reader:
+    """Seek/read wrapper that counts bytes actually read."""
+
+    def __init__(self, f, size: int):
+        self.f = f
+        self.size = size
+        self.bytes_read = 0
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        self.f.seek(offset)
+        data = self.f.read(max(0, min(length, self.size - offset)))
+        self.bytes_read += len(data)
+        return data
+
+
+def _boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield (type, payload start, payload end) of the ISO BMFF boxes in data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _child(data: bytes, start: int, end: int, kind: bytes) -> Optional[Tuple[int, int]]:
+    for child_kind, child_start, child_end in _boxes(data, start, end):
+        if child_kind == kind:
+            return child_start, child_end
+    return None
+
+
+def _probe_mp4(reader: _Reader) -> Dict:
+    """Find `moov` by walking top-level box headers (seeking over mdat) and parse it."""
+    pos = 0
+    moov = None
+    while pos + 8 <= reader.size:
+        header = reader.read_at(pos, 16)
+        size, kind = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = reader.size - pos
+        if size < header_size:
+            raise ValueError(f"corrupt box header at offset {pos}")
+        if kind == b'moov':
+            if size > _MAX_MOOV:
+                raise ValueError(f"moov box too large ({size} bytes)")
+            moov = reader.read_at(pos + header_size, size - header_size)
+            break
+        pos += size
+    if moov is None:
+        raise ValueError("no moov box")
+
+    info: Dict = {}
+    mvhd = _child(moov, 0, len(moov), b'mvhd')
+    if mvhd:
+        start = mvhd[0]
+        if moov[start] == 1:
+            timescale, duration = struct.unpack_from('>IQ', moov, start + 20)
+        else:
+            timescale, duration = struct.unpack_from('>II', moov, start + 12)
+        if timescale:
+            info['duration'] = duration / timescale
+
+    codecs = []
+    for kind, trak_start, trak_end in _boxes(moov):
+        if kind != b'trak':
+            continue
+        mdia = _child(moov, trak_start, trak_end, b'mdia')
+        if not mdia:
+            continue
+        hdlr = _child(moov, mdia[0], mdia[1], b'hdlr')
+        handler = moov[hdlr[0] + 8:hdlr[0] + 12] if hdlr else b''
+        stsd = None
+        minf = _child(moov, mdia[0], mdia[1], b'minf')
+        stbl = minf and _child(moov, minf[0], minf[1], b'stbl')
+        if stbl:
+            stsd = _child(moov, stbl[0], stbl[1], b'stsd')
+        entry = stsd[0] + 8 if stsd else None  # skip version/flags and entry count
+        if entry is not None and entry + 8 <= stsd[1]:
+            codecs.append(moov[entry + 4:entry + 8].decode('latin-1').strip())
+        if handler == b'vide' and 'width' not in info:
+            tkhd = _child(moov, trak_start, trak_end, b'tkhd')
+            if tkhd:
+                width, height = struct.unpack_from('>II', moov, tkhd[1] - 8)
+                info['width'], info['height'] = width >> 16, height >> 16
+        elif handler == b'soun' and 'sample_rate' not in info and entry is not None and entry + 36 <= stsd[1]:
+            channels, _, _, _, rate = struct.unpack_from('>HHHHI', moov, entry + 24)
+            info['channels'], info['sample_rate'] = channels, rate >> 16
+    if codecs:
+        info['codec'] = ','.join(codecs)
+    return info
+
+
+def _riff_chunks(reader: _Reader, start: int, end: int):
+    """Yield (id, data offset, size) of the RIFF chunks between start and end."""
+    pos = start
+    while pos + 8 <= end:
+        header = reader.read_at(pos, 8)
+        if len(header) < 8:
+            return
+        chunk_id, size = struct.unpack('<4sI', header)
+        yield chunk_id, pos + 8, size
+        pos += 8 + size + (size & 1)
+
+
+def _probe_wav(reader: _Reader) -> Dict:
+    info: Dict = {}
+    byte_rate = None
+    for chunk_id, offset, size in _riff_chunks(reader, 12, reader.size):
+        if chunk_id == b'fmt ':
+            fmt, channels, rate, byte_rate, _, bits = struct.unpack('<HHIIHH', reader.read_at(offset, 16))
+            info.update(codec=_WAV_CODECS.get(fmt, f"0x{fmt:04x}"), channels=channels,
+                        sample_rate=rate, bitrate=byte_rate * 8)
+        elif chunk_id == b'data':
+            if byte_rate:
+                info['duration'] = min(size, reader.size - offset) / byte_rate
+            break
+    return info
+
+
+def _probe_avi(reader: _Reader) -> Dict:
+    info: Dict = {}
+    for chunk_id, offset, size in _riff_chunks(reader, 12, reader.size):
+        if chunk_id != b'LIST' or reader.read_at(offset, 4) != b'hdrl':
+            continue
+        for sub_id, sub_offset, sub_size in _riff_chunks(reader, offset + 4, offset + size):
+            if sub_id == b'avih':
+                avih = reader.read_at(sub_offset, 40)
+                usec_per_frame, = struct.unpack_from('<I', avih, 0)
+                total_frames, = struct.unpack_from('<I', avih, 16)
+                info['width'], info['height'] = struct.unpack_from('<II', avih, 32)
+                info['duration'] = total_frames * usec_per_frame / 1_000_000
+            elif sub_id == b'LIST' and reader.read_at(sub_offset, 4) == b'strl':
+                strh = reader.read_at(sub_offset + 12, 8)
+                if strh[:4] == b'vids' and 'codec' not in info:
+                    info['codec'] = strh[4:8].decode('latin-1').strip().lower()
+        break
+    return info
+
+
+def _mp3_frame(header: bytes, offset: int) -> Optional[Dict]:
+    """Decode an MPEG-1/2/2.5 Layer III frame header at header[offset:offset+4]."""
+    if offset + 4 > len(header):
+        return None
+    b1, b2, b3 = header[offset + 1], header[offset + 2], header[offset + 3]
+    if header[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 3
+    layer = (b1 >> 1) & 3
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    samples = 1152 if version == 3 else 576
+    return {
+        'version': version,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'channels': 1 if b3 >> 6 == 3 else 2,
+        'samples': samples,
+        'length': samples // 8 * bitrate // sample_rate + ((b2 >> 1) & 1),
+    }
+
+
+def _probe_mp3(reader: _Reader) -> Dict:
+    start = 0
+    head = reader.read_at(0, 10)
+    if head[:3] == b'ID3' and len(head) == 10:
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+    window = reader.read_at(start, 8192)
+    frame = None
+    for i in range(len(window) - 3):
+        candidate = _mp3_frame(window, i)
+        if candidate is None:
+            continue
+        # Require the next frame to line up too, unless it lies beyond the window
+        following = i + candidate['length']
+        if following + 4 > len(window) or _mp3_frame(window, following):
+            frame, start = candidate, start + i
+            window = window[i:]
+            break
+    if frame is None:
+        raise ValueError("no MPEG audio frame found")
+
+    info = {'codec': 'mp3', 'sample_rate': frame['sample_rate'], 'channels': frame['channels']}
+    # Xing/Info sits after the side information; VBRI at a fixed offset
+    side_info = (32 if frame['channels'] == 2 else 17) if frame['version'] == 3 else (17 if frame['channels'] == 2 else 9)
+    xing = 4 + side_info
+    frames = None
+    if window[xing:xing + 4] in (b'Xing', b'Info'):
+        flags, = struct.unpack_from('>I', window, xing + 4)
+        if flags & 1:
+            frames, = struct.unpack_from('>I', window, xing + 8)
+    elif window[36:40] == b'VBRI':
+        frames, = struct.unpack_from('>I', window, 36 + 14)
+
+    audio_bytes = reader.size - start
+    if frames:
+        info['duration'] = frames * frame['samples'] / frame['sample_rate']
+        info['bitrate'] = int(audio_bytes * 8 / info['duration']) if info['duration'] else frame['bitrate']
+    else:
+        info['bitrate'] = frame['bitrate']
+        info['duration'] = audio_bytes * 8 / frame['bitrate']
+    return info
+
+
+def _probe_aac(reader: _Reader) -> Dict:
+    header = reader.read_at(0, 7)
+    rate_index = (header[2] >> 2) & 0xF
+    info = {'codec': 'aac', 'channels': ((header[2] & 1) << 2) | (header[3] >> 6)}
+    if rate_index < len(_ADTS_SAMPLE_RATES):
+        info['sample_rate'] = _ADTS_SAMPLE_RATES[rate_index]
+    return info
+
+
+def _probe_ogg(reader: _Reader) -> Dict:
+    page = reader.read_at(0, 27 + 255)
+    if len(page) < 27:
+        raise ValueError("truncated OGG page")
+    serial, = struct.unpack_from('<I', page, 14)
+    segments = page[26]
+    packet = reader.read_at(27 + segments, 64)
+
+    info: Dict = {}
+    granule_rate = None
+    pre_skip = 0
+    if packet[:7] == b'\x01vorbis':
+        channels, rate, _, nominal = struct.unpack_from('<BIii', packet, 11)
+        info.update(codec='vorbis', channels=channels, sample_rate=rate)
+        if nominal > 0:
+            info['bitrate'] = nominal
+        granule_rate = rate
+    elif packet[:8] == b'OpusHead':
+        channels, pre_skip, rate = struct.unpack_from('<BHI', packet, 9)
+        info.update(codec='opus', channels=channels, sample_rate=rate)
+        granule_rate = 48000
+    elif packet[:5] == b'\x7fFLAC':
+        info['codec'] = 'flac'
+    elif packet[:7] == b'\x80theora':
+        info['codec'] = 'theora'
+
+    if granule_rate:
+        tail_start = max(0, reader.size - _OGG_TAIL)
+        tail = reader.read_at(tail_start, _OGG_TAIL)
+        pos = tail.rfind(b'OggS')
+        while pos >= 0:
+            if pos + 27 <= len(tail) and struct.unpack_from('<I', tail, pos + 14)[0] == serial:
+                granule, = struct.unpack_from('<q', tail, pos + 6)
+                if granule >= 0:
+                    info['duration'] = max(0, granule - pre_skip) / granule_rate
+                    break
+            pos = tail.rfind(b'OggS', 0, pos)
+        if info.get('duration') and 'bitrate' not in info:
+            info['bitrate'] = int(reader.size * 8 / info['duration'])
+    return info
+
+
+_PROBES = {
+    'mp4': _probe_mp4,
+    'mov': _probe_mp4,
+    'wav': _probe_wav,
+    'avi': _probe_avi,
+    'mp3': _probe_mp3,
+    'aac': _probe_aac,
+    'ogg': _probe_ogg,
+}
+
+
+def probe_file(path: Path) -> Dict:
+    """
+    Probe one file's headers.
+
+    Returns:
+        Dict with detected_type, extension_mismatch, bytes_read, and (for
+        supported containers) duration, codec, width, height, bitrate,
+        sample_rate and channels when present; error if parsing failed.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    with open(path, 'rb') as f:
+        reader = _Reader(f, size)
+        detected = sniff_type(reader.read_at(0, SNIFF_BYTES))
+        expected = EXTENSION_TYPES.get(path.suffix.lower())
+        result = {
+            'detected_type': detected,
+            'extension_mismatch': bool(expected) and detected not in expected,
+        }
+        probe = _PROBES.get(detected)
+        if probe is not None:
+            try:
+                result.update(probe(reader))
+            except (ValueError, struct.error, IndexError) as e:
+                result['error'] = f"{detected}: {e}"
+        if result.get('duration') and 'bitrate' not in result:
+            result['bitrate'] = int(size * 8 / result['duration'])
+        result['bytes_read'] = reader.bytes_read
+    return result
+
+
+class MediaProber:
+    """Probe media files in the download tree and store the results in the catalog."""
+
+    def __init__(self, output_dir: Optional[Path] = None, workers: int = config.MEDIA_WORKERS):
+        """
+        Initialize the prober.
+
+        Args:
+            output_dir: Download tree root (default: config.OUTPUT_DIR)
+            workers: Number of files probed in parallel
+        """
+        self.output_dir = Path(output_dir or config.OUTPUT_DIR)
+        self.workers = max(1, workers)
+        self.catalog = Catalog(self.output_dir)
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def find_files(self, categories: Tuple[str, ...] = ('videos', 'audio')) -> List[Path]:
+        """Find downloaded files of the given categories (wherever the storage layout puts them)."""
+        return [record['path'] for record in StorageLayout.load(self.output_dir).files(categories=categories)]
+
+    def probe_files(self, paths: Optional[List[Path]] = None) -> Dict[str, Dict]:
+        """
+        Probe files in parallel and store the results in the catalog.
+
+        Probing runs on worker threads; catalog writes happen on the calling
+        thread, in one batch.
+
+        Args:
+            paths: Files to probe (default: every video and audio file in the tree)
+
+        Returns:
+            Dict mapping file key to its probe result
+        """
+        if paths is None:
+            paths = self.find_files()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(probe_file, path): path for path in paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                key = path_key(self.output_dir, path)
+                try:
+                    result = future.result()
+                except OSError as e:
+                    self.logger.warning(f"Skipping {key}: {e}")
+                    continue
+                result.update(path=key, data_set=data_set_from_path(path))
+                results[key] = result
+                if result['extension_mismatch']:
+                    self.logger.warning(f"{key}: content looks like {result['detected_type'] or 'unknown data'}")
+                if 'error' in result:
+                    self.logger.warning(f"{key}: {result['error']}")
+
+        self.catalog.upsert_media_info(results.values())
+        return results
+
+    def close(self) -> None:
+        """Close the catalog."""
+        self.catalog.close()
+
+
+def main():
+    """Command-line entry point for probing media files."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Read duration, codec and resolution from media file headers"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Probe every video and audio file and store results in the catalog")
+    scan_parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.MEDIA_WORKERS,
+        help=f"Files probed in parallel (default: {config.MEDIA_WORKERS})"
+    )
+    scan_parser.add_argument(
+        "--all-categories",
+        action="store_true",
+        help="Also check every other category for extension/content mismatches"
+    )
+
+    subparsers.add_parser("mismatches", help="List cataloged files whose content doesn't match their extension")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+
+    prober = MediaProber(output_dir, workers=getattr(args, 'workers', config.MEDIA_WORKERS))
+    try:
+        if args.command == "scan":
+            categories = tuple(config.FILE_CATEGORIES) + ('other',) if args.all_categories else ('videos', 'audio')
+            results = prober.probe_files(prober.find_files(categories))
+            mismatched = sum(1 for r in results.values() if r['extension_mismatch'])
+            kb_read = sum(r['bytes_read'] for r in results.values()) / 1024
+            print(f"\n✓ Probed {len(results)} files ({kb_read:.0f} KB read), {mismatched} extension mismatches")
+        elif args.command == "mismatches":
+            for row in prober.catalog.media_info(mismatched_only=True):
+                print(f"{row['path']}: {row['detected_type'] or 'unknown'}")
+    except OSError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        prober.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Mirror-aware source selection for the CSV downloader.
+
+A file can come from several places: the `url` column, extra URLs in an
+optional `mirrors` column (separated by '|' or whitespace), and URLs derived
+from a mirror prefix map file, one mapping per line:
+
+    # primary prefix                          mirror prefix(es)
+    https://www.justice.gov/epstein/files/    https://mirror.internal/epstein/
+
+SourceSelector keeps online per-host statistics (moving averages of the
+time to first byte and of throughput, consecutive failures) and orders a
+file's candidates by expected transfer time. Hosts that failed recently
+are tried last, hosts at their concurrency limit after free ones, and a
+host without measurements is tried before measured ones once, so every
+source gets sampled. Only errors that say something about the host count
+as failures: a 404/410 means that source lacks the file (mirrors may hold
+part of the corpus), and local errors such as a failing sink write are not
+the host's fault.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+import config
+
+# Statuses meaning "this source does not have the file", not "this host is failing"
+MISSING_STATUSES = (404, 410)
+
+
+class MirrorMap:
+    """Primary URL prefix -> mirror prefixes."""
+
+    def __init__(self, prefixes: Optional[Dict[str, List[str]]] = None):
+        self.prefixes: Dict[str, List[str]] = dict(prefixes or {})
+
+    @classmethod
+    def load(cls, path: Path) -> 'MirrorMap':
+        """
+        Read a prefix map file (see the module docstring).
+
+        Raises:
+            ValueError: If a line has a prefix but no mirror
+        """
+        prefixes: Dict[str, List[str]] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                fields = line.split('#', 1)[0].split()
+                if not fields:
+                    continue
+                if len(fields) < 2:
+                    raise ValueError(f"{path}:{line_num}: expected a prefix followed by mirror prefixes")
+                prefixes.setdefault(fields[0], []).extend(fields[1:])
+        return cls(prefixes)
+
+    def alternatives(self, url: str) -> List[str]:
+        """Mirror URLs for a URL (longest matching prefix wins)."""
+        matches = [prefix for prefix in self.prefixes if url.startswith(prefix)]
+        if not matches:
+            return []
+        prefix = max(matches, key=len)
+        return [mirror + url[len(prefix):] for mirror in self.prefixes[prefix]]
+
+
+def parse_mirror_column(value: Optional[str]) -> List[str]:
+    """URLs in a CSV `mirrors` cell."""
+    return value.replace('|', ' ').split() if value else []
+
+
+def candidate_urls(file_info: Dict, mirror_map: Optional[MirrorMap] = None) -> List[str]:
+    """Every known source of a file, primary first, without duplicates."""
+    urls = [file_info['url']] + list(file_info.get('mirrors', []))
+    if mirror_map is not None:
+        urls += [alt for url in list(urls) for alt in mirror_map.alternatives(url)]
+    return list(dict.fromkeys(urls))
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+class HostStats:
+    """Online measurements of one host."""
+
+    def __init__(self):
+        self.latency: Optional[float] = None  # seconds to response headers (moving average)
+        self.throughput: Optional[float] = None  # bytes per second after the first byte (moving average)
+        self.successes = 0
+        self.failures = 0  # consecutive
+        self.cooldown_until = 0.0
+        self.active = 0
+
+    def expected_seconds(self, size: Optional[int]) -> float:
+        """Expected time to fetch `size` bytes (latency only when either is unknown)."""
+        seconds = self.latency or 0.0
+        if size and self.throughput:
+            seconds += size / self.throughput
+        return seconds
+
+
+def is_host_failure(exc: BaseException) -> bool:
+    """Whether an exception raised during a transfer counts against the host."""
+    if isinstance(exc, requests.exceptions.HTTPError):
+        return exc.response is None or exc.response.status_code not in MISSING_STATUSES
+    return isinstance(exc, (requests.exceptions.RequestException, ConnectionError, TimeoutError))
+
+
+class _Attempt:
+    """Timing of one transfer; see SourceSelector.attempt()."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_byte_at: Optional[float] = None
+        self.bytes = 0
+
+    def first_byte(self) -> None:
+        """Mark the response headers as received."""
+        self.first_byte_at = time.monotonic()
+
+    def add(self, nbytes: int) -> None:
+        self.bytes += nbytes
+
+
+class SourceSelector:
+    """Rank candidate URLs by measured host performance and cap concurrency per host."""
+
+    def __init__(self, per_host: int = config.MIRROR_HOST_CONCURRENCY, alpha: float = config.MIRROR_EWMA_ALPHA):
+        """
+        Args:
+            per_host: Transfers allowed at once per host
+            alpha: Weight of the newest sample in the moving averages
+        """
+        self.per_host = max(1, per_host)
+        self.alpha = alpha
+        self.hosts: Dict[str, HostStats] = {}
+        self._cond = threading.Condition()
+
+    def _stats(self, host: str) -> HostStats:
+        stats = self.hosts.get(host)
+        if stats is None:
+            stats = self.hosts[host] = HostStats()
+        return stats
+
+    def rank(self, urls: List[str], size: Optional[int] = None) -> List[str]:
+        """
+        Order candidates best first.
+
+        Args:
+            urls: Candidate URLs (ties keep this order)
+            size: File size in bytes, if known
+        """
+        now = time.monotonic()
+        with self._cond:
+            def key(url):
+                stats = self._stats(host_of(url))
+                measured = stats.successes > 0
+                return (stats.cooldown_until > now, stats.active >= self.per_host, measured,
+                        stats.expected_seconds(size) if measured else 0.0)
+            return sorted(urls, key=key)
+
+    def _update(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else self.alpha * sample + (1 - self.alpha) * current
+
+    @contextmanager
+    def attempt(self, url: str) -> Iterator[_Attempt]:
+        """
+        Time one transfer from a URL and record the outcome for its host.
+
+        Waits while the host is at its concurrency limit. The caller marks
+        first_byte() once headers arrive and add()s every chunk. A network
+        or server error counts as a failure and puts the host in a growing
+        cooldown; other exceptions (a missing file, a local I/O error) leave
+        its statistics alone. Wait for rate limits before entering, or the
+        pause is measured as latency.
+        """
+        host = host_of(url)
+        with self._cond:
+            stats = self._stats(host)
+            while stats.active >= self.per_host:
+                self._cond.wait()
+            stats.active += 1
+        attempt = _Attempt()
+        try:
+            yield attempt
+        except BaseException as e:
+            with self._cond:
+                stats.active -= 1
+                if is_host_failure(e):
+                    stats.failures += 1
+                    stats.cooldown_until = (time.monotonic()
+                                            + config.MIRROR_FAILURE_COOLDOWN * min(stats.failures, 10))
+                self._cond.notify_all()
+            raise
+        finished = time.monotonic()
+        with self._cond:
+            stats.active -= 1
+            stats.failures = 0
+            stats.cooldown_until = 0.0
+            stats.successes += 1
+            if attempt.first_byte_at is not None:
+                stats.latency = self._update(stats.latency, attempt.first_byte_at - attempt.started)
+                elapsed = finished - attempt.first_byte_at
+                if attempt.bytes >= config.MIRROR_MIN_SAMPLE_BYTES and elapsed > 0:
+                    stats.throughput = self._update(stats.throughput, attempt.bytes / elapsed)
+            self._cond.notify_all()
+
+    def report(self) -> str:
+        """One line per host with its measurements."""
+        lines = []
+        for host, stats in sorted(self.hosts.items()):
+            latency = f"{stats.latency * 1000:.0f} ms" if stats.latency is not None else "-"
+            throughput = f"{stats.throughput / (1024 * 1024):.2f} MB/s" if stats.throughput else "-"
+            lines.append(f"  {host}: {stats.successes} ok, {stats.failures} failing, "
+                         f"latency {latency}, throughput {throughput}")
+        return "\n".join(lines)
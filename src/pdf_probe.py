@@ -0,0 +1,791 @@
+#!/usr/bin/env python3
+"""
+Structure-only PDF probe for documents/.
+
+Each PDF is memory-mapped and only the pieces needed for triage are read:
+the header, `startxref` and the cross-reference table or stream (following
+/Prev), the trailer, the document catalog and page tree root, /Info, and
+the first few page objects. That gives PDF version, page count, whether the
+file is encrypted, producer/creator, and whether the first pages use fonts
+at all (no fonts = image-only, i.e. a scan that needs OCR).
+
+Files whose xref is missing or broken are handled by scanning the whole file
+for `N G obj` markers and rebuilding the table, the one case where every
+byte is read. Probing runs in a process pool; results go to the catalog's
+pdf_info table.
+
+extract_text() goes further for callers that need page text (the
+watchlist scanner): it decodes each page's content streams and collects the
+strings shown by text operators, mapped through the fonts' /ToUnicode CMaps.
+"""
+
+import logging
+import mmap
+import re
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from archives import data_set_from_path
+from catalog import Catalog, path_key
+from layout import StorageLayout
+
+_WHITESPACE = b' \t\r\n\x0c\x00'
+_DELIMITERS = b'()<>[]{}/%'
+_NUMBER = re.compile(rb'[+-]?(?:\d+\.?\d*|\.\d+)')
+_REF = re.compile(rb'\s*(\d+)\s+(\d+)\s+R(?![^\s()<>\[\]{}/%])')
+_OBJ_HEADER = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+_XREF_ENTRY = re.compile(rb'(\d{10})\s(\d{5})\s([nf])')
+_VERSION = re.compile(rb'%PDF-(\d\.\d)')
+_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+_INLINE_IMAGE_END = re.compile(rb'\sEI(?![^\s()<>\[\]{}/%])')
+
+# startxref must be within this many bytes of the end
+_TAIL = 4096
+
+# Probe results written to the catalog per transaction
+_STORE_BATCH = 256
+
+
+class PdfError(Exception):
+    """Raised when a PDF's structure cannot be read."""
+
+
+class Name(str):
+    """A PDF name object (/Type)."""
+
+
+class Ref(tuple):
+    """An indirect reference (object number, generation)."""
+
+    def __new__(cls, num: int, gen: int):
+        return super().__new__(cls, (num, gen))
+
+
+class Keyword(str):
+    """A bare PDF keyword (obj, stream, R, ...)."""
+
+
+class Stream:
+    """A stream object: its dictionary and raw (still encoded) data."""
+
+    def __init__(self, attrs: Dict, raw: bytes):
+        self.attrs = attrs
+        self.raw = raw
+
+
+def _skip(data, pos: int) -> int:
+    """Skip whitespace and comments."""
+    size = len(data)
+    while pos < size:
+        c = data[pos]
+        if c in _WHITESPACE:
+            pos += 1
+        elif c == 0x25:  # %
+            while pos < size and data[pos] not in b'\r\n':
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def _literal_string(data, pos: int) -> Tuple[bytes, int]:
+    """Parse (...) starting after the opening parenthesis."""
+    out = bytearray()
+    depth = 1
+    escapes = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f'}
+    while pos < len(data):
+        c = data[pos]
+        pos += 1
+        if c == 0x5C:  # backslash
+            e = data[pos]
+            pos += 1
+            if e in escapes:
+                out += escapes[e]
+            elif 0x30 <= e <= 0x37:
+                digits = bytes([e])
+                while len(digits) < 3 and 0x30 <= data[pos] <= 0x37:
+                    digits += bytes([data[pos]])
+                    pos += 1
+                out.append(int(digits, 8) & 0xFF)
+            elif e in b'\r\n':
+                if e == 0x0D and data[pos] == 0x0A:
+                    pos += 1
+            else:
+                out.append(e)
+        elif c == 0x28:
+            depth += 1
+            out.append(c)
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), pos
+            out.append(c)
+        else:
+            out.append(c)
+    raise PdfError("unterminated string")
+
+
+def parse_object(data, pos: int):
+    """
+    Parse one PDF object starting at pos.
+
+    Returns:
+        (value, position after it). Dicts are dicts keyed by name, arrays
+        lists, strings bytes, names Name, references Ref.
+    """
+    pos = _skip(data, pos)
+    if pos >= len(data):
+        raise PdfError("unexpected end of data")
+    c = data[pos]
+    if data[pos:pos + 2] == b'<<':
+        pos += 2
+        result = {}
+        while True:
+            pos = _skip(data, pos)
+            if data[pos:pos + 2] == b'>>':
+                return result, pos + 2
+            key, pos = parse_object(data, pos)
+            if not isinstance(key, Name):
+                raise PdfError(f"dictionary key is not a name at {pos}")
+            result[key], pos = parse_object(data, pos)
+    if c == 0x3C:  # <hex>
+        end = data.find(b'>', pos)
+        if end < 0:
+            raise PdfError("unterminated hex string")
+        digits = bytes(b for b in data[pos + 1:end] if b not in _WHITESPACE)
+        if len(digits) % 2:
+            digits += b'0'
+        return bytes.fromhex(digits.decode('ascii')), end + 1
+    if c == 0x5B:  # [
+        pos += 1
+        items = []
+        while True:
+            pos = _skip(data, pos)
+            if data[pos:pos + 1] == b']':
+                return items, pos + 1
+            item, pos = parse_object(data, pos)
+            items.append(item)
+    if c == 0x28:  # (
+        return _literal_string(data, pos + 1)
+    if c == 0x2F:  # /
+        end = pos + 1
+        while end < len(data) and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+            end += 1
+        raw = bytes(data[pos + 1:end])
+        name = re.sub(rb'#([0-9A-Fa-f]{2})', lambda m: bytes([int(m.group(1), 16)]), raw)
+        return Name(name.decode('latin-1')), end
+    number = _NUMBER.match(data, pos)
+    if number:
+        text = number.group()
+        if b'.' not in text:
+            ref = _REF.match(data, pos)
+            if ref:
+                return Ref(int(ref.group(1)), int(ref.group(2))), ref.end()
+            return int(text), number.end()
+        return float(text), number.end()
+    end = pos
+    while end < len(data) and data[end] not in _WHITESPACE and data[end] not in _DELIMITERS:
+        end += 1
+    if end == pos:
+        raise PdfError(f"unexpected byte {bytes([c])!r} at {pos}")
+    word = bytes(data[pos:end])
+    return {b'true': True, b'false': False, b'null': None}.get(word, Keyword(word.decode('latin-1'))), end
+
+
+def _decode_stream(stream: Stream) -> bytes:
+    """Apply FlateDecode (with PNG predictors), the filter used by xref and object streams."""
+    filters = stream.attrs.get('Filter')
+    filters = filters if isinstance(filters, list) else [filters] if filters else []
+    params = stream.attrs.get('DecodeParms')
+    params = params[0] if isinstance(params, list) else params
+    data = stream.raw
+    for name in filters:
+        if name != 'FlateDecode':
+            raise PdfError(f"unsupported filter {name}")
+        data = zlib.decompressobj().decompress(data)
+    predictor = (params or {}).get('Predictor', 1)
+    if predictor >= 10:
+        columns = (params or {}).get('Columns', 1)
+        rows = []
+        previous = bytearray(columns)
+        for i in range(0, len(data), columns + 1):
+            kind, row = data[i], bytearray(data[i + 1:i + 1 + columns])
+            if kind == 2:  # Up, the only predictor xref streams use in practice
+                for j in range(len(row)):
+                    row[j] = (row[j] + previous[j]) & 0xFF
+            elif kind == 1:
+                for j in range(1, len(row)):
+                    row[j] = (row[j] + row[j - 1]) & 0xFF
+            elif kind != 0:
+                raise PdfError(f"unsupported PNG predictor {kind}")
+            rows.append(bytes(row))
+            previous = row
+        data = b''.join(rows)
+    return data
+
+
+class PdfDocument:
+    """Lazily resolved view of a PDF's objects through its cross-reference data."""
+
+    def __init__(self, data):
+        self.data = data
+        self.xref: Dict[int, Tuple] = {}     # num -> ('offset', pos) or ('objstm', stream num, index)
+        self.trailer: Dict = {}
+        self.repaired = False
+        self._cache: Dict[int, object] = {}
+        self._objstm: Dict[int, Tuple[bytes, List[int]]] = {}
+        try:
+            self._read_xref()
+            self.resolve(self.trailer['Root'])['Pages']
+        except (PdfError, KeyError, TypeError, ValueError, IndexError, zlib.error):
+            self._rebuild_xref()
+
+    # Cross-reference data
+
+    def _read_xref(self) -> None:
+        tail_start = max(0, len(self.data) - _TAIL)
+        matches = list(_STARTXREF.finditer(self.data, tail_start))
+        if not matches:
+            raise PdfError("no startxref")
+        offset = int(matches[-1].group(1))
+        seen = set()
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            trailer = self._read_xref_section(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            if 'XRefStm' in trailer:  # hybrid file: table plus stream
+                self._read_xref_section(trailer['XRefStm'])
+            offset = trailer.get('Prev')
+
+    def _read_xref_section(self, offset: int) -> Dict:
+        """Read one xref table or stream; earlier-read (newer) entries win."""
+        pos = _skip(self.data, offset)
+        if self.data[pos:pos + 4] == b'xref':
+            pos += 4
+            while True:
+                pos = _skip(self.data, pos)
+                if self.data[pos:pos + 7] == b'trailer':
+                    trailer, _ = parse_object(self.data, pos + 7)
+                    return trailer
+                start, pos = parse_object(self.data, pos)
+                count, pos = parse_object(self.data, pos)
+                if not isinstance(start, int) or not isinstance(count, int):
+                    raise PdfError("bad xref subsection header")
+                for num in range(start, start + count):
+                    pos = _skip(self.data, pos)
+                    entry = _XREF_ENTRY.match(self.data, pos)
+                    if not entry:
+                        raise PdfError(f"bad xref entry at {pos}")
+                    pos = entry.end()
+                    if entry.group(3) == b'n':
+                        self.xref.setdefault(num, ('offset', int(entry.group(1))))
+
+        stream = self._object_at(offset)
+        if not isinstance(stream, Stream) or stream.attrs.get('Type') != 'XRef':
+            raise PdfError("startxref points to neither a table nor an xref stream")
+        widths = stream.attrs['W']
+        index = stream.attrs.get('Index', [0, stream.attrs['Size']])
+        rows = _decode_stream(stream)
+        if len(rows) < sum(widths) * sum(index[1::2]):
+            raise PdfError("xref stream shorter than its /Index")
+        pos = 0
+        for start, count in zip(index[0::2], index[1::2]):
+            for num in range(start, start + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(rows[pos:pos + width], 'big') if width else None)
+                    pos += width
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    self.xref.setdefault(num, ('offset', fields[1]))
+                elif kind == 2:
+                    self.xref.setdefault(num, ('objstm', fields[1], fields[2]))
+        return stream.attrs
+
+    def _rebuild_xref(self) -> None:
+        """Full scan for damaged files: index every `N G obj`, later definitions winning."""
+        self.repaired = True
+        self.xref = {}
+        self._cache = {}
+        self._objstm = {}
+        for match in _OBJ_HEADER.finditer(self.data):
+            self.xref[int(match.group(1))] = ('offset', match.start())
+        # Objects packed in object streams
+        for num in list(self.xref):
+            try:
+                obj = self.resolve(Ref(num, 0))
+            except (PdfError, ValueError, IndexError, zlib.error):
+                continue
+            if isinstance(obj, Stream) and obj.attrs.get('Type') == 'ObjStm':
+                try:
+                    members = self._load_objstm(num)[1]
+                except (PdfError, ValueError, IndexError, zlib.error):
+                    continue
+                for index, member in enumerate(members):
+                    self.xref.setdefault(member, ('objstm', num, index))
+
+        trailers = [m.end() for m in re.finditer(rb'trailer', self.data)]
+        for pos in reversed(trailers):
+            try:
+                trailer, _ = parse_object(self.data, pos)
+            except PdfError:
+                continue
+            if 'Root' in trailer:
+                self.trailer = trailer
+                break
+        else:
+            self.trailer = {}
+            for num in sorted(self.xref):
+                try:
+                    obj = self.resolve(Ref(num, 0))
+                except (PdfError, ValueError, IndexError, zlib.error):
+                    continue
+                if isinstance(obj, Stream) and obj.attrs.get('Type') == 'XRef':
+                    self.trailer = dict(obj.attrs)
+                elif isinstance(obj, dict) and obj.get('Type') == 'Catalog' and 'Root' not in self.trailer:
+                    self.trailer['Root'] = Ref(num, 0)
+        if 'Root' not in self.trailer:
+            raise PdfError("no document catalog found")
+
+    # Objects
+
+    def _object_at(self, offset: int):
+        header = _OBJ_HEADER.match(self.data, _skip(self.data, offset))
+        if not header:
+            raise PdfError(f"no object at offset {offset}")
+        value, pos = parse_object(self.data, header.end())
+        if isinstance(value, dict):
+            after = _skip(self.data, pos)
+            if self.data[after:after + 6] == b'stream':
+                start = after + 6
+                if self.data[start:start + 2] == b'\r\n':
+                    start += 2
+                elif self.data[start:start + 1] in (b'\n', b'\r'):
+                    start += 1
+                length = value.get('Length')
+                if isinstance(length, Ref):
+                    length = self.resolve(length)
+                end = start + length if isinstance(length, int) else -1
+                marker = _skip(self.data, end) if end >= 0 else -1
+                if marker < 0 or self.data[marker:marker + 9] != b'endstream':
+                    end = self.data.find(b'endstream', start)  # wrong /Length: trust the marker
+                    if end < 0:
+                        raise PdfError("unterminated stream")
+                return Stream(value, bytes(self.data[start:end]))
+        return value
+
+    def _load_objstm(self, num: int) -> Tuple[bytes, List[int], List[int]]:
+        """Decoded content, member object numbers and member offsets of an object stream."""
+        if num not in self._objstm:
+            stream = self.resolve(Ref(num, 0))
+            if not isinstance(stream, Stream):
+                raise PdfError(f"object {num} is not an object stream")
+            content = _decode_stream(stream)
+            first = stream.attrs['First']
+            numbers = []
+            offsets = []
+            pos = 0
+            for _ in range(stream.attrs['N']):
+                member, pos = parse_object(content, pos)
+                offset, pos = parse_object(content, pos)
+                numbers.append(member)
+                offsets.append(first + offset)
+            self._objstm[num] = (content, numbers, offsets)
+        return self._objstm[num]
+
+    def resolve(self, obj):
+        """Follow an indirect reference (anything else is returned unchanged)."""
+        if not isinstance(obj, Ref):
+            return obj
+        num = obj[0]
+        if num in self._cache:
+            return self._cache[num]
+        entry = self.xref.get(num)
+        if entry is None:
+            return None
+        self._cache[num] = None  # guard against reference cycles
+        if entry[0] == 'offset':
+            value = self._object_at(entry[1])
+        else:
+            content, _, offsets = self._load_objstm(entry[1])
+            value, _ = parse_object(content, offsets[entry[2]])
+        self._cache[num] = value
+        return value
+
+    def _get(self, obj: Dict, key: str):
+        return self.resolve(obj.get(key)) if isinstance(obj, dict) else None
+
+    # Triage fields
+
+    def leaf_pages(self, limit: int):
+        """Yield up to `limit` page dicts, in order, with inherited /Resources filled in."""
+        root = self.resolve(self.trailer['Root'])
+        stack = [(self._get(root, 'Pages'), None)]
+        seen = set()
+        found = 0
+        while stack and found < limit:
+            node, inherited = stack.pop()
+            if not isinstance(node, dict) or id(node) in seen:
+                continue
+            seen.add(id(node))
+            resources = self._get(node, 'Resources') or inherited
+            kids = self._get(node, 'Kids')
+            if node.get('Type') == 'Pages' or (kids and node.get('Type') != 'Page'):
+                for kid in reversed(kids or []):
+                    stack.append((self.resolve(kid), resources))
+            else:
+                found += 1
+                yield node, resources
+
+    def has_fonts(self, pages: int) -> bool:
+        """True if any of the first `pages` pages (or their form XObjects) uses a font."""
+        for _, resources in self.leaf_pages(pages):
+            if self._resources_have_fonts(resources, depth=0):
+                return True
+        return False
+
+    def _resources_have_fonts(self, resources, depth: int) -> bool:
+        if not isinstance(resources, dict):
+            return False
+        if self._get(resources, 'Font'):
+            return True
+        if depth >= 2:
+            return False
+        xobjects = self._get(resources, 'XObject')
+        for ref in (xobjects or {}).values() if isinstance(xobjects, dict) else []:
+            xobject = self.resolve(ref)
+            if isinstance(xobject, Stream) and xobject.attrs.get('Subtype') == 'Form':
+                if self._resources_have_fonts(self.resolve(xobject.attrs.get('Resources')), depth + 1):
+                    return True
+        return False
+
+    # Text
+
+    def _font_decoder(self, font) -> Callable[[bytes], str]:
+        """Decoder for strings shown in a font: its /ToUnicode CMap, else Latin-1."""
+        if not isinstance(font, dict):
+            return _latin1
+        cmap = self._get(font, 'ToUnicode')
+        if isinstance(cmap, Stream):
+            try:
+                mapping, width = _parse_cmap(_decode_stream(cmap))
+            except (PdfError, ValueError, IndexError, zlib.error):
+                mapping = None
+            if mapping:
+                return _cmap_decoder(mapping, width)
+        if font.get('Subtype') == 'Type0':
+            return lambda raw: ''  # two-byte glyph ids without a map say nothing about the text
+        return _latin1
+
+    def page_text(self, page: Dict, resources) -> str:
+        """
+        Text shown on a page, in content-stream order.
+
+        Text operators are separated by whitespace, so words stay apart but
+        layout (columns, reading order) is not reconstructed. Text inside
+        form XObjects is not included.
+        """
+        contents = self._get(page, 'Contents')
+        streams = [self.resolve(s) for s in (contents if isinstance(contents, list) else [contents])]
+        data = b'\n'.join(_decode_stream(s) for s in streams if isinstance(s, Stream))
+        fonts = self._get(resources, 'Font')
+        decoders: Dict[str, Callable[[bytes], str]] = {}
+        decode = _latin1
+        out: List[str] = []
+        operands: List = []
+        pos = 0
+        while True:
+            pos = _skip(data, pos)
+            if pos >= len(data):
+                break
+            value, pos = parse_object(data, pos)
+            if not isinstance(value, Keyword):
+                operands.append(value)
+                continue
+            op = str(value)
+            if op == 'Tf' and len(operands) >= 2 and isinstance(operands[-2], Name):
+                name = operands[-2]
+                if name not in decoders:
+                    decoders[name] = self._font_decoder(self._get(fonts, name))
+                decode = decoders[name]
+            elif op in ('Tj', "'", '"') and operands and isinstance(operands[-1], bytes):
+                out.append(' ' + decode(operands[-1]))
+            elif op == 'TJ' and operands and isinstance(operands[-1], list):
+                out.append(' ')
+                for item in operands[-1]:
+                    if isinstance(item, bytes):
+                        out.append(decode(item))
+                    elif isinstance(item, (int, float)) and item < -200:
+                        out.append(' ')  # a gap wider than a fifth of the font size is a word break
+            elif op in ('T*', 'ET'):
+                out.append('\n')
+            elif op == 'ID':
+                end = _INLINE_IMAGE_END.search(data, pos)
+                pos = end.end() if end else len(data)
+            operands = []
+        return ''.join(out)
+
+
+def _latin1(raw: bytes) -> str:
+    return raw.decode('latin-1')
+
+
+def _parse_cmap(data: bytes) -> Tuple[Dict[bytes, str], int]:
+    """
+    Code -> text mapping of a /ToUnicode CMap (bfchar and bfrange sections).
+
+    Returns:
+        (mapping, code width in bytes)
+    """
+    mapping: Dict[bytes, str] = {}
+    for section, block in re.findall(rb'begin(bfchar|bfrange)(.*?)end\1', data, re.S):
+        tokens = []
+        pos = _skip(block, 0)
+        while pos < len(block):
+            token, pos = parse_object(block, pos)
+            tokens.append(token)
+            pos = _skip(block, pos)
+        if section == b'bfchar':
+            for src, dst in zip(tokens[0::2], tokens[1::2]):
+                if isinstance(src, bytes) and isinstance(dst, bytes):
+                    mapping[src] = dst.decode('utf-16-be', errors='replace')
+            continue
+        for low, high, dst in zip(tokens[0::3], tokens[1::3], tokens[2::3]):
+            if not isinstance(low, bytes) or not isinstance(high, bytes) or not low:
+                continue
+            first, last = int.from_bytes(low, 'big'), int.from_bytes(high, 'big')
+            for i, code in enumerate(range(first, min(last, first + 0xFFFF) + 1)):
+                key = code.to_bytes(len(low), 'big')
+                if isinstance(dst, list):
+                    if i < len(dst) and isinstance(dst[i], bytes):
+                        mapping[key] = dst[i].decode('utf-16-be', errors='replace')
+                elif isinstance(dst, bytes) and dst:
+                    value = int.from_bytes(dst, 'big') + i
+                    if value < 256 ** len(dst):
+                        mapping[key] = value.to_bytes(len(dst), 'big').decode('utf-16-be', errors='replace')
+    width = max((len(code) for code in mapping), default=1)
+    return mapping, width
+
+
+def _cmap_decoder(mapping: Dict[bytes, str], width: int) -> Callable[[bytes], str]:
+    def decode(raw: bytes) -> str:
+        chars = []
+        for i in range(0, len(raw), width):
+            code = raw[i:i + width]
+            text = mapping.get(code)
+            if text is None and width == 1:
+                text = code.decode('latin-1')
+            chars.append(text or '')
+        return ''.join(chars)
+    return decode
+
+
+def _text(value) -> Optional[str]:
+    """Decode a PDF text string (UTF-16BE with BOM, else PDFDocEncoding ~ Latin-1)."""
+    if not isinstance(value, bytes):
+        return None
+    if value.startswith(b'\xfe\xff'):
+        return value[2:].decode('utf-16-be', errors='replace').strip('\x00').strip()
+    return value.decode('latin-1').strip('\x00').strip()
+
+
+def probe_pdf(path: Path, text_pages: int = config.PDF_TEXT_PAGES) -> Dict:
+    """
+    Read a PDF's structure without parsing its content streams.
+
+    Args:
+        path: PDF file
+        text_pages: Number of leading pages checked for fonts
+
+    Returns:
+        Dict with version, pages, encrypted, has_text, producer, creator,
+        repaired (the xref had to be rebuilt by a full scan) and error
+    """
+    result: Dict = {'version': None, 'pages': None, 'encrypted': None, 'has_text': None,
+                    'producer': None, 'creator': None, 'repaired': False, 'error': None}
+    try:
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                result['error'] = "empty file"
+                return result
+            try:
+                header = _VERSION.search(data, 0, 1024)
+                if header is None:
+                    result['error'] = "not a PDF"
+                    return result
+                result['version'] = header.group(1).decode()
+                doc = PdfDocument(data)
+                result['repaired'] = doc.repaired
+                root = doc.resolve(doc.trailer['Root'])
+                if isinstance(root, dict) and isinstance(root.get('Version'), Name):
+                    result['version'] = max(result['version'], str(root['Version']))
+                result['encrypted'] = 'Encrypt' in doc.trailer
+                pages = doc._get(root, 'Pages')
+                count = doc._get(pages, 'Count')
+                result['pages'] = count if isinstance(count, int) else None
+                result['has_text'] = doc.has_fonts(text_pages)
+                info = doc.resolve(doc.trailer.get('Info'))
+                if isinstance(info, dict) and not result['encrypted']:
+                    # Strings of encrypted files are themselves encrypted
+                    result['producer'] = _text(doc.resolve(info.get('Producer')))
+                    result['creator'] = _text(doc.resolve(info.get('Creator')))
+            finally:
+                data.close()
+    except (OSError, PdfError, KeyError, TypeError, ValueError, IndexError, zlib.error, RecursionError) as e:
+        # RecursionError: absurdly deep nesting of arrays/dicts in a hostile file
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def extract_text(path: Path) -> List[str]:
+    """
+    Text of every page of a PDF (see PdfDocument.page_text).
+
+    Pages whose content cannot be decoded come back empty, as do all pages
+    of encrypted files and of scans without a text layer.
+
+    Raises:
+        OSError, PdfError: If the file cannot be read as a PDF
+    """
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return []
+        try:
+            doc = PdfDocument(data)
+            if 'Encrypt' in doc.trailer:
+                return []
+            root = doc.resolve(doc.trailer['Root'])
+            count = doc._get(doc._get(root, 'Pages'), 'Count')
+            pages = []
+            for page, resources in doc.leaf_pages(count if isinstance(count, int) else sys.maxsize):
+                try:
+                    pages.append(doc.page_text(page, resources))
+                except (PdfError, KeyError, TypeError, ValueError, IndexError, zlib.error, RecursionError):
+                    pages.append('')
+            return pages
+        except (KeyError, TypeError, ValueError, IndexError, zlib.error, RecursionError) as e:
+            raise PdfError(f"{type(e).__name__}: {e}")
+        finally:
+            data.close()
+
+
+class PdfProber:
+    """Probe PDFs in the download tree and store the results in the catalog."""
+
+    def __init__(self, output_dir: Optional[Path] = None, workers: int = config.PDF_WORKERS):
+        """
+        Initialize the prober.
+
+        Args:
+            output_dir: Download tree root (default: config.OUTPUT_DIR)
+            workers: Number of worker processes
+        """
+        self.output_dir = Path(output_dir or config.OUTPUT_DIR)
+        self.workers = max(1, workers)
+        self.catalog = Catalog(self.output_dir)
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def find_files(self) -> List[Path]:
+        """Find downloaded PDFs in data_set_*/documents/ (wherever the storage layout puts them)."""
+        return [
+            record['path'] for record in StorageLayout.load(self.output_dir).files(categories=['documents'])
+            if record['path'].suffix.lower() == '.pdf'
+        ]
+
+    def probe_files(self, paths: Optional[List[Path]] = None) -> Dict[str, Dict]:
+        """
+        Probe PDFs in worker processes and store the results in the catalog as they arrive.
+
+        Args:
+            paths: Files to probe (default: every PDF under documents/)
+
+        Returns:
+            Dict mapping file key to its probe result
+        """
+        if paths is None:
+            paths = self.find_files()
+
+        results = {}
+        batch: List[Dict] = []
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                # Batches keep inter-process overhead small next to a few-KB probe
+                for path, result in zip(paths, executor.map(probe_pdf, paths, chunksize=16)):
+                    key = path_key(self.output_dir, path)
+                    result.update(path=key, data_set=data_set_from_path(path))
+                    results[key] = result
+                    batch.append(result)
+                    if result['error']:
+                        self.logger.warning(f"{key}: {result['error']}")
+                    elif result['repaired']:
+                        self.logger.info(f"{key}: damaged cross-reference data, rebuilt by full scan")
+                    if len(batch) >= _STORE_BATCH:
+                        self.catalog.upsert_pdf_info(batch)
+                        batch = []
+        finally:
+            # Whatever was probed is kept, even if the pass is cut short
+            self.catalog.upsert_pdf_info(batch)
+        return results
+
+    def close(self) -> None:
+        """Close the catalog."""
+        self.catalog.close()
+
+
+def main():
+    """Command-line entry point for probing PDFs."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Read page count, version, encryption and text-layer presence from PDF structure"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Probe every PDF under documents/ and store results in the catalog")
+    scan_parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.PDF_WORKERS,
+        help=f"Worker processes (default: {config.PDF_WORKERS})"
+    )
+
+    subparsers.add_parser("scanned", help="List cataloged PDFs without a text layer, largest first")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+
+    prober = PdfProber(output_dir, workers=getattr(args, 'workers', config.PDF_WORKERS))
+    try:
+        if args.command == "scan":
+            results = prober.probe_files()
+            scanned = sum(1 for r in results.values() if r['has_text'] is False)
+            failed = sum(1 for r in results.values() if r['error'])
+            print(f"\n✓ Probed {len(results)} PDFs: {scanned} without a text layer, {failed} unreadable")
+        elif args.command == "scanned":
+            for row in prober.catalog.pdf_info(image_only=True):
+                print(f"{row['path']}: {row['pages']} pages")
+    except OSError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        prober.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Plan mode: estimate a pull before running it.
+
+Sends concurrent, rate-limited HEAD requests for the selected files, sums
+the bytes per data set and category, checks free space at the output
+directory and projects an ETA from a short throughput sample. Probe results
+are cached in the output directory so the real run can reuse them for
+scheduling and preallocation without probing again.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+import config
+from throttle import TokenBucket, format_rate
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count for humans."""
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as e.g. 2h 05m."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+class ProbeCache:
+    """HEAD probe results keyed by URL, persisted as JSON in the output directory."""
+
+    def __init__(self, output_dir: Path):
+        self.path = Path(output_dir) / config.PROBE_CACHE_FILE
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (IOError, OSError, ValueError):
+                self.entries = {}
+
+    def size(self, url: str) -> Optional[int]:
+        """Cached size of a URL, if probed before."""
+        entry = self.entries.get(url)
+        return entry.get('size') if entry else None
+
+    def put(self, url: str, size: Optional[int], headers: Optional[Dict] = None) -> None:
+        """Record a probe result."""
+        headers = headers or {}
+        with self._lock:
+            self.entries[url] = {
+                'size': size,
+                'etag': headers.get('etag'),
+                'last_modified': headers.get('last-modified'),
+                'probed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+
+    def save(self) -> None:
+        """Write the cache atomically."""
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def probe_sizes(session: requests.Session, files: List[Dict], cache: ProbeCache,
+                workers: int = config.PROBE_WORKERS, rate: float = config.PROBE_RATE,
+                logger=None) -> Dict[str, Optional[int]]:
+    """
+    HEAD every file concurrently under a shared request rate and cache the results.
+
+    Files already in the cache are not probed again.
+
+    Returns:
+        Dict mapping URL to size in bytes (None if the server didn't say)
+    """
+    pacing = TokenBucket(rate, capacity=1)
+    sizes = {}
+    todo = []
+    for file_info in files:
+        cached = cache.entries.get(file_info['url'])
+        if cached is not None:
+            sizes[file_info['url']] = cached.get('size')
+        else:
+            todo.append(file_info['url'])
+
+    def probe(url):
+        pacing.consume(1)
+        try:
+            response = session.head(
+                url, timeout=(config.CONNECT_TIMEOUT, config.REQUEST_TIMEOUT), allow_redirects=True
+            )
+            response.raise_for_status()
+            size = int(response.headers['content-length'])
+            cache.put(url, size, response.headers)
+            return url, size
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            if logger is not None:
+                logger.warning(f"HEAD failed for {url}: {e}")
+            return url, None
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for url, size in executor.map(probe, todo):
+                sizes[url] = size
+
+    return sizes
+
+
+def measure_throughput(session: requests.Session, urls: List[str],
+                       sample_bytes: int = 1024 * 1024) -> Optional[float]:
+    """
+    Estimate download throughput by fetching the first bytes of a few files.
+
+    Returns:
+        Bytes per second, or None if no sample could be taken
+    """
+    total_bytes = 0
+    total_time = 0.0
+    for url in urls:
+        try:
+            time.sleep(config.RATE_LIMIT_DELAY)
+            started = time.monotonic()
+            response = session.get(
+                url,
+                headers={'Range': f'bytes=0-{sample_bytes - 1}'},
+                timeout=(config.CONNECT_TIMEOUT, config.REQUEST_TIMEOUT),
+                stream=True,
+            )
+            response.raise_for_status()
+            received = 0
+            for chunk in response.iter_content(chunk_size=65536):
+                received += len(chunk)
+                if received >= sample_bytes:
+                    break
+            response.close()
+            total_time += time.monotonic() - started
+            total_bytes += received
+        except requests.exceptions.RequestException:
+            continue
+    if total_bytes == 0 or total_time <= 0:
+        return None
+    return total_bytes / total_time
+
+
+class DownloadPlan:
+    """Totals and projections for a set of files."""
+
+    def __init__(self, files: List[Dict], sizes: Dict[str, Optional[int]], output_dir: Path,
+                 throughput: Optional[float] = None, bandwidth_cap: Optional[float] = None,
+                 is_local=None):
+        """
+        Args:
+            files: Selected file_info dicts
+            sizes: URL -> size from probing
+            output_dir: Where the files would be written
+            throughput: Measured bytes/s (None if unknown)
+            bandwidth_cap: --max-bandwidth in bytes/s, if any
+            is_local: Callable telling whether a file is already on disk
+        """
+        self.output_dir = Path(output_dir)
+        self.by_data_set: Dict[int, int] = {}
+        self.by_category: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.to_fetch = 0
+        self.already_local = 0
+        self.unknown = 0
+
+        for file_info in files:
+            if is_local is not None and is_local(file_info):
+                self.already_local += 1
+                continue
+            self.to_fetch += 1
+            size = sizes.get(file_info['url'])
+            if size is None:
+                self.unknown += 1
+                continue
+            self.total_bytes += size
+            self.by_data_set[file_info['data_set']] = self.by_data_set.get(file_info['data_set'], 0) + size
+            self.by_category[file_info['category']] = self.by_category.get(file_info['category'], 0) + size
+
+        self.free_bytes = self._free_space()
+        self.throughput = throughput
+        if throughput and bandwidth_cap:
+            self.throughput = min(throughput, bandwidth_cap)
+        elif bandwidth_cap:
+            self.throughput = bandwidth_cap
+
+    def _free_space(self) -> Optional[int]:
+        """Free bytes on the filesystem holding the output dir (or its nearest existing parent)."""
+        path = self.output_dir
+        while not path.exists() and path != path.parent:
+            path = path.parent
+        try:
+            return shutil.disk_usage(path).free
+        except OSError:
+            return None
+
+    @property
+    def fits(self) -> Optional[bool]:
+        """Whether the known bytes fit in the free space."""
+        if self.free_bytes is None:
+            return None
+        return self.total_bytes <= self.free_bytes
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Projected run time: transfer time plus the per-request delay."""
+        if not self.throughput:
+            return None
+        return self.total_bytes / self.throughput + self.to_fetch * config.RATE_LIMIT_DELAY
+
+    def report(self) -> str:
+        """Multi-line human readable summary."""
+        lines = [f"Files to fetch: {self.to_fetch} ({self.already_local} already downloaded)"]
+        lines.append(f"Total size: {format_bytes(self.total_bytes)}"
+                     + (f" (+{self.unknown} files of unknown size)" if self.unknown else ""))
+        lines.append("By data set:")
+        for ds_num in sorted(self.by_data_set):
+            lines.append(f"  Data Set {ds_num}: {format_bytes(self.by_data_set[ds_num])}")
+        lines.append("By category:")
+        for category in sorted(self.by_category):
+            lines.append(f"  {category}: {format_bytes(self.by_category[category])}")
+        if self.free_bytes is not None:
+            verdict = "fits" if self.fits else "DOES NOT FIT"
+            lines.append(f"Free space at {self.output_dir}: {format_bytes(self.free_bytes)} ({verdict})")
+        if self.eta_seconds is not None:
+            lines.append(f"Estimated time: {format_duration(self.eta_seconds)} "
+                         f"at {format_rate(self.throughput)}")
+        else:
+            lines.append("Estimated time: unknown (could not measure throughput)")
+        return "\n".join(lines)
+
+
+def build_plan(session: requests.Session, files: List[Dict], output_dir: Path, logger=None,
+               bandwidth_cap: Optional[float] = None, is_local=None,
+               workers: int = config.PROBE_WORKERS, rate: float = config.PROBE_RATE) -> DownloadPlan:
+    """
+    Probe the files, measure throughput and summarize the pull.
+
+    Shared by both downloaders' --plan mode. Probe results are saved to the
+    probe cache before returning.
+    """
+    cache = ProbeCache(output_dir)
+    pending = [f for f in files if is_local is None or not is_local(f)]
+    sizes = probe_sizes(session, pending, cache, workers=workers, rate=rate, logger=logger)
+    try:
+        cache.save()
+    except (IOError, OSError) as e:
+        if logger is not None:
+            logger.error(f"Failed to save probe cache: {e}")
+
+    # Sample the largest files; small ones say little about sustained throughput
+    largest = sorted((u for u, s in sizes.items() if s), key=lambda u: sizes[u], reverse=True)[:3]
+    throughput = measure_throughput(session, largest) if largest else None
+
+    return DownloadPlan(files, sizes, output_dir, throughput=throughput,
+                        bandwidth_cap=bandwidth_cap, is_local=is_local)
+
+
+def preallocate(f, size: Optional[int]) -> None:
+    """Reserve disk space for a file being written (best effort, POSIX only)."""
+    if not size or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError:
+        pass
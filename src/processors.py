@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Post-download processing: hand every file to registered processors the
+moment it lands.
+
+Hashing, probing or text extraction as a separate pass means reading the
+whole tree back from disk. Instead the downloaders give each completed file
+to a ProcessingPipeline (--process), which runs the processors that accept
+it in a bounded process pool while the file is still in the page cache.
+
+Downloads never wait: submit() only queues the job. A dispatcher thread
+starts queued jobs in arrival order, as long as the pool has a free worker
+and the processor is below its own concurrency limit (so a slow processor
+cannot take over the pool). Outputs, or the error a processor raised, are
+stored in the catalog's processor_results table; processors may also write
+their own table (the PDF and media probes fill pdf_info / media_info).
+A worker that dies outright (OOM kill, crash in a parser) breaks the pool;
+the jobs it took down are recorded as errors and a fresh pool takes over.
+
+New processors are added with register_processor(); the function must be
+importable at module level so the worker processes can unpickle it.
+"""
+
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import config
+from archives import data_set_from_path
+from catalog import Catalog, path_key
+from media_probe import probe_file
+from pdf_probe import probe_pdf
+
+
+class Processor:
+    """A registered post-download step."""
+
+    def __init__(self, name: str, func: Callable[[Path], Dict], concurrency: int = 1,
+                 suffixes: Optional[Iterable[str]] = None, categories: Optional[Iterable[str]] = None,
+                 store: Optional[Callable[[Catalog, List[Dict]], None]] = None):
+        """
+        Args:
+            name: Name used on the command line and in the catalog
+            func: Called with the file path in a worker process; returns a
+                JSON-serializable dict. Exceptions are recorded as the error.
+            concurrency: Most files this processor works on at once
+            suffixes: Only files with these extensions (default: any)
+            categories: Only files in these categories (default: any)
+            store: Called in the main process with finished records
+                (path, data_set, output) to write them somewhere else as well
+        """
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.suffixes = {s.lower() for s in suffixes} if suffixes else None
+        self.categories = set(categories) if categories else None
+        self.store = store
+
+    def accepts(self, path: Path, category: Optional[str] = None) -> bool:
+        """Whether this processor wants a file."""
+        if self.suffixes is not None and path.suffix.lower() not in self.suffixes:
+            return False
+        if self.categories is not None and category is not None and category not in self.categories:
+            return False
+        return True
+
+
+# Registered processors by name
+PROCESSORS: Dict[str, Processor] = {}
+
+
+def register_processor(name: str, func: Callable[[Path], Dict], concurrency: int = 1,
+                       suffixes: Optional[Iterable[str]] = None, categories: Optional[Iterable[str]] = None,
+                       store: Optional[Callable[[Catalog, List[Dict]], None]] = None) -> None:
+    """
+    Register a post-download processor under a name.
+
+    Args:
+        name: Name selectable with --process
+        func: Module-level function taking a path and returning a dict
+        concurrency: Most files processed at once by this processor
+        suffixes: Only files with these extensions (default: any)
+        categories: Only files in these categories (default: any)
+        store: Optional main-process hook writing finished records elsewhere
+    """
+    PROCESSORS[name] = Processor(name, func, concurrency, suffixes, categories, store)
+
+
+def parse_processors(spec: str) -> List[Processor]:
+    """
+    Resolve a comma-separated list of processor names.
+
+    Raises:
+        ValueError: If a name is not registered
+    """
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PROCESSORS]
+    if unknown or not names:
+        raise ValueError(f"Unknown processor(s): {', '.join(unknown) or spec!r} "
+                         f"(available: {', '.join(sorted(PROCESSORS))})")
+    return [PROCESSORS[name] for name in dict.fromkeys(names)]
+
+
+# Built-in processors
+
+def sha256_file(path: Path) -> Dict:
+    """SHA-256 and size of a file."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(config.PROCESSOR_READ_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return {'sha256': digest.hexdigest(), 'size': size}
+
+
+def _probe_media(path: Path) -> Dict:
+    return probe_file(Path(path))
+
+
+def _probe_pdf(path: Path) -> Dict:
+    return probe_pdf(Path(path))
+
+
+def _store_media(catalog: Catalog, records: List[Dict]) -> None:
+    catalog.upsert_media_info(dict(r['output'], path=r['path'], data_set=r['data_set']) for r in records)
+
+
+def _store_pdf(catalog: Catalog, records: List[Dict]) -> None:
+    catalog.upsert_pdf_info(dict(r['output'], path=r['path'], data_set=r['data_set']) for r in records)
+
+
+register_processor('sha256', sha256_file, concurrency=config.PROCESSOR_WORKERS)
+register_processor('media', _probe_media, concurrency=2, categories=['videos', 'audio'], store=_store_media)
+register_processor('pdf', _probe_pdf, concurrency=2, suffixes=['.pdf'], store=_store_pdf)
+
+
+def _run(func: Callable[[Path], Dict], path: str) -> Tuple[Optional[Dict], Optional[str], float]:
+    """Run one processor on one file (in a worker process)."""
+    started = time.monotonic()
+    try:
+        return func(Path(path)), None, time.monotonic() - started
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", time.monotonic() - started
+
+
+def _prefetch(path: Path) -> None:
+    """Ask the kernel to read a file ahead, in case a backlog let it drop out of the page cache."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class ProcessingPipeline:
+    """Run processors on downloaded files in the background and record the results in the catalog."""
+
+    def __init__(self, processors: List[Processor], output_dir: Optional[Path] = None,
+                 workers: int = config.PROCESSOR_WORKERS):
+        """
+        Initialize the pipeline (the worker processes start with the first file).
+
+        Args:
+            processors: Processors to run (see parse_processors)
+            output_dir: Download tree root (default: config.OUTPUT_DIR)
+            workers: Size of the process pool shared by all processors
+        """
+        self.processors = list(processors)
+        self.output_dir = Path(output_dir or config.OUTPUT_DIR)
+        self.workers = max(1, workers)
+        self.catalog = Catalog(self.output_dir)
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+        self.processed: Dict[str, int] = {p.name: 0 for p in self.processors}
+        self.failed: Dict[str, int] = {p.name: 0 for p in self.processors}
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Deque[Tuple[Processor, Path]] = deque()
+        self._running: Dict[str, int] = {p.name: 0 for p in self.processors}
+        self._in_flight = 0
+        self._finished: List[Tuple[Processor, Path, Future]] = []
+        self._closing = False
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+
+    def submit(self, path: Path, category: Optional[str] = None) -> int:
+        """
+        Queue a completed file for every processor that accepts it. Never blocks.
+
+        Args:
+            path: The file, just written
+            category: Its category, if known (for category-limited processors)
+
+        Returns:
+            Number of processors the file was queued for
+        """
+        path = Path(path)
+        jobs = [(processor, path) for processor in self.processors if processor.accepts(path, category)]
+        if not jobs:
+            return 0
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("pipeline is closed")
+            if self._dispatcher is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._dispatcher = threading.Thread(target=self._dispatch, name="processors", daemon=True)
+                self._dispatcher.start()
+            self._queue.extend(jobs)
+            self._cond.notify()
+        return len(jobs)
+
+    def _startable(self) -> List[Tuple[Processor, Path]]:
+        """Take queued jobs that fit the pool and their processor's limit, oldest first (lock held)."""
+        started = []
+        skipped: Deque[Tuple[Processor, Path]] = deque()
+        while self._queue and self._in_flight < self.workers:
+            processor, path = self._queue.popleft()
+            if self._running[processor.name] >= processor.concurrency:
+                skipped.append((processor, path))
+                continue
+            self._running[processor.name] += 1
+            self._in_flight += 1
+            started.append((processor, path))
+        skipped.extend(self._queue)
+        self._queue = skipped
+        return started
+
+    def _done(self, processor: Processor, path: Path, future: Future) -> None:
+        with self._cond:
+            self._running[processor.name] -= 1
+            self._in_flight -= 1
+            self._finished.append((processor, path, future))
+            self._cond.notify()
+
+    def _dispatch(self) -> None:
+        """Dispatcher thread: start jobs as slots free up and store finished results."""
+        while True:
+            with self._cond:
+                while True:
+                    started = self._startable()
+                    finished, self._finished = self._finished, []
+                    if started or finished:
+                        break
+                    if self._closing and not self._queue and not self._in_flight:
+                        return
+                    self._cond.wait()
+            for processor, path in started:
+                _prefetch(path)
+                try:
+                    future = self._executor.submit(_run, processor.func, str(path))
+                except BrokenProcessPool as e:
+                    # A worker died; record this job as failed and carry on with a fresh pool
+                    self.logger.warning(f"Processor pool broke ({e}); starting a new one")
+                    self._executor.shutdown(wait=False)
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    future = Future()
+                    future.set_exception(e)
+                future.add_done_callback(lambda f, p=processor, q=path: self._done(p, q, f))
+            if finished:
+                self._store(finished)
+
+    def _store(self, finished: List[Tuple[Processor, Path, Future]]) -> None:
+        records: Dict[str, List[Dict]] = {}
+        for processor, path, future in finished:
+            try:
+                output, error, seconds = future.result()
+            except Exception as e:  # the worker process died
+                output, error, seconds = None, f"{type(e).__name__}: {e}", None
+            key = path_key(self.output_dir, path)
+            if error:
+                self.failed[processor.name] += 1
+                self.logger.warning(f"{processor.name} failed on {key}: {error}")
+            else:
+                self.processed[processor.name] += 1
+            records.setdefault(processor.name, []).append({
+                'processor': processor.name, 'path': key, 'data_set': data_set_from_path(path),
+                'output': output, 'error': error, 'seconds': seconds,
+            })
+        try:
+            self.catalog.upsert_processor_results(r for batch in records.values() for r in batch)
+            for processor in self.processors:
+                batch = [r for r in records.get(processor.name, ()) if r['output'] is not None]
+                if batch and processor.store is not None:
+                    processor.store(self.catalog, batch)
+        except Exception as e:
+            self.logger.error(f"Failed to store processor results: {e}")
+
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        with self._cond:
+            return len(self._queue) + self._in_flight + len(self._finished)
+
+    def report(self) -> str:
+        parts = [f"{name} {self.processed[name]} ok" + (f"/{self.failed[name]} failed" if self.failed[name] else "")
+                 for name in self.processed]
+        return "Processors: " + ", ".join(parts)
+
+    def close(self) -> None:
+        """Wait for queued and running jobs, store their results, then stop the workers and close the catalog."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+            self._dispatcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.catalog.close()
+
+
+def main():
+    """Command-line entry point for post-download processors."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(
+        description="List post-download processors (--process) and the results they recorded"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Print the registered processors")
+
+    results_parser = subparsers.add_parser("results", help="Print recorded outputs and errors")
+    results_parser.add_argument(
+        "--processor",
+        help="Only this processor"
+    )
+    results_parser.add_argument(
+        "--errors",
+        action="store_true",
+        help="Only files the processor failed on"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for processor in PROCESSORS.values():
+            scope = []
+            if processor.suffixes:
+                scope.append(",".join(sorted(processor.suffixes)))
+            if processor.categories:
+                scope.append(",".join(sorted(processor.categories)))
+            print(f"{processor.name}\tconcurrency {processor.concurrency}\t{' '.join(scope) or 'all files'}")
+        return
+
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+    if not (output_dir / config.CATALOG_FILE).exists():
+        print(f"❌ No catalog in {output_dir}")
+        sys.exit(1)
+    with Catalog(output_dir) as catalog:
+        for row in catalog.processor_results(args.processor, errors_only=args.errors):
+            detail = row['error'] or json.dumps(row['output'], sort_keys=True)
+            print(f"{row['processor']}\t{row['path']}\t{detail}")
+
+
+if __name__ == "__main__":
+    main()
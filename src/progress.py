@@ -0,0 +1,161 @@
+"""
+Aggregated transfer progress for one run.
+
+A single bar shows total bytes, speed, active transfers, queue depth, ETA
+and failures. Worker threads only bump counters in their own slot (no
+lock, no I/O); a refresher thread sums the slots and redraws the bar a few
+times per second, so reporting cost does not grow with the number of files.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from tqdm import tqdm
+
+import config
+from planner import format_duration
+
+
+def known_total(files: List[Dict], size_of: Callable[[Dict], Optional[int]]) -> Optional[int]:
+    """Sum of the files' sizes, or None if any size is unknown."""
+    total = 0
+    for file_info in files:
+        size = size_of(file_info)
+        if size is None:
+            return None
+        total += size
+    return total
+
+
+class _Slot:
+    """Counters owned by one worker thread; only that thread writes them."""
+
+    __slots__ = ('bytes', 'done', 'failed', 'active')
+
+    def __init__(self):
+        self.bytes = 0
+        self.done = 0
+        self.failed = 0
+        self.active = 0
+
+
+class TransferProgress:
+    """Byte-level progress across concurrent transfers, refreshed at a fixed rate."""
+
+    def __init__(self, total_files: int, total_bytes: Optional[int] = None, desc: str = "Downloading",
+                 queue_depth: Optional[Callable[[], int]] = None,
+                 interval: float = config.PROGRESS_INTERVAL, disable: Optional[bool] = False):
+        """
+        Args:
+            total_files: Files this run will attempt
+            total_bytes: Bytes expected, if known (enables a byte-based ETA)
+            desc: Bar label
+            queue_depth: Returns the number of files still waiting (default:
+                files not yet started)
+            interval: Seconds between redraws
+            disable: Passed to tqdm (None hides the bar when not on a terminal)
+        """
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.queue_depth = queue_depth
+        self.interval = interval
+        self._local = threading.local()
+        self._slots: List[_Slot] = []
+        self._slots_lock = threading.Lock()
+        self._started = time.monotonic()
+        self._shown_bytes = 0
+        self._stop = threading.Event()
+        self._bar = tqdm(total=total_bytes, desc=desc, unit='B', unit_scale=True, unit_divisor=1024,
+                         mininterval=0, disable=disable)
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def _slot(self) -> _Slot:
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            slot = self._local.slot = _Slot()
+            with self._slots_lock:
+                self._slots.append(slot)
+        return slot
+
+    # Worker side: plain attribute increments on the caller's own slot
+
+    def start_file(self) -> None:
+        """A transfer begins."""
+        self._slot().active += 1
+
+    def add_bytes(self, nbytes: int) -> None:
+        """Bytes received by the calling thread's current transfer."""
+        self._slot().bytes += nbytes
+
+    def finish_file(self, ok: bool) -> None:
+        """A transfer ended (successfully or not)."""
+        slot = self._slot()
+        slot.active -= 1
+        if ok:
+            slot.done += 1
+        else:
+            slot.failed += 1
+
+    # Reader side
+
+    def totals(self) -> dict:
+        """Sum of all slots (a consistent-enough snapshot; slots are read without locking)."""
+        with self._slots_lock:
+            slots = list(self._slots)
+        totals = {'bytes': 0, 'done': 0, 'failed': 0, 'active': 0}
+        for slot in slots:
+            totals['bytes'] += slot.bytes
+            totals['done'] += slot.done
+            totals['failed'] += slot.failed
+            totals['active'] += slot.active
+        if self.queue_depth is not None:
+            totals['queued'] = self.queue_depth()
+        else:
+            totals['queued'] = max(0, self.total_files - totals['done'] - totals['failed'] - totals['active'])
+        return totals
+
+    def eta_seconds(self, totals: dict) -> Optional[float]:
+        """Remaining time from bytes when the total is known, else from the file rate."""
+        elapsed = time.monotonic() - self._started
+        if elapsed <= 0:
+            return None
+        if self.total_bytes:
+            rate = totals['bytes'] / elapsed
+            return (self.total_bytes - totals['bytes']) / rate if rate > 0 else None
+        finished = totals['done'] + totals['failed']
+        if not finished:
+            return None
+        return (totals['queued'] + totals['active']) * elapsed / finished
+
+    def refresh(self) -> None:
+        """Redraw the bar from the counters."""
+        totals = self.totals()
+        self._bar.update(totals['bytes'] - self._shown_bytes)
+        self._shown_bytes = totals['bytes']
+        postfix = (f"files {totals['done']}/{self.total_files}, active {totals['active']}, "
+                   f"queued {totals['queued']}, failed {totals['failed']}")
+        if not self.total_bytes:
+            eta = self.eta_seconds(totals)
+            if eta is not None:
+                postfix += f", ETA {format_duration(eta)}"
+        self._bar.set_postfix_str(postfix, refresh=False)
+        self._bar.refresh()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def close(self) -> None:
+        """Stop the refresher and draw the final state."""
+        self._stop.set()
+        self._thread.join()
+        self.refresh()
+        self._bar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,315 @@
+"""
+Remote ZIP inspection over HTTP Range requests.
+
+Lists the members of a ZIP on the server by fetching only its tail (the
+end-of-central-directory record plus the central directory), and pulls
+individual members by their byte offsets, so huge archives can be explored
+and fetched selectively instead of downloaded whole.
+"""
+
+import fnmatch
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+import config
+from archives import member_destination
+
+
+EOCD_SIGNATURE = b"PK\x05\x06"
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+CENTRAL_DIR_SIGNATURE = b"PK\x01\x02"
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+EOCD_SIZE = 22
+ZIP64_LOCATOR_SIZE = 20
+ZIP64_EOCD_SIZE = 56
+LOCAL_HEADER_SIZE = 30
+MAX_COMMENT_SIZE = 0xFFFF
+
+# Enough to catch the EOCD with a maximal comment and the ZIP64 locator
+TAIL_SIZE = EOCD_SIZE + MAX_COMMENT_SIZE + ZIP64_LOCATOR_SIZE
+
+STORED = 0
+DEFLATED = 8
+
+
+class RemoteZipError(Exception):
+    """Raised when a remote ZIP cannot be inspected."""
+
+
+class RemoteZip:
+    """A ZIP file on an HTTP server that supports Range requests."""
+
+    def __init__(self, session: requests.Session, url: str, delay: float = config.RATE_LIMIT_DELAY):
+        """
+        Initialize the remote archive.
+
+        Args:
+            session: HTTP session used for the Range requests
+            url: URL of the ZIP file
+            delay: Seconds to wait before each request
+        """
+        self.session = session
+        self.url = url
+        self.delay = delay
+        self.total_size: Optional[int] = None
+        self.bytes_fetched = 0
+        self._members: Optional[List[Dict]] = None
+
+    def _open(self, range_header: str) -> requests.Response:
+        """Issue a streamed Range GET and insist on a 206 Partial Content answer."""
+        if self.delay:
+            time.sleep(self.delay)
+        response = self.session.get(
+            self.url,
+            # Ranges must address the stored bytes, not a re-encoded body
+            headers={"Range": range_header, "Accept-Encoding": "identity"},
+            timeout=(config.CONNECT_TIMEOUT, config.REQUEST_TIMEOUT),
+            stream=True,
+        )
+        response.raise_for_status()
+        if response.status_code != 206:
+            # Server ignored Range; bail out before the whole body streams in
+            response.close()
+            raise RemoteZipError(f"Server does not support Range requests for {self.url}")
+
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            if total.isdigit():
+                self.total_size = int(total)
+        return response
+
+    def _get(self, range_header: str) -> bytes:
+        """Fetch a byte range into memory."""
+        data = self._open(range_header).content
+        self.bytes_fetched += len(data)
+        return data
+
+    def _fetch(self, start: int, length: int) -> bytes:
+        """Fetch `length` bytes starting at `start`."""
+        data = self._get(f"bytes={start}-{start + length - 1}")
+        if len(data) != length:
+            raise RemoteZipError(f"Short read at offset {start}: got {len(data)} of {length} bytes")
+        return data
+
+    def list_members(self) -> List[Dict]:
+        """
+        List the archive's members from its central directory.
+
+        Returns:
+            List of dicts with 'name', 'size', 'compressed_size', 'crc',
+            'is_dir', 'compress_type' and 'header_offset'
+        """
+        if self._members is not None:
+            return self._members
+
+        tail = self._get(f"bytes=-{TAIL_SIZE}")
+        if self.total_size is None:
+            raise RemoteZipError(f"Server did not report the size of {self.url}")
+        tail_start = self.total_size - len(tail)
+
+        eocd_pos = tail.rfind(EOCD_SIGNATURE)
+        if eocd_pos < 0 or len(tail) - eocd_pos < EOCD_SIZE:
+            raise RemoteZipError(f"No end-of-central-directory record in {self.url}")
+
+        (_, _, _, _, entries, cd_size, cd_offset, _) = struct.unpack(
+            "<4sHHHHIIH", tail[eocd_pos:eocd_pos + EOCD_SIZE]
+        )
+
+        # ZIP64 archives park the real values in a separate record
+        if entries == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+            locator_pos = eocd_pos - ZIP64_LOCATOR_SIZE
+            if locator_pos < 0 or tail[locator_pos:locator_pos + 4] != ZIP64_LOCATOR_SIGNATURE:
+                raise RemoteZipError(f"Missing ZIP64 locator in {self.url}")
+            (_, _, zip64_eocd_offset, _) = struct.unpack(
+                "<4sIQI", tail[locator_pos:locator_pos + ZIP64_LOCATOR_SIZE]
+            )
+            if zip64_eocd_offset >= tail_start:
+                record = tail[zip64_eocd_offset - tail_start:zip64_eocd_offset - tail_start + ZIP64_EOCD_SIZE]
+            else:
+                record = self._fetch(zip64_eocd_offset, ZIP64_EOCD_SIZE)
+            if record[:4] != ZIP64_EOCD_SIGNATURE:
+                raise RemoteZipError(f"Bad ZIP64 end-of-central-directory record in {self.url}")
+            (_, _, _, _, _, _, _, entries, cd_size, cd_offset) = struct.unpack("<4sQHHIIQQQQ", record)
+
+        # Central directory is usually inside the tail we already have
+        if cd_offset >= tail_start:
+            central_dir = tail[cd_offset - tail_start:cd_offset - tail_start + cd_size]
+        else:
+            central_dir = self._fetch(cd_offset, cd_size)
+
+        self._members = self._parse_central_directory(central_dir, entries)
+        return self._members
+
+    def _parse_central_directory(self, data: bytes, entries: int) -> List[Dict]:
+        """Parse central directory file headers."""
+        members = []
+        pos = 0
+        for _ in range(entries):
+            if data[pos:pos + 4] != CENTRAL_DIR_SIGNATURE:
+                raise RemoteZipError(f"Corrupt central directory in {self.url}")
+            (_, _, _, flags, method, _, _, crc, comp_size, size,
+             name_len, extra_len, comment_len, _, _, _, offset) = struct.unpack(
+                "<4sHHHHHHIIIHHHHHII", data[pos:pos + 46]
+            )
+            name_bytes = data[pos + 46:pos + 46 + name_len]
+            extra = data[pos + 46 + name_len:pos + 46 + name_len + extra_len]
+            name = name_bytes.decode("utf-8" if flags & 0x800 else "cp437")
+
+            if 0xFFFFFFFF in (size, comp_size, offset):
+                size, comp_size, offset = self._apply_zip64_extra(extra, size, comp_size, offset)
+
+            members.append({
+                "name": name,
+                "size": size,
+                "compressed_size": comp_size,
+                "crc": crc,
+                "is_dir": name.endswith("/"),
+                "compress_type": method,
+                "header_offset": offset,
+            })
+            pos += 46 + name_len + extra_len + comment_len
+        return members
+
+    @staticmethod
+    def _apply_zip64_extra(extra: bytes, size: int, comp_size: int, offset: int):
+        """Replace saturated 32-bit fields with values from the ZIP64 extra field."""
+        pos = 0
+        while pos + 4 <= len(extra):
+            header_id, data_size = struct.unpack("<HH", extra[pos:pos + 4])
+            if header_id == 0x0001:
+                values = extra[pos + 4:pos + 4 + data_size]
+                idx = 0
+                if size == 0xFFFFFFFF:
+                    size = struct.unpack("<Q", values[idx:idx + 8])[0]
+                    idx += 8
+                if comp_size == 0xFFFFFFFF:
+                    comp_size = struct.unpack("<Q", values[idx:idx + 8])[0]
+                    idx += 8
+                if offset == 0xFFFFFFFF:
+                    offset = struct.unpack("<Q", values[idx:idx + 8])[0]
+                break
+            pos += 4 + data_size
+        return size, comp_size, offset
+
+    def fetch_member(self, name: str, dest: Path) -> Path:
+        """
+        Download and decompress a single member by its byte offset.
+
+        Args:
+            name: Member name as listed by list_members()
+            dest: Where to write the member's contents
+
+        Returns:
+            Path of the written file
+        """
+        member = next((m for m in self.list_members() if m["name"] == name), None)
+        if member is None:
+            raise KeyError(f"{name} not found in {self.url}")
+        if member["compress_type"] not in (STORED, DEFLATED):
+            raise RemoteZipError(f"Unsupported compression method {member['compress_type']} for {name}")
+
+        header = self._fetch(member["header_offset"], LOCAL_HEADER_SIZE)
+        if header[:4] != LOCAL_HEADER_SIGNATURE:
+            raise RemoteZipError(f"Bad local header for {name} in {self.url}")
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+
+        data_start = member["header_offset"] + LOCAL_HEADER_SIZE + name_len + extra_len
+        dest = Path(dest)
+        dest.parent.mkdir(exist_ok=True, parents=True)
+
+        crc = 0
+        decompressor = zlib.decompressobj(-15) if member["compress_type"] == DEFLATED else None
+        try:
+            with open(dest, "wb") as f:
+                if member["compressed_size"]:
+                    response = self._open(
+                        f"bytes={data_start}-{data_start + member['compressed_size'] - 1}"
+                    )
+                    for chunk in response.iter_content(chunk_size=65536):
+                        self.bytes_fetched += len(chunk)
+                        if decompressor is not None:
+                            chunk = decompressor.decompress(chunk)
+                        crc = zlib.crc32(chunk, crc)
+                        f.write(chunk)
+                if decompressor is not None:
+                    tail = decompressor.flush()
+                    crc = zlib.crc32(tail, crc)
+                    f.write(tail)
+
+            if crc != member["crc"]:
+                raise RemoteZipError(f"CRC mismatch for {name} in {self.url}")
+        except Exception:
+            # Best-effort cleanup - wrap unlink to avoid masking the original error
+            try:
+                if dest.exists():
+                    dest.unlink()
+            except Exception:
+                pass
+            raise
+
+        return dest
+
+
+def inspect_remote_archive(session: requests.Session, file_info: Dict, data_set_dir: Path,
+                           logger, catalog=None, member_pattern: Optional[str] = None,
+                           delay: float = config.RATE_LIMIT_DELAY) -> bool:
+    """
+    List a remote ZIP instead of downloading it, optionally fetching some members.
+
+    Shared by both downloaders' --inspect-archives mode. The listing is stored
+    in file_info and, when a catalog is given, in the catalog keyed by URL.
+
+    Args:
+        session: HTTP session
+        file_info: File metadata dictionary with 'url' and 'filename'
+        data_set_dir: data_set_N directory extracted members go under
+        logger: Logger to report to
+        catalog: Optional Catalog to store the member listing in
+        member_pattern: Glob; matching members are downloaded individually
+        delay: Seconds to wait before each request
+
+    Returns:
+        True if the archive was inspected successfully
+    """
+    remote = RemoteZip(session, file_info['url'], delay=delay)
+    try:
+        members = remote.list_members()
+    except (RemoteZipError, requests.exceptions.RequestException, struct.error) as e:
+        logger.error(f"Failed to inspect {file_info['filename']}: {e}")
+        return False
+
+    file_info['archive_members'] = [m['name'] for m in members]
+    file_info['file_size_bytes'] = remote.total_size
+    if catalog is not None:
+        catalog.replace_archive_members(file_info['url'], file_info.get('data_set'), members)
+
+    logger.info(
+        f"Inspected {file_info['filename']}: {len(members)} members, "
+        f"{remote.bytes_fetched} of {remote.total_size} bytes fetched"
+    )
+
+    if member_pattern:
+        for member in members:
+            if member['is_dir'] or not fnmatch.fnmatch(member['name'], member_pattern):
+                continue
+            try:
+                dest = member_destination(data_set_dir, file_info['filename'], member['name'])
+                if dest.exists():
+                    logger.debug("Already exists: %s", dest)
+                    continue
+                remote.fetch_member(member['name'], dest)
+                logger.info("Fetched member %s from %s", member['name'], file_info['filename'])
+            except (RemoteZipError, KeyError, ValueError, OSError,
+                    requests.exceptions.RequestException) as e:
+                logger.error(f"Failed to fetch {member['name']} from {file_info['filename']}: {e}")
+                return False
+
+    return True
@@ -0,0 +1,280 @@
+"""
+Priority- and budget-aware download scheduling.
+
+Each file gets a priority from per-category and per-data-set weights. Given
+a byte budget, the scheduler picks the set of files that maximizes total
+priority within it (greedy by priority per byte, the standard knapsack
+approximation) and orders them most valuable first. Sizes that are not
+known yet are HEAD-probed concurrently (planner.probe_sizes) on the run
+clock, so planning counts against the time budget. During the run it
+refuses to start a file that would overrun the byte budget or, judging by
+the throughput measured so far, the time budget.
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+import config
+from planner import ProbeCache, probe_sizes
+from throttle import parse_size
+
+
+def parse_duration(text: str) -> float:
+    """
+    Parse a duration like "90m", "2h", "1h30m" or "45" (seconds) into seconds.
+
+    Raises:
+        ValueError: If the text is not a duration
+    """
+    text = text.strip().lower()
+    if re.fullmatch(r"\d+(?:\.\d+)?", text):
+        return float(text)
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([hms])", text)
+    if not parts or re.sub(r"[\d.\shms]", "", text):
+        raise ValueError(f"Invalid duration '{text}' (expected e.g. 45m, 2h, 1h30m)")
+    unit_seconds = {'h': 3600, 'm': 60, 's': 1}
+    return sum(float(number) * unit_seconds[unit] for number, unit in parts)
+
+
+def parse_weights(specs: List[str], numeric_keys: bool = False) -> Dict:
+    """
+    Parse KEY=WEIGHT pairs such as ["documents=5", "videos=0.5"].
+
+    Args:
+        specs: KEY=WEIGHT strings
+        numeric_keys: Parse keys as integers (data set numbers)
+
+    Raises:
+        ValueError: If a pair is malformed
+    """
+    weights = {}
+    for spec in specs or []:
+        key, sep, value = spec.partition('=')
+        if not sep:
+            raise ValueError(f"Invalid weight '{spec}' (expected KEY=WEIGHT)")
+        try:
+            weight = float(value)
+            weights[int(key) if numeric_keys else key.strip()] = weight
+        except ValueError:
+            raise ValueError(f"Invalid weight '{spec}' (expected KEY=WEIGHT)")
+        if weight < 0:
+            raise ValueError(f"Weight must not be negative: '{spec}'")
+    return weights
+
+
+class DownloadScheduler:
+    """Choose and order files by priority within byte and time budgets."""
+
+    def __init__(self, category_weights: Optional[Dict[str, float]] = None,
+                 data_set_weights: Optional[Dict[int, float]] = None,
+                 max_bytes: Optional[int] = None, max_duration: Optional[float] = None):
+        """
+        Args:
+            category_weights: Priority weight per category (default 1.0)
+            data_set_weights: Priority weight per data set number (default 1.0)
+            max_bytes: Byte budget for the run
+            max_duration: Time budget for the run in seconds
+        """
+        self.category_weights = category_weights or {}
+        self.data_set_weights = data_set_weights or {}
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+
+        self._lock = threading.Lock()
+        self._started: Optional[float] = None
+        self._bytes_done = 0
+        self._bytes_reserved = 0
+
+    def priority(self, file_info: Dict) -> float:
+        """Priority of a file: category weight times data set weight."""
+        return (self.category_weights.get(file_info.get('category'), 1.0)
+                * self.data_set_weights.get(file_info.get('data_set'), 1.0))
+
+    def probe_sizes(self, files: List[Dict], size_of: Callable[[Dict], Optional[int]],
+                    session: requests.Session, cache: ProbeCache, logger=None) -> int:
+        """
+        HEAD-probe, concurrently, the files plan() would consider but cannot size yet.
+
+        Results go into the probe cache (and are saved), where size_of is
+        expected to find them. Call start() first so probing counts against
+        the time budget.
+
+        Args:
+            files: Candidate file_info dicts
+            size_of: Returns a file's known or cached size, None if unknown
+            session: Session used for the HEAD requests
+            cache: Probe cache to fill
+            logger: Logger for failed probes
+
+        Returns:
+            Number of files probed
+        """
+        unknown = [f for f in files if self.priority(f) > 0 and size_of(f) is None]
+        if unknown:
+            if logger is not None:
+                logger.info(f"Probing {len(unknown)} files of unknown size...")
+            probe_sizes(session, unknown, cache, logger=logger)
+            cache.save()
+        return len(unknown)
+
+    def plan(self, files: List[Dict], size_of: Callable[[Dict], Optional[int]]) -> List[Dict]:
+        """
+        Select and order files for the run.
+
+        Files with zero priority are dropped. Sizes come from size_of (known
+        sizes or probe results, see probe_sizes()); files whose size is still
+        unknown are scheduled after all sized ones, and only start while
+        enough of the byte budget is left (see can_start).
+
+        Args:
+            files: Candidate file_info dicts
+            size_of: Returns the number of bytes a file would transfer
+
+        Returns:
+            Files to download, most priority per byte first
+        """
+        sized, unsized = [], []
+        for file_info in files:
+            priority = self.priority(file_info)
+            if priority <= 0:
+                continue
+            size = size_of(file_info)
+            if size is None:
+                unsized.append((priority, file_info))
+            else:
+                file_info['planned_size_bytes'] = size
+                sized.append((priority, size, file_info))
+
+        # Most priority per byte first; files costing nothing go to the front
+        sized.sort(key=lambda item: item[0] / max(item[1], 1), reverse=True)
+
+        if self.max_bytes is None:
+            chosen = [file_info for _, _, file_info in sized]
+        else:
+            chosen, chosen_value, budget = [], 0.0, self.max_bytes
+            for priority, size, file_info in sized:
+                if size <= budget:
+                    chosen.append(file_info)
+                    chosen_value += priority
+                    budget -= size
+            # Greedy by density can miss one big valuable file; take it instead if better
+            best_single = max(
+                ((priority, file_info) for priority, size, file_info in sized if size <= self.max_bytes),
+                key=lambda item: item[0], default=None,
+            )
+            if best_single is not None and best_single[0] > chosen_value:
+                chosen = [best_single[1]]
+
+        unsized.sort(key=lambda item: item[0], reverse=True)
+        return chosen + [file_info for _, file_info in unsized]
+
+    def start(self) -> None:
+        """Start the run clock."""
+        with self._lock:
+            self._started = time.monotonic()
+            self._bytes_done = 0
+            self._bytes_reserved = 0
+
+    def elapsed(self) -> float:
+        """Seconds since start()."""
+        return time.monotonic() - self._started if self._started is not None else 0.0
+
+    def can_start(self, file_info: Dict) -> bool:
+        """
+        Decide whether a file may start without overrunning a budget.
+
+        Reserves the file's planned size against the byte budget when it may.
+        A file of unknown size cannot be checked against the byte budget, so
+        it only starts while at least config.SCHEDULE_UNSIZED_MIN_BYTES of
+        the budget is left; it may still overrun by whatever it turns out
+        to be larger than that.
+        """
+        size = file_info.get('planned_size_bytes')
+        with self._lock:
+            elapsed = self.elapsed()
+            if self.max_duration is not None:
+                if elapsed >= self.max_duration:
+                    return False
+                throughput = self._bytes_done / elapsed if elapsed > 0 else 0
+                if size and throughput > 0 and elapsed + size / throughput > self.max_duration:
+                    return False
+            if self.max_bytes is not None:
+                needed = size if size is not None else config.SCHEDULE_UNSIZED_MIN_BYTES
+                if self._bytes_done + self._bytes_reserved + needed > self.max_bytes:
+                    return False
+            self._bytes_reserved += size or 0
+            return True
+
+    def record(self, file_info: Dict, nbytes: int) -> None:
+        """Account for a finished (or failed) file, releasing its reservation."""
+        with self._lock:
+            self._bytes_reserved -= file_info.get('planned_size_bytes') or 0
+            self._bytes_done += nbytes
+
+    def exhausted(self) -> bool:
+        """True once either budget is used up."""
+        with self._lock:
+            if self.max_duration is not None and self.elapsed() >= self.max_duration:
+                return True
+            return self.max_bytes is not None and self._bytes_done >= self.max_bytes
+
+    def summary(self) -> str:
+        """One-line summary of budget use."""
+        parts = [f"{self._bytes_done / (1024 * 1024):.1f} MB in {self.elapsed():.0f}s"]
+        if self.max_bytes is not None:
+            parts.append(f"byte budget {self.max_bytes / (1024 * 1024):.1f} MB")
+        if self.max_duration is not None:
+            parts.append(f"time budget {self.max_duration:.0f}s")
+        return "Schedule: " + ", ".join(parts)
+
+
+def scheduler_from_args(args) -> Optional[DownloadScheduler]:
+    """
+    Build the scheduler for --category-priority/--data-set-priority/--max-bytes/--max-duration.
+
+    Returns:
+        None when none of the options is used
+
+    Raises:
+        ValueError: If an option is malformed
+    """
+    if not (args.category_priority or args.data_set_priority or args.max_bytes or args.max_duration):
+        return None
+    return DownloadScheduler(
+        category_weights=parse_weights(args.category_priority),
+        data_set_weights=parse_weights(args.data_set_priority, numeric_keys=True),
+        max_bytes=parse_size(args.max_bytes) if args.max_bytes else None,
+        max_duration=parse_duration(args.max_duration) if args.max_duration else None,
+    )
+
+
+def add_scheduler_arguments(parser) -> None:
+    """Add the scheduling options shared by both downloaders to an argparse parser."""
+    parser.add_argument(
+        "--category-priority",
+        nargs="+",
+        metavar="CATEGORY=WEIGHT",
+        help="Priority weights per category, e.g. documents=5 videos=0.2 (default 1)"
+    )
+    parser.add_argument(
+        "--data-set-priority",
+        nargs="+",
+        metavar="N=WEIGHT",
+        help="Priority weights per data set, e.g. 1=3 9=0.5 (default 1; 0 skips)"
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=str,
+        metavar="SIZE",
+        help="Byte budget for this run, e.g. 50G; highest-priority files are picked to fit"
+    )
+    parser.add_argument(
+        "--max-duration",
+        type=str,
+        metavar="TIME",
+        help="Time budget for this run, e.g. 90m or 2h; no file starts that would overrun it"
+    )
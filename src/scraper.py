@@ -19,13 +19,16 @@ Features:
 - Comprehensive logging
 """
 
+import bisect
+import itertools
 import json
-import logging
 import re
 import sys
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 # Check for required dependencies
@@ -50,34 +53,56 @@ except ImportError as e:
     sys.exit(1)
 
 import config
+from catalog import Catalog
+from checkpoint import CrawlCheckpoint, data_set_state, exit_on_sigterm
+from filters import FileFilter, apply_size_terms, filter_arg
+from layout import LAYOUTS, LayoutError, StorageLayout
+from planner import ProbeCache, build_plan
+from processors import PROCESSORS, ProcessingPipeline, parse_processors
+from progress import TransferProgress, known_total
+from remote_zip import inspect_remote_archive
+from sharding import filter_shard, shard_arg, shard_metadata_name
+from sinks import LocalSink, StorageSink, sink_from_spec
+from scheduler import DownloadScheduler, add_scheduler_arguments, scheduler_from_args
+from throttle import BandwidthLimiter, TokenBucket, bandwidth_limiter_from_args
+from log_pipeline import setup_logger
+from transport import BACKENDS, create_transport, retries_made
+from watch import PortalWatcher
+from watchlist import WatchlistScanner, load_terms
+from warc import RecordingTransport, ReplayTransport, WarcArchive, WarcError, WarcWriter
 
 
 class DOJEpsteinScraper:
     """Scraper for DOJ Epstein disclosure documents."""
 
-    def __init__(self, download_files: bool = True):
+    def __init__(self, download_files: bool = True, http_backend: Optional[str] = None):
         """
         Initialize the scraper.
 
         Args:
             download_files: Whether to download files (vs. metadata only)
+            http_backend: Transport backend name (default config.HTTP_BACKEND)
         """
         self.download_files = download_files
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": config.USER_AGENT,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Sec-Fetch-User": "?1",
-            "Cache-Control": "max-age=0",
-        })
+        # Shared HTTP transport (pooled keep-alive connections, retries, split timeouts)
+        self.session = create_transport(
+            headers={
+                "User-Agent": config.USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept-Encoding": "gzip, deflate, br",
+                "DNT": "1",
+                "Connection": "keep-alive",
+                "Upgrade-Insecure-Requests": "1",
+                "Sec-Fetch-Dest": "document",
+                "Sec-Fetch-Mode": "navigate",
+                "Sec-Fetch-Site": "none",
+                "Sec-Fetch-User": "?1",
+                "Cache-Control": "max-age=0",
+            },
+            backend=http_backend,
+            on_retry=self._log_retry,
+        )
 
         # Setup directories
         self.output_dir = Path(config.OUTPUT_DIR)
@@ -92,49 +117,73 @@ class DOJEpsteinScraper:
         # Metadata storage
         self.metadata: Dict[str, List[Dict]] = {}
 
-    def _setup_logging(self) -> None:
-        """Configure logging to file and console."""
-        log_file = self.logs_dir / f"scraper_{time.strftime('%Y%m%d_%H%M%S')}.log"
+        # Remote archive inspection (list .zip members via Range instead of downloading)
+        self.inspect_archives = False
+        self.archive_member_pattern: Optional[str] = None
+        self.catalog: Optional[Catalog] = None
 
-        # Use a per-instance logger to avoid handler/log_file mismatches
-        logger_name = f"{__name__}.{self.__class__.__name__}.{id(self)}"
-        self.logger = logging.getLogger(logger_name)
+        # (index, count) when this node only handles one shard of the run
+        self.shard: Optional[Tuple[int, int]] = None
 
-        # Ensure consistent logger configuration for this instance
-        self.logger.setLevel(logging.INFO)
-        self.logger.propagate = False
+        # --filter: links it rejects are dropped while a listing page is parsed
+        self.file_filter: Optional[FileFilter] = None
 
-        # Remove any existing handlers so we always log to the current log_file
-        if self.logger.handlers:
-            for handler in list(self.logger.handlers):
-                self.logger.removeHandler(handler)
-                try:
-                    handler.close()
-                except Exception:
-                    # Best-effort close; ignore errors during cleanup
-                    pass
+        # Process-wide byte-rate cap shared by every transfer (None = unlimited)
+        self.bandwidth: Optional[BandwidthLimiter] = None
+
+        # Priority/budget scheduling; when set, all data sets are scraped before downloading
+        self.scheduler: Optional[DownloadScheduler] = None
 
-        # File handler
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.INFO)
+        # --plan: crawl and HEAD-probe only; probe results are cached for later runs
+        self.plan_only = False
+        self.probe_cache: Optional[ProbeCache] = None
 
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
+        # Where files go under the output directory (resolved from LAYOUT_FILE on first use)
+        self.layout: Optional[StorageLayout] = None
 
-        # Formatter
-        formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        # Where downloads are written (default: a LocalSink over the layout)
+        self.sink: Optional[StorageSink] = None
 
-        # Add handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        self.logger.info(f"Logging to {log_file}")
+        # Documents are scanned for watchlist terms as they finish (--watchlist)
+        self.watchlist: Optional[WatchlistScanner] = None
+
+        # Completed files are handed to post-download processors (--process)
+        self.processing: Optional[ProcessingPipeline] = None
+
+        # Aggregated byte-level progress of the loop currently downloading
+        self.progress: Optional[TransferProgress] = None
+
+        # One request per RATE_LIMIT_DELAY across all threads (unlimited when replaying)
+        self.request_pacing = TokenBucket(
+            1 / config.RATE_LIMIT_DELAY if config.RATE_LIMIT_DELAY else None, capacity=1
+        )
+        self.page_workers = config.PAGE_WORKERS
+
+        # Crawl state saved periodically to CHECKPOINT_FILE; --resume continues from it
+        self.resume = False
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+
+    def _setup_logging(self) -> None:
+        """Configure logging to file and console."""
+        suffix = "jsonl" if config.LOG_JSON else "log"
+        log_file = self.logs_dir / f"scraper_{time.strftime('%Y%m%d_%H%M%S')}.{suffix}"
+
+        # Use a per-instance logger to avoid handler/log_file mismatches
+        logger_name = f"{__name__}.{self.__class__.__name__}.{id(self)}"
+
+        # Records go through a queue; a listener thread does the formatting and I/O
+        self.logger = setup_logger(logger_name, log_file, json_lines=config.LOG_JSON)
+        self.logger.info("Logging to %s", log_file)
+
+    def _log_retry(self, method: str, url: str, reason, attempt: int) -> None:
+        """Transport retry hook: note each retry in the log."""
+        self.logger.warning(f"{method} {url} failed ({reason}); retry {attempt}/{config.MAX_RETRIES}")
 
     def _make_request(self, url: str, stream: bool = False) -> Optional[requests.Response]:
         """
-        Make HTTP request with retry logic.
+        Make a rate-limited HTTP request (safe to call from several threads).
+
+        Retries with backoff happen inside the transport (see transport.make_retry).
 
         Args:
             url: URL to fetch
@@ -143,26 +192,50 @@ class DOJEpsteinScraper:
         Returns:
             Response object or None if failed
         """
-        for attempt in range(config.MAX_RETRIES):
-            try:
-                time.sleep(config.RATE_LIMIT_DELAY)
-                response = self.session.get(
-                    url,
-                    timeout=config.REQUEST_TIMEOUT,
-                    stream=stream
-                )
-                response.raise_for_status()
-                return response
+        try:
+            self.request_pacing.consume(1)
+            response = self.session.get(url, stream=stream)
+            response.raise_for_status()
+            return response
+
+        except requests.exceptions.RequestException as e:
+            # 4xx statuses are not retried; connection errors were logged retry by retry (_log_retry)
+            retries = retries_made(e.response)
+            after = f" after {retries} retries" if retries else ""
+            self.logger.error(f"Failed to fetch {url}{after}: {e}")
+            return None
 
-            except requests.exceptions.RequestException as e:
-                self.logger.warning(
-                    f"Request failed (attempt {attempt + 1}/{config.MAX_RETRIES}): {e}"
-                )
-                if attempt < config.MAX_RETRIES - 1:
-                    time.sleep(config.RETRY_DELAY)
-                else:
-                    self.logger.error(f"Failed to fetch {url} after {config.MAX_RETRIES} attempts")
-                    return None
+    def start_recording(self, warc_dir: Optional[Path] = None, include_files: bool = False) -> WarcWriter:
+        """
+        Record every response from now on to .warc.gz files.
+
+        Args:
+            warc_dir: Where to write (default: <output_dir>/warc)
+            include_files: Also record downloaded files, not just pages
+
+        Returns:
+            The WarcWriter (its directory and records_written are useful for reporting)
+        """
+        writer = WarcWriter(warc_dir or self.output_dir / config.WARC_DIR)
+        self.session = RecordingTransport(self.session, writer, include_streams=include_files)
+        self.logger.info(f"Recording responses to {writer.directory}")
+        return writer
+
+    def start_replay(self, paths: List[Path]) -> WarcArchive:
+        """
+        Serve all requests from recorded WARC files instead of the network.
+
+        Args:
+            paths: .warc.gz files or directories of them
+
+        Returns:
+            The loaded archive
+        """
+        archive = WarcArchive(paths)
+        self.session = ReplayTransport(archive, headers=self.session.headers)
+        self.request_pacing.set_rate(None, capacity=1)
+        self.logger.info(f"Replaying {len(archive)} recorded responses from {len(archive.files)} WARC file(s)")
+        return archive
 
     def get_data_set_urls(self) -> Dict[int, str]:
         """Get URLs for all data set pages."""
@@ -233,6 +306,7 @@ class DOJEpsteinScraper:
         against a set of supported types, and categorizes them accordingly. The
         resulting metadata, including filename, URL, dataset number, file type, and
         category, is collected into a list of dictionaries for further processing.
+        Links rejected by `self.file_filter` are left out.
         
         Args:
             soup: BeautifulSoup object of the page
@@ -267,19 +341,7 @@ class DOJEpsteinScraper:
                     self.logger.warning(f"Failed to construct URL from {href}: {e}")
                     continue
 
-                # Determine file category
-                if file_ext in ['.pdf', '.doc', '.docx', '.txt', '.rtf']:
-                    category = 'documents'
-                elif file_ext in ['.mp4', '.mov', '.avi', '.wmv', '.flv']:
-                    category = 'videos'
-                elif file_ext in ['.mp3', '.wav', '.m4a', '.aac', '.ogg']:
-                    category = 'audio'
-                elif file_ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']:
-                    category = 'images'
-                elif file_ext in ['.zip', '.rar', '.7z']:
-                    category = 'archives'
-                else:
-                    category = 'other'
+                category = config.categorize(filename)
 
                 doc_info = {
                     "filename": filename,
@@ -289,6 +351,9 @@ class DOJEpsteinScraper:
                     "category": category,
                 }
 
+                if self.file_filter is not None and not self.file_filter.matches(doc_info, self._cached_size(full_url)):
+                    continue
+
                 documents.append(doc_info)
 
         return documents
@@ -297,8 +362,9 @@ class DOJEpsteinScraper:
         """Scrape all documents from a data set.
         
         This function retrieves all documents from a specified data set by first
-        determining the total number of pages through a request to the data set URL. It
-        iterates through each page, extracting document metadata using the
+        determining the total number of pages through a request to the data set URL. The
+        remaining pages are fetched concurrently under the shared rate limit and
+        parsed in page order, extracting document metadata using the
         `extract_documents_from_page` method. The results are logged for each page, and
         a comprehensive list of all documents is returned at the end.
         
@@ -306,114 +372,197 @@ class DOJEpsteinScraper:
             data_set_num (int): Data set number.
             data_set_url (str): URL of the data set page.
         """
-        self.logger.info(f"Scraping Data Set {data_set_num}")
+        if self.checkpoint is not None:
+            state = self.checkpoint.data_set(data_set_num, data_set_url)
+        else:
+            state = data_set_state(data_set_url)
+        if state['complete']:
+            self.logger.info(f"Data Set {data_set_num}: {len(state['documents'])} documents from checkpoint")
+            return self._apply_size_filter(list(state['documents']))
+
+        soup = None
+        failed_pages = state.setdefault('failed_pages', [])
+        document_pages = state.setdefault('document_pages', [])
+        if len(document_pages) != len(state['documents']):
+            # Written before pages were tracked, so without gaps: every document precedes last_page + 1
+            document_pages[:] = [state['last_page']] * len(state['documents'])
+        if state['total_pages'] and state['last_page'] >= 0:
+            # Resuming: the page count is known; retry pages that failed, then continue after the last parsed page
+            total_pages = state['total_pages']
+            first_page = state['last_page'] + 1
+            page_nums = sorted(failed_pages) + list(range(first_page, total_pages))
+            retrying = f", retrying {len(failed_pages)} failed pages" if failed_pages else ""
+            self.logger.info(f"Resuming Data Set {data_set_num} at page {first_page + 1}/{total_pages}{retrying}")
+            pages = self._fetch_pages([f"{data_set_url}?page={n}" for n in page_nums])
+        else:
+            self.logger.info(f"Scraping Data Set {data_set_num}")
+
+            # Get first page to determine pagination
+            response = self._make_request(data_set_url)
+            if not response:
+                return []
+
+            soup = BeautifulSoup(response.text, "lxml")
+            total_pages = self.get_pagination_info(soup)
+            state['total_pages'] = total_pages
+            self.logger.info(f"Data Set {data_set_num} has {total_pages} pages")
+
+            # Remaining pages are fetched concurrently (still one request per
+            # RATE_LIMIT_DELAY overall) and parsed here, in page order
+            page_nums = list(range(total_pages))
+            page_urls = [f"{data_set_url}?page={page_num}" for page_num in page_nums[1:]]
+            pages = itertools.chain([response], self._fetch_pages(page_urls))
+
+        progress = tqdm(pages, initial=total_pages - len(page_nums), total=total_pages,
+                        desc=f"Data Set {data_set_num}")
+        for page_num, page_response in zip(page_nums, progress):
+            if not page_response:
+                # Remembered so a resumed crawl fetches it again
+                if page_num not in failed_pages:
+                    failed_pages.append(page_num)
+                continue
+            if page_num in failed_pages:
+                failed_pages.remove(page_num)
+            page_soup = soup if page_num == 0 and soup is not None else BeautifulSoup(page_response.text, "lxml")
 
-        # Get first page to determine pagination
-        response = self._make_request(data_set_url)
-        if not response:
-            return []
+            documents = self.extract_documents_from_page(page_soup, data_set_num)
+            # In page order, also for a failed page retried after later ones
+            at = bisect.bisect_right(document_pages, page_num)
+            state['documents'][at:at] = documents
+            document_pages[at:at] = [page_num] * len(documents)
+            state['last_page'] = max(state['last_page'], page_num)
+            if self.checkpoint is not None:
+                self.checkpoint.maybe_save()
+            self.logger.debug("Page %d: Found %d documents", page_num + 1, len(documents))
+
+        if failed_pages:
+            self.logger.warning(
+                f"Data Set {data_set_num}: {len(failed_pages)} pages failed "
+                f"({', '.join(str(n + 1) for n in sorted(failed_pages))}); --resume fetches them again"
+            )
+        else:
+            state['complete'] = True
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+        self.logger.info(f"Data Set {data_set_num}: Found {len(state['documents'])} total documents")
+        return self._apply_size_filter(list(state['documents']))
+
+    def _cached_size(self, url: str) -> Optional[int]:
+        """Size from the probe cache when the filter has size terms (no request is made)."""
+        if self.file_filter is None or not self.file_filter.uses_size:
+            return None
+        return self._get_probe_cache().size(url)
 
-        soup = BeautifulSoup(response.text, "lxml")
-        total_pages = self.get_pagination_info(soup)
-        self.logger.info(f"Data Set {data_set_num} has {total_pages} pages")
+    def _apply_size_filter(self, documents: List[Dict]) -> List[Dict]:
+        """Drop documents rejected by the filter's size terms (HEAD-probing unknown sizes)."""
+        if self.file_filter is None or not self.file_filter.uses_size:
+            return documents
+        return apply_size_terms(documents, self.file_filter, self.session, self._get_probe_cache(), self.logger)
 
-        all_documents = []
+    def _fetch_pages(self, urls: List[str]) -> Iterator[Optional[requests.Response]]:
+        """
+        Fetch pages on a small thread pool, yielding responses in the order given.
 
-        # Scrape all pages
-        for page_num in tqdm(range(total_pages), desc=f"Data Set {data_set_num}"):
-            if page_num == 0:
-                page_soup = soup  # Already have first page
-            else:
-                page_url = f"{data_set_url}?page={page_num}"
-                page_response = self._make_request(page_url)
-                if not page_response:
-                    continue
-                page_soup = BeautifulSoup(page_response.text, "lxml")
+        At most 2 * page_workers pages are in flight or waiting to be consumed,
+        so a slow consumer doesn't buffer a whole data set in memory.
 
-            documents = self.extract_documents_from_page(page_soup, data_set_num)
-            all_documents.extend(documents)
-            self.logger.debug(f"Page {page_num + 1}: Found {len(documents)} documents")
+        Args:
+            urls: Page URLs
 
-        self.logger.info(f"Data Set {data_set_num}: Found {len(all_documents)} total documents")
-        return all_documents
+        Yields:
+            Response, or None for pages that failed
+        """
+        if not urls:
+            return
+        url_iter = iter(urls)
+        with ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+            pending = deque(
+                executor.submit(self._make_request, url)
+                for url in itertools.islice(url_iter, 2 * self.page_workers)
+            )
+            try:
+                while pending:
+                    response = pending.popleft().result()
+                    next_url = next(url_iter, None)
+                    if next_url is not None:
+                        pending.append(executor.submit(self._make_request, next_url))
+                    yield response
+            finally:
+                # Consumer stopped early (error or interrupt): don't wait for pages nobody will parse
+                for future in pending:
+                    future.cancel()
 
     def download_file(self, doc: Dict, data_set_dir: Path) -> bool:
         """Download a file (any supported type).
         
-        This function creates a category subdirectory within the specified data_set_dir
-        to store the downloaded file. It checks if the file already exists to avoid
-        redundant downloads. If the file is not present, it makes a request to the
-        provided URL, streams the content, and saves it to the designated path. The
-        function also logs the download progress and updates the document metadata with
-        the file size.
+        This function checks if the file is already stored to avoid redundant
+        downloads. If the file is not present, it makes a request to the provided
+        URL and streams the content into the storage sink (a category
+        subdirectory of data_set_dir by default). The function also logs the
+        download progress and updates the document metadata with the file size.
         
         Args:
             doc: Document metadata dictionary containing 'category',
                 'filename', and 'url'.
             data_set_dir: Directory to save the file.
         """
-        category_dir = data_set_dir / doc["category"]
-        file_path = category_dir / doc["filename"]
+        sink = self._get_sink()
 
         # Skip if already downloaded
-        if file_path.exists():
-            self.logger.debug(f"Already exists: {doc['filename']}")
+        if sink.exists(doc):
+            self.logger.debug("Already exists: %s", doc['filename'])
             return True
 
-        # Create directory before making HTTP request to avoid connection leaks
-        try:
-            category_dir.mkdir(exist_ok=True, parents=True)
-        except OSError as e:
-            self.logger.error(f"Failed to create directory {category_dir}: {e}")
-            return False
-
-        response = self._make_request(doc["url"], stream=True)
-        if not response:
-            self.logger.error(f"Failed to download {doc['filename']}: request failed")
-            return False
+        if self.inspect_archives and doc["file_type"] == ".zip":
+            return self._inspect_archive(doc, data_set_dir)
 
         try:
-            # Get file size if available (validate header value)
-            try:
-                total_size = int(response.headers.get('content-length', 0))
-            except (ValueError, TypeError):
-                total_size = 0
-                self.logger.debug(f"Could not parse content-length header for {doc['filename']}")
+            # Open the writer (and its directory) before making the HTTP request to avoid connection leaks
+            with sink.open(doc, self._get_probe_cache().size(doc["url"])) as out:
+                response = self._make_request(doc["url"], stream=True)
+                if not response:
+                    out.abort()
+                    self.logger.error(f"Failed to download {doc['filename']}: request failed")
+                    return False
 
-            with open(file_path, "wb") as f:
                 for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                    if self.bandwidth is not None:
+                        self.bandwidth.consume(len(chunk))
+                    if self.progress is not None:
+                        self.progress.add_bytes(len(chunk))
+                    out.write(chunk)
 
             # Log file size
-            file_size = file_path.stat().st_size
+            file_size = out.size
             size_mb = file_size / (1024 * 1024)
-            self.logger.debug(f"Downloaded: {doc['filename']} ({size_mb:.2f} MB)")
+            self.logger.debug("Downloaded: %s (%.2f MB)", doc['filename'], size_mb)
 
             # Add file size to metadata
             doc['file_size_bytes'] = file_size
             doc['file_size_mb'] = round(size_mb, 2)
 
+            if self.watchlist is not None:
+                self.watchlist.submit(self._local_path(doc))
+            if self.processing is not None:
+                self.processing.submit(self._local_path(doc), doc.get('category'))
             return True
 
         except (IOError, OSError, PermissionError) as e:
             self.logger.error(f"File I/O error for {doc['filename']}: {e}")
-            # Best-effort cleanup - wrap unlink to avoid masking the original error
-            try:
-                if file_path.exists():
-                    file_path.unlink()
-            except Exception:
-                pass
             return False
         except Exception as e:
             self.logger.error(f"Unexpected error downloading {doc['filename']}: {e}")
-            # Best-effort cleanup - wrap unlink to avoid masking the original error
-            try:
-                if file_path.exists():
-                    file_path.unlink()
-            except Exception:
-                pass
             return False
 
+    def _inspect_archive(self, doc: Dict, data_set_dir: Path) -> bool:
+        """List a remote ZIP's members (and fetch matching ones) instead of downloading it."""
+        if self.catalog is None:
+            self.catalog = Catalog(self.output_dir)
+        return inspect_remote_archive(
+            self.session, doc, data_set_dir, self.logger,
+            catalog=self.catalog, member_pattern=self.archive_member_pattern,
+        )
+
     def run(self) -> None:
         """Run the complete scraping process.
         
@@ -422,16 +571,64 @@ class DOJEpsteinScraper:
         sets, scraping metadata and downloading files if enabled. The function also
         logs the progress and any issues encountered during the process, including
         missing data sets and the types of files found.
+
+        Crawl state is checkpointed as it goes; an interrupted run (including
+        SIGINT or SIGTERM) saves the checkpoint before exiting, and a run with
+        `resume` set continues from it.
         """
         self.logger.info("Starting DOJ Epstein Disclosures scraper")
-
-        # Get all data set URLs
-        data_set_urls = self.get_data_set_urls()
+        self.checkpoint = self._open_checkpoint()
+        with exit_on_sigterm():
+            try:
+                self._crawl()
+            except (KeyboardInterrupt, SystemExit):
+                self.checkpoint.save()
+                self.logger.warning(f"Interrupted; crawl state saved to {self.checkpoint.path} (continue with --resume)")
+                raise
+            except Exception:
+                self.checkpoint.save()
+                raise
+        incomplete = [num for num, state in self.checkpoint.data_sets.items()
+                      if num in config.DATA_SETS and not state['complete']]
+        if incomplete:
+            # Kept so --resume can fetch the pages that failed
+            self.checkpoint.save()
+            self.logger.warning(f"Data sets {incomplete} have failed pages; crawl state kept in "
+                                f"{self.checkpoint.path} (continue with --resume)")
+        else:
+            self.checkpoint.remove()
+
+    def _open_checkpoint(self) -> CrawlCheckpoint:
+        """Checkpoint of this run: the saved one when resuming, else a fresh one."""
+        path = self.output_dir / config.CHECKPOINT_FILE
+        if not self.resume:
+            return CrawlCheckpoint(path)
+        try:
+            checkpoint = CrawlCheckpoint.load(path)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Cannot resume, starting over: {e}")
+            return CrawlCheckpoint(path)
+        if checkpoint.data_sets:
+            done = sum(1 for state in checkpoint.data_sets.values() if state['complete'])
+            self.logger.info(
+                f"Resuming from {path}: {len(checkpoint.data_sets)} data sets started, {done} fully scraped"
+            )
+        return checkpoint
+
+    def _crawl(self) -> None:
+        """Scrape (and download) the selected data sets, updating the checkpoint."""
+        # Get all data set URLs (the main page is not fetched again when resuming)
+        data_set_urls = self.checkpoint.data_set_urls
         if not data_set_urls:
-            self.logger.error("No data sets found or failed to retrieve data set URLs. Exiting.")
-            return
+            data_set_urls = self.get_data_set_urls()
+            if not data_set_urls:
+                self.logger.error("No data sets found or failed to retrieve data set URLs. Exiting.")
+                return
+            self.checkpoint.data_set_urls = data_set_urls
+            self.checkpoint.save()
 
         # Scrape only the selected data sets
+        scheduled_documents = []
         for data_set_num in sorted(config.DATA_SETS):
             if data_set_num not in data_set_urls:
                 self.logger.warning(f"Data Set {data_set_num} not found on website")
@@ -441,43 +638,206 @@ class DOJEpsteinScraper:
 
             # Scrape metadata
             documents = self.scrape_data_set(data_set_num, data_set_url)
+            if self.shard:
+                total_found = len(documents)
+                documents = filter_shard(documents, self.shard)
+                self.logger.info(
+                    f"Data Set {data_set_num}: {len(documents)}/{total_found} documents "
+                    f"in shard {self.shard[0]}/{self.shard[1]}"
+                )
             self.metadata[f"data_set_{data_set_num}"] = documents
 
-            # Download files if enabled
+            # Planning and scheduling look across all data sets, so act after scraping them all
+            if self.scheduler is not None or self.plan_only:
+                scheduled_documents.extend(documents)
+                continue
+
+            # Download files if enabled (skipped for data sets a resumed run already finished)
+            if self.checkpoint.data_set(data_set_num, data_set_url)['downloaded']:
+                self.logger.info(f"Data Set {data_set_num}: downloads finished in the interrupted run")
+                continue
             if self.download_files and documents:
-                data_set_dir = self.output_dir / f"data_set_{data_set_num}"
-                try:
-                    data_set_dir.mkdir(exist_ok=True, parents=True)
-                except OSError as e:
-                    self.logger.error(f"Failed to create directory for Data Set {data_set_num}: {e}")
+                if not self.download_data_set(data_set_num, documents):
+                    continue
+                # Documents on failed pages are still to come; a resumed run downloads those too
+                if not self.checkpoint.data_set(data_set_num, data_set_url)['complete']:
                     continue
+                self.checkpoint.data_set(data_set_num, data_set_url)['downloaded'] = True
+                self.checkpoint.save()
 
-                self.logger.info(f"Downloading files for Data Set {data_set_num}")
-                download_success_count = 0
+        if self.plan_only:
+            self._plan(scheduled_documents)
+        elif self.scheduler is not None and self.download_files and scheduled_documents:
+            self._download_scheduled(scheduled_documents)
 
-                # Count files by type
-                file_types = {}
-                for doc in documents:
-                    file_types[doc['category']] = file_types.get(doc['category'], 0) + 1
+        # Save metadata
+        self._save_metadata()
+        self.logger.info("Scraping complete!")
 
-                self.logger.info(f"File types found: {file_types}")
+    def download_data_set(self, data_set_num: int, documents: List[Dict]) -> bool:
+        """Download one data set's documents (files already on disk are skipped).
 
-                for doc in tqdm(documents, desc=f"Downloading Set {data_set_num}"):
-                    # Download file
-                    if self.download_file(doc, data_set_dir):
-                        download_success_count += 1
+        Args:
+            data_set_num: Data set number.
+            documents: Document metadata from scrape_data_set().
 
-                self.logger.info(
-                    f"Data Set {data_set_num}: Downloaded {download_success_count}/{len(documents)} files"
-                )
+        Returns:
+            bool: False if the data set directory could not be created.
+        """
+        data_set_dir = self.output_dir / f"data_set_{data_set_num}"
+        try:
+            data_set_dir.mkdir(exist_ok=True, parents=True)
+        except OSError as e:
+            self.logger.error(f"Failed to create directory for Data Set {data_set_num}: {e}")
+            return False
 
-        # Save metadata
-        self._save_metadata()
-        self.logger.info("Scraping complete!")
+        self.logger.info(f"Downloading files for Data Set {data_set_num}")
+        download_success_count = 0
+
+        # Count files by type
+        file_types = {}
+        for doc in documents:
+            file_types[doc['category']] = file_types.get(doc['category'], 0) + 1
+
+        self.logger.info(f"File types found: {file_types}")
+
+        with self._start_progress(documents, f"Downloading Set {data_set_num}") as progress:
+            for doc in documents:
+                progress.start_file()
+                ok = self.download_file(doc, data_set_dir)
+                progress.finish_file(ok)
+                if ok:
+                    download_success_count += 1
+
+        self.logger.info(
+            f"Data Set {data_set_num}: Downloaded {download_success_count}/{len(documents)} files"
+        )
+        if self.bandwidth is not None:
+            self.logger.info(self.bandwidth.report())
+        return True
+
+    def _local_path(self, doc: Dict) -> Path:
+        """Where a document lives in the download tree."""
+        return self._get_layout().locate(doc["data_set"], doc["category"], doc["filename"])
+
+    def _get_layout(self) -> StorageLayout:
+        """Storage layout of the current output directory."""
+        if self.layout is None:
+            self.layout = StorageLayout.load(self.output_dir)
+        return self.layout
+
+    def _get_sink(self) -> StorageSink:
+        """Storage sink downloads are written to."""
+        if self.sink is None:
+            self.sink = LocalSink(self._get_layout())
+        return self.sink
+
+    def close_sink(self) -> None:
+        """Finish the storage sink (e.g. close the open tar shard)."""
+        if self.sink is not None:
+            self.sink.close()
+
+    def close_watchlist(self) -> None:
+        """Wait for pending watchlist scans and store their results."""
+        if self.watchlist is not None:
+            self.watchlist.close()
+            self.logger.info(self.watchlist.report())
+
+    def close_processing(self) -> None:
+        """Wait for queued post-download processors and store their results."""
+        if self.processing is not None:
+            self.processing.close()
+            self.logger.info(self.processing.report())
+
+    def _get_probe_cache(self) -> ProbeCache:
+        """Probe cache for the current output directory."""
+        if self.probe_cache is None:
+            self.probe_cache = ProbeCache(self.output_dir)
+        return self.probe_cache
+
+    def _known_transfer_size(self, doc: Dict) -> Optional[int]:
+        """Bytes a document would transfer without asking the server: 0 if on disk, else its known or cached size."""
+        if self._get_sink().exists(doc):
+            return 0
+        if "file_size_bytes" in doc:
+            return doc["file_size_bytes"]
+        return self._get_probe_cache().size(doc["url"])
+
+    def _start_progress(self, documents: List[Dict], desc: str) -> TransferProgress:
+        """Open the progress display for a download loop (byte ETA when every size is known)."""
+        self.progress = TransferProgress(
+            len(documents), total_bytes=known_total(documents, self._known_transfer_size), desc=desc
+        )
+        return self.progress
+
+    def _plan(self, documents: List[Dict]) -> None:
+        """HEAD-probe the scraped documents and log size, free space and ETA (no downloads).
+
+        Args:
+            documents: Document metadata from all scraped data sets.
+        """
+        self.logger.info(f"Probing {len(documents)} documents...")
+        download_plan = build_plan(
+            self.session, documents, self.output_dir, logger=self.logger,
+            bandwidth_cap=self.bandwidth.current_rate if self.bandwidth is not None else None,
+            is_local=self._get_sink().exists,
+        )
+        self.probe_cache = None  # reload with the fresh results
+        for line in download_plan.report().splitlines():
+            self.logger.info(line)
+
+    def _download_scheduled(self, documents: List[Dict]) -> None:
+        """Download the highest-priority documents within the budgets.
+
+        Documents from every scraped data set are planned together by the
+        scheduler and downloaded in plan order. Documents that would overrun
+        the byte or time budget are not started, and the run stops once a
+        budget is used up.
+
+        Args:
+            documents: Document metadata from all scraped data sets.
+        """
+        # The clock starts before planning: probing unknown sizes uses up the time budget too
+        self.scheduler.start()
+        self.scheduler.probe_sizes(documents, self._known_transfer_size, self.session,
+                                   self._get_probe_cache(), logger=self.logger)
+        selected = self.scheduler.plan(documents, self._known_transfer_size)
+        self.logger.info(f"Scheduled {len(selected)}/{len(documents)} documents by priority")
+
+        download_success_count = 0
+        skipped_count = 0
+        with self._start_progress(selected, "Scheduled") as progress:
+            for doc in selected:
+                if self.scheduler.exhausted():
+                    self.logger.info("Budget used up, stopping")
+                    break
+                if not self.scheduler.can_start(doc):
+                    skipped_count += 1
+                    continue
+
+                data_set_dir = self.output_dir / f"data_set_{doc['data_set']}"
+                transferred = doc.get("planned_size_bytes") != 0
+                progress.start_file()
+                ok = self.download_file(doc, data_set_dir)
+                progress.finish_file(ok)
+                if ok:
+                    download_success_count += 1
+                    self.scheduler.record(doc, doc.get("file_size_bytes", 0) if transferred else 0)
+                else:
+                    self.scheduler.record(doc, 0)
+
+        self.logger.info(
+            f"Downloaded {download_success_count}/{len(selected)} scheduled documents "
+            f"({skipped_count} skipped to stay within budget)"
+        )
+        self.logger.info(self.scheduler.summary())
+        if self.bandwidth is not None:
+            self.logger.info(self.bandwidth.report())
 
     def _save_metadata(self) -> None:
         """Save collected metadata to JSON file."""
-        metadata_path = self.output_dir / config.METADATA_FILE
+        metadata_name = shard_metadata_name(self.shard) if self.shard else config.METADATA_FILE
+        metadata_path = self.output_dir / metadata_name
 
         try:
             with open(metadata_path, "w", encoding='utf-8') as f:
@@ -599,8 +959,142 @@ def main():
         action="store_true",
         help="Use interactive menu to select data sets"
     )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        help=f"Storage layout for a new output directory (default: {config.STORAGE_LAYOUT}; "
+             "existing trees keep theirs, convert with layout.py migrate)"
+    )
+    parser.add_argument(
+        "--sink",
+        default="local",
+        metavar="SINK",
+        help="Where downloads are written: local (default), tar[:DIR] for rotating .tar shards with an "
+             f"offset index (default DIR: <output-dir>/{config.TAR_SHARD_DIR}), or s3://BUCKET[/PREFIX]"
+    )
+    parser.add_argument(
+        "--watchlist",
+        type=str,
+        metavar="FILE",
+        help="Scan downloaded documents for these terms (one per line) as they finish; "
+             "the index is kept in the catalog (see watchlist.py hits)"
+    )
+    parser.add_argument(
+        "--process",
+        type=str,
+        metavar="NAME[,NAME]",
+        help=f"Run post-download processors on each file as it lands ({', '.join(sorted(PROCESSORS))}); "
+             "results are kept in the catalog (see processors.py results)"
+    )
+    parser.add_argument(
+        "--inspect-archives",
+        action="store_true",
+        help="List remote .zip members via HTTP Range instead of downloading whole archives"
+    )
+    parser.add_argument(
+        "--archive-members",
+        type=str,
+        metavar="GLOB",
+        help="With --inspect-archives, fetch only members matching this glob"
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="i/N",
+        help="Only handle shard i of N (files assigned by a stable hash of their EFTA ID)"
+    )
+    parser.add_argument(
+        "--filter",
+        type=filter_arg,
+        metavar="EXPR",
+        help="Only handle matching files, e.g. 'category=videos size<500M', 'ext=pdf efta=1-5000', "
+             "'!name~_redacted' (terms: category, ext, efta, name=glob, name~regex, size)"
+    )
+    add_scheduler_arguments(parser)
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Dry run: crawl, HEAD-probe the documents and report size, free space and ETA"
+    )
+    parser.add_argument(
+        "--max-bandwidth",
+        type=str,
+        metavar="RATE",
+        help="Cap total download speed, e.g. 500K, 20M, 1G (bytes per second)"
+    )
+    parser.add_argument(
+        "--bandwidth-schedule",
+        type=str,
+        metavar="WINDOWS",
+        help="Time-of-day caps overriding --max-bandwidth, e.g. '22:00-06:00=100M,09:00-17:00=5M'"
+    )
+    parser.add_argument(
+        "--http-backend",
+        choices=sorted(BACKENDS),
+        default=config.HTTP_BACKEND,
+        help=f"HTTP client used for all requests (default: {config.HTTP_BACKEND})"
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="Write the log file as JSON lines for machine parsing"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"Continue an interrupted crawl from <output-dir>/{config.CHECKPOINT_FILE}"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running: check the portal periodically and fetch only data sets that changed"
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=config.WATCH_INTERVAL,
+        metavar="SECONDS",
+        help=f"Seconds between --watch checks (default: {config.WATCH_INTERVAL})"
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help=f"Write every fetched page to .warc.gz files in <output-dir>/{config.WARC_DIR}"
+    )
+    parser.add_argument(
+        "--record-files",
+        action="store_true",
+        help="With --record, also record downloaded files"
+    )
+    parser.add_argument(
+        "--replay",
+        nargs="+",
+        metavar="WARC",
+        help="Serve all requests from recorded .warc.gz files (or directories of them), no network"
+    )
 
     args = parser.parse_args()
+    if args.replay and (args.record or args.record_files):
+        parser.error("--replay cannot be combined with --record")
+    if args.record_files:
+        args.record = True
+    if args.watch and (args.replay or args.plan or args.resume):
+        parser.error("--watch cannot be combined with --replay, --plan or --resume")
+    try:
+        bandwidth = bandwidth_limiter_from_args(args.max_bandwidth, args.bandwidth_schedule)
+        scheduler = scheduler_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.watch and scheduler is not None:
+        parser.error("--watch cannot be combined with priority/budget scheduling")
+    if args.sink != "local" and (args.inspect_archives or args.watchlist or args.process):
+        parser.error("--inspect-archives, --watchlist and --process work on the local tree and need --sink local")
+    processors = None
+    if args.process:
+        try:
+            processors = parse_processors(args.process)
+        except ValueError as e:
+            parser.error(str(e))
 
     # Override output directory if specified (use local variable to avoid mutating config)
     output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
@@ -610,6 +1104,9 @@ def main():
     if args.data_sets:
         # Command line arguments provided
         data_sets_to_scrape = args.data_sets
+    elif args.watch:
+        # Watch every data set the portal lists, including new ones
+        data_sets_to_scrape = None
     elif args.interactive or (not args.data_sets and sys.stdin.isatty()):
         # Interactive mode (default when run without arguments)
         selected_sets = interactive_menu()
@@ -622,13 +1119,38 @@ def main():
 
     print(f"\n{'='*70}")
     print(f"Download Configuration:")
-    print(f"  Data Sets: {data_sets_to_scrape}")
+    print(f"  Data Sets: {data_sets_to_scrape or 'all on the portal'}")
     print(f"  Output Directory: {output_dir}")
+    if args.sink != "local":
+        print(f"  Sink: {args.sink}")
     print(f"  Download Files: {not args.no_download}")
+    if args.inspect_archives:
+        print(f"  Inspect Archives: yes (members: {args.archive_members or 'list only'})")
+    if args.shard:
+        print(f"  Shard: {args.shard[0]}/{args.shard[1]}")
+    if args.filter:
+        print(f"  Filter: {args.filter}")
+    if args.watchlist:
+        print(f"  Watchlist: {args.watchlist}")
+    if processors:
+        print(f"  Processors: {', '.join(p.name for p in processors)}")
+    if bandwidth is not None:
+        print(f"  Max Bandwidth: {args.max_bandwidth or 'unlimited'}"
+              + (f" (schedule: {args.bandwidth_schedule})" if args.bandwidth_schedule else ""))
+    if scheduler is not None:
+        print(f"  Budget: {args.max_bytes or 'no byte limit'}, {args.max_duration or 'no time limit'}")
+    if args.record:
+        print(f"  Record: {output_dir / config.WARC_DIR} ({'pages and files' if args.record_files else 'pages'})")
+    if args.replay:
+        print(f"  Replay: {', '.join(args.replay)}")
+    if args.resume:
+        print(f"  Resume: {output_dir / config.CHECKPOINT_FILE}")
+    if args.watch:
+        print(f"  Watch: every {args.watch_interval:g}s")
     print(f"{'='*70}\n")
 
     # Final confirmation for large downloads
-    if len(data_sets_to_scrape) > 3 and not args.no_download:
+    if data_sets_to_scrape and len(data_sets_to_scrape) > 3 and not args.no_download and not args.plan:
         try:
             confirm = input("⚠️  You're about to download multiple data sets. Continue? (yes/no): ").strip().lower()
             if confirm not in ['yes', 'y']:
@@ -638,15 +1160,70 @@ def main():
             print("\n\n✓ Cancelled by user. Goodbye!")
             return
 
-    scraper = DOJEpsteinScraper(download_files=not args.no_download)
+    # Log format is read when the logger is set up in __init__
+    if args.log_json:
+        config.LOG_JSON = True
+    scraper = DOJEpsteinScraper(download_files=not args.no_download, http_backend=args.http_backend)
     
     # Set output directory
     scraper.output_dir = output_dir
+    try:
+        scraper.layout = StorageLayout.open(output_dir, args.layout)
+        scraper.sink = sink_from_spec(args.sink, output_dir, scraper.layout)
+    except (LayoutError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        scraper.session.close()
+        return
+    scraper.inspect_archives = args.inspect_archives
+    scraper.archive_member_pattern = args.archive_members
+    scraper.shard = args.shard
+    scraper.file_filter = args.filter
+    scraper.bandwidth = bandwidth
+    scraper.scheduler = scheduler
+    scraper.plan_only = args.plan
+    scraper.resume = args.resume
+    if args.record:
+        scraper.start_recording(include_files=args.record_files)
+    if args.replay:
+        try:
+            scraper.start_replay([Path(p) for p in args.replay])
+        except (OSError, WarcError) as e:
+            print(f"❌ Failed to load WARC files: {e}")
+            return
+    if args.watchlist and not args.no_download and not args.plan:
+        try:
+            scraper.watchlist = WatchlistScanner(load_terms(Path(args.watchlist)), output_dir)
+        except OSError as e:
+            print(f"❌ Failed to load watchlist: {e}")
+            scraper.session.close()
+            return
+    if processors and not args.no_download and not args.plan:
+        scraper.processing = ProcessingPipeline(processors, output_dir)
     
+    if args.watch:
+        watcher = PortalWatcher(scraper, data_sets=data_sets_to_scrape)
+        try:
+            with exit_on_sigterm():
+                watcher.run(interval=args.watch_interval)
+        except (KeyboardInterrupt, SystemExit):
+            print("\n✓ Watch stopped. Goodbye!")
+        finally:
+            scraper.close_sink()
+            scraper.close_watchlist()
+            scraper.close_processing()
+            scraper.session.close()
+        return
+
     # Set data sets to scrape (required for backward compatibility as scraper.run() reads from config.DATA_SETS)
     config.DATA_SETS = data_sets_to_scrape
     
-    scraper.run()
+    try:
+        scraper.run()
+    finally:
+        scraper.close_sink()
+        scraper.close_watchlist()
+        scraper.close_processing()
+        scraper.session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,541 @@
+"""
+Read-only HTTP API over the catalog, with the files themselves served from the tree.
+
+    GET /api/data-sets                          data sets with file counts and sizes per category
+    GET /api/data-sets/N/files                  file records of one data set (?category=&name=)
+    GET /api/files/N/FILENAME                   one file record plus its media/PDF probe results
+    GET /api/efta/NUMBER                        files with that EFTA number, in any data set
+    GET /api/search?q=TEXT                      file names (?scope=members: archive members)
+    GET /files/N/CATEGORY/FILENAME              the file itself; Range requests supported
+
+Lists take ?offset= and ?limit= and answer with {"items", "total", "offset",
+"limit", "next_offset"}.
+
+The server runs on asyncio streams, so hundreds of keep-alive clients cost
+a socket and a coroutine each rather than a thread. Catalog queries run on a
+small thread pool, JSON responses are kept in an LRU keyed by request target
+and dropped as soon as the catalog database changes, and file bodies go out
+with loop.sendfile(), i.e. sendfile(2) straight from the page cache where
+the platform supports it.
+
+At startup the catalog's files table is refreshed from metadata.json, so
+trees downloaded without --sync are browsable too.
+"""
+
+import asyncio
+import json
+import logging
+import mimetypes
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import config
+from catalog import Catalog
+from filters import efta_number
+from layout import StorageLayout
+from manifest import CATEGORIES
+
+
+class HttpError(Exception):
+    """A request that is answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """LRU of encoded JSON responses, valid for one version of the catalog."""
+
+    def __init__(self, max_entries: int = config.SERVE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._version = None
+
+    def get(self, key: str, version) -> Optional[bytes]:
+        """Cached body for a key, or None; a new catalog version empties the cache."""
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Byte span requested by a single-range `Range` header.
+
+    Args:
+        value: Header value, e.g. "bytes=0-1023", "bytes=1024-" or "bytes=-512"
+        size: File size
+
+    Returns:
+        (start, end) with end exclusive, or None to send the whole file
+        (malformed or multi-range headers are ignored, as RFC 9110 allows)
+
+    Raises:
+        HttpError: 416 if the range lies outside the file
+    """
+    unit, sep, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or not sep or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise HttpError(416, "Range not satisfiable")
+            return max(0, size - length), size
+        start = int(first)
+        end = int(last) + 1 if last else max(size, start + 1)
+    except ValueError:
+        return None
+    if end <= start:
+        return None
+    if start >= size:
+        raise HttpError(416, "Range not satisfiable")
+    return start, min(end, size)
+
+
+def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    """Method, target, version and (lower-cased) headers of a request head."""
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise HttpError(400, "Malformed header line")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def _head(status: int, headers: List[Tuple[str, str]], keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'replace')
+
+
+class CatalogServer:
+    """Asyncio HTTP server for the catalog API and the downloaded files."""
+
+    def __init__(self, output_dir: Optional[Path] = None, cache_entries: int = config.SERVE_CACHE_ENTRIES,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            output_dir: Download tree root
+            cache_entries: Size of the JSON response LRU (0 disables it)
+            logger: Logger for access and error messages
+        """
+        self.output_dir = Path(output_dir or config.OUTPUT_DIR)
+        self.logger = logger or logging.getLogger(__name__)
+        self.catalog = Catalog(self.output_dir)
+        self.layout = StorageLayout.load(self.output_dir)
+        self.cache = ResponseCache(cache_entries)
+        self._executor = ThreadPoolExecutor(max_workers=config.SERVE_DB_WORKERS, thread_name_prefix='catalog')
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def import_metadata(self) -> int:
+        """
+        Refresh the catalog's files table from metadata.json.
+
+        Returns:
+            Number of records imported (0 without a readable metadata file)
+        """
+        metadata_path = self.output_dir / config.METADATA_FILE
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read {metadata_path}: {e}")
+            return 0
+        return self.catalog.upsert_files(
+            f for files in metadata.values() for f in files if 'data_set' in f and 'filename' in f
+        )
+
+    async def start(self, host: str = config.SERVE_HOST, port: int = config.SERVE_PORT) -> asyncio.AbstractServer:
+        """Start listening (port 0 picks a free port; see `port`)."""
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port, limit=config.SERVE_MAX_HEADER_SIZE, backlog=1024
+        )
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve(self, host: str = config.SERVE_HOST, port: int = config.SERVE_PORT) -> None:
+        """Start and serve until cancelled."""
+        server = await self.start(host, port)
+        self.logger.info(f"Serving {self.output_dir} on http://{host}:{self.port}/")
+        async with server:
+            await server.serve_forever()
+
+    async def stop(self) -> None:
+        """Stop listening and drop open connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    def close(self) -> None:
+        """Stop the query threads and close the catalog."""
+        if self._server is not None:
+            self._server.close()
+        self._executor.shutdown(wait=True)
+        self.catalog.close()
+
+    # Connections
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), config.SERVE_IDLE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    writer.write(self._error_response(HttpError(431, "Request header too large"), False))
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                keep_alive = await self._handle_request(head, writer)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError, asyncio.CancelledError):
+                pass
+
+    async def _handle_request(self, head: bytes, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether the connection stays open."""
+        keep_alive = False
+        status = 500
+        target = '?'
+        try:
+            method, target, version, headers = _parse_head(head)
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+            if method not in ('GET', 'HEAD'):
+                # We never read request bodies, so the connection cannot be reused
+                keep_alive = False
+                raise HttpError(405, f"{method} not allowed")
+            url = urlsplit(target)
+            path = unquote(url.path)
+            if path.startswith('/files/'):
+                status = await self._send_file(writer, method, path, headers, keep_alive)
+            elif path.startswith('/api/'):
+                body = await self._api(path, url.query)
+                status = 200
+                writer.write(_head(200, [('Content-Type', 'application/json'),
+                                         ('Content-Length', str(len(body)))], keep_alive))
+                if method == 'GET':
+                    writer.write(body)
+            else:
+                raise HttpError(404, f"No such resource: {path}")
+        except HttpError as e:
+            status = e.status
+            writer.write(self._error_response(e, keep_alive))
+        except ConnectionError:
+            raise
+        except Exception as e:
+            self.logger.exception(f"Error handling {target}: {e}")
+            keep_alive = False
+            writer.write(self._error_response(HttpError(500, "Internal server error"), keep_alive))
+        self.logger.debug("%s %d", target, status)
+        return keep_alive
+
+    @staticmethod
+    def _error_response(error: HttpError, keep_alive: bool) -> bytes:
+        body = json.dumps({'error': str(error)}).encode('utf-8')
+        headers = [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))]
+        if error.status == 405:
+            headers.append(('Allow', 'GET, HEAD'))
+        return _head(error.status, headers, keep_alive) + body
+
+    # Files
+
+    async def _send_file(self, writer: asyncio.StreamWriter, method: str, path: str,
+                         headers: Dict[str, str], keep_alive: bool) -> int:
+        """Stream a file from the tree; returns the status sent."""
+        parts = path.split('/')[2:]
+        if (len(parts) != 3 or parts[1] not in CATEGORIES
+                or not parts[0].isdigit() or parts[2] in ('', '.', '..')):
+            raise HttpError(404, f"No such file: {path}")
+        data_set, category, filename = int(parts[0]), parts[1], parts[2]
+        try:
+            f = open(self.layout.locate(data_set, category, filename), 'rb')
+        except (OSError, ValueError):
+            raise HttpError(404, f"No such file: {path}")
+
+        with f:
+            stat = os.fstat(f.fileno())
+            start, end = 0, stat.st_size
+            status = 200
+            response_headers = [
+                ('Content-Type', mimetypes.guess_type(filename)[0] or 'application/octet-stream'),
+                ('Accept-Ranges', 'bytes'),
+                ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ]
+            if 'range' in headers:
+                try:
+                    span = parse_range(headers['range'], stat.st_size)
+                except HttpError:
+                    writer.write(_head(416, [('Content-Range', f"bytes */{stat.st_size}"),
+                                             ('Content-Length', '0')], keep_alive))
+                    return 416
+                if span is not None:
+                    start, end = span
+                    status = 206
+                    response_headers.append(('Content-Range', f"bytes {start}-{end - 1}/{stat.st_size}"))
+            response_headers.append(('Content-Length', str(end - start)))
+            writer.write(_head(status, response_headers, keep_alive))
+            if method == 'GET' and end > start:
+                await writer.drain()
+                await asyncio.get_running_loop().sendfile(writer.transport, f, start, end - start)
+        return status
+
+    # API
+
+    def _catalog_version(self):
+        try:
+            stat = os.stat(self.catalog.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def _api(self, path: str, query: str) -> bytes:
+        """
+        Encoded JSON answer to an API request, from the LRU when possible.
+
+        Identical requests arriving while the query runs wait for its answer
+        instead of querying again.
+        """
+        key = f"{path}?{query}"
+        body = self.cache.get(key, self._catalog_version())
+        if body is not None:
+            return body
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        pending = self._pending[key] = loop.create_future()
+        try:
+            result = await loop.run_in_executor(self._executor, self._route, path, parse_qs(query))
+            body = json.dumps(result).encode('utf-8')
+        except BaseException as e:
+            pending.set_exception(e)
+            pending.exception()  # retrieved here, so an unawaited failure is not reported
+            raise
+        finally:
+            del self._pending[key]
+        self.cache.put(key, body)
+        pending.set_result(body)
+        return body
+
+    def _route(self, path: str, params: Dict[str, List[str]]):
+        """Run an API request against the catalog (on a query thread)."""
+        parts = [part for part in path.split('/') if part][1:]
+        if parts == ['data-sets']:
+            return self._data_sets()
+        if len(parts) == 3 and parts[0] == 'data-sets' and parts[2] == 'files':
+            return self._files_page(params, data_set=self._number(parts[1]),
+                                    category=self._param(params, 'category'), name=self._param(params, 'name'))
+        if len(parts) == 3 and parts[0] == 'files':
+            return self._file_detail(self._number(parts[1]), parts[2])
+        if len(parts) == 2 and parts[0] == 'efta':
+            return self._efta(self._number(parts[1]))
+        if parts == ['search']:
+            return self._search(params)
+        raise HttpError(404, f"No such resource: {path}")
+
+    @staticmethod
+    def _number(value: str) -> int:
+        if not value.isdigit():
+            raise HttpError(404, f"Not a number: {value}")
+        return int(value)
+
+    @staticmethod
+    def _param(params: Dict[str, List[str]], name: str) -> Optional[str]:
+        values = params.get(name)
+        return values[-1] if values else None
+
+    def _paging(self, params: Dict[str, List[str]]) -> Tuple[int, int]:
+        try:
+            offset = int(self._param(params, 'offset') or 0)
+            limit = int(self._param(params, 'limit') or config.SERVE_PAGE_SIZE)
+        except ValueError:
+            raise HttpError(400, "offset and limit must be integers")
+        if offset < 0 or limit < 1:
+            raise HttpError(400, "offset must be >= 0 and limit >= 1")
+        return offset, min(limit, config.SERVE_MAX_PAGE_SIZE)
+
+    @staticmethod
+    def _page(items: List[Dict], total: Optional[int], offset: int, limit: int) -> Dict:
+        if total is not None:
+            more = offset + len(items) < total
+        else:
+            more = len(items) == limit
+        return {'items': items, 'total': total, 'offset': offset, 'limit': limit,
+                'next_offset': offset + len(items) if more else None}
+
+    @staticmethod
+    def _with_href(record: Dict) -> Dict:
+        if record.get('category'):
+            record['href'] = f"/files/{record['data_set']}/{record['category']}/{quote(record['filename'])}"
+        return record
+
+    def _data_sets(self) -> List[Dict]:
+        data_sets: Dict[int, Dict] = {}
+        for row in self.catalog.file_summary():
+            entry = data_sets.setdefault(row['data_set'], {'data_set': row['data_set'], 'files': 0,
+                                                           'size_bytes': 0, 'categories': {}})
+            entry['files'] += row['files']
+            entry['size_bytes'] += row['size_bytes'] or 0
+            entry['categories'][row['category'] or 'unknown'] = {'files': row['files'],
+                                                                 'size_bytes': row['size_bytes']}
+        return list(data_sets.values())
+
+    def _files_page(self, params: Dict[str, List[str]], **where) -> Dict:
+        offset, limit = self._paging(params)
+        records, total = self.catalog.files_page(offset=offset, limit=limit, **where)
+        return self._page([self._with_href(r) for r in records], total, offset, limit)
+
+    def _file_detail(self, data_set: int, filename: str) -> Dict:
+        records, _ = self.catalog.files_page(data_set=data_set, name=filename, limit=config.SERVE_MAX_PAGE_SIZE)
+        record = next((r for r in records if r['filename'] == filename), None)
+        if record is None:
+            raise HttpError(404, f"No file {filename} in data set {data_set}")
+        if record.get('category'):
+            path = self.layout.locate(data_set, record['category'], filename)
+            record.update(self.catalog.probe_info(path.relative_to(self.output_dir).as_posix()))
+        return self._with_href(record)
+
+    def _efta(self, number: int) -> List[Dict]:
+        # LIKE narrows the scan; efta_number() drops e.g. EFTA00012345 when looking up 1234
+        matches, offset = [], 0
+        while True:
+            records, total = self.catalog.files_page(name=f"%EFTA%{number}%", offset=offset,
+                                                     limit=config.SERVE_MAX_PAGE_SIZE)
+            matches += [self._with_href(r) for r in records if efta_number(r) == number]
+            offset += len(records)
+            if not records or offset >= total:
+                return matches
+
+    def _search(self, params: Dict[str, List[str]]) -> Dict:
+        text = self._param(params, 'q')
+        if not text:
+            raise HttpError(400, "Missing ?q=")
+        scope = self._param(params, 'scope') or 'files'
+        if scope == 'files':
+            return self._files_page(params, name=text)
+        if scope == 'members':
+            offset, limit = self._paging(params)
+            return self._page(self.catalog.search_archive_members(text, limit, offset), None, offset, limit)
+        raise HttpError(400, f"Unknown scope '{scope}' (expected files or members)")
+
+
+def main():
+    """Command-line entry point for the catalog API server."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Serve the catalog as a read-only JSON API, and the downloaded files with Range support"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    parser.add_argument(
+        "--host",
+        default=config.SERVE_HOST,
+        help=f"Address to listen on (default: {config.SERVE_HOST})"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=config.SERVE_PORT,
+        help=f"Port to listen on (default: {config.SERVE_PORT})"
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=config.SERVE_CACHE_ENTRIES,
+        help=f"JSON responses kept in memory, 0 to disable (default: {config.SERVE_CACHE_ENTRIES})"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log every request"
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s [%(levelname)s] %(message)s")
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+
+    try:
+        server = CatalogServer(output_dir, cache_entries=args.cache_entries)
+    except Exception as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    try:
+        imported = server.import_metadata()
+        if imported:
+            print(f"Indexed {imported} files from {config.METADATA_FILE}")
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nStopped")
+    except OSError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
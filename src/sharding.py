@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Deterministic sharding of a download run across machines.
+
+Each file is assigned to one of N shards by a stable hash of its EFTA ID
+(or its URL when the filename has none), so every node can pick its share
+of the work with `--shard i/N` and no coordinator. The per-shard metadata
+files written by each node are merged afterwards by running this module.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import config
+from catalog import Catalog
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec like "2/4".
+
+    Args:
+        spec: "i/N" with 1 <= i <= N
+
+    Returns:
+        (index, count) tuple
+
+    Raises:
+        ValueError: If the spec is malformed or out of range
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec)
+    if not match:
+        raise ValueError(f"Invalid shard spec '{spec}' (expected i/N, e.g. 1/4)")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard spec '{spec}' (need 1 <= i <= N)")
+    return index, count
+
+
+def shard_arg(spec: str) -> Tuple[int, int]:
+    """argparse type for --shard."""
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def shard_key(file_info: Dict) -> str:
+    """Stable identity of a file: its EFTA ID if the filename has one, else its URL."""
+    match = re.search(config.FILENAME_PATTERN, file_info.get('filename', ''), re.IGNORECASE)
+    if match:
+        return match.group(0).upper()
+    return file_info['url']
+
+
+def shard_of(file_info: Dict, count: int) -> int:
+    """Return the 1-based shard a file belongs to out of `count` shards."""
+    digest = hashlib.sha256(shard_key(file_info).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def filter_shard(files: List[Dict], shard: Tuple[int, int]) -> List[Dict]:
+    """Keep only the files that belong to the given (index, count) shard."""
+    index, count = shard
+    return [f for f in files if shard_of(f, count) == index]
+
+
+def shard_metadata_name(shard: Tuple[int, int]) -> str:
+    """Metadata filename a shard writes instead of config.METADATA_FILE."""
+    index, count = shard
+    stem, suffix = Path(config.METADATA_FILE).stem, Path(config.METADATA_FILE).suffix
+    return f"{stem}.shard-{index}-of-{count}{suffix}"
+
+
+def merge_manifests(metadata_paths: List[Path]) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+    """
+    Merge per-shard metadata files into one.
+
+    Files are matched by data set and filename. When two manifests describe
+    the same file with a different URL or size, the first one wins and the
+    disagreement is reported as a conflict.
+
+    Args:
+        metadata_paths: metadata JSON files written by each shard
+
+    Returns:
+        (merged metadata, list of conflict dicts)
+    """
+    merged: Dict[str, List[Dict]] = {}
+    seen: Dict[Tuple[str, str], Tuple[Dict, str]] = {}
+    conflicts = []
+
+    for path in metadata_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+        for data_set_key, files in metadata.items():
+            for file_info in files:
+                key = (data_set_key, file_info['filename'])
+                if key not in seen:
+                    seen[key] = (file_info, str(path))
+                    merged.setdefault(data_set_key, []).append(file_info)
+                    continue
+
+                existing, source = seen[key]
+                for field in ('url', 'file_size_bytes'):
+                    if field in existing and field in file_info and existing[field] != file_info[field]:
+                        conflicts.append({
+                            'data_set': data_set_key,
+                            'filename': file_info['filename'],
+                            'field': field,
+                            'kept': existing[field],
+                            'kept_from': source,
+                            'dropped': file_info[field],
+                            'dropped_from': str(path),
+                        })
+                # Fill in details the first manifest didn't have (e.g. size)
+                for field, value in file_info.items():
+                    existing.setdefault(field, value)
+
+    for files in merged.values():
+        files.sort(key=lambda f: f['filename'])
+    ordered = sorted(merged.items(), key=lambda item: int(re.sub(r"\D", "", item[0]) or 0))
+    return dict(ordered), conflicts
+
+
+def main():
+    """Merge per-shard metadata files into one metadata.json and the catalog."""
+    parser = argparse.ArgumentParser(
+        description="Merge per-shard metadata files into a single catalog"
+    )
+    parser.add_argument(
+        "manifests",
+        nargs="+",
+        help="Per-shard metadata files (metadata.shard-i-of-N.json)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Where to write the merged metadata and catalog (default: {config.OUTPUT_DIR})"
+    )
+
+    args = parser.parse_args()
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+    output_dir.mkdir(exist_ok=True, parents=True)
+
+    try:
+        merged, conflicts = merge_manifests([Path(p) for p in args.manifests])
+    except (IOError, OSError, ValueError, KeyError) as e:
+        print(f"❌ Failed to read manifests: {e}")
+        sys.exit(1)
+
+    metadata_path = output_dir / config.METADATA_FILE
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2)
+
+    with Catalog(output_dir) as catalog:
+        written = catalog.upsert_files(f for files in merged.values() for f in files)
+
+    print(f"✓ Merged {len(args.manifests)} manifests: {written} files -> {metadata_path}")
+
+    if conflicts:
+        conflicts_path = output_dir / "merge_conflicts.json"
+        with open(conflicts_path, 'w', encoding='utf-8') as f:
+            json.dump(conflicts, f, indent=2)
+        print(f"⚠️  {len(conflicts)} conflicts found, see {conflicts_path}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Storage sinks: where downloaded files are written.
+
+Both downloaders stream every file into a sink writer and only commit it
+once the transfer completed, so a failed download never leaves a file that
+looks finished. Sinks are chosen with `--sink`:
+
+    local               files under the output directory in its storage layout (default)
+    tar[:DIR]           rotating ~TAR_SHARD_SIZE .tar shards in DIR (default
+                        <output-dir>/shards), each with a JSON-lines sidecar index
+                        of member offsets for random access without reading the tar
+    s3://BUCKET[/PREFIX]
+                        objects in an S3-compatible store (endpoint S3_ENDPOINT_URL or
+                        config.S3_ENDPOINT, credentials AWS_ACCESS_KEY_ID and
+                        AWS_SECRET_ACCESS_KEY; requests are unsigned without them)
+
+Tar members are named data_set_N/<category>/<filename>. Each process writing
+into a shard directory claims shard numbers of its own, so several workers
+(--queue) can share one. The sidecar index is authoritative: a shard cut
+short by a crash lacks its end-of-archive blocks, but every indexed member
+in it is complete.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from urllib.parse import quote, urlparse
+
+import requests
+
+import config
+from layout import StorageLayout
+from planner import preallocate
+
+_BLOCK = tarfile.BLOCKSIZE
+
+
+def member_name(file_info: Dict) -> str:
+    """Name of a file inside a tar shard or bucket prefix."""
+    return f"data_set_{file_info['data_set']}/{file_info['category']}/{file_info['filename']}"
+
+
+class SinkWriter:
+    """Destination of one download: written, then committed or aborted exactly once.
+
+    Used as a context manager, it commits when the block finishes and aborts
+    when it raises (or if abort() was called inside it).
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        """Make the file visible."""
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        """Discard everything written."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.closed:
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            # Best-effort cleanup - don't mask the original error
+            try:
+                self.abort()
+            except Exception:
+                pass
+
+
+class StorageSink:
+    """Where downloaded files go."""
+
+    def exists(self, file_info: Dict) -> bool:
+        """Whether the file is already stored."""
+        raise NotImplementedError
+
+    def open(self, file_info: Dict, size_hint: Optional[int] = None) -> SinkWriter:
+        """
+        Start storing a file.
+
+        Args:
+            file_info: File entry (data_set, category, filename)
+            size_hint: Expected size in bytes, if known
+
+        Returns:
+            SinkWriter to stream the file into
+        """
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        """Human-readable destination."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Flush and release everything the sink holds open."""
+
+
+# Local tree
+
+class _LocalWriter(SinkWriter):
+    """Write under a .part name (tagged per worker, if given), rename into place on commit."""
+
+    def __init__(self, path: Path, size_hint: Optional[int], part_tag: Optional[str] = None):
+        super().__init__()
+        self.path = path
+        tag = f".{re.sub(r'[^A-Za-z0-9_-]', '_', part_tag)}" if part_tag else ''
+        self.part_path = path.with_name(f"{path.name}{tag}.part")
+        path.parent.mkdir(exist_ok=True, parents=True)
+        self._file = open(self.part_path, 'wb')
+        preallocate(self._file, size_hint)
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.size += len(data)
+
+    def commit(self) -> None:
+        self.closed = True
+        # Drop any preallocated space the transfer didn't fill
+        self._file.truncate(self.size)
+        self._file.close()
+        os.replace(self.part_path, self.path)
+
+    def abort(self) -> None:
+        self.closed = True
+        self._file.close()
+        if self.part_path.exists():
+            self.part_path.unlink()
+
+
+class LocalSink(StorageSink):
+    """Individual files under the output directory (see layout.py)."""
+
+    def __init__(self, layout: StorageLayout, part_tag: Optional[str] = None):
+        """
+        Args:
+            layout: Where files go in the tree
+            part_tag: Added to temporary .part names, so that workers sharing
+                the tree (--queue) never write into each other's partial files
+        """
+        self.layout = layout
+        self.part_tag = part_tag
+
+    def path(self, file_info: Dict) -> Path:
+        return self.layout.locate(file_info['data_set'], file_info['category'], file_info['filename'])
+
+    def exists(self, file_info: Dict) -> bool:
+        return self.path(file_info).exists()
+
+    def open(self, file_info: Dict, size_hint: Optional[int] = None) -> SinkWriter:
+        return _LocalWriter(self.path(file_info), size_hint, self.part_tag)
+
+    def describe(self) -> str:
+        return f"{self.layout.output_dir} ({self.layout.name} layout)"
+
+
+# Tar shards
+
+def _tar_header(name: str, size: int, mtime: float) -> bytes:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    # GNU headers keep the same length whatever the size (base-256 past 8 GiB),
+    # so the placeholder written first can be overwritten in place
+    return info.tobuf(tarfile.GNU_FORMAT, 'utf-8', 'surrogateescape')
+
+
+class _TarWriter(SinkWriter):
+    """Stream one member into the current shard; its header is finalized on commit."""
+
+    def __init__(self, sink: 'TarShardSink', name: str, file_info: Dict):
+        super().__init__()
+        self.sink = sink
+        self.name = name
+        self.file_info = file_info
+        self.mtime = time.time()
+        self.header_offset = sink._shard.tell()
+        header = _tar_header(name, 0, self.mtime)
+        sink._shard.write(header)
+        self.offset = self.header_offset + len(header)
+
+    def write(self, data: bytes) -> None:
+        self.sink._shard.write(data)
+        self.size += len(data)
+
+    def commit(self) -> None:
+        self.closed = True
+        sink = self.sink
+        try:
+            shard = sink._shard
+            shard.write(b'\0' * (-self.size % _BLOCK))
+            end = shard.tell()
+            shard.seek(self.header_offset)
+            shard.write(_tar_header(self.name, self.size, self.mtime))
+            shard.seek(end)
+            shard.flush()
+            entry = {
+                'name': self.name, 'shard': sink._shard_path.name, 'header_offset': self.header_offset,
+                'offset': self.offset, 'size': self.size, 'url': self.file_info.get('url'),
+            }
+            sink._index.write(json.dumps(entry) + '\n')
+            sink._index.flush()
+            sink.members[self.name] = entry
+        finally:
+            sink._lock.release()
+
+    def abort(self) -> None:
+        self.closed = True
+        try:
+            self.sink._shard.seek(self.header_offset)
+            self.sink._shard.truncate()
+        finally:
+            self.sink._lock.release()
+
+
+class TarShardSink(StorageSink):
+    """Sequential .tar shards with a sidecar offset index."""
+
+    def __init__(self, directory: Path, shard_size: int = config.TAR_SHARD_SIZE, prefix: str = 'shard'):
+        """
+        Args:
+            directory: Where shards and their .idx files are written
+            shard_size: Start a new shard once a shard reaches this many bytes
+            prefix: Shard file name prefix (<prefix>-NNNNN.tar)
+        """
+        self.directory = Path(directory)
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.directory.mkdir(exist_ok=True, parents=True)
+        # One member is written at a time; held from open() until commit/abort
+        self._lock = threading.Lock()
+        self._shard = None
+        self._shard_path: Optional[Path] = None
+        self._index = None
+        self.members: Dict[str, Dict] = {}
+        for entry in self.index_entries(self.directory):
+            self.members[entry['name']] = entry
+
+    @staticmethod
+    def index_entries(directory: Path) -> Iterator[Dict]:
+        """Every member recorded in the sidecar indexes of a shard directory, shard by shard."""
+        for index_path in sorted(Path(directory).glob("*.idx")):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of a crashed writer
+
+    def exists(self, file_info: Dict) -> bool:
+        return member_name(file_info) in self.members
+
+    def open(self, file_info: Dict, size_hint: Optional[int] = None) -> SinkWriter:
+        self._lock.acquire()
+        try:
+            if self._shard is not None:
+                used = self._shard.tell()
+                if used >= self.shard_size or (size_hint and used and used + size_hint > self.shard_size):
+                    self._finish_shard()
+            if self._shard is None:
+                self._claim_shard()
+            return _TarWriter(self, member_name(file_info), file_info)
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def _claim_shard(self) -> None:
+        """Open the first shard number no other writer has taken."""
+        number = 0
+        while True:
+            path = self.directory / f"{self.prefix}-{number:05d}.tar"
+            try:
+                self._shard = open(path, 'xb')
+                break
+            except FileExistsError:
+                number += 1
+        self._shard_path = path
+        self._index = open(path.with_suffix('.idx'), 'a', encoding='utf-8')
+
+    def _finish_shard(self) -> None:
+        """Write the end-of-archive blocks and close the current shard."""
+        self._shard.write(b'\0' * (2 * _BLOCK))
+        self._shard.close()
+        self._index.close()
+        self._shard = self._index = None
+
+    def read(self, name: str) -> bytes:
+        """Read one member through the index (a single seek, no tar scan)."""
+        entry = self.members[name]
+        with open(self.directory / entry['shard'], 'rb') as f:
+            f.seek(entry['offset'])
+            return f.read(entry['size'])
+
+    def describe(self) -> str:
+        return f"{self.directory} (tar shards of {self.shard_size // (1024 * 1024)} MB)"
+
+    def close(self) -> None:
+        with self._lock:
+            if self._shard is not None:
+                self._finish_shard()
+
+
+# S3-compatible object store
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+class _S3Writer(SinkWriter):
+    """Spool the object (memory, then disk) while hashing it; PUT it on commit."""
+
+    def __init__(self, sink: 'S3Sink', key: str):
+        super().__init__()
+        self.sink = sink
+        self.key = key
+        self._spool = tempfile.SpooledTemporaryFile(max_size=config.S3_SPOOL_SIZE)
+        self._digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self._spool.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+
+    def commit(self) -> None:
+        self.closed = True
+        try:
+            self._spool.seek(0)
+            self.sink._request('PUT', self.key, data=self._spool, payload_hash=self._digest.hexdigest(),
+                               headers={'Content-Length': str(self.size)})
+            self.sink._known[self.key] = True
+        finally:
+            self._spool.close()
+
+    def abort(self) -> None:
+        self.closed = True
+        self._spool.close()
+
+
+class S3Sink(StorageSink):
+    """Objects in an S3-compatible bucket (path-style requests, SigV4-signed)."""
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint: Optional[str] = None,
+                 region: str = config.S3_REGION, access_key: Optional[str] = None,
+                 secret_key: Optional[str] = None, session: Optional[requests.Session] = None):
+        """
+        Args:
+            bucket: Bucket name
+            prefix: Key prefix for every object
+            endpoint: Service URL (default: $S3_ENDPOINT_URL or config.S3_ENDPOINT)
+            region: Signing region
+            access_key: Access key (default: $AWS_ACCESS_KEY_ID; unsigned requests without one)
+            secret_key: Secret key (default: $AWS_SECRET_ACCESS_KEY)
+            session: HTTP session (default: a new requests.Session)
+        """
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.endpoint = (endpoint or os.environ.get('S3_ENDPOINT_URL') or config.S3_ENDPOINT).rstrip('/')
+        self.region = region
+        self.access_key = access_key or os.environ.get('AWS_ACCESS_KEY_ID')
+        self.secret_key = secret_key or os.environ.get('AWS_SECRET_ACCESS_KEY')
+        self.session = session or requests.Session()
+        self._known: Dict[str, bool] = {}
+
+    def key(self, file_info: Dict) -> str:
+        return self.prefix + member_name(file_info)
+
+    def _signed_headers(self, method: str, path: str, payload_hash: str) -> Dict[str, str]:
+        """AWS Signature Version 4 headers for a request without a query string."""
+        amz_date = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+        headers = {'x-amz-content-sha256': payload_hash, 'x-amz-date': amz_date}
+        if not self.access_key or not self.secret_key:
+            return headers
+        host = urlparse(self.endpoint).netloc
+        signed = 'host;x-amz-content-sha256;x-amz-date'
+        canonical_request = '\n'.join([
+            method, path, '',
+            f"host:{host}\nx-amz-content-sha256:{payload_hash}\nx-amz-date:{amz_date}\n",
+            signed, payload_hash,
+        ])
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ])
+        key = _hmac(('AWS4' + self.secret_key).encode('utf-8'), amz_date[:8])
+        for part in (self.region, 's3', 'aws4_request'):
+            key = _hmac(key, part)
+        signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers['Authorization'] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed}, Signature={signature}"
+        )
+        return headers
+
+    def _request(self, method: str, key: str, data=None, payload_hash: Optional[str] = None,
+                 headers: Optional[Dict] = None) -> requests.Response:
+        path = quote(f"/{self.bucket}/{key}", safe='/-_.~')
+        all_headers = self._signed_headers(method, path, payload_hash or hashlib.sha256(b'').hexdigest())
+        all_headers.update(headers or {})
+        response = self.session.request(
+            method, self.endpoint + path, data=data, headers=all_headers,
+            timeout=(config.CONNECT_TIMEOUT, config.REQUEST_TIMEOUT),
+        )
+        if method != 'HEAD' or response.status_code != 404:
+            response.raise_for_status()
+        return response
+
+    def exists(self, file_info: Dict) -> bool:
+        key = self.key(file_info)
+        if key not in self._known:
+            try:
+                self._known[key] = self._request('HEAD', key).status_code == 200
+            except requests.exceptions.RequestException:
+                return False  # unknown; the upload will report the problem
+        return self._known[key]
+
+    def open(self, file_info: Dict, size_hint: Optional[int] = None) -> SinkWriter:
+        return _S3Writer(self, self.key(file_info))
+
+    def describe(self) -> str:
+        return f"s3://{self.bucket}/{self.prefix} at {self.endpoint}"
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def sink_from_spec(spec: str, output_dir: Path, layout: Optional[StorageLayout] = None) -> StorageSink:
+    """
+    Build the sink named by a --sink value.
+
+    Args:
+        spec: local, tar, tar:DIR or s3://BUCKET[/PREFIX]
+        output_dir: Download tree root
+        layout: Layout for the local sink (default: the tree's recorded one)
+
+    Raises:
+        ValueError: If the spec names no known sink
+    """
+    if spec == 'local':
+        return LocalSink(layout or StorageLayout.load(output_dir))
+    if spec == 'tar' or spec.startswith('tar:'):
+        directory = spec[4:] or Path(output_dir) / config.TAR_SHARD_DIR
+        return TarShardSink(Path(directory))
+    if spec.startswith('s3://'):
+        bucket, _, prefix = spec[5:].partition('/')
+        if not bucket:
+            raise ValueError(f"Invalid sink '{spec}' (expected s3://BUCKET[/PREFIX])")
+        return S3Sink(bucket, prefix)
+    raise ValueError(f"Invalid sink '{spec}' (use local, tar, tar:DIR or s3://BUCKET[/PREFIX])")
+
+
+def main():
+    """Command-line entry point for reading tar shards through their index."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="List or extract files stored in tar shards (via the sidecar index)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    parser.add_argument(
+        "--shard-dir",
+        type=str,
+        help=f"Shard directory (default: <output-dir>/{config.TAR_SHARD_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List stored members with their shard and size")
+    cat_parser = subparsers.add_parser("cat", help="Write one member to stdout")
+    cat_parser.add_argument("name", help="Member name, e.g. data_set_1/documents/EFTA00000001.pdf")
+
+    args = parser.parse_args()
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+    shard_dir = Path(args.shard_dir) if args.shard_dir else output_dir / config.TAR_SHARD_DIR
+    if not shard_dir.is_dir():
+        print(f"❌ No shard directory at {shard_dir}")
+        sys.exit(1)
+
+    sink = TarShardSink(shard_dir)
+    if args.command == "list":
+        for entry in sink.members.values():
+            print(f"{entry['name']}\t{entry['shard']}\t{entry['size']}")
+    elif args.command == "cat":
+        if args.name not in sink.members:
+            print(f"❌ {args.name} is not in {shard_dir}")
+            sys.exit(1)
+        sys.stdout.buffer.write(sink.read(args.name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Delta sync of the download tree against a new link list.
+
+The new list, the files on disk and the catalog's `files` table are each
+sorted by (data set, filename) and walked together in one merge pass, so a
+refresh costs one directory listing plus work proportional to what changed.
+Each file ends up in one of these groups:
+
+    new        listed, not on disk                      -> download
+    changed    listed, on disk, URL differs from the    -> set aside, download
+               one the catalog recorded
+    moved      listed, on disk under another category   -> rename into place
+    unchanged  listed and on disk                       -> nothing
+    removed    on disk (or in the catalog), no longer   -> report, or quarantine
+               listed
+"""
+
+import heapq
+import itertools
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import config
+from layout import StorageLayout
+
+# Source tags, in the order records for one key come out of the merge
+_LISTED, _LOCAL, _CATALOG = 0, 1, 2
+
+
+def scan_local(output_dir: Path, data_sets: Iterable[int]) -> List[Dict]:
+    """
+    List downloaded files of the given data sets.
+
+    Files are found wherever the tree's storage layout puts them (see
+    layout.py); extracted archive members and .part leftovers are ignored.
+
+    Returns:
+        Dicts with data_set, category, filename and path, sorted by (data_set, filename)
+    """
+    local = list(StorageLayout.load(output_dir).files(data_sets))
+    local.sort(key=_key)
+    return local
+
+
+def _key(record: Dict) -> Tuple[int, str]:
+    return record['data_set'], record['filename']
+
+
+def _tagged(records: Iterable[Dict], tag: int) -> Iterator[Tuple[Tuple[int, str], int, Dict]]:
+    return ((_key(record), tag, record) for record in records)
+
+
+class SyncPlan:
+    """Result of reconciling a link list with the local tree and catalog."""
+
+    def __init__(self):
+        self.new: List[Dict] = []
+        self.changed: List[Tuple[Dict, Dict]] = []   # (listed, local)
+        self.moved: List[Tuple[Dict, Dict]] = []     # (listed, local)
+        self.unchanged: List[Dict] = []
+        self.removed: List[Dict] = []                 # local records (or catalog rows with no file)
+
+    @property
+    def to_download(self) -> List[Dict]:
+        """Listed entries that need a transfer."""
+        return self.new + [listed for listed, _ in self.changed]
+
+    def report(self) -> str:
+        """Multi-line summary."""
+        lines = [
+            f"New: {len(self.new)}",
+            f"Changed: {len(self.changed)}",
+            f"Moved: {len(self.moved)}",
+            f"Unchanged: {len(self.unchanged)}",
+            f"No longer listed: {len(self.removed)}",
+        ]
+        for record in self.removed[:20]:
+            where = record.get('path') or f"data_set_{record['data_set']}/{record['filename']} (catalog only)"
+            lines.append(f"  - {where}")
+        if len(self.removed) > 20:
+            lines.append(f"  ... and {len(self.removed) - 20} more")
+        return "\n".join(lines)
+
+
+def plan_sync(listed: List[Dict], local: List[Dict], catalog_rows: List[Dict]) -> SyncPlan:
+    """
+    Reconcile the three sorted sources in a single merge pass.
+
+    Args:
+        listed: file_info dicts of the new link list
+        local: scan_local() output
+        catalog_rows: Catalog.files() rows for the same data sets
+
+    Returns:
+        SyncPlan
+    """
+    plan = SyncPlan()
+    merged = heapq.merge(
+        _tagged(sorted(listed, key=_key), _LISTED),
+        _tagged(local, _LOCAL),
+        _tagged(sorted(catalog_rows, key=_key), _CATALOG),
+    )
+    for _, group in itertools.groupby(merged, key=lambda item: item[0]):
+        by_source: Dict[int, List[Dict]] = {}
+        for _, tag, record in group:
+            by_source.setdefault(tag, []).append(record)
+        listed_entry = by_source.get(_LISTED, [None])[0]
+        local_entries = by_source.get(_LOCAL, [])
+        catalog_row = by_source.get(_CATALOG, [None])[0]
+
+        if listed_entry is None:
+            plan.removed.extend(local_entries or [catalog_row])
+            continue
+        if not local_entries:
+            plan.new.append(listed_entry)
+            continue
+
+        in_place = [e for e in local_entries if e['category'] == listed_entry['category']]
+        local_entry = in_place[0] if in_place else local_entries[0]
+        # Same filename in several category folders: keep one, the rest are strays
+        plan.removed.extend(e for e in local_entries if e is not local_entry)
+        if catalog_row is not None and catalog_row.get('url') and catalog_row['url'] != listed_entry['url']:
+            plan.changed.append((listed_entry, local_entry))
+        elif not in_place:
+            plan.moved.append((listed_entry, local_entry))
+        else:
+            plan.unchanged.append(listed_entry)
+    return plan
+
+
+def quarantine(output_dir: Path, path: Path, original: Optional[Path] = None,
+               stamp: Optional[str] = None) -> Path:
+    """
+    Move a file under <output_dir>/quarantine/<stamp>/, keeping its relative path.
+
+    Args:
+        output_dir: Download tree root
+        path: File to move
+        original: Path the file had in the tree, if it was renamed since
+        stamp: Folder name (default: today's date)
+
+    Returns:
+        The new location
+    """
+    stamp = stamp or time.strftime('%Y%m%d')
+    dest = Path(output_dir) / config.QUARANTINE_DIR / stamp / Path(original or path).relative_to(output_dir)
+    dest.parent.mkdir(exist_ok=True, parents=True)
+    os.replace(path, dest)
+    return dest
@@ -0,0 +1,225 @@
+"""
+Byte-level bandwidth throttling shared by all concurrent transfers.
+
+A single BandwidthLimiter is created per process and every streaming
+write loop calls consume() with the size of each chunk it writes. The
+limiter is a token bucket refilled at the current cap, which can follow a
+time-of-day schedule (e.g. a higher cap at night).
+"""
+
+import re
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a human size like "20M", "1.5G" or "512k" into bytes.
+
+    Units are binary (K = 1024). A trailing "B", "iB" or "/s" is accepted.
+
+    Raises:
+        ValueError: If the text is not a size
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kKmMgGtT]?)(?:i?[bB])?(?:/s)?\s*", text)
+    if not match:
+        raise ValueError(f"Invalid size '{text}' (expected e.g. 500K, 20M, 1.5G)")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def format_rate(rate: Optional[float]) -> str:
+    """Format bytes/s for humans."""
+    if rate is None:
+        return "unlimited"
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if rate < 1024 or unit == 'GB':
+            return f"{rate:.1f} {unit}/s"
+        rate /= 1024
+    return f"{rate:.1f} GB/s"
+
+
+class TokenBucket:
+    """Thread-safe token bucket; tokens are bytes (or requests)."""
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second (None or 0 means unlimited)
+            capacity: Maximum burst size (default: one second's worth)
+        """
+        self._lock = threading.Lock()
+        self.rate = rate or None
+        self.capacity = capacity if capacity is not None else (self.rate or 0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+
+    def set_rate(self, rate: Optional[float], capacity: Optional[float] = None) -> None:
+        """Change the refill rate (and burst size) on the fly."""
+        with self._lock:
+            self._refill()
+            self.rate = rate or None
+            self.capacity = capacity if capacity is not None else (self.rate or 0)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def consume(self, amount: float = 1) -> float:
+        """
+        Take `amount` tokens, sleeping until the bucket can afford them.
+
+        The bucket may go into debt for requests larger than its capacity;
+        the caller then sleeps until the debt is paid off, which keeps large
+        chunks from starving.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            self._refill()
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class BandwidthSchedule:
+    """Time-of-day bandwidth caps, e.g. "22:00-06:00=100M,09:00-17:00=5M"."""
+
+    def __init__(self, windows: List[Tuple[int, int, Optional[int]]]):
+        """
+        Args:
+            windows: (start minute, end minute, bytes/s) tuples; a window whose
+                end is before its start wraps past midnight
+        """
+        self.windows = windows
+
+    @classmethod
+    def parse(cls, spec: str) -> "BandwidthSchedule":
+        """
+        Parse a comma-separated list of HH:MM-HH:MM=RATE windows.
+
+        A rate of 0 or "unlimited" removes the cap during that window.
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        windows = []
+        for part in filter(None, (p.strip() for p in spec.split(','))):
+            match = re.fullmatch(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(\S+)", part)
+            if not match:
+                raise ValueError(f"Invalid schedule window '{part}' (expected HH:MM-HH:MM=RATE)")
+            h1, m1, h2, m2, rate_text = match.groups()
+            start, end = int(h1) * 60 + int(m1), int(h2) * 60 + int(m2)
+            if not (0 <= start < 1440 and 0 <= end <= 1440):
+                raise ValueError(f"Invalid time in schedule window '{part}'")
+            rate = None if rate_text.lower() == 'unlimited' else (parse_size(rate_text) or None)
+            windows.append((start, end, rate))
+        return cls(windows)
+
+    def rate_at(self, when: datetime, default: Optional[int]) -> Optional[int]:
+        """Return the cap for a point in time (first matching window wins)."""
+        minute = when.hour * 60 + when.minute
+        for start, end, rate in self.windows:
+            if start <= end:
+                if start <= minute < end:
+                    return rate
+            elif minute >= start or minute < end:
+                return rate
+        return default
+
+
+class BandwidthLimiter:
+    """Process-wide bandwidth cap applied to streamed chunks."""
+
+    # How often the schedule is re-evaluated
+    SCHEDULE_CHECK_INTERVAL = 30.0
+
+    def __init__(self, max_rate: Optional[int], schedule: Optional[BandwidthSchedule] = None):
+        """
+        Args:
+            max_rate: Default cap in bytes/s (None for unlimited)
+            schedule: Optional time-of-day overrides
+        """
+        self.default_rate = max_rate
+        self.schedule = schedule
+        self._bucket = TokenBucket(self._scheduled_rate())
+        self._checked = time.monotonic()
+
+        self._stats_lock = threading.Lock()
+        self._bytes = 0
+        self._started: Optional[float] = None
+        self._waited = 0.0
+
+    def _scheduled_rate(self) -> Optional[int]:
+        if self.schedule is None:
+            return self.default_rate
+        return self.schedule.rate_at(datetime.now(), self.default_rate)
+
+    @property
+    def current_rate(self) -> Optional[float]:
+        """Cap currently in force, in bytes/s."""
+        return self._bucket.rate
+
+    def consume(self, nbytes: int) -> None:
+        """Account for `nbytes` just received, sleeping as needed to honor the cap."""
+        now = time.monotonic()
+        if self.schedule is not None and now - self._checked >= self.SCHEDULE_CHECK_INTERVAL:
+            self._checked = now
+            rate = self._scheduled_rate()
+            if rate != self._bucket.rate:
+                self._bucket.set_rate(rate)
+
+        waited = self._bucket.consume(nbytes)
+        with self._stats_lock:
+            if self._started is None:
+                self._started = now
+            self._bytes += nbytes
+            self._waited += waited
+
+    def achieved_rate(self) -> float:
+        """Average bytes/s since the first chunk."""
+        with self._stats_lock:
+            if self._started is None:
+                return 0.0
+            elapsed = max(time.monotonic() - self._started, 1e-6)
+            return self._bytes / elapsed
+
+    def report(self) -> str:
+        """One-line summary of achieved rate against the cap."""
+        with self._stats_lock:
+            total, waited = self._bytes, self._waited
+        return (
+            f"Bandwidth: {total / (1024 * 1024):.1f} MB at {format_rate(self.achieved_rate())} "
+            f"(cap {format_rate(self.current_rate)}, throttled {waited:.1f}s)"
+        )
+
+
+def bandwidth_limiter_from_args(max_bandwidth: Optional[str],
+                                schedule: Optional[str]) -> Optional[BandwidthLimiter]:
+    """
+    Build the limiter for --max-bandwidth / --bandwidth-schedule, or None if unused.
+
+    Raises:
+        ValueError: If either option is malformed
+    """
+    if not max_bandwidth and not schedule:
+        return None
+    max_rate = parse_size(max_bandwidth) if max_bandwidth else None
+    parsed_schedule = BandwidthSchedule.parse(schedule) if schedule else None
+    return BandwidthLimiter(max_rate or None, parsed_schedule)
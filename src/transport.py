@@ -0,0 +1,299 @@
+"""
+Shared HTTP transport for the scraper and the CSV downloader.
+
+Both downloaders talk HTTP through a Transport: a keep-alive connection pool
+sized for concurrent workers, separate connect and read timeouts, and
+urllib3-level retries with exponential backoff (honouring Retry-After) for
+connection errors and 429/5xx answers. Backends are pluggable so another
+client can be benchmarked without touching the downloaders; a backend must
+return requests-compatible responses and raise requests exceptions.
+"""
+
+import json
+from itertools import takewhile
+from typing import Callable, Dict, Optional
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+# Answers worth retrying: rate limiting and transient server trouble
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HookedRetry(Retry):
+    """urllib3 Retry that reports every retry to a callback before backing off."""
+
+    def __init__(self, *args, on_retry: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_retry = on_retry
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.on_retry = self.on_retry
+        return retry
+
+    def get_backoff_time(self) -> float:
+        """
+        Seconds to sleep before the next retry: backoff_factor, doubling per consecutive error.
+
+        urllib3 2.x retries the first error at once; this waits before the
+        first retry too.
+        """
+        consecutive = len(list(takewhile(lambda r: r.redirect_location is None, reversed(self.history))))
+        if consecutive == 0:
+            return 0
+        return min(getattr(self, 'backoff_max', 120), self.backoff_factor * 2 ** (consecutive - 1))
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if self.on_retry is not None:
+            reason = error if error is not None else f"HTTP {response.status}" if response is not None else None
+            attempt = len(retry.history)
+            self.on_retry(method, url, reason, attempt)
+        return retry
+
+
+def make_retry(retries: int = config.MAX_RETRIES, on_retry: Optional[Callable] = None) -> HookedRetry:
+    """
+    Build the retry policy shared by all backends.
+
+    Backoff doubles from RETRY_DELAY / 2 (5s, 10s, 20s with the defaults;
+    see HookedRetry.get_backoff_time), unless Retry-After says otherwise. Only
+    idempotent GET/HEAD requests are retried; after the last attempt the final
+    response is returned so raise_for_status() reports the real status.
+
+    Args:
+        retries: Retries after the first attempt
+        on_retry: Called as on_retry(method, url, reason, attempt) before each retry
+    """
+    return HookedRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=config.RETRY_DELAY / 2,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+        on_retry=on_retry,
+    )
+
+
+def retries_made(response) -> int:
+    """
+    Retries the transport made before giving this response (redirects not counted).
+
+    Args:
+        response: Response from either backend, or None (e.g. a connection error)
+    """
+    retry = getattr(getattr(response, "raw", None), "retries", None)
+    if retry is None:
+        return 0
+    return sum(1 for entry in retry.history if entry.redirect_location is None)
+
+
+class Transport:
+    """
+    Interface the downloaders use for HTTP.
+
+    Implementations keep a `headers` mapping sent with every request, accept
+    the requests-style keyword arguments used in this package (headers,
+    timeout, stream, allow_redirects) and apply the configured connect/read
+    timeouts when no timeout is given.
+    """
+
+    headers: Dict[str, str]
+
+    def get(self, url: str, **kwargs):
+        raise NotImplementedError
+
+    def head(self, url: str, **kwargs):
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RequestsTransport(requests.Session, Transport):
+    """requests.Session with a sized keep-alive pool, retries and split timeouts."""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, pool_size: int = config.HTTP_POOL_SIZE,
+                 retries: int = config.MAX_RETRIES, on_retry: Optional[Callable] = None):
+        """
+        Args:
+            headers: Default headers for every request
+            pool_size: Connections kept per host (match the number of workers)
+            retries: Retries per request (see make_retry)
+            on_retry: Retry callback (see make_retry)
+        """
+        super().__init__()
+        self.headers.update(headers or {})
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=make_retry(retries, on_retry),
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (config.CONNECT_TIMEOUT, config.REQUEST_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+class Urllib3Response:
+    """The subset of requests.Response used in this package, over a urllib3 response."""
+
+    def __init__(self, raw, url: str):
+        self.raw = raw
+        self.url = url
+        self.status_code = raw.status
+        self.headers = raw.headers  # HTTPHeaderDict: case-insensitive like requests
+        self._content: Optional[bytes] = None
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            try:
+                self._content = self.raw.read(decode_content=True)
+            except urllib3.exceptions.HTTPError as e:
+                raise _translate_error(e)
+            finally:
+                self.raw.release_conn()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        charset = "utf-8"
+        content_type = self.headers.get("content-type", "")
+        if "charset=" in content_type:
+            charset = content_type.split("charset=", 1)[1].split(";")[0].strip()
+        return self.content.decode(charset, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 8192):
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start + chunk_size]
+            return
+        try:
+            yield from self.raw.stream(chunk_size, decode_content=True)
+        except urllib3.exceptions.HTTPError as e:
+            raise _translate_error(e)
+        finally:
+            self.raw.release_conn()
+
+    def raise_for_status(self) -> None:
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind} Error: {self.raw.reason} for url: {self.url}", response=self
+            )
+
+    def close(self) -> None:
+        self.raw.release_conn()
+
+
+def _translate_error(error: Exception) -> requests.exceptions.RequestException:
+    """Map a urllib3 exception onto the requests exception callers catch."""
+    reason = getattr(error, "reason", None) or error
+    if isinstance(reason, (urllib3.exceptions.TimeoutError, TimeoutError)):
+        return requests.exceptions.Timeout(str(error))
+    return requests.exceptions.ConnectionError(str(error))
+
+
+class Urllib3Transport(Transport):
+    """Thin urllib3 PoolManager backend, skipping the requests layer."""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, pool_size: int = config.HTTP_POOL_SIZE,
+                 retries: int = config.MAX_RETRIES, on_retry: Optional[Callable] = None):
+        self.headers: Dict[str, str] = dict(headers or {})
+        self._retry = make_retry(retries, on_retry)
+        self._pool = urllib3.PoolManager(num_pools=pool_size, maxsize=pool_size, block=False)
+
+    def _request(self, method: str, url: str, headers=None, timeout=None,
+                 stream: bool = False, allow_redirects: bool = True) -> Urllib3Response:
+        if timeout is None:
+            timeout = (config.CONNECT_TIMEOUT, config.REQUEST_TIMEOUT)
+        if isinstance(timeout, tuple):
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        merged = dict(self.headers)
+        merged.update(headers or {})
+        try:
+            raw = self._pool.request(
+                method, url,
+                headers=merged,
+                timeout=timeout,
+                retries=self._retry.new(redirect=10 if allow_redirects else False),
+                redirect=allow_redirects,
+                preload_content=False,
+            )
+        except urllib3.exceptions.HTTPError as e:
+            raise _translate_error(e)
+        response = Urllib3Response(raw, url)
+        if not stream:
+            response.content
+        return response
+
+    def get(self, url: str, **kwargs) -> Urllib3Response:
+        return self._request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> Urllib3Response:
+        kwargs.setdefault("allow_redirects", False)
+        return self._request("HEAD", url, **kwargs)
+
+    def close(self) -> None:
+        self._pool.clear()
+
+
+# Backend name -> Transport factory; register_backend() adds more
+BACKENDS: Dict[str, Callable[..., Transport]] = {
+    "requests": RequestsTransport,
+    "urllib3": Urllib3Transport,
+}
+
+
+def register_backend(name: str, factory: Callable[..., Transport]) -> None:
+    """
+    Make another HTTP client available to create_transport().
+
+    Args:
+        name: Backend name (as passed to --http-backend)
+        factory: Called with headers, pool_size, retries and on_retry keyword arguments
+    """
+    BACKENDS[name] = factory
+
+
+def create_transport(headers: Optional[Dict[str, str]] = None, backend: Optional[str] = None,
+                     pool_size: int = config.HTTP_POOL_SIZE, retries: int = config.MAX_RETRIES,
+                     on_retry: Optional[Callable] = None) -> Transport:
+    """
+    Build the transport for a downloader.
+
+    Args:
+        headers: Default headers for every request
+        backend: Backend name (default config.HTTP_BACKEND)
+        pool_size: Connections kept per host
+        retries: Retries per request
+        on_retry: Called as on_retry(method, url, reason, attempt) before each retry
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = backend or config.HTTP_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTTP backend '{backend}' (available: {', '.join(sorted(BACKENDS))})")
+    return BACKENDS[backend](headers=headers, pool_size=pool_size, retries=retries, on_retry=on_retry)
@@ -0,0 +1,375 @@
+"""
+WARC record and replay of crawled pages.
+
+--record wraps the scraper's transport so every response it fetches (listing
+pages, and downloaded files with --record-files) is appended to a
+.warc.gz file as it arrives, one gzip member per record so the archive
+stays readable if a crawl dies half way. --replay serves those responses
+back from the archives without touching the network, which makes re-parsing
+a whole crawl fast and reproducible. The archives also document what the
+portal showed on a given day.
+
+Payloads are stored decoded (after gzip/br transfer encoding was undone), so
+Content-Encoding is dropped from the recorded headers and Content-Length set
+to the stored size. Records are keyed by the URL as requested; when the
+request was redirected, the final URL is kept in an X-Final-URI field and
+indexed as well. Indexing an archive only decompresses record bodies to
+find where the next record starts; they are not held in memory.
+"""
+
+import base64
+import hashlib
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import config
+from transport import Transport
+
+# Headers that describe the wire encoding rather than the stored payload
+_HOP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+_READ_CHUNK = 1024 * 1024
+_MAX_RECORD_HEAD = 64 * 1024  # WARC header blocks are far smaller; anything larger is not a record
+
+
+class WarcError(Exception):
+    """Raised when a WARC file cannot be read."""
+
+
+def _digest(data_or_hash) -> str:
+    """WARC-style sha1 digest (base32) of bytes or a finished hashlib object."""
+    sha1 = data_or_hash if hasattr(data_or_hash, 'digest') else hashlib.sha1(data_or_hash)
+    return "sha1:" + base64.b32encode(sha1.digest()).decode('ascii')
+
+
+class WarcWriter:
+    """Append gzip-member WARC records to rotating files in a directory."""
+
+    def __init__(self, directory: Path, prefix: str = "crawl", max_size: int = config.WARC_MAX_SIZE):
+        """
+        Args:
+            directory: Where the .warc.gz files go (created if missing)
+            prefix: File name prefix
+            max_size: Start a new file once the current one exceeds this many bytes
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(exist_ok=True, parents=True)
+        self.prefix = prefix
+        self.max_size = max_size
+        self.records_written = 0
+        self._stamp = time.strftime('%Y%m%d_%H%M%S')
+        self._serial = 0
+        self._file: Optional[BinaryIO] = None
+        self.path: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    def _open_next(self) -> None:
+        """Close the current file and start the next one with a warcinfo record."""
+        if self._file is not None:
+            self._file.close()
+        self.path = self.directory / f"{self.prefix}-{self._stamp}-{self._serial:05d}.warc.gz"
+        self._serial += 1
+        self._file = open(self.path, 'ab')
+        info = (
+            "software: Epstein_File_fisher scraper\r\n"
+            "format: WARC File Format 1.1\r\n"
+            f"isPartOf: {config.MAIN_PAGE_URL}\r\n"
+        ).encode('utf-8')
+        self._write_record({'WARC-Type': 'warcinfo', 'Content-Type': 'application/warc-fields',
+                            'WARC-Filename': self.path.name}, [info], len(info))
+
+    def _write_record(self, headers: Dict[str, str], block_parts, block_length: int) -> None:
+        """Write one record as its own gzip member. Caller holds the lock."""
+        header_lines = ["WARC/1.1"]
+        fields = {
+            'WARC-Record-ID': f"<urn:uuid:{uuid.uuid4()}>",
+            'WARC-Date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }
+        fields.update(headers)
+        fields['Content-Length'] = str(block_length)
+        header_lines.extend(f"{name}: {value}" for name, value in fields.items())
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        self._file.write(compressor.compress(("\r\n".join(header_lines) + "\r\n\r\n").encode('utf-8')))
+        for part in block_parts:
+            self._file.write(compressor.compress(part))
+        self._file.write(compressor.compress(b"\r\n\r\n"))
+        self._file.write(compressor.flush())
+        self._file.flush()
+        self.records_written += 1
+
+    def write_response(self, response, payload: BinaryIO, payload_length: int, payload_sha1,
+                       url: Optional[str] = None) -> None:
+        """
+        Record an HTTP response.
+
+        Args:
+            response: The requests-compatible response (status, reason, headers, url)
+            payload: File object positioned at the start of the decoded body
+            payload_length: Body size in bytes
+            payload_sha1: hashlib.sha1 of the body
+            url: URL as requested (default: response.url); replay looks records up by it
+        """
+        reason = getattr(response, 'reason', None) or ''
+        http_headers = [f"HTTP/1.1 {response.status_code} {reason}".rstrip()]
+        http_headers.extend(f"{name}: {value}" for name, value in response.headers.items()
+                            if name.lower() not in _HOP_HEADERS)
+        http_headers.append(f"Content-Length: {payload_length}")
+        head = ("\r\n".join(http_headers) + "\r\n\r\n").encode('iso-8859-1', errors='replace')
+
+        def body():
+            yield head
+            while True:
+                chunk = payload.read(_READ_CHUNK)
+                if not chunk:
+                    return
+                yield chunk
+
+        fields = {
+            'WARC-Type': 'response',
+            'WARC-Target-URI': url or response.url,
+            'WARC-Payload-Digest': _digest(payload_sha1),
+            'Content-Type': 'application/http;msgtype=response',
+        }
+        if url and response.url and response.url != url:
+            fields['X-Final-URI'] = response.url
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_size:
+                self._open_next()
+            self._write_record(fields, body(), len(head) + payload_length)
+
+    def close(self) -> None:
+        """Close the current file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _parse_fields(head: bytes) -> Dict[str, str]:
+    """Parse a WARC header block (up to, not including, the blank line)."""
+    if not head.startswith(b"WARC/"):
+        raise WarcError("Not a WARC record")
+    fields = CaseInsensitiveDict()
+    for line in head.decode('utf-8').split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        fields[name.strip()] = value.strip()
+    return fields
+
+
+def _read_member(f: BinaryIO, keep_block: bool = True) -> Optional[Tuple[Dict[str, str], Optional[bytes]]]:
+    """
+    Read the WARC record in the gzip member at the file position, leaving f at the next one.
+
+    The member is decompressed a bounded piece at a time; without keep_block
+    only the header fields are kept, so a multi-GB body costs no memory.
+
+    Returns:
+        (header fields, block or None), or None at the end of the file
+    """
+    name = getattr(f, 'name', 'WARC file')
+    decompressor = zlib.decompressobj(31)
+    head = bytearray()
+    fields: Optional[Dict[str, str]] = None
+    parts: List[bytes] = []
+    started = False
+    while not decompressor.eof:
+        data = decompressor.unconsumed_tail
+        if not data:
+            data = f.read(_READ_CHUNK)
+            if not data:
+                if started:
+                    raise WarcError(f"Truncated record in {name}")
+                return None
+            started = True
+        try:
+            out = decompressor.decompress(data, _READ_CHUNK)
+        except zlib.error as e:
+            raise WarcError(f"Corrupt record in {name}: {e}")
+        if fields is None:
+            head += out
+            end = head.find(b"\r\n\r\n")
+            if end < 0:
+                if len(head) > _MAX_RECORD_HEAD:
+                    raise WarcError(f"Not a WARC record in {name}")
+                continue
+            fields = _parse_fields(bytes(head[:end]))
+            out = bytes(head[end + 4:])
+        if keep_block:
+            parts.append(out)
+    if fields is None:
+        raise WarcError(f"Not a WARC record in {name}")
+    # Step back over bytes that belong to the next member
+    f.seek(-len(decompressor.unused_data), 1)
+    if not keep_block:
+        return fields, None
+    return fields, b"".join(parts)[:int(fields.get('Content-Length', 0))]
+
+
+def iter_records(path: Path, blocks: bool = True) -> Iterator[Tuple[int, Dict[str, str], Optional[bytes]]]:
+    """
+    Read every record of a .warc.gz file.
+
+    Args:
+        path: The file
+        blocks: Also return each record's block (False: header fields only)
+
+    Yields:
+        (offset of the record's gzip member, header fields, block or None)
+    """
+    with open(path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            record = _read_member(f, keep_block=blocks)
+            if record is None:
+                return
+            yield (offset,) + record
+
+
+def _response_from_block(url: str, block: bytes) -> requests.Response:
+    """Rebuild a requests.Response from a recorded HTTP response block."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode('iso-8859-1').split("\r\n")
+    status_parts = lines[0].split(" ", 2)
+    response = requests.Response()
+    response.status_code = int(status_parts[1])
+    response.reason = status_parts[2] if len(status_parts) > 2 else ''
+    response.headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        response.headers[name.strip()] = value.strip()
+    response.url = url
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = body
+    response._content_consumed = True  # makes iter_content() slice _content
+    return response
+
+
+class WarcArchive:
+    """Index of recorded responses by URL across one or more WARC files."""
+
+    def __init__(self, paths: List[Path]):
+        """
+        Args:
+            paths: .warc.gz files or directories containing them; when a URL was
+                   recorded more than once the last record wins
+        """
+        self.files: List[Path] = []
+        for path in paths:
+            path = Path(path)
+            self.files.extend(sorted(path.glob("*.warc.gz")) if path.is_dir() else [path])
+        self._index: Dict[str, Tuple[Path, int]] = {}
+        for path in self.files:
+            for offset, fields, _ in iter_records(path, blocks=False):
+                if fields.get('WARC-Type') == 'response':
+                    self._index[fields['WARC-Target-URI']] = (path, offset)
+                    if 'X-Final-URI' in fields:
+                        self._index.setdefault(fields['X-Final-URI'], (path, offset))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def response(self, url: str) -> Optional[requests.Response]:
+        """Recorded response for a URL (None if not in the archive)."""
+        location = self._index.get(url)
+        if location is None:
+            return None
+        path, offset = location
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            fields, block = _read_member(f)
+        return _response_from_block(fields.get('X-Final-URI', url), block)
+
+
+class RecordingTransport(Transport):
+    """Transport wrapper that appends every response to a WarcWriter."""
+
+    def __init__(self, inner: Transport, writer: WarcWriter, include_streams: bool = False):
+        """
+        Args:
+            inner: Transport doing the real requests
+            writer: Where records go
+            include_streams: Also record streamed (file download) responses
+        """
+        self.inner = inner
+        self.writer = writer
+        self.include_streams = include_streams
+
+    @property
+    def headers(self):
+        return self.inner.headers
+
+    def get(self, url: str, stream: bool = False, **kwargs):
+        response = self.inner.get(url, stream=stream, **kwargs)
+        if not stream:
+            body = response.content
+            with tempfile.SpooledTemporaryFile() as spool:
+                spool.write(body)
+                spool.seek(0)
+                self.writer.write_response(response, spool, len(body), hashlib.sha1(body), url=url)
+        elif self.include_streams:
+            self._tee(response, url)
+        return response
+
+    def _tee(self, response, url: str) -> None:
+        """Spool a streamed body while the caller consumes it; record it once complete."""
+        iter_content = response.iter_content
+        writer = self.writer
+
+        def recording_iter_content(chunk_size=1, decode_unicode=False):
+            sha1 = hashlib.sha1()
+            length = 0
+            with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+                for chunk in iter_content(chunk_size=chunk_size):
+                    spool.write(chunk)
+                    sha1.update(chunk)
+                    length += len(chunk)
+                    yield chunk
+                # Only complete bodies are recorded
+                spool.seek(0)
+                writer.write_response(response, spool, length, sha1, url=url)
+
+        response.iter_content = recording_iter_content
+
+    def head(self, url: str, **kwargs):
+        return self.inner.head(url, **kwargs)
+
+    def close(self) -> None:
+        self.writer.close()
+        self.inner.close()
+
+
+class ReplayTransport(Transport):
+    """Transport that answers from a WarcArchive and never touches the network."""
+
+    def __init__(self, archive: WarcArchive, headers: Optional[Dict[str, str]] = None):
+        self.archive = archive
+        self.headers = dict(headers or {})
+
+    def _lookup(self, url: str) -> requests.Response:
+        response = self.archive.response(url)
+        if response is None:
+            raise requests.exceptions.ConnectionError(f"Not in replay archive: {url}")
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self._lookup(url)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        response = self._lookup(url)
+        response.headers['Content-Length'] = str(len(response.content))
+        response._content = b""
+        return response
+
+    def close(self) -> None:
+        pass
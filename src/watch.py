@@ -0,0 +1,154 @@
+"""
+Watch mode: poll the disclosure portal and fetch only data sets that changed.
+
+Each check fetches the main page and the first listing page of every
+watched data set, i.e. 1 + N requests. Pages are compared by fingerprints
+of their normalized link sets (data set links on the main page; document
+links plus page count on a listing page), so markup, tracking parameters
+or link order changing does not trigger a crawl. A data set whose
+fingerprint differs from the last check (or that is new, including
+`data-set-N-files` links beyond the usual 1-12) is scraped and downloaded
+again; files already on disk are skipped.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+import config
+from manifest import normalize_url
+
+
+def link_fingerprint(links: Iterable[str]) -> str:
+    """Order-insensitive SHA-256 of a set of links (normalized with manifest.normalize_url)."""
+    digest = hashlib.sha256()
+    for link in sorted({normalize_url(link) for link in links}):
+        digest.update(link.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class PortalWatcher:
+    """Periodic change detection on top of a DOJEpsteinScraper."""
+
+    def __init__(self, scraper, data_sets: Optional[List[int]] = None, state_path: Optional[Path] = None):
+        """
+        Args:
+            scraper: DOJEpsteinScraper used for requests, parsing and downloads
+            data_sets: Data sets to watch (default: every data set on the main page)
+            state_path: Fingerprint file (default: WATCH_STATE_FILE in the scraper's output directory)
+        """
+        self.scraper = scraper
+        self.logger = scraper.logger
+        self.data_sets = set(data_sets) if data_sets else None
+        self.state_path = Path(state_path or scraper.output_dir / config.WATCH_STATE_FILE)
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return {'main': state.get('main'), 'data_sets': state.get('data_sets', {})}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable watch state {self.state_path}: {e}")
+        return {'main': None, 'data_sets': {}}
+
+    def _save_state(self) -> None:
+        self.state_path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _load_metadata(self) -> None:
+        """Start from the existing metadata file so unchanged data sets stay in it."""
+        metadata_path = self.scraper.output_dir / config.METADATA_FILE
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                self.scraper.metadata.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read {metadata_path}: {e}")
+
+    def _first_page_fingerprint(self, data_set_num: int, url: str) -> Optional[str]:
+        """Fingerprint of a data set's first listing page, or None if it could not be fetched."""
+        response = self.scraper._make_request(url)
+        if not response:
+            return None
+        soup = BeautifulSoup(response.text, "lxml")
+        links = [doc['url'] for doc in self.scraper.extract_documents_from_page(soup, data_set_num)]
+        total_pages = self.scraper.get_pagination_info(soup)
+        return f"{total_pages}:{link_fingerprint(links)}"
+
+    def check_once(self) -> List[int]:
+        """
+        Check the portal once and fetch every data set that changed.
+
+        Returns:
+            Data sets that were fetched
+        """
+        data_set_urls = self.scraper.get_data_set_urls()
+        if not data_set_urls:
+            self.logger.error("Main page unavailable or without data set links; will retry")
+            return []
+
+        main_fingerprint = link_fingerprint(data_set_urls.values())
+        if main_fingerprint != self.state['main']:
+            known = {int(n) for n in self.state['data_sets']}
+            appeared = sorted(set(data_set_urls) - known)
+            if self.state['main'] is not None and appeared:
+                self.logger.info(f"New data sets on the main page: {appeared}")
+            self.state['main'] = main_fingerprint
+
+        changed = []
+        for data_set_num, url in sorted(data_set_urls.items()):
+            if self.data_sets is not None and data_set_num not in self.data_sets:
+                continue
+            fingerprint = self._first_page_fingerprint(data_set_num, url)
+            if fingerprint is None:
+                continue
+            previous = self.state['data_sets'].get(str(data_set_num), {})
+            if previous.get('url') == url and previous.get('fingerprint') == fingerprint:
+                continue
+
+            self.logger.info(f"Data Set {data_set_num} changed; fetching")
+            documents = self.scraper.scrape_data_set(data_set_num, url)
+            self.scraper.metadata[f"data_set_{data_set_num}"] = documents
+            if self.scraper.download_files and documents:
+                if not self.scraper.download_data_set(data_set_num, documents):
+                    continue  # try again next check
+            # Only remember the fingerprint once the data set is fetched
+            self.state['data_sets'][str(data_set_num)] = {'url': url, 'fingerprint': fingerprint}
+            changed.append(data_set_num)
+
+        if changed:
+            self.scraper._save_metadata()
+        self._save_state()
+        return changed
+
+    def run(self, interval: float = config.WATCH_INTERVAL, max_checks: Optional[int] = None) -> None:
+        """
+        Check every `interval` seconds until interrupted (or max_checks checks).
+
+        Args:
+            interval: Seconds from the start of one check to the start of the next
+            max_checks: Stop after this many checks (None = forever)
+        """
+        self._load_metadata()
+        checks = 0
+        while True:
+            started = time.monotonic()
+            changed = self.check_once()
+            checks += 1
+            self.logger.info(f"Check {checks}: {len(changed)} data set(s) changed {changed or ''}".rstrip())
+            if max_checks is not None and checks >= max_checks:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Watchlist scanning: find every occurrence of a list of names, entities and
+phone numbers in the text of downloaded documents.
+
+All terms are compiled into one Aho-Corasick automaton, so each page's text
+is walked once however many terms there are: O(text + matches) instead of
+one regex pass per term. Matching ignores case and treats any run of
+whitespace as a single space, and a term only matches as a whole word (not
+glued to letters or digits on either side).
+
+Text comes from PDFs (pdf_probe.extract_text; scans without a text layer
+have none), .txt files (pages split on form feeds) and .docx files. Files
+are scanned in a process pool and the index, term -> (file, page, offset in
+the page text), is kept in the catalog. Scans are incremental: a file whose
+size and mtime are unchanged is read again only when terms were added, and
+then searched for the new terms alone; removed terms drop their hits. The
+downloaders feed newly downloaded files in as they finish (--watchlist).
+"""
+
+import logging
+import re
+import sys
+import threading
+import zipfile
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from html import unescape
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+from archives import data_set_from_path
+from catalog import Catalog, path_key
+from layout import StorageLayout
+from pdf_probe import PdfError, extract_text
+
+_WHITESPACE_RUN = re.compile(r'\s+')
+_DOCX_BREAK = re.compile(r'<w:br [^>]*w:type="page"[^>]*/>')
+_DOCX_NEWLINE = re.compile(r'</w:p>|<w:br[^>]*/>|<w:cr/>')
+_DOCX_TAB = re.compile(r'<w:tab/>')
+_XML_TAG = re.compile(r'<[^>]+>')
+
+
+def load_terms(path: Path) -> List[str]:
+    """Read a watchlist file: one term per line; blank lines and lines starting with # are skipped."""
+    terms = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            term = line.strip()
+            if term and not term.startswith('#'):
+                terms.append(term)
+    return list(dict.fromkeys(terms))
+
+
+def normalize(text: str) -> Tuple[str, List[int], List[int]]:
+    """
+    Lower-case a text and collapse whitespace runs to one space.
+
+    Returns:
+        (normalized text, positions, shifts): a character at normalized
+        position i >= positions[k] sits shifts[k] characters further on in
+        the original text (see original_offset)
+    """
+    pieces = []
+    positions: List[int] = []
+    shifts: List[int] = []
+    last = removed = 0
+    for match in _WHITESPACE_RUN.finditer(text):
+        if match.group() == ' ':
+            continue
+        pieces.append(text[last:match.start()])
+        pieces.append(' ')
+        positions.append(match.start() - removed + 1)
+        removed += len(match.group()) - 1
+        shifts.append(removed)
+        last = match.end()
+    pieces.append(text[last:])
+    collapsed = ''.join(pieces)
+    lowered = collapsed.lower()
+    if len(lowered) != len(collapsed):
+        # A few characters lower-case to two (İ -> i̇); keep those as they are so offsets still line up
+        lowered = ''.join(c.lower() if len(c.lower()) == 1 else c for c in collapsed)
+    return lowered, positions, shifts
+
+
+def original_offset(offset: int, positions: List[int], shifts: List[int]) -> int:
+    """Map a position in normalized text back to the original text."""
+    k = bisect_right(positions, offset) - 1
+    return offset + shifts[k] if k >= 0 else offset
+
+
+class Automaton:
+    """Aho-Corasick automaton over normalized terms."""
+
+    def __init__(self, terms: Iterable[str]):
+        """
+        Args:
+            terms: Terms as written in the watchlist; terms that normalize
+                to the same text are kept once (the first spelling wins)
+        """
+        self.terms: List[str] = []
+        self._keys: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]
+        seen = set()
+        for term in terms:
+            key = normalize(term.strip())[0]
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(len(self.terms))
+            self.terms.append(term)
+            self._keys.append(key)
+        self._fail = self._link()
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _link(self) -> List[int]:
+        """Failure links, breadth first; each state also inherits the outputs of its failure state."""
+        goto, out = self._goto, self._out
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+        return fail
+
+    def find(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Every whole-word occurrence of a term in a text.
+
+        Returns:
+            (term, character offset in `text`) pairs in order of their end
+        """
+        if not self.terms:
+            return []
+        norm, positions, shifts = normalize(text)
+        goto, fail, out, keys = self._goto, self._fail, self._out, self._keys
+        matches = []
+        state = 0
+        for i, ch in enumerate(norm):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                for term_id in out[state]:
+                    key = keys[term_id]
+                    start = end - len(key)
+                    if key[0].isalnum() and start > 0 and norm[start - 1].isalnum():
+                        continue
+                    if key[-1].isalnum() and end < len(norm) and norm[end].isalnum():
+                        continue
+                    matches.append((self.terms[term_id], original_offset(start, positions, shifts)))
+        return matches
+
+
+def _docx_pages(path: Path) -> List[str]:
+    with zipfile.ZipFile(path) as zf:
+        xml = zf.read('word/document.xml').decode('utf-8', errors='replace')
+    xml = _DOCX_BREAK.sub('\f', xml)
+    xml = _DOCX_TAB.sub('\t', _DOCX_NEWLINE.sub('\n', xml))
+    return unescape(_XML_TAG.sub('', xml)).split('\f')
+
+
+def document_pages(path: Path) -> List[str]:
+    """
+    Text of a document, page by page.
+
+    Raises:
+        OSError, PdfError, zipfile.BadZipFile, KeyError: If the text cannot be read
+    """
+    suffix = path.suffix.lower()
+    if suffix == '.pdf':
+        return extract_text(path)
+    if suffix == '.docx':
+        return _docx_pages(path)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read().split('\f')
+
+
+# Automata of the current worker process: True = every term, False = newly added terms
+_worker_automata: Dict[bool, Automaton] = {}
+
+
+def _init_worker(terms: List[str], added: List[str]) -> None:
+    _worker_automata[True] = Automaton(terms)
+    _worker_automata[False] = Automaton(added)
+
+
+def _scan_file(job: Tuple[str, bool]) -> Dict:
+    """Extract a file's text and run it through an automaton (in a worker process)."""
+    path, every_term = job
+    automaton = _worker_automata[every_term]
+    result: Dict = {'pages': None, 'error': None, 'hits': []}
+    try:
+        pages = document_pages(Path(path))
+    except (OSError, PdfError, zipfile.BadZipFile, KeyError) as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        return result
+    result['pages'] = len(pages)
+    for number, text in enumerate(pages, 1):
+        result['hits'].extend((term, number, offset) for term, offset in automaton.find(text))
+    return result
+
+
+class WatchlistScanner:
+    """Scan documents for watchlist terms and keep the index in the catalog."""
+
+    def __init__(self, terms: List[str], output_dir: Optional[Path] = None,
+                 workers: int = config.WATCHLIST_WORKERS):
+        """
+        Initialize the scanner.
+
+        Args:
+            terms: Watchlist terms (see load_terms)
+            output_dir: Download tree root (default: config.OUTPUT_DIR)
+            workers: Number of worker processes
+        """
+        self.terms = list(dict.fromkeys(terms))
+        self.output_dir = Path(output_dir or config.OUTPUT_DIR)
+        self.workers = max(1, workers)
+        self.catalog = Catalog(self.output_dir)
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+        indexed = self.catalog.watchlist_terms()
+        self.added = [term for term in self.terms if term not in indexed]
+        self.removed = sorted(indexed - set(self.terms))
+        self.scanned = 0
+        self.hits = 0
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Tuple[Path, str, object, Future]] = []
+        self._lock = threading.Lock()
+
+    def find_files(self) -> List[Path]:
+        """Find scannable documents in data_set_*/documents/ (wherever the storage layout puts them)."""
+        return [
+            record['path'] for record in StorageLayout.load(self.output_dir).files(categories=['documents'])
+            if record['path'].suffix.lower() in config.WATCHLIST_SUFFIXES
+        ]
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.terms, self.added)
+            )
+        return self._executor
+
+    def _store(self, path: Path, key: str, stat, every_term: bool, result: Dict) -> int:
+        if result['error']:
+            self.logger.warning(f"{key}: {result['error']}")
+        scan = {'path': key, 'data_set': data_set_from_path(path), 'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns, 'pages': result['pages'], 'error': result['error']}
+        written = self.catalog.store_watchlist_scan(scan, result['hits'], replace=every_term)
+        self.scanned += 1
+        self.hits += written
+        return written
+
+    def scan(self, paths: Optional[List[Path]] = None) -> Dict[str, int]:
+        """
+        Bring the index up to date: scan new and changed files for every
+        term, unchanged ones for added terms only, and drop removed terms.
+
+        Args:
+            paths: Files to consider (default: every scannable document)
+
+        Returns:
+            Dict mapping file key to the number of hits stored for it
+        """
+        if paths is None:
+            paths = self.find_files()
+        self.catalog.update_watchlist_terms(removed=self.removed)
+        self.removed = []
+        scans = self.catalog.watchlist_scans()
+
+        jobs = []
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError as e:
+                self.logger.warning(f"Skipping {path}: {e}")
+                continue
+            key = path_key(self.output_dir, path)
+            every_term = scans.get(key) != (stat.st_size, stat.st_mtime_ns)
+            if every_term or self.added:
+                jobs.append((path, key, stat, every_term))
+
+        results = {}
+        if jobs:
+            executor = self._get_executor()
+            # Batches keep inter-process overhead small next to short documents
+            outcomes = executor.map(_scan_file, [(str(job[0]), job[3]) for job in jobs], chunksize=4)
+            for (path, key, stat, every_term), result in zip(jobs, outcomes):
+                results[key] = self._store(path, key, stat, every_term, result)
+
+        # Only now has every file been searched for the added terms
+        self.catalog.update_watchlist_terms(added=self.added)
+        self.added = []
+        return results
+
+    def submit(self, path: Path) -> None:
+        """
+        Queue a newly downloaded file for scanning in the background.
+
+        Files of other types are ignored. Results are stored as they come
+        in, on later submit() calls and in close().
+        """
+        if path.suffix.lower() not in config.WATCHLIST_SUFFIXES:
+            return
+        try:
+            stat = path.stat()
+        except OSError as e:
+            self.logger.warning(f"Not scanning {path}: {e}")
+            return
+        future = self._get_executor().submit(_scan_file, (str(path), True))
+        with self._lock:
+            self._pending.append((path, path_key(self.output_dir, path), stat, future))
+        self.collect()
+
+    def collect(self, wait: bool = False) -> int:
+        """
+        Store results of submitted files.
+
+        Args:
+            wait: Wait for files still being scanned
+
+        Returns:
+            Number of files stored
+        """
+        with self._lock:
+            ready, waiting = [], []
+            for item in self._pending:
+                (ready if wait or item[3].done() else waiting).append(item)
+            self._pending = waiting
+        for path, key, stat, future in ready:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'pages': None, 'error': f"{type(e).__name__}: {e}", 'hits': []}
+            with self._lock:
+                self._store(path, key, stat, True, result)
+        return len(ready)
+
+    def report(self) -> str:
+        return f"Watchlist: {self.scanned} files scanned, {self.hits} hits for {len(self.terms)} terms"
+
+    def close(self) -> None:
+        """Wait for background scans, then stop the workers and close the catalog."""
+        self.collect(wait=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.catalog.close()
+
+
+def main():
+    """Command-line entry point for watchlist scanning."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Index occurrences of watchlist terms (names, entities, phone numbers) in document text"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help=f"Download tree root (default: {config.OUTPUT_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Scan new, changed and (for added terms) all documents")
+    scan_parser.add_argument(
+        "--terms",
+        required=True,
+        metavar="FILE",
+        help="Watchlist file, one term per line (# starts a comment line)"
+    )
+    scan_parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.WATCHLIST_WORKERS,
+        help=f"Worker processes (default: {config.WATCHLIST_WORKERS})"
+    )
+
+    hits_parser = subparsers.add_parser("hits", help="Print the index: term, file, page, offset")
+    hits_parser.add_argument(
+        "term",
+        nargs="?",
+        help="Only this term (as written in the watchlist)"
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    output_dir = Path(args.output_dir) if args.output_dir else config.OUTPUT_DIR
+
+    if args.command == "hits":
+        with Catalog(output_dir) as catalog:
+            for row in catalog.watchlist_hits(args.term):
+                print(f"{row['term']}\t{row['path']}\tp.{row['page']}\t@{row['offset']}")
+        return
+
+    try:
+        terms = load_terms(Path(args.terms))
+    except OSError as e:
+        print(f"❌ Failed to load watchlist: {e}")
+        sys.exit(1)
+    scanner = WatchlistScanner(terms, output_dir, workers=args.workers)
+    try:
+        added, removed = len(scanner.added), len(scanner.removed)
+        results = scanner.scan()
+        print(f"\n✓ Scanned {len(results)} files: {sum(results.values())} hits "
+              f"({added} terms added, {removed} removed)")
+    except OSError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        scanner.close()
+
+
+if __name__ == "__main__":
+    main()
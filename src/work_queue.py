@@ -0,0 +1,265 @@
+"""
+Lease-based shared work queue for multiple downloader processes.
+
+Jobs live in a SQLite database (WAL mode) inside the output directory.
+A worker claims one file at a time with a time-limited lease, renews it
+from a heartbeat thread while the transfer runs, and marks it done or
+releases it afterwards. Leases of crashed workers simply expire and the
+file is handed to the next worker that asks, so any number of processes
+can drain one link list without duplicate transfers. A worker that stalled
+long enough to lose a lease learns so from its heartbeat (lost()) and must
+abort the transfer.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    data_set INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (data_set, state, lease_expires);
+"""
+
+
+class LeaseLost(Exception):
+    """Raised when another worker has taken over a file this worker was transferring."""
+
+
+def job_key(file_info: Dict) -> str:
+    """Queue key of a file: data set and filename."""
+    return f"{file_info['data_set']}/{file_info['filename']}"
+
+
+class WorkQueue:
+    """One worker's handle on the shared job queue."""
+
+    def __init__(self, path: Path, worker_id: Optional[str] = None,
+                 lease_seconds: float = config.LEASE_SECONDS,
+                 max_attempts: int = config.MAX_RETRIES):
+        """
+        Open (and create if needed) the queue database.
+
+        Args:
+            path: SQLite database file shared by all workers
+            worker_id: Unique name of this worker (default: host:pid:random)
+            lease_seconds: How long a claim is valid without renewal
+            max_attempts: Claims per file before it is marked failed
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        # Autocommit mode; claims use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+        self._held: set = set()
+        self._lost: set = set()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def enqueue(self, files: Iterable[Dict]) -> int:
+        """
+        Add files to the queue; files already queued are left untouched.
+
+        Returns:
+            Number of newly added jobs
+        """
+        now = time.time()
+        rows = [(job_key(f), f['data_set'], json.dumps(f), now) for f in files]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (key, data_set, payload, updated) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+    def claim(self, data_set: Optional[int] = None) -> Optional[Dict]:
+        """
+        Lease the next available file.
+
+        A file is available when it is pending, or leased by a worker whose
+        lease has expired. An expired lease on a file that has already used
+        max_attempts claims is moved to failed instead of being handed out.
+
+        Args:
+            data_set: Only claim files from this data set
+
+        Returns:
+            The file_info dict, or None when nothing is left to claim
+        """
+        now = time.time()
+        query = (
+            "SELECT key, payload FROM jobs "
+            "WHERE (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) "
+            "AND attempts < ?"
+        )
+        params: List = [now, self.max_attempts]
+        if data_set is not None:
+            query += " AND data_set = ?"
+            params.append(data_set)
+        query += " ORDER BY rowid LIMIT 1"
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Crashed on its last attempt: nobody will release it, so fail it here
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'failed', owner = NULL, lease_expires = NULL, updated = ? "
+                    "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, self.max_attempts),
+                )
+                row = self._conn.execute(query, params).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                key, payload = row
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'leased', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated = ? WHERE key = ?",
+                    (self.worker_id, now + self.lease_seconds, now, key),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._held.add(key)
+            self._lost.discard(key)
+
+        return json.loads(payload)
+
+    def renew(self, key: str) -> bool:
+        """Extend this worker's lease on a file. Returns False if the lease was lost."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? "
+                "WHERE key = ? AND owner = ? AND state = 'leased'",
+                (now + self.lease_seconds, now, key, self.worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def lost(self, key: str) -> bool:
+        """Whether the heartbeat found this worker's lease on a file taken over by another worker."""
+        return key in self._lost
+
+    def complete(self, file_info: Dict) -> bool:
+        """
+        Mark a claimed file done, storing its final metadata.
+
+        Returns:
+            False if the lease was lost to another worker (nothing is changed)
+        """
+        key = job_key(file_info)
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = 'done', payload = ?, lease_expires = NULL, updated = ? "
+                "WHERE key = ? AND owner = ?",
+                (json.dumps(file_info), time.time(), key, self.worker_id),
+            )
+            self._held.discard(key)
+            return cursor.rowcount == 1
+
+    def release(self, file_info: Dict) -> None:
+        """
+        Give a claimed file back after a failed attempt.
+
+        The file goes back to pending, or to failed once it has used up
+        max_attempts claims.
+        """
+        key = job_key(file_info)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, lease_expires = NULL, updated = ? WHERE key = ? AND owner = ?",
+                (self.max_attempts, time.time(), key, self.worker_id),
+            )
+            self._held.discard(key)
+
+    def files(self, data_set: int) -> List[Dict]:
+        """Current metadata of every queued file in a data set, as written by any worker."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM jobs WHERE data_set = ? ORDER BY rowid", (data_set,)
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def counts(self, data_set: Optional[int] = None) -> Dict[str, int]:
+        """Number of jobs per state."""
+        query = "SELECT state, COUNT(*) FROM jobs"
+        params: List = []
+        if data_set is not None:
+            query += " WHERE data_set = ?"
+            params.append(data_set)
+        query += " GROUP BY state"
+        with self._lock:
+            return dict(self._conn.execute(query, params).fetchall())
+
+    def start_heartbeat(self) -> None:
+        """Renew every held lease from a background thread until close(); failed renewals mark the file lost."""
+        if self._heartbeat is not None:
+            return
+
+        def beat():
+            while not self._stop.wait(self.lease_seconds / 3):
+                for key in list(self._held):
+                    if not self.renew(key):
+                        self._held.discard(key)
+                        self._lost.add(key)
+
+        self._heartbeat = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def close(self) -> None:
+        """Stop the heartbeat, hand back unfinished leases and close the database."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+
+        with self._lock:
+            for key in list(self._held):
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'pending', owner = NULL, lease_expires = NULL, "
+                    "attempts = MAX(attempts - 1, 0) WHERE key = ? AND owner = ? AND state = 'leased'",
+                    (key, self.worker_id),
+                )
+            self._held.clear()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,20 @@
+"""Pytest setup shared by the test modules."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _logs_in_temp_dir(tmp_path_factory):
+    """Keep the downloaders' and scraper's log files out of the repository's logs/ directory."""
+    old_logs_dir = config.LOGS_DIR
+    config.LOGS_DIR = tmp_path_factory.mktemp("logs")
+    yield
+    config.LOGS_DIR = old_logs_dir
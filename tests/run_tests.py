@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """Run all tests for the File Fisher project."""
 
+import os
 import sys
 import subprocess
+import tempfile
 from pathlib import Path
 
 
-def run_test_file(test_file):
+def run_test_file(test_file, env=None):
     """Run a single test file and return the result."""
     print(f"\n{'='*70}")
     print(f"Running {test_file.name}...")
@@ -15,7 +17,8 @@ def run_test_file(test_file):
     result = subprocess.run(
         [sys.executable, str(test_file)],
         capture_output=False,
-        cwd=test_file.parent.parent
+        cwd=test_file.parent.parent,
+        env=env
     )
     
     return result.returncode == 0
@@ -33,9 +36,12 @@ def main():
     print(f"\nFound {len(test_files)} test file(s)")
     
     results = []
-    for test_file in test_files:
-        success = run_test_file(test_file)
-        results.append((test_file.name, success))
+    # Log files of the downloaders and scrapers under test go to a temp dir, not logs/
+    with tempfile.TemporaryDirectory() as logs_dir:
+        env = dict(os.environ, FILE_FISHER_LOGS_DIR=logs_dir)
+        for test_file in test_files:
+            success = run_test_file(test_file, env)
+            results.append((test_file.name, success))
     
     # Summary
     print(f"\n{'='*70}")
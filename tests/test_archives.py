@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tests for archive cataloger module."""
+
+import sys
+import tempfile
+import zipfile
+import zlib
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import archives
+
+
+def _make_tree(root: Path) -> Path:
+    """Create a data set with one ZIP archive and return its path."""
+    archives_dir = root / 'data_set_3' / 'archives'
+    archives_dir.mkdir(parents=True)
+    archive_path = archives_dir / 'EFTA00000300.zip'
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('scans/EFTA00000301.pdf', b'%PDF-1.4 test')
+        zf.writestr('notes.txt', b'hello world')
+    return archive_path
+
+
+def test_list_members():
+    """Test listing ZIP members from the central directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive_path = _make_tree(Path(tmpdir))
+        members = {m['name']: m for m in archives.list_members(archive_path)}
+
+        assert set(members) == {'scans/EFTA00000301.pdf', 'notes.txt'}
+        assert members['notes.txt']['size'] == len(b'hello world')
+        assert members['notes.txt']['crc'] == zlib.crc32(b'hello world')
+    print("✓ ZIP members listed without extraction")
+
+
+def test_catalog_and_search():
+    """Test parallel cataloging and searching members by name."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(Path(tmpdir))
+        cataloger = archives.ArchiveCataloger(Path(tmpdir), workers=2)
+        try:
+            results = cataloger.catalog_archives()
+            assert results == {'data_set_3/archives/EFTA00000300.zip': 2}
+
+            hits = cataloger.catalog.search_archive_members('EFTA00000301')
+            assert len(hits) == 1
+            assert hits[0]['data_set'] == 3
+        finally:
+            cataloger.close()
+    print("✓ Archive members cataloged and searchable")
+
+
+def test_extract_member():
+    """Test extracting a single member into the category layout."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        archive_path = _make_tree(Path(tmpdir))
+        cataloger = archives.ArchiveCataloger(Path(tmpdir))
+        try:
+            dest = cataloger.extract_member(archive_path, 'scans/EFTA00000301.pdf')
+            expected = Path(tmpdir) / 'data_set_3' / 'documents' / 'EFTA00000300' / 'scans' / 'EFTA00000301.pdf'
+            assert dest == expected
+            assert dest.read_bytes() == b'%PDF-1.4 test'
+        finally:
+            cataloger.close()
+    print("✓ Single member extracted into category layout")
+
+
+def test_rejects_unsafe_member():
+    """Test that path traversal members are refused."""
+    try:
+        archives._safe_member_path('../../etc/passwd')
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    print("✓ Unsafe member paths rejected")
+
+
+if __name__ == "__main__":
+    test_list_members()
+    test_catalog_and_search()
+    test_extract_member()
+    test_rejects_unsafe_member()
+    print("\n✅ All archive tests passed!")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Tests for crawl checkpoint module."""
+
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import scraper
+from checkpoint import CrawlCheckpoint
+
+
+class _ListingHandler(BaseHTTPRequestHandler):
+    """Eight listing pages with one document each; records the pages requested; pages in fail_once 404 once."""
+
+    requested = []
+    fail_once = set()
+
+    def do_GET(self):
+        page = int(self.path.split("page=")[1]) if "page=" in self.path else 0
+        type(self).requested.append(page)
+        if page in self.fail_once:
+            self.fail_once.discard(page)
+            self.send_error(404)
+            return
+        body = (
+            f"<a href='/files/EFTA{page:08d}.pdf'>doc</a>"
+            "<nav aria-label='Pagination'><a href='?page=7'>Last</a></nav>"
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _scraper_with_checkpoint(output_dir, url, last_page=-1):
+    """Scraper set to resume from a checkpoint that already knows the data set URL."""
+    checkpoint = CrawlCheckpoint(Path(output_dir) / config.CHECKPOINT_FILE)
+    checkpoint.data_set_urls = {1: url}
+    state = checkpoint.data_set(1, url)
+    if last_page >= 0:
+        state['total_pages'] = 8
+        state['last_page'] = last_page
+        state['documents'] = [{'filename': f"EFTA{p:08d}.pdf"} for p in range(last_page + 1)]
+    checkpoint.save()
+
+    scraper_instance = scraper.DOJEpsteinScraper(download_files=False)
+    scraper_instance.output_dir = Path(output_dir)
+    scraper_instance.resume = True
+    return scraper_instance
+
+
+def _run(test):
+    handler = type('Handler', (_ListingHandler,), {'requested': [], 'fail_once': set()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = config.RATE_LIMIT_DELAY, config.DATA_SETS
+    config.RATE_LIMIT_DELAY = 0
+    config.DATA_SETS = [1]
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            test(tmpdir, f"http://127.0.0.1:{server.server_address[1]}/data-set-1-files", handler)
+    finally:
+        config.RATE_LIMIT_DELAY, config.DATA_SETS = saved
+        server.shutdown()
+
+
+def test_save_and_load():
+    """Test that state survives a save/load round trip and bad files are refused."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'checkpoint.json'
+        checkpoint = CrawlCheckpoint(path, interval=3600)
+        checkpoint.data_set_urls = {9: 'https://example/data-set-9-files'}
+        checkpoint.data_set(9, 'https://example/data-set-9-files')['last_page'] = 139
+        assert not checkpoint.maybe_save() and not path.exists()
+        checkpoint.save()
+
+        loaded = CrawlCheckpoint.load(path)
+        assert loaded.data_set_urls == {9: 'https://example/data-set-9-files'}
+        assert loaded.data_set(9, 'https://example/data-set-9-files')['last_page'] == 139
+        # A different URL for the data set means the old state no longer applies
+        assert loaded.data_set(9, 'https://example/moved')['last_page'] == -1
+        assert CrawlCheckpoint.load(Path(tmpdir) / 'missing.json').data_sets == {}
+
+        path.write_text('{"version": 0}')
+        try:
+            CrawlCheckpoint.load(path)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+    print("✓ Checkpoint saved, loaded and validated")
+
+
+def test_resume_continues_after_last_page():
+    """Test that a resumed crawl only fetches the pages after the checkpoint."""
+    def test(tmpdir, url, handler):
+        scraper_instance = _scraper_with_checkpoint(tmpdir, url, last_page=4)
+        scraper_instance.run()
+        assert sorted(handler.requested) == [5, 6, 7]
+        names = [doc['filename'] for doc in scraper_instance.metadata['data_set_1']]
+        assert names == [f"EFTA{page:08d}.pdf" for page in range(8)]
+        # A finished crawl leaves no checkpoint behind
+        assert not (Path(tmpdir) / config.CHECKPOINT_FILE).exists()
+    _run(test)
+    print("✓ Resumed crawl continued after the last completed page")
+
+
+def test_interrupt_saves_checkpoint():
+    """Test that an interrupted crawl saves its progress for --resume."""
+    def test(tmpdir, url, handler):
+        scraper_instance = _scraper_with_checkpoint(tmpdir, url)
+        extract = scraper_instance.extract_documents_from_page
+        parsed = []
+
+        def interrupt_on_fourth_page(soup, data_set_num):
+            if len(parsed) == 3:
+                raise KeyboardInterrupt
+            parsed.append(1)
+            return extract(soup, data_set_num)
+
+        scraper_instance.extract_documents_from_page = interrupt_on_fourth_page
+        try:
+            scraper_instance.run()
+            assert False, "Expected KeyboardInterrupt"
+        except KeyboardInterrupt:
+            pass
+
+        state = CrawlCheckpoint.load(Path(tmpdir) / config.CHECKPOINT_FILE).data_set(1, url)
+        assert state['total_pages'] == 8 and state['last_page'] == 2 and not state['complete']
+        assert len(state['documents']) == 3
+    _run(test)
+    print("✓ Interrupted crawl saved its checkpoint")
+
+
+def test_failed_pages_retried_on_resume():
+    """Test that a page whose fetch failed keeps the data set incomplete until --resume fetches it."""
+    def test(tmpdir, url, handler):
+        handler.fail_once = {3}
+        first = _scraper_with_checkpoint(tmpdir, url)
+        first.run()
+        assert len(first.metadata['data_set_1']) == 7
+
+        path = Path(tmpdir) / config.CHECKPOINT_FILE
+        state = CrawlCheckpoint.load(path).data_set(1, url)
+        assert state['failed_pages'] == [3] and state['last_page'] == 7 and not state['complete']
+
+        handler.requested.clear()
+        resumed = scraper.DOJEpsteinScraper(download_files=False)
+        resumed.output_dir = Path(tmpdir)
+        resumed.resume = True
+        resumed.run()
+        assert handler.requested == [3]
+        names = sorted(doc['filename'] for doc in resumed.metadata['data_set_1'])
+        assert names == [f"EFTA{page:08d}.pdf" for page in range(8)]
+        assert not path.exists()
+    _run(test)
+    print("✓ Failed pages kept in the checkpoint and retried on resume")
+
+
+def test_resumed_crawl_keeps_page_order():
+    """Test that a crawl resumed after failed pages lists documents in the same order as a clean one."""
+    def test(tmpdir, url, handler):
+        clean = _scraper_with_checkpoint(Path(tmpdir) / 'clean', url)
+        clean.run()
+        expected = [doc['filename'] for doc in clean.metadata['data_set_1']]
+        assert expected == [f"EFTA{page:08d}.pdf" for page in range(8)]
+
+        handler.fail_once = {2, 5}
+        _scraper_with_checkpoint(Path(tmpdir) / 'resumed', url).run()
+        resumed = scraper.DOJEpsteinScraper(download_files=False)
+        resumed.output_dir = Path(tmpdir) / 'resumed'
+        resumed.resume = True
+        resumed.run()
+        assert [doc['filename'] for doc in resumed.metadata['data_set_1']] == expected
+    _run(test)
+    print("✓ Resumed crawl keeps page order")
+
+
+if __name__ == "__main__":
+    test_save_and_load()
+    test_resume_continues_after_last_page()
+    test_interrupt_saves_checkpoint()
+    test_failed_pages_retried_on_resume()
+    test_resumed_crawl_keeps_page_order()
+    print("\n✅ All checkpoint tests passed!")
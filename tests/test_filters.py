@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Tests for selection filter module."""
+
+import csv
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import csv_downloader
+import filters
+import scraper
+from planner import ProbeCache
+
+
+class _SizedHandler(BaseHTTPRequestHandler):
+    """Answer HEAD with a Content-Length encoded in the path (/<size>/name)."""
+
+    head_count = 0
+
+    def do_HEAD(self):
+        type(self).head_count += 1
+        self.send_response(200)
+        self.send_header('Content-Length', self.path.strip('/').split('/')[0])
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _file(filename, category='documents', **extra):
+    return dict({'filename': filename, 'category': category, 'url': f'https://example/{filename}'}, **extra)
+
+
+def test_terms():
+    """Test each field, alternatives, negation and invalid expressions."""
+    f = filters.FileFilter("category=videos,audio ext=mp4,.MP3 efta=10-20,99 !name~_redacted")
+    assert f.matches(_file('EFTA00000015.mp4', 'videos'))
+    assert f.matches(_file('EFTA00000099.mp3', 'audio'))
+    assert not f.matches(_file('EFTA00000021.mp4', 'videos'))
+    assert not f.matches(_file('EFTA00000015_redacted.mp4', 'videos'))
+    assert not f.matches(_file('EFTA00000015.pdf'))
+    assert filters.FileFilter("name=efta0001*.pdf").matches(_file('EFTA00012.pdf'))
+    assert filters.FileFilter("category!=images").matches(_file('a.pdf'))
+    assert not filters.FileFilter("efta=1-5").matches(_file('notes.pdf'))
+
+    for bad in ["", "color=red", "size~1M", "efta=9-1", "ext<pdf", "name~(", "size<lots"]:
+        try:
+            filters.FileFilter(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+    print("✓ Filter terms compile and match")
+
+
+def test_size_terms():
+    """Test that size terms use known sizes and pass unknown ones."""
+    f = filters.FileFilter("size<1M")
+    assert f.uses_size and not filters.FileFilter("ext=pdf").uses_size
+    assert f.matches(_file('a.pdf'))  # unknown
+    assert f.matches(_file('a.pdf', file_size_bytes=1000))
+    assert not f.matches(_file('a.pdf', file_size_bytes=2 * 1024 * 1024))
+    assert not f.matches(_file('a.pdf'), size=1024 * 1024)
+    assert filters.FileFilter("!size>=1M").matches(_file('a.pdf'), size=10)
+    print("✓ Size terms use known sizes only")
+
+
+def test_apply_size_terms_probes_only_unknown():
+    """Test that only files without a known size are HEAD-probed."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SizedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    _SizedHandler.head_count = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir, requests.Session() as session:
+            cache = ProbeCache(Path(tmpdir))
+            cache.put(f'{base}/5000/c.pdf', 5000)
+            files = [
+                {'filename': 'a.pdf', 'category': 'documents', 'url': f'{base}/100/a.pdf'},
+                {'filename': 'b.pdf', 'category': 'documents', 'url': f'{base}/9000/b.pdf'},
+                {'filename': 'c.pdf', 'category': 'documents', 'url': f'{base}/5000/c.pdf'},
+                {'filename': 'd.pdf', 'category': 'documents', 'url': f'{base}/1/d.pdf', 'file_size_bytes': 1},
+            ]
+            kept = filters.apply_size_terms(files, filters.FileFilter("size<=5000"), session, cache)
+            assert [f['filename'] for f in kept] == ['a.pdf', 'c.pdf', 'd.pdf']
+            assert _SizedHandler.head_count == 2
+            assert ProbeCache(Path(tmpdir)).size(f'{base}/9000/b.pdf') == 9000
+    finally:
+        server.shutdown()
+    print("✓ Size filter probes only unknown sizes and caches them")
+
+
+def test_filter_applied_while_loading():
+    """Test that rejected rows and links never reach the downloaders' lists."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = Path(tmpdir) / 'links.csv'
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['data_set', 'url', 'link_text'])
+            for name in ['EFTA00000001.pdf', 'EFTA00000002.mp4', 'EFTA00000300.pdf']:
+                writer.writerow([1, f'https://example/{name}', name])
+
+        downloader = csv_downloader.CSVDownloader(str(csv_path), download_files=False)
+        downloader.output_dir = Path(tmpdir)
+        downloader.file_filter = filters.FileFilter("ext=pdf efta=1-100")
+        assert downloader.load_csv()
+        assert [f['filename'] for f in downloader.files_by_dataset[1]] == ['EFTA00000001.pdf']
+        downloader.session.close()
+
+    s = scraper.DOJEpsteinScraper(download_files=False)
+    s.file_filter = filters.FileFilter("category=videos")
+    soup = BeautifulSoup('<a href="/files/EFTA00000001.pdf">a</a><a href="/files/EFTA00000002.mp4">b</a>', 'lxml')
+    assert [d['filename'] for d in s.extract_documents_from_page(soup, 1)] == ['EFTA00000002.mp4']
+    s.session.close()
+    print("✓ Filter applied while reading the CSV and parsing pages")
+
+
+if __name__ == "__main__":
+    test_terms()
+    test_size_terms()
+    test_apply_size_terms_probes_only_unknown()
+    test_filter_applied_while_loading()
+    print("\n✅ All filter tests passed!")
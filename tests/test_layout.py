@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Tests for storage layout module."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import layout
+from catalog import Catalog
+from pdf_probe import PdfProber
+
+
+def _touch(path, content=b'x'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_paths():
+    """Test where each layout puts a file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        flat = layout.StorageLayout(out)
+        assert flat.path(3, 'documents', 'EFTA00012345.pdf') == out / 'data_set_3/documents/EFTA00012345.pdf'
+        efta = layout.StorageLayout(out, 'efta')
+        assert efta.path(3, 'documents', 'EFTA00012345.pdf') == out / 'data_set_3/documents/00012/EFTA00012345.pdf'
+        assert efta.path(3, 'other', 'notes.txt') == out / 'data_set_3/other/_misc/notes.txt'
+        hashed = layout.StorageLayout(out, 'hash').path(3, 'images', 'EFTA1.jpg')
+        assert len(hashed.parent.name) == 2 and hashed.parent.parent.name == 'images'
+        try:
+            layout.StorageLayout(out, 'tree')
+            raise AssertionError("accepted an unknown layout")
+        except layout.LayoutError:
+            pass
+    print("✓ Layout paths resolved")
+
+
+def test_open_records_and_guards_layout():
+    """Test that a new tree records its layout and an existing one keeps its own."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        new_tree = Path(tmpdir) / 'new'
+        assert layout.StorageLayout.open(new_tree, 'hash').name == 'hash'
+        assert json.loads((new_tree / config.LAYOUT_FILE).read_text()) == {'layout': 'hash'}
+        assert layout.StorageLayout.open(new_tree).name == 'hash'
+
+        old_tree = Path(tmpdir) / 'old'
+        _touch(old_tree / 'data_set_1/documents/EFTA1.pdf')
+        assert layout.StorageLayout.open(old_tree).name == 'flat'
+        try:
+            layout.StorageLayout.open(old_tree, 'efta')
+            raise AssertionError("switched the layout of an existing tree")
+        except layout.LayoutError as e:
+            assert 'migrate --to efta' in str(e)
+    print("✓ Layout recorded for new trees and kept for existing ones")
+
+
+def test_migrate_renames_in_place():
+    """Test flat -> efta -> hash migration by rename, with catalog keys following."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        pdf = _touch(out / 'data_set_1/documents/EFTA00001500.pdf', b'%PDF-1.4\n')
+        _touch(out / 'data_set_1/images/EFTA00000007.jpg')
+        member = _touch(out / 'data_set_1/documents/EFTA00000009/inner.pdf')
+        _touch(out / 'data_set_1/documents/EFTA00000010.pdf.part')
+        inode = pdf.stat().st_ino
+        with Catalog(out) as catalog:
+            catalog.upsert_pdf_info([{'path': 'data_set_1/documents/EFTA00001500.pdf', 'pages': 1}])
+
+        assert layout.migrate(out, 'efta') == 2
+        moved = out / 'data_set_1/documents/00001/EFTA00001500.pdf'
+        assert moved.stat().st_ino == inode and not pdf.exists()
+        assert member.exists() and (out / 'data_set_1/documents/EFTA00000010.pdf.part').exists()
+        with Catalog(out) as catalog:
+            assert [r['path'] for r in catalog.pdf_info()] == ['data_set_1/documents/00001/EFTA00001500.pdf']
+        prober = PdfProber(out)
+        assert prober.find_files() == [moved]
+        prober.close()
+
+        assert layout.migrate(out, 'hash') == 2
+        tree = layout.StorageLayout.load(out)
+        assert tree.name == 'hash' and tree.previous is None
+        assert sorted(r['filename'] for r in tree.files()) == ['EFTA00000007.jpg', 'EFTA00001500.pdf']
+        assert not (out / 'data_set_1/documents/00001').exists()
+        assert layout.migrate(out, 'hash') == 0
+    print("✓ Migration moves files by rename and re-keys the catalog")
+
+
+def test_interrupted_migration():
+    """Test that files are found in either layout until a migration is finished."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        old = _touch(out / 'data_set_2/videos/EFTA00002001.mp4')
+        _touch(out / 'data_set_2/videos/00002/EFTA00002002.mp4')
+        layout.StorageLayout(out, 'efta', previous='flat').save()
+
+        tree = layout.StorageLayout.load(out)
+        assert tree.locate(2, 'videos', 'EFTA00002001.mp4') == old
+        assert len(list(tree.files())) == 2
+        try:
+            layout.migrate(out, 'hash')
+            raise AssertionError("started a second migration")
+        except layout.LayoutError:
+            pass
+        assert layout.migrate(out, 'efta') == 1
+        assert (out / 'data_set_2/videos/00002/EFTA00002001.mp4').exists()
+        assert layout.StorageLayout.load(out).previous is None
+    print("✓ Interrupted migration readable and resumable")
+
+
+if __name__ == "__main__":
+    test_paths()
+    test_open_records_and_guards_layout()
+    test_migrate_renames_in_place()
+    test_interrupted_migration()
+    print("\n✅ All layout tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests for non-blocking logging pipeline module."""
+
+import io
+import json
+import logging
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import log_pipeline
+
+
+def test_records_reach_file_via_listener():
+    """Test that records are written by the listener thread, in order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "run.log"
+        logger = log_pipeline.setup_logger("test.pipeline.text", log_file)
+        assert isinstance(logger.handlers[0], log_pipeline.LazyQueueHandler)
+        for i in range(50):
+            logger.info("file %d of %d", i, 50)
+        log_pipeline.stop_logger(logger)
+
+        lines = log_file.read_text().splitlines()
+        assert len(lines) == 50
+        assert lines[0].endswith("[INFO] file 0 of 50")
+        assert lines[-1].endswith("[INFO] file 49 of 50")
+    print("✓ Records written in order by the listener")
+
+
+def test_filtered_messages_are_never_formatted():
+    """Test lazy formatting: debug arguments aren't rendered at INFO level."""
+    rendered = []
+
+    class Spy:
+        def __str__(self):
+            rendered.append(threading.current_thread().name)
+            return "spy"
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = log_pipeline.setup_logger("test.pipeline.lazy", Path(tmpdir) / "run.log")
+        logger.debug("value %s", Spy())
+        assert rendered == []
+        logger.info("value %s", Spy())
+        log_pipeline.stop_logger(logger)
+        # Rendered off the calling thread
+        assert rendered and threading.current_thread().name not in rendered
+    print("✓ Messages formatted lazily on the listener thread")
+
+
+def test_json_lines_format():
+    """Test JSON-lines output including extra fields."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "run.jsonl"
+        logger = log_pipeline.setup_logger("test.pipeline.json", log_file, json_lines=True)
+        logger.info("Downloaded %s", "EFTA1.pdf", extra={"data_set": 3, "bytes": 1024})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed")
+        log_pipeline.stop_logger(logger)
+
+        entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert entries[0]["message"] == "Downloaded EFTA1.pdf"
+        assert entries[0]["level"] == "INFO" and entries[0]["data_set"] == 3 and entries[0]["bytes"] == 1024
+        assert "ValueError: boom" in entries[1]["exception"]
+    print("✓ JSON lines carry message, level and extra fields")
+
+
+def test_console_rate_limit():
+    """Test that the console is capped while warnings always show."""
+    stream = io.StringIO()
+    handler = log_pipeline.RateLimitedStreamHandler(stream, per_second=5)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(20):
+        handler.emit(logging.LogRecord("t", logging.INFO, "", 0, "info %d", (i,), None))
+    handler.emit(logging.LogRecord("t", logging.WARNING, "", 0, "careful", (), None))
+    lines = stream.getvalue().splitlines()
+    assert lines == ["info 0", "info 1", "info 2", "info 3", "info 4", "careful"]
+    assert handler.suppressed == 15
+    print("✓ Console output rate-limited, warnings kept")
+
+
+if __name__ == "__main__":
+    test_records_reach_file_via_listener()
+    test_filtered_messages_are_never_formatted()
+    test_json_lines_format()
+    test_console_rate_limit()
+    print("\n✅ All logging pipeline tests passed!")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests for compiled link manifest module."""
+
+import csv
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import csv_downloader
+import manifest
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['data_set', 'url', 'link_text'])
+        writer.writerows(rows)
+
+
+def _compile(tmpdir):
+    tmpdir = Path(tmpdir)
+    _write_csv(tmpdir / 'a.csv', [
+        [2, 'https://WWW.Justice.gov:443/epstein/files/EFTA00000300.pdf', 'EFTA00000300.pdf'],
+        [1, '/epstein/files/EFTA00000020.mp4', 'EFTA00000020.mp4'],
+        [1, 'https://www.justice.gov/epstein/files/EFTA00000010.pdf#page=2', 'EFTA00000010.pdf'],
+        [1, 'https://www.justice.gov/epstein/files/readme.pdf', 'readme.pdf'],
+        ['x', 'https://www.justice.gov/epstein/files/EFTA00000011.pdf', 'EFTA00000011.pdf'],
+    ])
+    _write_csv(tmpdir / 'b.csv', [
+        [1, 'https://www.justice.gov/epstein/files/EFTA00000010.pdf', 'EFTA00000010.pdf'],
+        [1, 'https://mirror.example/EFTA00000020.mp4', 'EFTA00000020.mp4'],
+        [2, 'https://www.justice.gov/epstein/files/EFTA00000299.zip', 'EFTA00000299.zip'],
+    ])
+    out = tmpdir / 'links.efm'
+    stats = manifest.compile_manifest([tmpdir / 'a.csv', tmpdir / 'b.csv'], out)
+    return out, stats
+
+
+def test_normalize_url():
+    """Test URL normalization used for deduplication."""
+    assert manifest.normalize_url('HTTPS://WWW.Justice.GOV:443/a/B.pdf#x') == 'https://www.justice.gov/a/B.pdf'
+    assert manifest.normalize_url('/epstein/EFTA1.pdf') == 'https://www.justice.gov/epstein/EFTA1.pdf'
+    assert manifest.normalize_url('http://host:8080/x?page=1') == 'http://host:8080/x?page=1'
+    print("✓ URLs normalized")
+
+
+def test_compile_merges_and_deduplicates():
+    """Test merging CSVs, dropping duplicates and invalid rows, sorted by EFTA."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out, stats = _compile(tmpdir)
+        assert stats == {'rows': 8, 'duplicates': 2, 'invalid': 2, 'files': 4}
+
+        compiled = manifest.Manifest(out)
+        assert list(compiled) == [1, 2]
+        assert compiled.count(1) == 2 and compiled.count(2) == 2 and compiled.total_files == 4
+        assert [f['filename'] for f in compiled[2]] == ['EFTA00000299.zip', 'EFTA00000300.pdf']
+        first = compiled[1][0]
+        assert first == {
+            'filename': 'EFTA00000010.pdf',
+            'url': 'https://www.justice.gov/epstein/files/EFTA00000010.pdf',
+            'data_set': 1, 'file_type': '.pdf', 'category': 'documents',
+        }
+        assert compiled[2][0]['category'] == 'archives'
+        assert [f['data_set'] for f in compiled.find(300)] == [2]
+        assert compiled.find(12345) == []
+        compiled.close()
+    print("✓ CSVs merged, deduplicated and indexed")
+
+
+def test_rejects_other_files():
+    """Test that a non-manifest file is refused."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'links.efm'
+        path.write_bytes(b'data_set,url,link_text\n')
+        assert not manifest.is_manifest(path)
+        try:
+            manifest.Manifest(path)
+            assert False, "Expected ManifestError"
+        except manifest.ManifestError:
+            pass
+    print("✓ Non-manifest files rejected")
+
+
+def test_csv_downloader_loads_manifest():
+    """Test that CSVDownloader accepts a compiled manifest in place of a CSV."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out, _ = _compile(tmpdir)
+        downloader = csv_downloader.CSVDownloader(str(out), download_files=False)
+        assert downloader.load_csv()
+        assert sorted(downloader.files_by_dataset.keys()) == [1, 2]
+        assert 3 not in downloader.files_by_dataset
+        assert len(downloader._data_set_files(1)) == 2
+        downloader.files_by_dataset.close()
+    print("✓ CSV downloader loads compiled manifests")
+
+
+def test_csv_and_manifest_agree_on_categories():
+    """Test that a link list gets the same categories whether loaded as CSV or as a manifest."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        _write_csv(tmpdir / 'links.csv', [
+            [1, 'https://www.justice.gov/epstein/files/EFTA00000001.rtf', 'EFTA00000001.rtf'],
+            [1, 'https://www.justice.gov/epstein/files/EFTA00000002.wmv', 'EFTA00000002.wmv'],
+            [1, 'https://www.justice.gov/epstein/files/EFTA00000003.tiff', 'EFTA00000003.tiff'],
+            [1, 'https://www.justice.gov/epstein/files/EFTA00000004.xyz', 'EFTA00000004.xyz'],
+        ])
+        manifest.compile_manifest([tmpdir / 'links.csv'], tmpdir / 'links.efm')
+
+        categories = []
+        for path in (tmpdir / 'links.csv', tmpdir / 'links.efm'):
+            downloader = csv_downloader.CSVDownloader(str(path), download_files=False)
+            assert downloader.load_csv()
+            categories.append({f['filename']: f['category'] for f in downloader._data_set_files(1)})
+            if isinstance(downloader.files_by_dataset, manifest.Manifest):
+                downloader.files_by_dataset.close()
+
+        assert categories[0] == categories[1] == {
+            'EFTA00000001.rtf': 'documents', 'EFTA00000002.wmv': 'videos',
+            'EFTA00000003.tiff': 'images', 'EFTA00000004.xyz': 'other',
+        }
+    print("✓ CSV and manifest loading agree on categories")
+
+
+if __name__ == "__main__":
+    test_normalize_url()
+    test_compile_merges_and_deduplicates()
+    test_rejects_other_files()
+    test_csv_downloader_loads_manifest()
+    test_csv_and_manifest_agree_on_categories()
+    print("\n✅ All manifest tests passed!")
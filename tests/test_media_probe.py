@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Tests for header-only media probe module."""
+
+import struct
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import media_probe
+
+
+def _box(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def _mp4(mdat_size=200_000):
+    """ftyp, a large mdat, then moov with a video and an audio track."""
+    mvhd = _box(b'mvhd', b'\x00' * 4 + struct.pack('>III', 0, 0, 1000) + struct.pack('>I', 5000) + b'\x00' * 80)
+    tkhd = _box(b'tkhd', b'\x00' * 76 + struct.pack('>II', 640 << 16, 480 << 16))
+
+    def trak(handler, entry):
+        hdlr = _box(b'hdlr', b'\x00' * 8 + handler + b'\x00' * 13)
+        stsd = _box(b'stsd', b'\x00' * 4 + struct.pack('>I', 1) + entry)
+        minf = _box(b'minf', _box(b'stbl', stsd))
+        return _box(b'trak', (tkhd if handler == b'vide' else b'') + _box(b'mdia', hdlr + minf))
+
+    video_entry = _box(b'avc1', b'\x00' * 78)
+    audio_entry = _box(b'mp4a', b'\x00' * 16 + struct.pack('>HHHHI', 2, 16, 0, 0, 44100 << 16))
+    moov = _box(b'moov', mvhd + trak(b'vide', video_entry) + trak(b'soun', audio_entry))
+    return _box(b'ftyp', b'isom\x00\x00\x02\x00isomavc1') + _box(b'mdat', b'\x00' * mdat_size) + moov
+
+
+def _ogg_page(granule, packet=b''):
+    segments = bytes([len(packet)]) if packet else b''
+    return (b'OggS' + bytes([0, 2 if packet else 4]) + struct.pack('<qIII', granule, 7, 0, 0)
+            + bytes([len(segments)]) + segments + packet)
+
+
+def test_sniff_and_mismatch():
+    """Test magic-byte detection and extension mismatch flagging."""
+    assert media_probe.sniff_type(b'\x00\x00\x00\x18ftypisom') == 'mp4'
+    assert media_probe.sniff_type(b'\x00\x00\x00\x14ftypqt  ') == 'mov'
+    assert media_probe.sniff_type(b'RIFF\x00\x00\x00\x00WAVEfmt ') == 'wav'
+    assert media_probe.sniff_type(b'\xff\xfb\x90\x00') == 'mp3'
+    assert media_probe.sniff_type(b'\xff\xf1\x50\x80') == 'aac'
+    assert media_probe.sniff_type(b'<html>') is None
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fake = Path(tmpdir) / 'EFTA00000001.mp4'
+        fake.write_bytes(b'%PDF-1.7\n' + b'\x00' * 100)
+        result = media_probe.probe_file(fake)
+    assert result['detected_type'] == 'pdf' and result['extension_mismatch']
+    print("✓ Content sniffed and extension mismatches flagged")
+
+
+def test_mp4_reads_only_headers():
+    """Test MP4 fields with moov after a large mdat, reading only a few KB."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'EFTA00000002.mp4'
+        path.write_bytes(_mp4())
+        result = media_probe.probe_file(path)
+    assert result['duration'] == 5.0
+    assert result['codec'] == 'avc1,mp4a'
+    assert (result['width'], result['height']) == (640, 480)
+    assert (result['sample_rate'], result['channels']) == (44100, 2)
+    assert result['bitrate'] > 0 and not result['extension_mismatch']
+    assert result['bytes_read'] < 4096
+    print("✓ MP4 probed from headers only")
+
+
+def test_audio_containers():
+    """Test WAV, MP3 (CBR) and OGG Vorbis headers."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        wav_path = Path(tmpdir) / 'a.wav'
+        with wave.open(str(wav_path), 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(8000)
+            w.writeframes(b'\x00\x00' * 8000)
+        wav = media_probe.probe_file(wav_path)
+        assert (wav['codec'], wav['duration'], wav['bitrate'], wav['channels']) == ('pcm', 1.0, 128000, 1)
+
+        mp3_path = Path(tmpdir) / 'a.mp3'
+        frame = b'\xff\xfb\x90\x00' + b'\x00' * 413  # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz
+        mp3_path.write_bytes(b'ID3\x04\x00\x00\x00\x00\x00\x00' + frame * 100)
+        mp3 = media_probe.probe_file(mp3_path)
+        assert (mp3['codec'], mp3['sample_rate'], mp3['bitrate']) == ('mp3', 44100, 128000)
+        assert abs(mp3['duration'] - 100 * 1152 / 44100) < 0.05
+
+        ogg_path = Path(tmpdir) / 'a.ogg'
+        vorbis = b'\x01vorbis' + struct.pack('<IBIiii', 0, 2, 44100, 0, 96000, 0) + b'\xb8\x01'
+        ogg_path.write_bytes(_ogg_page(0, vorbis) + b'\x00' * 5000 + _ogg_page(88200))
+        ogg = media_probe.probe_file(ogg_path)
+        assert (ogg['codec'], ogg['channels'], ogg['bitrate'], ogg['duration']) == ('vorbis', 2, 96000, 2.0)
+    print("✓ WAV, MP3 and OGG headers parsed")
+
+
+def test_prober_stores_results_in_catalog():
+    """Test probing a tree in parallel and storing results in the catalog."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        videos = Path(tmpdir) / 'data_set_3' / 'videos'
+        videos.mkdir(parents=True)
+        (videos / 'EFTA00000002.mp4').write_bytes(_mp4(1000))
+        (videos / 'EFTA00000003.mov').write_bytes(b'PK\x03\x04' + b'\x00' * 100)
+        (videos / 'EFTA00000004.mp4.part').write_bytes(b'')
+
+        prober = media_probe.MediaProber(Path(tmpdir), workers=2)
+        try:
+            results = prober.probe_files()
+            assert sorted(results) == ['data_set_3/videos/EFTA00000002.mp4', 'data_set_3/videos/EFTA00000003.mov']
+            rows = prober.catalog.media_info()
+            assert rows[0]['codec'] == 'avc1,mp4a' and rows[0]['data_set'] == 3
+            mismatched = prober.catalog.media_info(mismatched_only=True)
+            assert [(r['path'], r['detected_type']) for r in mismatched] == [('data_set_3/videos/EFTA00000003.mov', 'zip')]
+        finally:
+            prober.close()
+    print("✓ Probe results stored in the catalog")
+
+
+if __name__ == "__main__":
+    test_sniff_and_mismatch()
+    test_mp4_reads_only_headers()
+    test_audio_containers()
+    test_prober_stores_results_in_catalog()
+    print("\n✅ All media probe tests passed!")
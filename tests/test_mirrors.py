@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Tests for mirror-aware source selection module."""
+
+import csv
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import csv_downloader
+import mirrors
+
+
+class _DownHandler(BaseHTTPRequestHandler):
+    """Always 503, counting requests."""
+
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        self.send_error(503)
+
+    def log_message(self, *args):
+        pass
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """Answer GET with the request path as the body."""
+
+    def do_GET(self):
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_mirror_map_and_candidates():
+    """Test prefix map parsing, longest-prefix matching and candidate order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'mirrors.txt'
+        path.write_text(
+            "# internal mirrors\n"
+            "https://doj.example/files/  https://m1.example/f/\n"
+            "https://doj.example/files/ds9/ https://m2.example/nine/ https://m1.example/f/ds9/\n"
+        )
+        mirror_map = mirrors.MirrorMap.load(path)
+        (Path(tmpdir) / 'bad.txt').write_text("https://doj.example/\n")
+        try:
+            mirrors.MirrorMap.load(Path(tmpdir) / 'bad.txt')
+            raise AssertionError("accepted a prefix without mirrors")
+        except ValueError:
+            pass
+
+    assert mirror_map.alternatives('https://doj.example/files/ds1/a.pdf') == ['https://m1.example/f/ds1/a.pdf']
+    assert mirror_map.alternatives('https://other.example/a.pdf') == []
+    file_info = {
+        'url': 'https://doj.example/files/ds9/a.pdf',
+        'mirrors': mirrors.parse_mirror_column('https://m3.example/a.pdf | https://m1.example/f/ds9/a.pdf'),
+    }
+    assert mirrors.candidate_urls(file_info, mirror_map) == [
+        'https://doj.example/files/ds9/a.pdf', 'https://m3.example/a.pdf',
+        'https://m1.example/f/ds9/a.pdf', 'https://m2.example/nine/a.pdf',
+    ]
+    print("✓ Mirror candidates built from columns and prefix map")
+
+
+def test_rank_and_record():
+    """Test ranking by measurements, exploration, cooldown and concurrency caps."""
+    selector = mirrors.SourceSelector(per_host=1)
+    fast, slow, new = 'https://fast.example/a', 'https://slow.example/a', 'https://new.example/a'
+    for host, latency, throughput in (('fast.example', 0.05, 50e6), ('slow.example', 0.02, 1e6)):
+        stats = selector._stats(host)
+        stats.successes, stats.latency, stats.throughput = 1, latency, throughput
+    # Unmeasured hosts are sampled first; big files favour throughput, tiny ones latency
+    assert selector.rank([slow, fast, new], size=100 * 1024 * 1024) == [new, fast, slow]
+    assert selector.rank([fast, slow], size=10) == [slow, fast]
+
+    try:
+        with selector.attempt(new):
+            raise ConnectionError("refused")
+    except ConnectionError:
+        pass
+    assert selector.rank([new, slow], size=10) == [slow, new]
+
+    # A file missing from a partial mirror, or a local write error, is not the host's fault
+    missing = requests.Response()
+    missing.status_code = 404
+    for error in (requests.HTTPError("404", response=missing), OSError("No space left on device")):
+        try:
+            with selector.attempt(fast):
+                raise error
+        except type(error):
+            pass
+    assert selector.hosts['fast.example'].failures == 0
+    assert selector.rank([fast, slow], size=100 * 1024 * 1024) == [fast, slow]
+
+    with selector.attempt(slow) as attempt:
+        assert selector.rank([slow, fast], size=10) == [fast, slow]  # slow.example is at its limit
+        attempt.first_byte()
+        attempt.add(10)
+    stats = selector.hosts['slow.example']
+    assert stats.successes == 2 and stats.active == 0 and stats.latency < 0.02
+    assert 'slow.example: 2 ok' in selector.report()
+    print("✓ Sources ranked by measured speed with cooldown and per-host caps")
+
+
+def test_failover_without_retry_delay():
+    """Test that a failing primary falls over to a mirror at once and is then avoided."""
+    down, down_base = _serve(_DownHandler)
+    up, up_base = _serve(_EchoHandler)
+    _DownHandler.hits = 0
+    old_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            (tmpdir / 'mirrors.txt').write_text(f"{down_base}/files/ {up_base}/mirror/\n")
+            csv_path = tmpdir / 'links.csv'
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['data_set', 'url', 'link_text'])
+                writer.writerow([1, f'{down_base}/files/EFTA00000001.pdf', 'EFTA00000001.pdf'])
+                writer.writerow([1, f'{down_base}/files/EFTA00000002.pdf', 'EFTA00000002.pdf'])
+
+            downloader = csv_downloader.CSVDownloader(str(csv_path))
+            downloader.output_dir = tmpdir / 'out'
+            downloader.mirror_map = mirrors.MirrorMap.load(tmpdir / 'mirrors.txt')
+            assert downloader.load_csv()
+            started = time.monotonic()
+            downloader.download_data_sets([1])
+            elapsed = time.monotonic() - started
+            downloader.session.close()
+            downloader.failover_session.close()
+
+            docs = tmpdir / 'out' / 'data_set_1' / 'documents'
+            assert (docs / 'EFTA00000001.pdf').read_bytes() == b'/mirror/EFTA00000001.pdf'
+            assert (docs / 'EFTA00000002.pdf').read_bytes() == b'/mirror/EFTA00000002.pdf'
+            assert _DownHandler.hits == 1  # no retries, and the primary was skipped for the second file
+            assert elapsed < config.RETRY_DELAY / 2
+            assert downloader.metadata['data_set_1'][0]['source_url'] == f'{up_base}/mirror/EFTA00000001.pdf'
+    finally:
+        config.RATE_LIMIT_DELAY = old_delay
+        down.shutdown()
+        up.shutdown()
+    print("✓ Failover to a mirror without retry backoff")
+
+
+def test_rate_limit_not_measured_as_latency():
+    """Test that the pause before a primary-host request is not counted as the host's latency."""
+    up, up_base = _serve(_EchoHandler)
+    old_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0.3
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            csv_path = tmpdir / 'links.csv'
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['data_set', 'url', 'link_text'])
+                writer.writerow([1, f'{up_base}/files/EFTA00000001.pdf', 'EFTA00000001.pdf'])
+
+            downloader = csv_downloader.CSVDownloader(str(csv_path))
+            downloader.output_dir = tmpdir / 'out'
+            assert downloader.load_csv()
+            started = time.monotonic()
+            downloader.download_data_sets([1])
+            assert time.monotonic() - started >= config.RATE_LIMIT_DELAY  # the pause still happens
+            downloader.session.close()
+            downloader.failover_session.close()
+
+            stats = downloader.sources.hosts[mirrors.host_of(up_base)]
+            assert stats.successes == 1 and stats.latency < config.RATE_LIMIT_DELAY
+    finally:
+        config.RATE_LIMIT_DELAY = old_delay
+        up.shutdown()
+    print("✓ Rate-limit pause kept out of latency samples")
+
+
+if __name__ == "__main__":
+    test_mirror_map_and_candidates()
+    test_rank_and_record()
+    test_failover_without_retry_delay()
+    test_rate_limit_not_measured_as_latency()
+    print("\n✅ All mirror tests passed!")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Tests for PDF structure probe module."""
+
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import pdf_probe
+
+
+def _classic_pdf(objects, trailer=b'', version=b'1.4', bad_startxref=False):
+    """Build a PDF with a classic xref table; objects are numbered from 1."""
+    out = bytearray(b'%PDF-' + version + b'\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % num + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R ' % (len(objects) + 1) + trailer + b' >>\n'
+    out += b'startxref\n%d\n%%%%EOF\n' % (xref + 7 if bad_startxref else xref)
+    return bytes(out)
+
+
+def _text_pdf(**kwargs):
+    producer = b'<FEFF0054006500730074>'  # "Test" as UTF-16BE
+    return _classic_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 /Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Type /Page /Parent 2 0 R /Contents 6 0 R >>',
+        b'<< /Type /Page /Parent 2 0 R >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Length 44 >>\nstream\nBT /F1 12 Tf 72 712 Td (Hello \\(world\\)) Tj ET\nendstream',
+        b'<< /Producer ' + producer + b' /Creator (Writer\\051) >>',
+    ], trailer=b'/Info 7 0 R', **kwargs)
+
+
+def _xref_stream_pdf():
+    """PDF 1.5 with pages packed in an object stream and an xref stream using the Up predictor."""
+    members = [
+        (2, b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>'),
+        (3, b'<< /Type /Page /Parent 2 0 R /Resources << /XObject << /Im0 4 0 R >> >> >>'),
+    ]
+    header = b' '.join(b'%d %d' % (num, sum(len(b) + 1 for _, b in members[:i])) for i, (num, _) in enumerate(members))
+    body = b'\n'.join(b for _, b in members) + b'\n'
+    objstm = zlib.compress(header + b'\n' + body)
+
+    out = bytearray(b'%PDF-1.5\n')
+    offsets = {}
+    offsets[1] = len(out)
+    out += b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R /Version /1.7 >>\nendobj\n'
+    offsets[4] = len(out)
+    out += b'4 0 obj\n<< /Type /XObject /Subtype /Image /Length 3 >>\nstream\nabc\nendstream\nendobj\n'
+    offsets[5] = len(out)
+    out += (b'5 0 obj\n<< /Type /ObjStm /N 2 /First %d /Filter /FlateDecode /Length %d >>\nstream\n'
+            % (len(header) + 1, len(objstm))) + objstm + b'\nendstream\nendobj\n'
+    offsets[6] = len(out)
+
+    entries = [(0, 0, 255), (1, offsets[1], 0), (2, 5, 0), (2, 5, 1), (1, offsets[4], 0),
+               (1, offsets[5], 0), (1, offsets[6], 0)]
+    rows = [bytes([kind]) + value.to_bytes(4, 'big') + bytes([extra]) for kind, value, extra in entries]
+    encoded = bytearray()
+    previous = bytes(6)
+    for row in rows:
+        encoded += b'\x02' + bytes((a - b) & 0xFF for a, b in zip(row, previous))
+        previous = row
+    data = zlib.compress(bytes(encoded))
+    out += (b'6 0 obj\n<< /Type /XRef /Size 7 /W [1 4 1] /Root 1 0 R /Filter /FlateDecode '
+            b'/DecodeParms << /Columns 6 /Predictor 12 >> /Length %d >>\nstream\n' % len(data))
+    out += data + b'\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n' % offsets[6]
+    return bytes(out)
+
+
+def _probe(tmpdir, name, content):
+    path = Path(tmpdir) / name
+    path.write_bytes(content)
+    return pdf_probe.probe_pdf(path)
+
+
+def test_classic_xref():
+    """Test version, pages, fonts and UTF-16 producer from a classic xref table."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = _probe(tmpdir, 'a.pdf', _text_pdf())
+    assert result == {
+        'version': '1.4', 'pages': 2, 'encrypted': False, 'has_text': True,
+        'producer': 'Test', 'creator': 'Writer)', 'repaired': False, 'error': None,
+    }
+    print("✓ Classic xref PDF probed")
+
+
+def test_xref_stream_and_object_stream():
+    """Test xref streams with predictors, object streams and image-only detection."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = _probe(tmpdir, 'b.pdf', _xref_stream_pdf())
+    assert result['version'] == '1.7' and result['pages'] == 1
+    assert result['has_text'] is False and not result['repaired'] and result['error'] is None
+    print("✓ Xref stream PDF probed, image-only page detected")
+
+
+def test_damaged_and_encrypted():
+    """Test the full-scan fallback, the encryption flag and non-PDF input."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repaired = _probe(tmpdir, 'c.pdf', _text_pdf(bad_startxref=True))
+        assert repaired['repaired'] and repaired['pages'] == 2 and repaired['has_text']
+
+        encrypted = _probe(tmpdir, 'd.pdf', _text_pdf().replace(b'/Info 7 0 R', b'/Info 7 0 R /Encrypt << /V 2 >>'))
+        assert encrypted['encrypted'] and encrypted['producer'] is None and encrypted['pages'] == 2
+
+        assert _probe(tmpdir, 'e.pdf', b'<html></html>')['error'] == 'not a PDF'
+        assert _probe(tmpdir, 'f.pdf', b'')['error'] == 'empty file'
+    print("✓ Damaged, encrypted and invalid files handled")
+
+
+def test_extract_text():
+    """Test page text through a /ToUnicode CMap, TJ word gaps and Latin-1 fonts."""
+    cmap = (b'/CIDInit /ProcSet findresource begin begincmap\n'
+            b'1 begincodespacerange <0000> <FFFF> endcodespacerange\n'
+            b'1 beginbfchar <0003> <0020> endbfchar\n'
+            b'1 beginbfrange <0041> <007A> <0041> endbfrange\nendcmap end')
+    content = zlib.compress(b'BT /F2 9 Tf [<004A006F0068006E> -400 <0053> 5 <006D006900740068>] TJ '
+                            b'BI /W 1 /H 1 ID \x00) EI /F1 9 Tf (Caf\351) Tj ET')
+    pdf = _classic_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 /Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> >>',
+        b'<< /Type /Page /Parent 2 0 R /Contents 7 0 R >>',
+        b'<< /Type /Page /Parent 2 0 R /Contents [8 0 R] >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Type /Font /Subtype /Type0 /BaseFont /Embedded /ToUnicode 9 0 R >>',
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content) + content + b'\nendstream',
+        b'<< /Length 24 >>\nstream\nBT /F2 9 Tf <0041> Tj ET\nendstream',
+        b'<< /Length %d >>\nstream\n' % len(cmap) + cmap + b'\nendstream',
+    ])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'text.pdf'
+        path.write_bytes(pdf)
+        pages = pdf_probe.extract_text(path)
+        path.write_bytes(pdf.replace(b'/Root 1 0 R', b'/Root 1 0 R /Encrypt << /V 2 >>'))
+        assert pdf_probe.extract_text(path) == []
+    assert ' '.join(pages[0].split()) == 'John Smith Café'
+    assert pages[1].strip() == 'A'
+    print("✓ Page text extracted")
+
+
+def _nested_pdf():
+    """A PDF whose catalog holds 100k nested arrays, deeper than the parser can recurse."""
+    return _classic_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R /Junk ' + b'[' * 100000 + b']' * 100000 + b' >>',
+        b'<< /Type /Pages /Kids [] /Count 0 >>',
+    ])
+
+
+def test_deep_nesting_is_a_per_file_error():
+    """Test that absurdly nested objects are reported for the file instead of raised."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = _probe(tmpdir, 'nested.pdf', _nested_pdf())
+        assert result['error'].startswith('RecursionError')
+        try:
+            pdf_probe.extract_text(Path(tmpdir) / 'nested.pdf')
+            raise AssertionError("extracted text from an unparseable PDF")
+        except pdf_probe.PdfError as e:
+            assert 'RecursionError' in str(e)
+
+        documents = Path(tmpdir) / 'data_set_4' / 'documents'
+        documents.mkdir(parents=True)
+        (documents / 'EFTA00000001.pdf').write_bytes(_nested_pdf())
+        (documents / 'EFTA00000002.pdf').write_bytes(_text_pdf())
+        prober = pdf_probe.PdfProber(Path(tmpdir), workers=2)
+        try:
+            prober.probe_files()
+            stored = {r['path']: r for r in prober.catalog.pdf_info()}
+            assert stored['data_set_4/documents/EFTA00000001.pdf']['error'].startswith('RecursionError')
+            assert stored['data_set_4/documents/EFTA00000002.pdf']['pages'] == 2
+        finally:
+            prober.close()
+    print("✓ Deeply nested PDFs reported as per-file errors")
+
+
+def test_prober_stores_results_in_catalog():
+    """Test probing the tree in a process pool and listing image-only PDFs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        documents = Path(tmpdir) / 'data_set_4' / 'documents'
+        documents.mkdir(parents=True)
+        (documents / 'EFTA00000001.pdf').write_bytes(_text_pdf())
+        (documents / 'EFTA00000002.pdf').write_bytes(_xref_stream_pdf())
+        (documents / 'EFTA00000003.txt').write_bytes(b'not a pdf')
+
+        prober = pdf_probe.PdfProber(Path(tmpdir), workers=2)
+        try:
+            results = prober.probe_files()
+            assert len(results) == 2
+            scanned = prober.catalog.pdf_info(image_only=True)
+            assert [(r['path'], r['data_set']) for r in scanned] == [('data_set_4/documents/EFTA00000002.pdf', 4)]
+            assert len(prober.catalog.pdf_info()) == 2
+        finally:
+            prober.close()
+    print("✓ PDF probe results stored in the catalog")
+
+
+if __name__ == "__main__":
+    test_classic_xref()
+    test_xref_stream_and_object_stream()
+    test_damaged_and_encrypted()
+    test_extract_text()
+    test_deep_nesting_is_a_per_file_error()
+    test_prober_stores_results_in_catalog()
+    print("\n✅ All PDF probe tests passed!")
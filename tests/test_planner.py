@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Tests for plan mode module."""
+
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import planner
+
+
+class _SizedHandler(BaseHTTPRequestHandler):
+    """Answer HEAD/GET with a body whose size is encoded in the path (/<size>/name)."""
+
+    head_count = 0
+
+    def _size(self):
+        return int(self.path.strip('/').split('/')[0])
+
+    def do_HEAD(self):
+        type(self).head_count += 1
+        self.send_response(200)
+        self.send_header('Content-Length', str(self._size()))
+        self.end_headers()
+
+    def do_GET(self):
+        body = b'x' * self._size()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    handler = type('Handler', (_SizedHandler,), {'head_count': 0})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _files(base):
+    return [
+        {'url': f'{base}/1000/EFTA1.pdf', 'data_set': 1, 'category': 'documents', 'filename': 'EFTA1.pdf'},
+        {'url': f'{base}/5000/EFTA2.mp4', 'data_set': 1, 'category': 'videos', 'filename': 'EFTA2.mp4'},
+        {'url': f'{base}/2000/EFTA3.pdf', 'data_set': 2, 'category': 'documents', 'filename': 'EFTA3.pdf'},
+    ]
+
+
+def test_probe_sizes_uses_cache():
+    """Test concurrent probing and that cached URLs are not probed again."""
+    server, base = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = planner.ProbeCache(Path(tmpdir))
+            sizes = planner.probe_sizes(requests.Session(), _files(base), cache, workers=3, rate=100)
+            assert sorted(sizes.values()) == [1000, 2000, 5000]
+            cache.save()
+
+            reloaded = planner.ProbeCache(Path(tmpdir))
+            assert reloaded.size(f'{base}/5000/EFTA2.mp4') == 5000
+            planner.probe_sizes(requests.Session(), _files(base), reloaded)
+            assert server.RequestHandlerClass.head_count == 3
+    finally:
+        server.shutdown()
+    print("✓ Sizes probed concurrently and cached")
+
+
+def test_build_plan_report():
+    """Test totals per data set and category, free space and ETA."""
+    server, base = _serve()
+    saved_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = _files(base)
+            plan = planner.build_plan(
+                requests.Session(), files, Path(tmpdir),
+                is_local=lambda f: f['filename'] == 'EFTA3.pdf', rate=100,
+            )
+            assert plan.to_fetch == 2 and plan.already_local == 1
+            assert plan.total_bytes == 6000
+            assert plan.by_data_set == {1: 6000}
+            assert plan.by_category == {'documents': 1000, 'videos': 5000}
+            assert plan.fits is True
+            assert plan.eta_seconds is not None
+            assert "Total size" in plan.report()
+            assert (Path(tmpdir) / config.PROBE_CACHE_FILE).exists()
+    finally:
+        config.RATE_LIMIT_DELAY = saved_delay
+        server.shutdown()
+    print("✓ Plan reports totals, free space and ETA")
+
+
+def test_preallocate_then_truncate():
+    """Test that preallocated space is trimmed to what was written."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'file.bin'
+        with open(path, 'wb') as f:
+            planner.preallocate(f, 1024 * 1024)
+            f.write(b'abc')
+            f.truncate(f.tell())
+        assert path.stat().st_size == 3
+    print("✓ Preallocation trimmed to written size")
+
+
+if __name__ == "__main__":
+    test_probe_sizes_uses_cache()
+    test_build_plan_report()
+    test_preallocate_then_truncate()
+    print("\n✅ All planner tests passed!")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Tests for post-download processors module."""
+
+import csv
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import csv_downloader
+import processors
+from catalog import Catalog
+
+
+def _pdf():
+    """A one-page PDF with a classic xref table."""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+               b'<< /Type /Page /Parent 2 0 R >>']
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % num + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 4\n0000000000 65535 f \n' + b''.join(b'%010d 00000 n \n' % o for o in offsets)
+    out += b'trailer\n<< /Size 4 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % xref
+    return bytes(out)
+
+
+def _slow(path):
+    """Record when it ran next to the file, taking a while about it."""
+    started = time.time()
+    time.sleep(0.2)
+    with open(path.parent / 'runs.log', 'a') as f:
+        f.write(f"{started} {time.time()}\n")
+    return {'name': path.name}
+
+
+def _broken(path):
+    raise ValueError(f"cannot handle {path.name}")
+
+
+def _crash(path):
+    """Take the whole worker process down on one file, like an OOM kill."""
+    if path.name.startswith('crash'):
+        os._exit(1)
+    return {'size': path.stat().st_size}
+
+
+def test_registry_and_selection():
+    """Test built-ins, registration, name parsing and file filters."""
+    assert {'sha256', 'pdf', 'media'} <= set(processors.PROCESSORS)
+    selected = processors.parse_processors('pdf, sha256,pdf')
+    assert [p.name for p in selected] == ['pdf', 'sha256']
+    try:
+        processors.parse_processors('sha256,thumbnails')
+        raise AssertionError("accepted an unknown processor")
+    except ValueError as e:
+        assert 'thumbnails' in str(e)
+
+    pdf, media = processors.PROCESSORS['pdf'], processors.PROCESSORS['media']
+    assert pdf.accepts(Path('a/EFTA1.PDF')) and not pdf.accepts(Path('a/EFTA1.mp4'))
+    assert media.accepts(Path('x.mp4'), 'videos') and not media.accepts(Path('x.pdf'), 'documents')
+
+    processors.register_processor('broken', _broken, concurrency=3, suffixes=['.txt'])
+    try:
+        assert processors.PROCESSORS['broken'].concurrency == 3
+        assert processors.parse_processors('broken')[0].func is _broken
+    finally:
+        del processors.PROCESSORS['broken']
+    print("✓ Processor registry and selection")
+
+
+def test_pipeline_records_outputs_and_errors():
+    """Test outputs, errors and processor-specific tables written to the catalog."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        docs = out / 'data_set_4' / 'documents'
+        docs.mkdir(parents=True)
+        pdf_path = docs / 'EFTA00000001.pdf'
+        pdf_path.write_bytes(_pdf())
+        txt_path = docs / 'EFTA00000002.txt'
+        txt_path.write_text('notes')
+
+        broken = processors.Processor('broken', _broken, suffixes=['.txt'])
+        pipeline = processors.ProcessingPipeline(
+            [processors.PROCESSORS['sha256'], processors.PROCESSORS['pdf'], broken], out, workers=2
+        )
+        assert pipeline.submit(pdf_path, 'documents') == 2
+        assert pipeline.submit(txt_path, 'documents') == 2
+        pipeline.close()
+        assert pipeline.processed == {'sha256': 2, 'pdf': 1, 'broken': 0}
+        assert pipeline.failed['broken'] == 1
+
+        with Catalog(out) as catalog:
+            results = {(r['processor'], r['path']): r for r in catalog.processor_results()}
+            sha = results[('sha256', 'data_set_4/documents/EFTA00000001.pdf')]
+            assert sha['output'] == {'sha256': hashlib.sha256(pdf_path.read_bytes()).hexdigest(),
+                                     'size': pdf_path.stat().st_size}
+            assert sha['data_set'] == 4 and sha['error'] is None
+            assert results[('pdf', 'data_set_4/documents/EFTA00000001.pdf')]['output']['pages'] == 1
+            failed = catalog.processor_results('broken', errors_only=True)
+            assert [r['error'] for r in failed] == ['ValueError: cannot handle EFTA00000002.txt']
+            assert failed[0]['output'] is None
+            # The PDF processor also fills pdf_info
+            assert catalog.probe_info('data_set_4/documents/EFTA00000001.pdf')['pdf']['pages'] == 1
+    print("✓ Outputs and errors recorded in the catalog")
+
+
+def test_submit_never_blocks_and_limits_hold():
+    """Test that submit returns at once and a processor never exceeds its concurrency."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        files = []
+        for i in range(6):
+            path = out / f'file{i}.bin'
+            path.write_bytes(os.urandom(1000))
+            files.append(path)
+
+        slow = processors.Processor('slow', _slow, concurrency=2)
+        pipeline = processors.ProcessingPipeline([slow, processors.PROCESSORS['sha256']], out, workers=4)
+        started = time.monotonic()
+        for path in files:
+            pipeline.submit(path)
+        assert time.monotonic() - started < 0.5  # six 0.2 s jobs at two at a time take 0.6 s
+        assert pipeline.pending() > 0
+        pipeline.close()
+        assert pipeline.processed == {'slow': 6, 'sha256': 6}
+
+        runs = [tuple(map(float, line.split())) for line in (out / 'runs.log').read_text().splitlines()]
+        overlap = max(sum(1 for s, e in runs if s <= start < e) for start, _ in runs)
+        assert len(runs) == 6 and overlap <= 2
+    print("✓ Submissions never block; per-processor limits respected")
+
+
+def test_dead_worker_does_not_stall_the_pipeline():
+    """Test that a worker dying mid-job is recorded as an error and later files still run."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        names = ['crash.bin', 'next1.bin', 'next2.bin', 'next3.bin']
+        for name in names:
+            (out / name).write_bytes(b'x' * 10)
+
+        pipeline = processors.ProcessingPipeline([processors.Processor('crashy', _crash)], out, workers=1)
+        for name in names:
+            pipeline.submit(out / name)
+        pipeline.close()
+        assert pipeline.processed['crashy'] + pipeline.failed['crashy'] == len(names)
+        assert pipeline.processed['crashy'] >= 2  # the fresh pool handles what comes after
+
+        with Catalog(out) as catalog:
+            results = {r['path']: r for r in catalog.processor_results('crashy')}
+        assert sorted(results) == names
+        assert results['crash.bin']['error'].startswith('BrokenProcessPool')
+        assert results['next3.bin']['output'] == {'size': 10}
+    print("✓ Dead workers recorded as errors; a new pool takes over")
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    """Serve the request path as the body."""
+
+    def do_GET(self):
+        body = self.path.encode() * 100
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_downloader_processes_files_as_they_land():
+    """Test that --process hands each downloaded file to the pipeline."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    old_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            csv_path = tmpdir / 'links.csv'
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['data_set', 'url', 'link_text'])
+                writer.writerow([6, f'{base}/EFTA00000020.txt', 'EFTA00000020.txt'])
+                writer.writerow([6, f'{base}/EFTA00000021.mp4', 'EFTA00000021.mp4'])
+
+            downloader = csv_downloader.CSVDownloader(str(csv_path))
+            downloader.output_dir = tmpdir / 'out'
+            downloader.processing = processors.ProcessingPipeline(
+                processors.parse_processors('sha256,media'), downloader.output_dir, workers=2
+            )
+            assert downloader.load_csv()
+            downloader.download_data_sets([6])
+            downloader.close_processing()
+            downloader.session.close()
+            downloader.failover_session.close()
+
+            assert downloader.processing.processed == {'sha256': 2, 'media': 1}
+            with Catalog(tmpdir / 'out') as catalog:
+                hashes = {r['path'].rsplit('/', 1)[-1]: r['output']['sha256']
+                          for r in catalog.processor_results('sha256')}
+                assert hashes['EFTA00000020.txt'] == hashlib.sha256(b'/EFTA00000020.txt' * 100).hexdigest()
+                media = catalog.media_info()
+                assert len(media) == 1 and media[0]['extension_mismatch'] == 1
+    finally:
+        config.RATE_LIMIT_DELAY = old_delay
+        server.shutdown()
+    print("✓ Downloaded files processed as they land")
+
+
+if __name__ == "__main__":
+    test_registry_and_selection()
+    test_pipeline_records_outputs_and_errors()
+    test_submit_never_blocks_and_limits_hold()
+    test_dead_worker_does_not_stall_the_pipeline()
+    test_downloader_processes_files_as_they_land()
+    print("\n✅ All processors tests passed!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Tests for aggregated transfer progress module."""
+
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import progress
+
+
+def test_counters_aggregate_across_threads():
+    """Test that per-thread counters sum exactly."""
+    with progress.TransferProgress(40, total_bytes=40 * 1000, interval=0.01, disable=True) as display:
+        def worker():
+            for _ in range(10):
+                display.start_file()
+                for _ in range(10):
+                    display.add_bytes(100)
+                display.finish_file(True)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        totals = display.totals()
+    assert totals == {'bytes': 40_000, 'done': 40, 'failed': 0, 'active': 0, 'queued': 0}
+    print("✓ Counters aggregate across worker threads")
+
+
+def test_queue_depth_and_failures():
+    """Test queued/active/failed bookkeeping and a custom queue depth source."""
+    display = progress.TransferProgress(5, disable=True)
+    display.start_file()
+    display.finish_file(False)
+    display.start_file()
+    totals = display.totals()
+    assert totals['failed'] == 1 and totals['active'] == 1 and totals['queued'] == 3
+    display.finish_file(True)
+    display.close()
+
+    remote = progress.TransferProgress(5, queue_depth=lambda: 42, disable=True)
+    assert remote.totals()['queued'] == 42
+    remote.close()
+    print("✓ Queue depth, active and failed tracked")
+
+
+def test_eta_and_known_total():
+    """Test file-rate ETA and the known-size total helper."""
+    display = progress.TransferProgress(10, disable=True)
+    assert display.eta_seconds(display.totals()) is None
+    for _ in range(5):
+        display.start_file()
+        display.finish_file(True)
+    eta = display.eta_seconds(display.totals())
+    display.close()
+    assert eta is not None and eta >= 0
+
+    files = [{'size': 10}, {'size': 20}]
+    assert progress.known_total(files, lambda f: f['size']) == 30
+    assert progress.known_total(files + [{'size': None}], lambda f: f['size']) is None
+    print("✓ ETA and expected total computed")
+
+
+if __name__ == "__main__":
+    test_counters_aggregate_across_threads()
+    test_queue_depth_and_failures()
+    test_eta_and_known_total()
+    print("\n✅ All progress tests passed!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Tests for remote ZIP inspection module."""
+
+import io
+import logging
+import random
+import re
+import sys
+import tempfile
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import remote_zip
+
+
+def _make_zip() -> bytes:
+    """Build an in-memory ZIP with a large padding member first."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('padding.bin', random.Random(0).randbytes(512 * 1024))
+        zf.writestr('docs/EFTA00000301.pdf', b'%PDF-1.4 remote member')
+        zf.writestr('stored.txt', b'stored bytes', compress_type=zipfile.ZIP_STORED)
+    return buffer.getvalue()
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serve a single blob with byte-range support and count bytes sent."""
+
+    blob = b''
+    bytes_sent = 0
+
+    def do_GET(self):
+        blob = type(self).blob
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get('Range', ''))
+        if not match:
+            self.send_response(200)
+            body = blob
+        else:
+            start, end = match.groups()
+            if start == '':
+                start, end = max(0, len(blob) - int(end)), len(blob) - 1
+            else:
+                start, end = int(start), int(end) if end else len(blob) - 1
+            body = blob[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{start + len(body) - 1}/{len(blob)}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        type(self).bytes_sent += len(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(blob: bytes):
+    """Start a Range-capable server for blob; return (server, url)."""
+    handler = type('Handler', (_RangeHandler,), {'blob': blob, 'bytes_sent': 0})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/EFTA00000300.zip"
+
+
+def test_list_members_from_tail():
+    """Test listing members without downloading the whole archive."""
+    blob = _make_zip()
+    server, url = _serve(blob)
+    try:
+        remote = remote_zip.RemoteZip(requests.Session(), url, delay=0)
+        names = [m['name'] for m in remote.list_members()]
+        assert names == ['padding.bin', 'docs/EFTA00000301.pdf', 'stored.txt']
+        assert remote.total_size == len(blob)
+    finally:
+        server.shutdown()
+    print("✓ Remote ZIP members listed from the tail")
+
+
+def test_fetch_member_by_offset():
+    """Test fetching deflated and stored members by byte offset."""
+    server, url = _serve(_make_zip())
+    try:
+        remote = remote_zip.RemoteZip(requests.Session(), url, delay=0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pdf = remote.fetch_member('docs/EFTA00000301.pdf', Path(tmpdir) / 'a.pdf')
+            txt = remote.fetch_member('stored.txt', Path(tmpdir) / 'b.txt')
+            assert pdf.read_bytes() == b'%PDF-1.4 remote member'
+            assert txt.read_bytes() == b'stored bytes'
+    finally:
+        server.shutdown()
+    print("✓ Remote ZIP members fetched by offset")
+
+
+def test_inspect_remote_archive():
+    """Test the downloader inspection helper fetches only matching members."""
+    blob = _make_zip()
+    server, url = _serve(blob)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_set_dir = Path(tmpdir) / 'data_set_3'
+            file_info = {'filename': 'EFTA00000300.zip', 'url': url, 'data_set': 3}
+            ok = remote_zip.inspect_remote_archive(
+                requests.Session(), file_info, data_set_dir, logging.getLogger(__name__),
+                member_pattern='*.pdf', delay=0,
+            )
+            assert ok
+            assert len(file_info['archive_members']) == 3
+            dest = data_set_dir / 'documents' / 'EFTA00000300' / 'docs' / 'EFTA00000301.pdf'
+            assert dest.read_bytes() == b'%PDF-1.4 remote member'
+            assert not (data_set_dir / 'other').exists()
+        assert server.RequestHandlerClass.bytes_sent < len(blob)
+    finally:
+        server.shutdown()
+    print("✓ Inspection fetches only matching members")
+
+
+if __name__ == "__main__":
+    test_list_members_from_tail()
+    test_fetch_member_by_offset()
+    test_inspect_remote_archive()
+    print("\n✅ All remote ZIP tests passed!")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Tests for download scheduler module."""
+
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import scheduler
+from planner import ProbeCache
+
+
+def _file(name, category, data_set, size):
+    """Build a file_info dict with a known size."""
+    return {'filename': name, 'category': category, 'data_set': data_set, 'file_size_bytes': size}
+
+
+def _known_size(file_info):
+    return file_info.get('file_size_bytes')
+
+
+def test_parse_helpers():
+    """Test duration and weight parsing."""
+    assert scheduler.parse_duration("90m") == 5400
+    assert scheduler.parse_duration("1h30m") == 5400
+    assert scheduler.parse_duration("45") == 45
+    assert scheduler.parse_weights(["documents=5", "videos=0.5"]) == {'documents': 5.0, 'videos': 0.5}
+    assert scheduler.parse_weights(["3=2"], numeric_keys=True) == {3: 2.0}
+    for bad in (lambda: scheduler.parse_duration("soon"), lambda: scheduler.parse_weights(["x"])):
+        try:
+            bad()
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+    print("✓ Durations and weights parsed")
+
+
+def test_plan_prefers_priority_within_budget():
+    """Test that small high-priority files beat a huge low-priority video."""
+    files = [
+        _file('EFTA1.mp4', 'videos', 1, 900),
+        _file('EFTA2.pdf', 'documents', 1, 100),
+        _file('EFTA3.pdf', 'documents', 2, 100),
+        _file('EFTA4.pdf', 'documents', 9, 100),
+    ]
+    sched = scheduler.DownloadScheduler(
+        category_weights={'documents': 5, 'videos': 1},
+        data_set_weights={9: 0},
+        max_bytes=1000,
+    )
+    plan = [f['filename'] for f in sched.plan(files, _known_size)]
+    assert plan == ['EFTA2.pdf', 'EFTA3.pdf']  # video doesn't fit alongside, data set 9 disabled
+    print("✓ Plan maximizes priority within byte budget")
+
+
+def test_plan_takes_single_valuable_file():
+    """Test the knapsack fallback to one big valuable file."""
+    files = [_file('small.pdf', 'documents', 1, 1), _file('big.mp4', 'videos', 1, 1000)]
+    sched = scheduler.DownloadScheduler(category_weights={'documents': 1, 'videos': 50}, max_bytes=1000)
+    plan = [f['filename'] for f in sched.plan(files, _known_size)]
+    assert plan == ['big.mp4']
+    print("✓ Plan falls back to the best single file")
+
+
+def test_run_time_budget_checks():
+    """Test that files are refused once budgets are used up."""
+    sched = scheduler.DownloadScheduler(max_bytes=150)
+    files = sched.plan([_file('a', 'documents', 1, 100), {'filename': 'b', 'category': 'documents', 'data_set': 1}],
+                       _known_size)
+    assert [f['filename'] for f in files] == ['a', 'b']  # unknown size goes last
+    sched.start()
+    assert sched.can_start(files[0])
+    sched.record(files[0], 160)
+    assert sched.exhausted()
+
+    timed = scheduler.DownloadScheduler(max_duration=0)
+    timed.start()
+    assert not timed.can_start(_file('c', 'documents', 1, 1))
+
+    # An unknown size can't be checked, so it needs a margin of budget left
+    margin = config.SCHEDULE_UNSIZED_MIN_BYTES
+    unsized = {'filename': 'd', 'category': 'documents', 'data_set': 1}
+    roomy = scheduler.DownloadScheduler(max_bytes=margin + 10)
+    roomy.start()
+    assert roomy.can_start(unsized)
+    roomy.record(unsized, 20)
+    assert not roomy.can_start(unsized)
+    print("✓ Budgets enforced at run time")
+
+
+class _HeadHandler(BaseHTTPRequestHandler):
+    """Answer HEAD slowly with a size derived from the path, counting requests."""
+
+    hits = 0
+
+    def do_HEAD(self):
+        type(self).hits += 1
+        time.sleep(0.2)
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(self.path) * 10))
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_sizes_probed_concurrently_on_the_clock():
+    """Test that unknown sizes are probed concurrently, cached, and count against the time budget."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _HeadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    _HeadHandler.hits = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir, requests.Session() as session:
+            cache = ProbeCache(Path(tmpdir))
+            files = [{'filename': f'f{i}', 'category': 'documents', 'data_set': 1, 'url': f'{base}/f{i}'}
+                     for i in range(4)]
+            files.append(_file('known', 'documents', 1, 5))
+            files.append({'filename': 'off', 'category': 'videos', 'data_set': 1, 'url': f'{base}/off'})
+
+            def size_of(file_info):
+                return file_info.get('file_size_bytes', cache.size(file_info.get('url')))
+
+            sched = scheduler.DownloadScheduler(category_weights={'videos': 0}, max_duration=3600)
+            sched.start()
+            assert sched.probe_sizes(files, size_of, session, cache) == 4
+            assert _HeadHandler.hits == 4  # neither the known size nor the zero-priority video
+            assert sched.elapsed() >= 0.2
+            plan = sched.plan(files, size_of)
+            assert [f['planned_size_bytes'] for f in plan] == [5, 30, 30, 30, 30]
+            assert ProbeCache(Path(tmpdir)).size(f'{base}/f0') == 30  # saved for later runs
+
+            assert sched.probe_sizes(files, size_of, session, cache) == 0
+            assert _HeadHandler.hits == 4
+    finally:
+        server.shutdown()
+    print("✓ Unknown sizes probed concurrently within the time budget")
+
+
+if __name__ == "__main__":
+    test_parse_helpers()
+    test_plan_prefers_priority_within_budget()
+    test_plan_takes_single_valuable_file()
+    test_run_time_budget_checks()
+    test_sizes_probed_concurrently_on_the_clock()
+    print("\n✅ All scheduler tests passed!")
@@ -2,11 +2,15 @@
 """Tests for web scraper module."""
 
 import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+import config
 import scraper
 
 
@@ -57,9 +61,59 @@ def test_scraper_has_required_methods():
     print("✓ Scraper has required methods")
 
 
+class _PagedHandler(BaseHTTPRequestHandler):
+    """Eight listing pages; earlier pages answer slower so they finish out of order."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        page = int(self.path.split("page=")[1]) if "page=" in self.path else 0
+        time.sleep((8 - page) * 0.02)
+        body = (
+            f"<a href='/files/EFTA{page:08d}.pdf'>doc</a>"
+            "<nav aria-label='Pagination'><a href='?page=7'>Last</a></nav>"
+        ).encode()
+        with cls.lock:
+            cls.active -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_scrape_data_set_pages_in_order():
+    """Test that pages are fetched concurrently and documents keep page order."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PagedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        scraper_instance = scraper.DOJEpsteinScraper(download_files=False)
+        url = f"http://127.0.0.1:{server.server_address[1]}/data-set-1-files"
+        documents = scraper_instance.scrape_data_set(1, url)
+    finally:
+        config.RATE_LIMIT_DELAY = saved_delay
+        server.shutdown()
+
+    assert [doc["filename"] for doc in documents] == [f"EFTA{page:08d}.pdf" for page in range(8)]
+    assert _PagedHandler.peak > 1
+    print("✓ Pagination fetched concurrently, assembled in page order")
+
+
 if __name__ == "__main__":
     test_scraper_init()
     test_scraper_has_session_headers()
     test_scraper_directories_created()
     test_scraper_has_required_methods()
+    test_scrape_data_set_pages_in_order()
     print("\n✅ All scraper tests passed!")
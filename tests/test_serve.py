@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Tests for catalog API server module."""
+
+import asyncio
+import json
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import serve
+from catalog import Catalog
+
+
+def _tree(out):
+    """A small download tree: metadata.json, two files on disk, an archive listing and a PDF probe."""
+    metadata = {
+        'data_set_1': [
+            {'data_set': 1, 'filename': 'EFTA00000012.pdf', 'category': 'documents', 'file_size_bytes': 1000},
+            {'data_set': 1, 'filename': 'EFTA00000123.pdf', 'category': 'documents', 'file_size_bytes': 10},
+        ],
+        'data_set_2': [
+            {'data_set': 2, 'filename': 'EFTA00000012.mp4', 'category': 'videos', 'file_size_bytes': 5},
+        ],
+    }
+    (out / config.METADATA_FILE).write_text(json.dumps(metadata))
+    docs = out / 'data_set_1' / 'documents'
+    docs.mkdir(parents=True)
+    (docs / 'EFTA00000012.pdf').write_bytes(bytes(range(256)) * 4)
+    with Catalog(out) as catalog:
+        catalog.replace_archive_members('data_set_1/archives/a.zip', 1, [{'name': 'inner/EFTA9.pdf', 'size': 3}])
+        catalog.upsert_pdf_info([{'path': 'data_set_1/documents/EFTA00000012.pdf', 'data_set': 1, 'pages': 2}])
+
+
+class _Running:
+    """A CatalogServer on a free port, with its event loop on a background thread."""
+
+    def __init__(self, output_dir, cache_entries=config.SERVE_CACHE_ENTRIES):
+        self.server = serve.CatalogServer(output_dir, cache_entries=cache_entries)
+        self.server.import_metadata()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self.server.start('127.0.0.1', 0), self.loop).result()
+        self.base = f"http://127.0.0.1:{self.server.port}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.server.close()
+
+
+def test_parse_range_and_cache():
+    """Test Range header parsing and the catalog-versioned LRU."""
+    assert serve.parse_range('bytes=0-99', 1000) == (0, 100)
+    assert serve.parse_range('bytes=900-', 1000) == (900, 1000)
+    assert serve.parse_range('bytes=-100', 1000) == (900, 1000)
+    assert serve.parse_range('bytes=990-2000', 1000) == (990, 1000)
+    assert serve.parse_range('bytes=0-1,5-6', 1000) is None
+    assert serve.parse_range('items=0-1', 1000) is None
+    try:
+        serve.parse_range('bytes=1000-', 1000)
+        raise AssertionError("accepted a range past the end")
+    except serve.HttpError as e:
+        assert e.status == 416
+
+    cache = serve.ResponseCache(max_entries=2)
+    cache.get('a', 1)
+    cache.put('a', b'A')
+    cache.put('b', b'B')
+    assert cache.get('a', 1) == b'A'
+    cache.put('c', b'C')  # evicts b, the least recently used
+    assert cache.get('b', 1) is None and cache.get('c', 1) == b'C'
+    assert cache.get('a', 2) is None  # the catalog changed
+    print("✓ Range parsing and LRU invalidation")
+
+
+def test_api_endpoints():
+    """Test the JSON API: data sets, pages, detail, EFTA lookup and search."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        _tree(out)
+        with _Running(out) as running:
+            base = running.base
+            data_sets = requests.get(f"{base}/api/data-sets").json()
+            assert [d['data_set'] for d in data_sets] == [1, 2]
+            assert data_sets[0]['files'] == 2 and data_sets[0]['size_bytes'] == 1010
+
+            page = requests.get(f"{base}/api/data-sets/1/files?limit=1").json()
+            assert page['total'] == 2 and page['next_offset'] == 1
+            assert page['items'][0]['href'] == '/files/1/documents/EFTA00000012.pdf'
+            page = requests.get(f"{base}/api/data-sets/1/files?limit=1&offset=1").json()
+            assert page['items'][0]['filename'] == 'EFTA00000123.pdf' and page['next_offset'] is None
+
+            detail = requests.get(f"{base}/api/files/1/EFTA00000012.pdf").json()
+            assert detail['pdf']['pages'] == 2 and detail['media'] is None
+            assert requests.get(f"{base}/api/files/1/EFTA1.pdf").status_code == 404
+
+            lookup = requests.get(f"{base}/api/efta/12").json()
+            assert sorted(r['filename'] for r in lookup) == ['EFTA00000012.mp4', 'EFTA00000012.pdf']
+
+            assert requests.get(f"{base}/api/search?q=123").json()['items'][0]['filename'] == 'EFTA00000123.pdf'
+            members = requests.get(f"{base}/api/search?q=EFTA9&scope=members").json()
+            assert members['items'][0]['member'] == 'inner/EFTA9.pdf'
+            assert requests.get(f"{base}/api/search").status_code == 400
+            assert requests.get(f"{base}/api/data-sets/1/files?limit=x").status_code == 400
+            assert requests.post(f"{base}/api/data-sets").status_code == 405
+    print("✓ API endpoints answer from the catalog")
+
+
+def test_file_serving_with_ranges():
+    """Test whole files, ranges, HEAD, 416 and path checks."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        _tree(out)
+        data = (out / 'data_set_1/documents/EFTA00000012.pdf').read_bytes()
+        with _Running(out) as running, requests.Session() as session:
+            url = f"{running.base}/files/1/documents/EFTA00000012.pdf"
+            response = session.get(url)
+            assert response.content == data and response.headers['Content-Type'] == 'application/pdf'
+            response = session.get(url, headers={'Range': 'bytes=100-199'})
+            assert response.status_code == 206 and response.content == data[100:200]
+            assert response.headers['Content-Range'] == f'bytes 100-199/{len(data)}'
+            assert session.get(url, headers={'Range': 'bytes=-10'}).content == data[-10:]
+            response = session.get(url, headers={'Range': f'bytes={len(data)}-'})
+            assert response.status_code == 416 and response.headers['Content-Range'] == f'bytes */{len(data)}'
+            response = session.head(url)
+            assert response.headers['Content-Length'] == str(len(data)) and not response.content
+
+            for bad in ('/files/1/documents/..', '/files/1/secrets/EFTA00000012.pdf',
+                        '/files/1/documents/EFTA00000123.pdf', '/files/x/documents/a.pdf'):
+                assert session.get(running.base + bad).status_code == 404, bad
+    print("✓ Files served with Range support")
+
+
+def test_other_category_served_by_href():
+    """Test that a file in the catch-all 'other' category can be fetched from its href."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        _tree(out)
+        metadata = json.loads((out / config.METADATA_FILE).read_text())
+        metadata['data_set_1'].append(
+            {'data_set': 1, 'filename': 'EFTA00000001.xyz', 'category': 'other', 'file_size_bytes': 4}
+        )
+        (out / config.METADATA_FILE).write_text(json.dumps(metadata))
+        (out / 'data_set_1' / 'other').mkdir()
+        (out / 'data_set_1' / 'other' / 'EFTA00000001.xyz').write_bytes(b'data')
+
+        with _Running(out) as running, requests.Session() as session:
+            record = session.get(f"{running.base}/api/files/1/EFTA00000001.xyz").json()
+            assert record['href'] == '/files/1/other/EFTA00000001.xyz'
+            response = session.get(running.base + record['href'])
+            assert response.status_code == 200 and response.content == b'data'
+    print("✓ Files in the other category served")
+
+
+def test_many_concurrent_clients():
+    """Test that hundreds of simultaneous identical requests cost one catalog query."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        _tree(out)
+        with _Running(out) as running:
+            queries = []
+            file_summary = running.server.catalog.file_summary
+            running.server.catalog.file_summary = lambda: queries.append(1) or file_summary()
+            clients = [socket.create_connection(('127.0.0.1', running.server.port)) for _ in range(300)]
+            try:
+                for client in clients:
+                    client.sendall(b"GET /api/data-sets HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+                deadline = time.monotonic() + 10
+                for client in clients:
+                    client.settimeout(max(0.1, deadline - time.monotonic()))
+                    response = b''
+                    while True:
+                        chunk = client.recv(65536)
+                        if not chunk:
+                            break
+                        response += chunk
+                    assert response.startswith(b'HTTP/1.1 200 OK') and b'"data_set": 2' in response
+            finally:
+                for client in clients:
+                    client.close()
+            assert len(queries) == 1
+    print("✓ 300 concurrent clients served")
+
+
+if __name__ == "__main__":
+    test_parse_range_and_cache()
+    test_api_endpoints()
+    test_file_serving_with_ranges()
+    test_other_category_served_by_href()
+    test_many_concurrent_clients()
+    print("\n✅ All serve tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests for sharding module."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import sharding
+
+
+def _files(count):
+    """Build file_info dicts for EFTA00000001..count."""
+    return [
+        {'filename': f'EFTA{i:08d}.pdf', 'url': f'https://example.com/EFTA{i:08d}.pdf', 'data_set': 1}
+        for i in range(1, count + 1)
+    ]
+
+
+def test_parse_shard():
+    """Test shard spec parsing and validation."""
+    assert sharding.parse_shard("1/4") == (1, 4)
+    assert sharding.parse_shard(" 3 / 3 ") == (3, 3)
+    for bad in ("0/4", "5/4", "1/0", "abc", "1-4"):
+        try:
+            sharding.parse_shard(bad)
+            assert False, f"Expected ValueError for {bad}"
+        except ValueError:
+            pass
+    print("✓ Shard specs parsed and validated")
+
+
+def test_shards_partition_files():
+    """Test that shards are disjoint, complete and stable."""
+    files = _files(500)
+    shards = [sharding.filter_shard(files, (i, 4)) for i in range(1, 5)]
+
+    names = [f['filename'] for shard in shards for f in shard]
+    assert sorted(names) == sorted(f['filename'] for f in files)
+    assert len(set(names)) == len(names)
+    assert all(len(shard) > 75 for shard in shards)
+
+    # Same EFTA ID from a different URL lands in the same shard
+    moved = dict(files[0], url='https://mirror.example.org/x.pdf')
+    assert sharding.shard_of(moved, 4) == sharding.shard_of(files[0], 4)
+    print("✓ Shards partition files deterministically")
+
+
+def test_merge_manifests_detects_conflicts():
+    """Test merging shard manifests with a conflicting entry."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        first = Path(tmpdir) / 'metadata.shard-1-of-2.json'
+        second = Path(tmpdir) / 'metadata.shard-2-of-2.json'
+        first.write_text(json.dumps({'data_set_1': [
+            {'filename': 'EFTA00000001.pdf', 'url': 'https://a/1.pdf', 'file_size_bytes': 10},
+        ]}))
+        second.write_text(json.dumps({
+            'data_set_1': [
+                {'filename': 'EFTA00000001.pdf', 'url': 'https://a/1.pdf', 'file_size_bytes': 12},
+                {'filename': 'EFTA00000002.pdf', 'url': 'https://a/2.pdf'},
+            ],
+            'data_set_10': [{'filename': 'EFTA00000003.pdf', 'url': 'https://a/3.pdf'}],
+            'data_set_2': [{'filename': 'EFTA00000004.pdf', 'url': 'https://a/4.pdf'}],
+        }))
+
+        merged, conflicts = sharding.merge_manifests([first, second])
+        assert list(merged) == ['data_set_1', 'data_set_2', 'data_set_10']
+        assert len(merged['data_set_1']) == 2
+        assert len(conflicts) == 1
+        assert conflicts[0]['field'] == 'file_size_bytes'
+        assert conflicts[0]['kept'] == 10
+    print("✓ Manifest merge detects conflicts")
+
+
+def test_shard_metadata_name():
+    """Test per-shard metadata file naming."""
+    assert sharding.shard_metadata_name((2, 5)) == 'metadata.shard-2-of-5.json'
+    print("✓ Shard metadata names are distinct")
+
+
+if __name__ == "__main__":
+    test_parse_shard()
+    test_shards_partition_files()
+    test_merge_manifests_detects_conflicts()
+    test_shard_metadata_name()
+    print("\n✅ All sharding tests passed!")
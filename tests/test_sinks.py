@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Tests for storage sink module."""
+
+import csv
+import hashlib
+import sys
+import tarfile
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import csv_downloader
+import sinks
+
+
+class _FakeS3Handler(BaseHTTPRequestHandler):
+    """Minimal object store: PUT stores the body, HEAD reports whether a key exists."""
+
+    objects = {}
+    requests_seen = []
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        type(self).requests_seen.append(dict(self.headers))
+        type(self).objects[self.path] = body
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.send_response(200 if self.path in self.objects else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """Answer GET with the request path as the body (404 for /missing/...)."""
+
+    def do_GET(self):
+        if self.path.startswith('/missing/'):
+            self.send_error(404)
+            return
+        body = self.path.encode() * 100
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _file(filename, data_set=1, category='documents'):
+    return {'data_set': data_set, 'category': category, 'filename': filename, 'url': f'https://example/{filename}'}
+
+
+def _store(sink, file_info, data):
+    with sink.open(file_info, len(data)) as out:
+        out.write(data)
+
+
+def test_tar_shards_rotate_and_index():
+    """Test rotation, readable shards and index offsets."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sink = sinks.TarShardSink(Path(tmpdir), shard_size=3000)
+        long_name = 'EFTA' + '0' * 120 + '1.pdf'
+        payloads = {'EFTA1.pdf': b'a' * 1000, 'EFTA2.pdf': b'b' * 2500, long_name: b'c' * 10}
+        for name, data in payloads.items():
+            _store(sink, _file(name), data)
+        sink.close()
+
+        shards = sorted(Path(tmpdir).glob('*.tar'))
+        # EFTA2 would overflow the first shard, and fills the second one by itself
+        assert [p.name for p in shards] == ['shard-00000.tar', 'shard-00001.tar', 'shard-00002.tar']
+        stored = {}
+        for shard in shards:
+            with tarfile.open(shard) as tf:
+                for member in tf.getmembers():
+                    stored[member.name] = tf.extractfile(member).read()
+        assert stored == {f'data_set_1/documents/{n}': d for n, d in payloads.items()}
+
+        reopened = sinks.TarShardSink(Path(tmpdir))
+        assert reopened.exists(_file(long_name)) and not reopened.exists(_file('EFTA3.pdf'))
+        assert reopened.read('data_set_1/documents/EFTA2.pdf') == payloads['EFTA2.pdf']
+    print("✓ Tar shards rotate, stay valid and are readable through the index")
+
+
+def test_tar_abort_and_second_writer():
+    """Test that aborted members vanish and a second writer takes a new shard."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        first = sinks.TarShardSink(Path(tmpdir))
+        second = sinks.TarShardSink(Path(tmpdir))
+        _store(first, _file('EFTA1.pdf'), b'one')
+        try:
+            with first.open(_file('EFTA2.pdf')) as out:
+                out.write(b'partial')
+                raise IOError("connection dropped")
+        except IOError:
+            pass
+        _store(second, _file('EFTA3.pdf'), b'three')
+        first.close()
+        second.close()
+
+        assert not first.exists(_file('EFTA2.pdf'))
+        with tarfile.open(Path(tmpdir) / 'shard-00000.tar') as tf:
+            assert tf.getnames() == ['data_set_1/documents/EFTA1.pdf']
+        with tarfile.open(Path(tmpdir) / 'shard-00001.tar') as tf:
+            assert tf.getnames() == ['data_set_1/documents/EFTA3.pdf']
+    print("✓ Aborted members discarded; concurrent writers use separate shards")
+
+
+def test_s3_sink_against_stand_in():
+    """Test signed PUTs and HEAD existence checks against a local object store."""
+    server, base = _serve(_FakeS3Handler)
+    _FakeS3Handler.objects.clear()
+    _FakeS3Handler.requests_seen.clear()
+    try:
+        sink = sinks.S3Sink('corpus', 'mirror/', endpoint=base, access_key='AKIDEXAMPLE', secret_key='secret')
+        file_info = _file('EFTA 7.pdf')
+        assert not sink.exists(file_info)
+        _store(sink, file_info, b'%PDF-1.4 body')
+        sink.close()
+
+        assert _FakeS3Handler.objects == {'/corpus/mirror/data_set_1/documents/EFTA%207.pdf': b'%PDF-1.4 body'}
+        headers = _FakeS3Handler.requests_seen[0]
+        assert headers['x-amz-content-sha256'] == hashlib.sha256(b'%PDF-1.4 body').hexdigest()
+        assert headers['Authorization'].startswith('AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/')
+        assert sinks.S3Sink('corpus', 'mirror', endpoint=base).exists(file_info)
+    finally:
+        server.shutdown()
+    print("✓ S3 sink uploads signed objects to a local stand-in")
+
+
+def test_csv_downloader_with_tar_sink():
+    """Test that downloads go into shards and failures leave nothing behind."""
+    server, base = _serve(_EchoHandler)
+    old_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            csv_path = tmpdir / 'links.csv'
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['data_set', 'url', 'link_text'])
+                writer.writerow([1, f'{base}/a/EFTA00000001.pdf', 'EFTA00000001.pdf'])
+                writer.writerow([1, f'{base}/missing/EFTA00000002.pdf', 'EFTA00000002.pdf'])
+
+            downloader = csv_downloader.CSVDownloader(str(csv_path))
+            downloader.output_dir = tmpdir / 'out'
+            downloader.sink = sinks.sink_from_spec('tar', downloader.output_dir)
+            assert downloader.load_csv()
+            downloader.download_data_sets([1])
+            downloader.close_sink()
+            downloader.session.close()
+
+            assert not (tmpdir / 'out' / 'data_set_1' / 'documents').exists()
+            with tarfile.open(tmpdir / 'out' / config.TAR_SHARD_DIR / 'shard-00000.tar') as tf:
+                assert tf.getnames() == ['data_set_1/documents/EFTA00000001.pdf']
+                assert tf.extractfile(tf.getmembers()[0]).read() == b'/a/EFTA00000001.pdf' * 100
+            assert downloader.metadata['data_set_1'][0]['file_size_bytes'] == 1900
+    finally:
+        config.RATE_LIMIT_DELAY = old_delay
+        server.shutdown()
+    print("✓ CSV downloader writes into tar shards")
+
+
+if __name__ == "__main__":
+    test_tar_shards_rotate_and_index()
+    test_tar_abort_and_second_writer()
+    test_s3_sink_against_stand_in()
+    test_csv_downloader_with_tar_sink()
+    print("\n✅ All sink tests passed!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Tests for delta sync module."""
+
+import csv
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import csv_downloader
+import sync
+from catalog import Catalog
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """Answer GET with the request path as the body."""
+
+    def do_GET(self):
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _entry(data_set, filename, category='documents', url=None):
+    return {'data_set': data_set, 'filename': filename, 'category': category,
+            'file_type': Path(filename).suffix, 'url': url or f'https://example/{filename}'}
+
+
+def _touch(root, data_set, category, filename, content=b'old'):
+    path = Path(root) / f'data_set_{data_set}' / category / filename
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_scan_local_skips_partials_and_members():
+    """Test that only completed files directly in category folders are listed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _touch(tmpdir, 1, 'documents', 'EFTA2.pdf')
+        _touch(tmpdir, 1, 'images', 'EFTA1.jpg')
+        _touch(tmpdir, 1, 'documents', 'EFTA3.pdf.part')
+        _touch(tmpdir, 1, 'archives', 'EFTA4/inner.pdf')
+        _touch(tmpdir, 2, 'documents', 'EFTA9.pdf')
+        local = sync.scan_local(Path(tmpdir), [1, 3])
+    assert [(r['category'], r['filename']) for r in local] == [('images', 'EFTA1.jpg'), ('documents', 'EFTA2.pdf')]
+    print("✓ Local tree scanned without partials or extracted members")
+
+
+def test_plan_sync_classifies():
+    """Test new / changed / moved / unchanged / removed classification."""
+    listed = [
+        _entry(1, 'EFTA5.pdf'),                                     # new
+        _entry(1, 'EFTA1.pdf', url='https://example/v2/EFTA1.pdf'),  # changed
+        _entry(1, 'EFTA2.rtf', category='other'),                   # moved
+        _entry(1, 'EFTA3.pdf'),                                     # unchanged
+    ]
+    local = sorted([
+        {'data_set': 1, 'category': 'documents', 'filename': 'EFTA1.pdf', 'path': Path('a')},
+        {'data_set': 1, 'category': 'documents', 'filename': 'EFTA2.rtf', 'path': Path('b')},
+        {'data_set': 1, 'category': 'documents', 'filename': 'EFTA3.pdf', 'path': Path('c')},
+        {'data_set': 1, 'category': 'documents', 'filename': 'EFTA4.pdf', 'path': Path('d')},
+    ], key=lambda r: (r['data_set'], r['filename']))
+    catalog_rows = [_entry(1, 'EFTA1.pdf'), _entry(1, 'EFTA3.pdf'), _entry(1, 'EFTA8.pdf')]
+
+    plan = sync.plan_sync(listed, local, catalog_rows)
+    assert [f['filename'] for f in plan.new] == ['EFTA5.pdf']
+    assert [(l['filename'], p['path']) for l, p in plan.changed] == [('EFTA1.pdf', Path('a'))]
+    assert [(l['category'], p['category']) for l, p in plan.moved] == [('other', 'documents')]
+    assert [f['filename'] for f in plan.unchanged] == ['EFTA3.pdf']
+    assert [r['filename'] for r in plan.removed] == ['EFTA4.pdf', 'EFTA8.pdf']
+    assert [f['filename'] for f in plan.to_download] == ['EFTA5.pdf', 'EFTA1.pdf']
+    assert 'No longer listed: 2' in plan.report()
+    print("✓ Sync plan classifies every file in one merge")
+
+
+def test_csv_downloader_sync():
+    """Test that a sync downloads only new/changed files and quarantines removed ones."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    old_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            out = tmpdir / 'out'
+            with Catalog(out) as catalog:
+                catalog.upsert_files([_entry(1, 'EFTA00000001.pdf', url=f'{base}/v1/EFTA00000001.pdf'),
+                                      _entry(1, 'EFTA00000002.pdf', url=f'{base}/v1/EFTA00000002.pdf')])
+            _touch(out, 1, 'documents', 'EFTA00000001.pdf')
+            kept = _touch(out, 1, 'documents', 'EFTA00000002.pdf')
+            gone = _touch(out, 1, 'documents', 'EFTA00000003.pdf')
+
+            csv_path = tmpdir / 'links.csv'
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['data_set', 'url', 'link_text'])
+                writer.writerow([1, f'{base}/v2/EFTA00000001.pdf', 'EFTA00000001.pdf'])
+                writer.writerow([1, f'{base}/v1/EFTA00000002.pdf', 'EFTA00000002.pdf'])
+                writer.writerow([1, f'{base}/v1/EFTA00000004.pdf', 'EFTA00000004.pdf'])
+
+            downloader = csv_downloader.CSVDownloader(str(csv_path))
+            downloader.output_dir = out
+            assert downloader.load_csv()
+            plan = downloader.sync([1], quarantine_removed=True)
+
+            assert len(plan.new) == 1 and len(plan.changed) == 1 and len(plan.removed) == 1
+            docs = out / 'data_set_1' / 'documents'
+            assert (docs / 'EFTA00000001.pdf').read_bytes() == b'/v2/EFTA00000001.pdf'
+            assert (docs / 'EFTA00000004.pdf').read_bytes() == b'/v1/EFTA00000004.pdf'
+            assert kept.read_bytes() == b'old' and not gone.exists()
+            quarantined = list((out / config.QUARANTINE_DIR).rglob('*.pdf*'))
+            assert sorted(p.name for p in quarantined) == ['EFTA00000001.pdf', 'EFTA00000003.pdf']
+
+            rows = {r['filename']: r['url'] for r in downloader.catalog.files(1)}
+            assert rows == {
+                'EFTA00000001.pdf': f'{base}/v2/EFTA00000001.pdf',
+                'EFTA00000002.pdf': f'{base}/v1/EFTA00000002.pdf',
+                'EFTA00000004.pdf': f'{base}/v1/EFTA00000004.pdf',
+            }
+            downloader.catalog.close()
+            downloader.session.close()
+    finally:
+        config.RATE_LIMIT_DELAY = old_delay
+        server.shutdown()
+    print("✓ Sync fetched only new and changed files")
+
+
+if __name__ == "__main__":
+    test_scan_local_skips_partials_and_members()
+    test_plan_sync_classifies()
+    test_csv_downloader_sync()
+    print("\n✅ All sync tests passed!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Tests for bandwidth throttle module."""
+
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import throttle
+
+
+def test_parse_size():
+    """Test human size parsing."""
+    assert throttle.parse_size("512") == 512
+    assert throttle.parse_size("20M") == 20 * 1024 * 1024
+    assert throttle.parse_size("1.5G") == int(1.5 * 1024 ** 3)
+    assert throttle.parse_size("500kB/s") == 500 * 1024
+    try:
+        throttle.parse_size("fast")
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    print("✓ Sizes parsed correctly")
+
+
+def test_token_bucket_limits_shared_rate():
+    """Test that concurrent consumers share one cap."""
+    bucket = throttle.TokenBucket(rate=200_000, capacity=10_000)
+    bucket._tokens = 0
+
+    def worker():
+        for _ in range(10):
+            bucket.consume(5_000)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    # 200 KB across all threads at 200 KB/s takes about a second
+    assert 0.8 < elapsed < 1.6, elapsed
+    print("✓ Token bucket enforces a shared rate")
+
+
+def test_schedule_windows():
+    """Test time-of-day caps, including windows wrapping past midnight."""
+    schedule = throttle.BandwidthSchedule.parse("22:00-06:00=100M, 09:00-17:00=5M")
+    assert schedule.rate_at(datetime(2026, 1, 1, 23, 30), 1) == 100 * 1024 ** 2
+    assert schedule.rate_at(datetime(2026, 1, 1, 3, 0), 1) == 100 * 1024 ** 2
+    assert schedule.rate_at(datetime(2026, 1, 1, 12, 0), 1) == 5 * 1024 ** 2
+    assert schedule.rate_at(datetime(2026, 1, 1, 7, 0), 1) == 1
+    print("✓ Bandwidth schedule windows resolve correctly")
+
+
+def test_limiter_reports_against_cap():
+    """Test achieved-rate reporting."""
+    limiter = throttle.bandwidth_limiter_from_args("1M", None)
+    limiter.consume(1024)
+    report = limiter.report()
+    assert "cap 1.0 MB/s" in report
+    assert throttle.bandwidth_limiter_from_args(None, None) is None
+    print("✓ Limiter reports achieved rate against cap")
+
+
+if __name__ == "__main__":
+    test_parse_size()
+    test_token_bucket_limits_shared_rate()
+    test_schedule_windows()
+    test_limiter_reports_against_cap()
+    print("\n✅ All throttle tests passed!")
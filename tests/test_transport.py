@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Tests for HTTP transport module."""
+
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+import urllib3
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import transport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serve /flaky (503 twice, then 200), /missing (404), /echo-agent and 64 KB of data."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    hits = {}
+    connections = set()
+
+    def _reply(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Retry-After", "0")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        type(self).connections.add(self.client_address)
+        hits = type(self).hits
+        hits[self.path] = hits.get(self.path, 0) + 1
+        if self.path == "/flaky" and hits[self.path] <= 2:
+            self._reply(503)
+        elif self.path == "/missing":
+            self._reply(404)
+        elif self.path == "/echo-agent":
+            self._reply(200, self.headers.get("User-Agent", "").encode())
+        else:
+            self._reply(200, b"d" * 65536)
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    handler = type("Handler", (_Handler,), {"hits": {}, "connections": set()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_retries_with_hook():
+    """Test that 503s are retried in the transport and reported to the hook (both backends)."""
+    saved_delay = config.RETRY_DELAY
+    config.RETRY_DELAY = 0
+    try:
+        for backend in ("requests", "urllib3"):
+            server, base = _serve()
+            retries = []
+            try:
+                with transport.create_transport(
+                    backend=backend, on_retry=lambda *a: retries.append(a)
+                ) as session:
+                    response = session.get(f"{base}/flaky")
+                    response.raise_for_status()
+                    assert response.status_code == 200
+                    assert [attempt for _, _, _, attempt in retries] == [1, 2]
+                    assert "503" in str(retries[0][2])
+                    assert transport.retries_made(response) == 2
+                    assert transport.retries_made(session.get(f"{base}/missing")) == 0  # 404 is not retried
+                    assert transport.retries_made(None) == 0
+            finally:
+                server.shutdown()
+    finally:
+        config.RETRY_DELAY = saved_delay
+    print("✓ Transient errors retried with hook")
+
+
+def test_errors_surface_as_requests_exceptions():
+    """Test raise_for_status and connection errors on the urllib3 backend."""
+    server, base = _serve()
+    session = transport.create_transport(backend="urllib3", retries=0)
+    try:
+        try:
+            session.get(f"{base}/missing").raise_for_status()
+            assert False, "Expected HTTPError"
+        except requests.exceptions.HTTPError as e:
+            assert e.response.status_code == 404
+    finally:
+        server.shutdown()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    try:
+        session.get(f"http://127.0.0.1:{closed_port}/")
+        assert False, "Expected ConnectionError"
+    except requests.exceptions.RequestException:
+        pass
+    session.close()
+
+    try:
+        transport.create_transport(backend="carrier-pigeon")
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    print("✓ Errors surface as requests exceptions")
+
+
+def test_keep_alive_and_headers():
+    """Test that default headers are sent and connections are reused."""
+    for backend in ("requests", "urllib3"):
+        server, base = _serve()
+        try:
+            with transport.create_transport(headers={"User-Agent": "fisher-test"}, backend=backend) as session:
+                assert session.headers["User-Agent"] == "fisher-test"
+                assert session.get(f"{base}/echo-agent").text == "fisher-test"
+                for _ in range(5):
+                    response = session.get(f"{base}/data", stream=True)
+                    assert sum(len(c) for c in response.iter_content(8192)) == 65536
+                assert len(server.RequestHandlerClass.connections) == 1
+        finally:
+            server.shutdown()
+    print("✓ Headers sent and connections kept alive")
+
+
+def test_custom_backend_registration():
+    """Test that a new backend can be plugged in by name."""
+    created = {}
+
+    def factory(**kwargs):
+        created.update(kwargs)
+        return transport.RequestsTransport(**kwargs)
+
+    transport.register_backend("test-backend", factory)
+    try:
+        session = transport.create_transport(headers={"X-Test": "1"}, backend="test-backend", pool_size=4)
+        assert isinstance(session, transport.Transport)
+        assert created["pool_size"] == 4
+        session.close()
+    finally:
+        del transport.BACKENDS["test-backend"]
+    print("✓ Custom backend registered")
+
+
+def test_backoff_schedule():
+    """Test the documented backoff: RETRY_DELAY / 2, doubling, with a wait before the first retry."""
+    retry = transport.make_retry(retries=3)
+    assert retry.get_backoff_time() == 0
+    delays = []
+    for _ in range(3):
+        retry = retry.increment("GET", "/x", error=urllib3.exceptions.ConnectTimeoutError())
+        delays.append(retry.get_backoff_time())
+    assert delays == [config.RETRY_DELAY / 2, config.RETRY_DELAY, config.RETRY_DELAY * 2]
+    print("✓ Backoff schedule matches the documented delays")
+
+
+if __name__ == "__main__":
+    test_retries_with_hook()
+    test_errors_surface_as_requests_exceptions()
+    test_keep_alive_and_headers()
+    test_custom_backend_registration()
+    test_backoff_schedule()
+    print("\n✅ All transport tests passed!")
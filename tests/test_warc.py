@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Tests for WARC record/replay module."""
+
+import gzip
+import hashlib
+import sys
+import tempfile
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import warc
+from scraper import DOJEpsteinScraper
+from transport import create_transport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serve a small HTML page at any path, 200 KB of bytes under /files/, and redirects from /moved/."""
+
+    def do_GET(self):
+        if self.path.startswith("/moved/"):
+            self.send_response(302)
+            self.send_header("Location", "/" + self.path[len("/moved/"):])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/files/"):
+            body = bytes(range(256)) * 800
+            content_type = "application/pdf"
+        else:
+            body = f"<html><a href='/files/EFTA00000001.pdf'>{self.path}</a></html>".encode()
+            content_type = "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_record_and_replay_roundtrip():
+    """Test that recorded pages and streamed files replay byte for byte."""
+    server, base = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            writer = warc.WarcWriter(Path(tmpdir))
+            with warc.RecordingTransport(create_transport(), writer, include_streams=True) as session:
+                page = session.get(f"{base}/page?page=1")
+                streamed = session.get(f"{base}/files/EFTA00000001.pdf", stream=True)
+                file_bytes = b"".join(streamed.iter_content(8192))
+            assert writer.records_written == 3  # warcinfo + 2 responses
+
+            replay = warc.ReplayTransport(warc.WarcArchive([Path(tmpdir)]))
+            replayed = replay.get(f"{base}/page?page=1")
+            assert replayed.status_code == 200
+            assert replayed.text == page.text
+            assert replayed.headers["Content-Type"] == "text/html; charset=utf-8"
+            assert b"".join(replay.get(f"{base}/files/EFTA00000001.pdf").iter_content(1000)) == file_bytes
+            assert replay.head(f"{base}/files/EFTA00000001.pdf").headers["Content-Length"] == str(len(file_bytes))
+            try:
+                replay.get(f"{base}/never-fetched")
+                assert False, "Expected ConnectionError"
+            except requests.exceptions.ConnectionError:
+                pass
+    finally:
+        server.shutdown()
+    print("✓ Recorded responses replay identically")
+
+
+def test_gzip_members_and_rotation():
+    """Test that files rotate and every file is plain multi-member gzip WARC."""
+    server, base = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            writer = warc.WarcWriter(Path(tmpdir), max_size=1)
+            with warc.RecordingTransport(create_transport(), writer) as session:
+                for page in range(3):
+                    session.get(f"{base}/list?page={page}")
+                # Streamed bodies are not recorded without include_streams
+                session.get(f"{base}/files/EFTA00000002.pdf", stream=True).close()
+
+            files = sorted(Path(tmpdir).glob("*.warc.gz"))
+            assert len(files) == 3
+            for path in files:
+                text = gzip.open(path).read().decode("latin-1")
+                assert text.startswith("WARC/1.1") and "WARC-Type: warcinfo" in text
+                assert text.count("WARC-Type: response") == 1
+            assert len(warc.WarcArchive(files)) == 3
+    finally:
+        server.shutdown()
+    print("✓ WARC files rotate and stay standard gzip")
+
+
+def test_scraper_replays_without_network():
+    """Test the scraper's --record/--replay plumbing end to end."""
+    server, base = _serve()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        saved_delay = config.RATE_LIMIT_DELAY
+        config.RATE_LIMIT_DELAY = 0
+        try:
+            recorder = DOJEpsteinScraper(download_files=False)
+            recorder.output_dir = Path(tmpdir)
+            recorder.start_recording()
+            live = recorder._make_request(f"{base}/data-set-1-files")
+            recorder.session.close()
+        finally:
+            config.RATE_LIMIT_DELAY = saved_delay
+            server.shutdown()
+
+        replayer = DOJEpsteinScraper(download_files=False)
+        replayer.start_replay([Path(tmpdir) / config.WARC_DIR])
+        assert replayer.request_pacing.rate is None
+        assert replayer._make_request(f"{base}/data-set-1-files").text == live.text
+        assert replayer._make_request(f"{base}/other") is None
+    print("✓ Scraper replays a recorded crawl")
+
+
+class _BigResponse:
+    """Just enough of a response for WarcWriter.write_response."""
+
+    status_code = 200
+    reason = "OK"
+    headers = {"Content-Type": "video/mp4"}
+    url = "https://example.test/files/big.mp4"
+
+
+def test_redirects_and_streaming_index():
+    """Test replay of redirected requests and indexing without loading record bodies."""
+    server, base = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            writer = warc.WarcWriter(Path(tmpdir))
+            with warc.RecordingTransport(create_transport(), writer) as session:
+                live = session.get(f"{base}/moved/page?page=2")
+                assert live.url == f"{base}/page?page=2"
+
+            replay = warc.ReplayTransport(warc.WarcArchive([Path(tmpdir)]))
+            replayed = replay.get(f"{base}/moved/page?page=2")  # as requested
+            assert replayed.text == live.text and replayed.url == live.url
+            assert replay.get(f"{base}/page?page=2").text == live.text  # and by the final URL
+    finally:
+        server.shutdown()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        size = 64 * 1024 * 1024
+        writer = warc.WarcWriter(Path(tmpdir))
+        with tempfile.TemporaryFile() as payload:
+            payload.truncate(size)
+            writer.write_response(_BigResponse(), payload, size, hashlib.sha1())
+        writer.close()
+
+        tracemalloc.start()
+        try:
+            archive = warc.WarcArchive([Path(tmpdir)])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert _BigResponse.url in archive
+        assert peak < 8 * 1024 * 1024, peak
+    print("✓ Redirected requests replay; indexing streams past bodies")
+
+
+if __name__ == "__main__":
+    test_record_and_replay_roundtrip()
+    test_gzip_members_and_rotation()
+    test_scraper_replays_without_network()
+    test_redirects_and_streaming_index()
+    print("\n✅ All WARC tests passed!")
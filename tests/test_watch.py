@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Tests for portal watch mode module."""
+
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import scraper
+import watch
+
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    """Main page plus single-page data set listings taken from `listings`."""
+
+    listings = {}
+    requested = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requested.append(self.path)
+        base = f"http://{self.headers['Host']}"
+        if self.path == '/main':
+            body = ''.join(f"<a href='{base}/data-set-{n}-files'>Set {n}</a>" for n in sorted(cls.listings))
+        else:
+            data_set = int(self.path.split('-')[2])
+            body = ''.join(f"<a href='/files/{name}'>{name}</a>" for name in cls.listings[data_set])
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_link_fingerprint():
+    """Test that fingerprints ignore order, duplicates and URL spelling."""
+    a = watch.link_fingerprint(['https://www.justice.gov/f/EFTA1.pdf', '/f/EFTA2.pdf'])
+    b = watch.link_fingerprint(['/f/EFTA2.pdf', 'HTTPS://WWW.JUSTICE.GOV/f/EFTA1.pdf#p=1', '/f/EFTA2.pdf'])
+    assert a == b
+    assert a != watch.link_fingerprint(['/f/EFTA1.pdf', '/f/EFTA3.pdf'])
+    print("✓ Link-set fingerprints are order and spelling insensitive")
+
+
+def test_check_once_fetches_only_changed():
+    """Test that unchanged data sets cost one request and changed ones are re-scraped."""
+    handler = type('Handler', (_PortalHandler,), {
+        'listings': {1: ['EFTA00000001.pdf'], 13: ['EFTA00000100.pdf']},
+        'requested': [],
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = config.RATE_LIMIT_DELAY, config.MAIN_PAGE_URL
+    config.RATE_LIMIT_DELAY = 0
+    config.MAIN_PAGE_URL = f"http://127.0.0.1:{server.server_address[1]}/main"
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scraper_instance = scraper.DOJEpsteinScraper(download_files=False)
+            scraper_instance.output_dir = Path(tmpdir)
+            watcher = watch.PortalWatcher(scraper_instance)
+
+            # First check: no baseline, everything (including set 13) is fetched
+            assert watcher.check_once() == [1, 13]
+            docs = scraper_instance.metadata['data_set_13']
+            assert [d['filename'] for d in docs] == ['EFTA00000100.pdf']
+
+            # Nothing changed: main page plus one listing page per data set
+            handler.requested.clear()
+            assert watcher.check_once() == []
+            assert len(handler.requested) == 3
+
+            # A new document in set 13 only; state survives a restart
+            handler.listings[13].append('EFTA00000101.pdf')
+            restarted = watch.PortalWatcher(scraper_instance)
+            assert restarted.check_once() == [13]
+            assert len(scraper_instance.metadata['data_set_13']) == 2
+            assert (Path(tmpdir) / config.METADATA_FILE).exists()
+    finally:
+        config.RATE_LIMIT_DELAY, config.MAIN_PAGE_URL = saved
+        server.shutdown()
+    print("✓ Only changed data sets fetched")
+
+
+def test_watch_limited_to_selected_data_sets():
+    """Test that data sets outside the selection are not checked."""
+    handler = type('Handler', (_PortalHandler,), {
+        'listings': {1: ['EFTA00000001.pdf'], 2: ['EFTA00000002.pdf']},
+        'requested': [],
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = config.RATE_LIMIT_DELAY, config.MAIN_PAGE_URL
+    config.RATE_LIMIT_DELAY = 0
+    config.MAIN_PAGE_URL = f"http://127.0.0.1:{server.server_address[1]}/main"
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scraper_instance = scraper.DOJEpsteinScraper(download_files=False)
+            scraper_instance.output_dir = Path(tmpdir)
+            watcher = watch.PortalWatcher(scraper_instance, data_sets=[2])
+            watcher.run(interval=0, max_checks=2)
+            assert '/data-set-1-files' not in handler.requested
+            # Fingerprint + scrape on the first check, fingerprint only on the second
+            assert handler.requested.count('/data-set-2-files') == 3
+    finally:
+        config.RATE_LIMIT_DELAY, config.MAIN_PAGE_URL = saved
+        server.shutdown()
+    print("✓ Watch restricted to selected data sets")
+
+
+if __name__ == "__main__":
+    test_link_fingerprint()
+    test_check_once_fetches_only_changed()
+    test_watch_limited_to_selected_data_sets()
+    print("\n✅ All watch tests passed!")
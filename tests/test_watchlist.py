@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Tests for watchlist scanning module."""
+
+import csv
+import io
+import sys
+import tempfile
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import csv_downloader
+import watchlist
+from catalog import Catalog
+
+
+def _pdf(pages):
+    """A PDF with one Helvetica text line per page."""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        content = b'BT /F1 10 Tf 72 700 Td (' + text.encode('latin-1') + b') Tj ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>' % len(objects))
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = (b'<< /Type /Pages /Kids [' + b' '.join(kids) + b'] /Count %d ' % len(kids)
+                  + b'/Resources << /Font << /F1 3 0 R >> >> >>')
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % num + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _docx(paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{p}</w:t></w:r></w:p>' for p in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr('word/document.xml', f'<?xml version="1.0"?><w:document><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def _hits(catalog, term=None):
+    return [(r['term'], r['path'].rsplit('/', 1)[-1], r['page'], r['offset']) for r in catalog.watchlist_hits(term)]
+
+
+def test_automaton_matching():
+    """Test overlapping terms, whole-word matching, case/whitespace folding and offsets."""
+    automaton = watchlist.Automaton(['John Smith', 'smith', 'SMITH', '(212) 555-0100', 'he', 'she', 'hers'])
+    assert len(automaton) == 6  # 'SMITH' normalizes to the same key as 'smith'
+    text = 'Call John\n\t SMITH at (212) 555-0100; she sees ushers.'
+    assert automaton.find(text) == [('John Smith', 5), ('smith', 12), ('(212) 555-0100', 21), ('she', 37)]
+    assert text[12:17] == 'SMITH' and text[21:35] == '(212) 555-0100'
+    assert watchlist.Automaton([]).find(text) == []
+    print("✓ Aho-Corasick matches whole words in one pass")
+
+
+def test_scan_index_is_incremental():
+    """Test the index across PDFs, text and docx files, and incremental rescans."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        docs = out / 'data_set_3' / 'documents'
+        docs.mkdir(parents=True)
+        (docs / 'EFTA00000001.pdf').write_bytes(_pdf(['Nothing here', 'Flight with Jane Doe']))
+        (docs / 'EFTA00000002.txt').write_text('page one\fJANE  DOE called 555-0100')
+        (docs / 'EFTA00000003.docx').write_bytes(_docx(['Memo', 'cc: Jane Doe &amp; staff']))
+        (docs / 'EFTA00000004.jpg').write_bytes(b'\xff\xd8')
+
+        scanner = watchlist.WatchlistScanner(['Jane Doe', '555-0100'], out, workers=1)
+        assert len(scanner.scan()) == 3
+        scanner.close()
+        with Catalog(out) as catalog:
+            assert _hits(catalog) == [
+                ('555-0100', 'EFTA00000002.txt', 2, 17),
+                ('Jane Doe', 'EFTA00000001.pdf', 2, 13),
+                ('Jane Doe', 'EFTA00000002.txt', 2, 0),
+                ('Jane Doe', 'EFTA00000003.docx', 1, 9),
+            ]
+            assert catalog.watchlist_hits()[0]['data_set'] == 3
+
+        # Nothing changed: nothing is read
+        scanner = watchlist.WatchlistScanner(['Jane Doe', '555-0100'], out, workers=1)
+        assert scanner.scan() == {}
+        scanner.close()
+
+        # A term added and one removed: unchanged files are searched for the new term only
+        (docs / 'EFTA00000002.txt').write_text('Memo for Jane Doe')
+        scanner = watchlist.WatchlistScanner(['Jane Doe', 'memo'], out, workers=1)
+        assert scanner.added == ['memo'] and scanner.removed == ['555-0100']
+        assert len(scanner.scan()) == 3
+        scanner.close()
+        with Catalog(out) as catalog:
+            assert _hits(catalog) == [
+                ('Jane Doe', 'EFTA00000001.pdf', 2, 13),
+                ('Jane Doe', 'EFTA00000002.txt', 1, 9),
+                ('Jane Doe', 'EFTA00000003.docx', 1, 9),
+                ('memo', 'EFTA00000002.txt', 1, 0),
+                ('memo', 'EFTA00000003.docx', 1, 0),
+            ]
+            assert catalog.watchlist_terms() == {'Jane Doe', 'memo'}
+    print("✓ Watchlist index built and updated incrementally")
+
+
+class _TextHandler(BaseHTTPRequestHandler):
+    """Serve a small text document for any path."""
+
+    def do_GET(self):
+        body = b'Meeting notes: Jane Doe, 2005'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_downloader_scans_new_documents():
+    """Test that --watchlist scans documents as the CSV downloader finishes them."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _TextHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    old_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            csv_path = tmpdir / 'links.csv'
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['data_set', 'url', 'link_text'])
+                writer.writerow([5, f'{base}/EFTA00000010.txt', 'EFTA00000010.txt'])
+                writer.writerow([5, f'{base}/EFTA00000011.mp4', 'EFTA00000011.mp4'])
+
+            downloader = csv_downloader.CSVDownloader(str(csv_path))
+            downloader.output_dir = tmpdir / 'out'
+            downloader.watchlist = watchlist.WatchlistScanner(['jane doe'], downloader.output_dir, workers=1)
+            assert downloader.load_csv()
+            downloader.download_data_sets([5])
+            downloader.close_watchlist()
+            downloader.session.close()
+            downloader.failover_session.close()
+
+            assert downloader.watchlist.scanned == 1
+            with Catalog(tmpdir / 'out') as catalog:
+                assert _hits(catalog) == [('jane doe', 'EFTA00000010.txt', 1, 15)]
+    finally:
+        config.RATE_LIMIT_DELAY = old_delay
+        server.shutdown()
+    print("✓ Downloaded documents scanned as they finish")
+
+
+if __name__ == "__main__":
+    test_automaton_matching()
+    test_scan_index_is_incremental()
+    test_downloader_scans_new_documents()
+    print("\n✅ All watchlist tests passed!")
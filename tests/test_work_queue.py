@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Tests for shared work queue module."""
+
+import csv
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import config
+import csv_downloader
+import work_queue
+from layout import StorageLayout
+from sinks import LocalSink
+
+
+def _files(count):
+    """Build file_info dicts for data set 1."""
+    return [
+        {'filename': f'EFTA{i:08d}.pdf', 'url': f'https://example.com/{i}.pdf', 'data_set': 1}
+        for i in range(1, count + 1)
+    ]
+
+
+def test_workers_claim_distinct_files():
+    """Test that two workers never claim the same file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = Path(tmpdir) / 'queue.db'
+        with work_queue.WorkQueue(db, worker_id='a') as a, work_queue.WorkQueue(db, worker_id='b') as b:
+            assert a.enqueue(_files(5)) == 5
+            assert b.enqueue(_files(5)) == 0  # already queued by a
+
+            claimed = []
+            while True:
+                job_a, job_b = a.claim(), b.claim()
+                if job_a is None and job_b is None:
+                    break
+                for queue, job in ((a, job_a), (b, job_b)):
+                    if job is not None:
+                        claimed.append(job['filename'])
+                        queue.complete(job)
+
+            assert sorted(claimed) == [f['filename'] for f in _files(5)]
+            assert a.counts() == {'done': 5}
+    print("✓ Workers claim distinct files")
+
+
+def test_expired_lease_is_reclaimed():
+    """Test that a crashed worker's file is handed to another worker."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = Path(tmpdir) / 'queue.db'
+        crashed = work_queue.WorkQueue(db, worker_id='crashed', lease_seconds=0.05)
+        crashed.enqueue(_files(1))
+        assert crashed.claim() is not None
+
+        with work_queue.WorkQueue(db, worker_id='survivor') as survivor:
+            assert survivor.claim() is None  # lease still valid
+            time.sleep(0.1)
+            job = survivor.claim()
+            assert job is not None
+            assert crashed.renew(work_queue.job_key(job)) is False
+        crashed._conn.close()
+    print("✓ Expired leases are reclaimed")
+
+
+def test_release_marks_failed_after_max_attempts():
+    """Test that repeatedly failing files end up failed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with work_queue.WorkQueue(Path(tmpdir) / 'queue.db', max_attempts=2) as queue:
+            queue.enqueue(_files(1))
+            queue.release(queue.claim())
+            assert queue.counts() == {'pending': 1}
+            queue.release(queue.claim())
+            assert queue.counts() == {'failed': 1}
+            assert queue.claim() is None
+    print("✓ Files fail after max attempts")
+
+
+def test_expired_last_attempt_marked_failed():
+    """Test that a file whose worker crashed on its last attempt ends up failed, not leased."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = Path(tmpdir) / 'queue.db'
+        crashed = work_queue.WorkQueue(db, worker_id='crashed', lease_seconds=0.05, max_attempts=1)
+        crashed.enqueue(_files(1))
+        assert crashed.claim() is not None
+
+        with work_queue.WorkQueue(db, worker_id='survivor', max_attempts=1) as survivor:
+            assert survivor.claim() is None
+            assert survivor.counts() == {'leased': 1}  # lease still valid
+            time.sleep(0.1)
+            assert survivor.claim() is None
+            assert survivor.counts() == {'failed': 1}
+        crashed._conn.close()
+    print("✓ Expired leases on the last attempt are marked failed")
+
+
+def test_heartbeat_notices_lost_lease():
+    """Test that a stalled worker learns its lease was taken over and cannot complete the file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = Path(tmpdir) / 'queue.db'
+        with work_queue.WorkQueue(db, worker_id='stalled', lease_seconds=0.05) as stalled, \
+                work_queue.WorkQueue(db, worker_id='other') as other:
+            stalled.enqueue(_files(1))
+            job = stalled.claim()
+            key = work_queue.job_key(job)
+            time.sleep(0.1)
+            assert other.claim() is not None
+
+            stalled.start_heartbeat()
+            time.sleep(0.1)
+            assert stalled.lost(key) and not other.lost(key)
+            assert stalled.complete(job) is False
+            assert other.complete(job) is True
+            assert other.counts() == {'done': 1}
+    print("✓ Lost leases noticed by the heartbeat")
+
+
+def test_workers_write_separate_part_files():
+    """Test that tagged local writers for the same file never share a .part file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        layout = StorageLayout.load(Path(tmpdir))
+        file_info = {'data_set': 1, 'category': 'documents', 'filename': 'EFTA00000001.pdf'}
+        first = LocalSink(layout, part_tag='host:1:aa').open(file_info)
+        second = LocalSink(layout, part_tag='host:2:bb').open(file_info)
+        assert first.part_path != second.part_path
+        assert first.part_path.name == 'EFTA00000001.pdf.host_1_aa.part'
+        first.write(b'first')
+        second.write(b'second')
+        second.abort()
+        first.commit()
+        assert layout.locate(1, 'documents', 'EFTA00000001.pdf').read_bytes() == b'first'
+    print("✓ Workers write separate .part files")
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Send 20 chunks of 1 KB, 50 ms apart."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(20 * 1024))
+        self.end_headers()
+        try:
+            for _ in range(20):
+                self.wfile.write(b'x' * 1024)
+                self.wfile.flush()
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_downloader_aborts_when_lease_taken_over():
+    """Test that a transfer stops, leaving nothing behind, once another worker owns the file."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    old_delay = config.RATE_LIMIT_DELAY
+    config.RATE_LIMIT_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            csv_path = tmpdir / 'links.csv'
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['data_set', 'url', 'link_text'])
+                writer.writerow([1, f'{base}/EFTA00000001.pdf', 'EFTA00000001.pdf'])
+
+            downloader = csv_downloader.CSVDownloader(str(csv_path))
+            downloader.output_dir = tmpdir / 'out'
+            downloader.use_queue = True
+            downloader.queue = work_queue.WorkQueue(downloader.output_dir / config.QUEUE_FILE,
+                                                    worker_id='slow', lease_seconds=0.15)
+            downloader.queue.start_heartbeat()
+            assert downloader.load_csv()
+
+            def take_over():
+                # Another worker reclaims the file while the transfer is still running
+                time.sleep(0.3)
+                conn = sqlite3.connect(str(downloader.queue.path), timeout=30)
+                conn.execute("UPDATE jobs SET owner = 'other'")
+                conn.commit()
+                conn.close()
+
+            thief = threading.Thread(target=take_over)
+            thief.start()
+            downloader.download_data_sets([1])
+            thief.join()
+            counts = downloader.queue.counts()
+            downloader.close_queue()
+            downloader.session.close()
+            downloader.failover_session.close()
+
+            documents = tmpdir / 'out' / 'data_set_1' / 'documents'
+            assert list(documents.iterdir()) == []  # no file, no .part left behind
+            assert counts == {'leased': 1}  # still the other worker's
+    finally:
+        config.RATE_LIMIT_DELAY = old_delay
+        server.shutdown()
+    print("✓ Transfers abort when their lease is taken over")
+
+
+def test_close_returns_held_leases():
+    """Test that a clean shutdown hands unfinished files back."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = Path(tmpdir) / 'queue.db'
+        queue = work_queue.WorkQueue(db)
+        queue.enqueue(_files(1))
+        queue.claim()
+        queue.close()
+
+        with work_queue.WorkQueue(db) as other:
+            assert other.counts() == {'pending': 1}
+            assert other.claim() is not None
+    print("✓ Closing returns held leases")
+
+
+if __name__ == "__main__":
+    test_workers_claim_distinct_files()
+    test_expired_lease_is_reclaimed()
+    test_release_marks_failed_after_max_attempts()
+    test_expired_last_attempt_marked_failed()
+    test_heartbeat_notices_lost_lease()
+    test_workers_write_separate_part_files()
+    test_downloader_aborts_when_lease_taken_over()
+    test_close_returns_held_leases()
+    print("\n✅ All work queue tests passed!")